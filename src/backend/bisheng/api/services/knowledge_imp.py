@@ -62,6 +62,7 @@ from bisheng.knowledge.rag.pipeline.loader.utils.libreoffice_converter import (
     convert_doc_to_docx,
     convert_ppt_to_pdf, convert_ppt_to_pptx,
 )
+from bisheng.knowledge.rag.pipeline.types import PipelineConfig
 from bisheng.llm.domain.services import LLMService
 from bisheng.sensitive_word.domain.services.exceptions import ContentSafetyViolation
 from bisheng.user.domain.models.user import UserDao
@@ -244,8 +245,16 @@ def addEmbedding(
                 need_thumbnail=knowledge_info.type == KnowledgeTypeEnum.SPACE.value,
                 vector_store=[vector_client, es_client],
             )
-            pipeline_result = knowledge_file_pipeline.run()
+            # Stream chunks into Milvus/ES batch by batch; the chunks are only kept
+            # in the result when auto tagging reads them afterwards.
+            pipeline_result = knowledge_file_pipeline.run(
+                PipelineConfig(streaming=True, keep_documents=enable_auto_tags)
+            )
             db_file.status = KnowledgeFileStatus.SUCCESS.value
+            logger.info(
+                f"process_file_timings file_id={db_file.id} total={pipeline_result.duration_seconds:.3f} "
+                f"stages={pipeline_result.stage_timings}"
+            )
 
             # TODO[plan-3-async]: trigger SimHash similar-scan after successful parse.
             # addEmbedding runs in a sync Celery worker; async scan is deferred to a
@@ -12,6 +12,16 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+# read-only db session: served by a read replica when one is configured, for
+# repositories that only read
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get a read-only database session"""
+    from bisheng.core.database import get_database_connection
+    db_manager = await get_database_connection()
+    async with db_manager.async_session(read_only=True) as session:
+        yield session
+
+
 # sync db session
 def get_sync_db_session() -> Generator[Session, None, None]:
     """Get a synchronous database session"""
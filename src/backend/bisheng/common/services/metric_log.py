@@ -12,7 +12,8 @@ Design constraints (design §5):
   (never silent) the failure and returns (backend CLAUDE.md error-handling).
 - **No SQL text / bind params ever logged** (§2, §5 坑 11): ``sql_op`` returns
   only the leading keyword; the statement body is never retained.
-- **Per-process module singletons** for counters (§5 坑 7): ``db_histogram``.
+- **Per-process module singletons** for counters (§5 坑 7): ``db_histograms``,
+  one ``DbQueryHistogram`` per engine (primary and each read replica).
 - **No dependency on request/tenant ContextVar** — this runs inside Celery /
   Linsight workers too.
 
@@ -159,8 +160,20 @@ class DbQueryHistogram:
             return result
 
 
-# Per-process singleton used by the DB cursor-event wiring (T005).
-db_histogram = DbQueryHistogram()
+# Per-process, per-engine histograms used by the DB cursor-event wiring (T005).
+# Keyed by engine name (``sync``/``async`` for the primary, ``sync_replica_0``...
+# for read replicas) so each engine's latency is aggregated on its own.
+db_histograms: dict[str, DbQueryHistogram] = {}
+_db_histograms_lock = threading.Lock()
+
+
+def get_db_histogram(engine_name: str) -> DbQueryHistogram:
+    """Return the histogram of ``engine_name``, creating it on first use."""
+    histogram = db_histograms.get(engine_name)
+    if histogram is None:
+        with _db_histograms_lock:
+            histogram = db_histograms.setdefault(engine_name, DbQueryHistogram())
+    return histogram
 
 
 # ---------------------------------------------------------------------------
@@ -183,7 +196,17 @@ class _PoolSampler:
             return False
 
 
-_pool_sampler = _PoolSampler()
+# One sampler per engine, so every pool is reported once per window.
+_pool_samplers: dict[str, _PoolSampler] = {}
+_pool_samplers_lock = threading.Lock()
+
+
+def _pool_sampler(engine_name: str) -> _PoolSampler:
+    sampler = _pool_samplers.get(engine_name)
+    if sampler is None:
+        with _pool_samplers_lock:
+            sampler = _pool_samplers.setdefault(engine_name, _PoolSampler())
+    return sampler
 
 
 def _max_overflow() -> int:
@@ -196,21 +219,23 @@ def _max_overflow() -> int:
 
 
 def maybe_emit_pool_gauge(now: float, pools, window_s: float) -> None:
-    """Sample connection-pool saturation and emit ``db_pool`` (once per window).
+    """Sample connection-pool saturation and emit ``db_pool`` (once per window per engine).
 
     ``pools`` is an iterable of ``(engine_name, pool)``. Reads only the stable
     public QueuePool methods ``checkedout()/checkedin()/size()`` (design §5
     坑 10); for the async engine pass ``async_engine.sync_engine.pool`` (坑 9).
     Best-effort — a read failure on one pool never blocks the others or the caller.
     """
-    if not _pool_sampler.due(now, window_s):
-        return
-    overflow = _max_overflow()
+    overflow = None
     for name, pool in pools:
         # StaticPool / SingletonThreadPool (SQLite dev/test) have no saturation
         # semantics and lack checkedout(); skip silently rather than log noise.
         if not hasattr(pool, "checkedout"):
             continue
+        if not _pool_sampler(name).due(now, window_s):
+            continue
+        if overflow is None:
+            overflow = _max_overflow()
         try:
             checked_out = pool.checkedout()
             idle = pool.checkedin()
@@ -258,8 +283,8 @@ def record_db_query(engine_name, pool, statement, elapsed_ms, now, status="ok"):
     - ``status="error"`` → emit a ``db_query`` error line only (a failed query
       must not pollute the latency histogram); returns early.
     - success → emit a ``db_query`` detail line if ``elapsed_ms`` is at/above the
-      configured slow threshold, always feed the histogram, flush ``db_query_agg``
-      once the window elapsed, and sample the pool gauge.
+      configured slow threshold, always feed the engine's histogram, flush its
+      ``db_query_agg`` once the window elapsed, and sample the pool gauge.
 
     ``now`` and the window come from the caller (design §5: no hidden clock). All
     reads are gated by ``MetricLogConf`` so a disabled ``db`` domain is zero-work.
@@ -269,19 +294,20 @@ def record_db_query(engine_name, pool, statement, elapsed_ms, now, status="ok"):
         return
 
     if status == "error":
-        emit_metric("db_query", op=sql_op(statement), elapsed_ms=elapsed_ms, status="error")
+        emit_metric("db_query", engine=engine_name, op=sql_op(statement), elapsed_ms=elapsed_ms, status="error")
         return
 
     slow_ms = getattr(conf, "db_slow_query_ms", 200) if conf is not None else 200
     window_s = getattr(conf, "db_agg_window_s", 10) if conf is not None else 10
 
     if elapsed_ms >= slow_ms:
-        emit_metric("db_query", op=sql_op(statement), elapsed_ms=elapsed_ms, status="ok")
+        emit_metric("db_query", engine=engine_name, op=sql_op(statement), elapsed_ms=elapsed_ms, status="ok")
 
-    db_histogram.record(elapsed_ms, now)
-    agg = db_histogram.maybe_flush(now, window_s)
+    histogram = get_db_histogram(engine_name)
+    histogram.record(elapsed_ms, now)
+    agg = histogram.maybe_flush(now, window_s)
     if agg:
-        emit_metric("db_query_agg", **agg)
+        emit_metric("db_query_agg", engine=engine_name, **agg)
 
     if pool is not None:
         maybe_emit_pool_gauge(now, [(engine_name, pool)], window_s)
@@ -0,0 +1,84 @@
+import logging
+from typing import Any, Callable
+
+from elasticsearch import Elasticsearch
+
+from bisheng.core.config.settings import TelemetryBufferConf
+from bisheng.utils.background_batcher import BackgroundBatcher, BatcherStats
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryBufferStats(BatcherStats):
+    """Cumulative event counters of one buffer"""
+
+    counters = ("queued", "flushed", "dropped", "failed", "retried", "bulk_requests")
+
+
+class TelemetryBuffer(BackgroundBatcher[tuple[str, dict[str, Any]]]):
+    """
+    Collects telemetry documents in memory and ships them with the Elasticsearch bulk API.
+
+    ``add`` only appends to a bounded queue, so request threads never wait on Elasticsearch.
+    A background thread sends a bulk request as soon as ``batch_size`` events are queued
+    and otherwise every ``flush_interval`` seconds. When the queue is full the configured
+    overflow policy drops either the oldest queued event or the new one. Items the bulk
+    response rejects with 429/5xx, and whole batches whose request failed, are retried with
+    exponential backoff; events carry their ``event_id`` as ``_id`` so a retry never indexes
+    a document twice. ``close`` sends whatever is still queued.
+    """
+
+    thread_name = "telemetry-buffer"
+    item_label = "telemetry events"
+    stats_class = TelemetryBufferStats
+
+    def __init__(self, client_factory: Callable[[], Elasticsearch], conf: TelemetryBufferConf | None = None):
+        super().__init__(conf or TelemetryBufferConf())
+        self._client_factory = client_factory
+        self._client: Elasticsearch | None = None
+
+    def add(self, index: str, document: dict[str, Any]) -> bool:
+        """Queue a document; returns False when it was dropped"""
+        return self._enqueue((index, document), drop_newest=self.conf.overflow == "drop_newest")
+
+    def _after_fork(self) -> None:
+        super()._after_fork()
+        self._client = None
+
+    def _send_batch(self, batch: list[tuple[str, dict[str, Any]]]) -> None:
+        failed = self._retry(self._bulk, batch, "telemetry events")
+        self.stats.incr("failed", len(failed))
+
+    def _bulk(self, pending: list[tuple[str, dict[str, Any]]]) -> list[tuple[str, dict[str, Any]]]:
+        """One bulk request; returns the events worth retrying"""
+        if self._client is None:
+            self._client = self._client_factory()
+        self.stats.incr("bulk_requests")
+        response = self._client.bulk(operations=self._operations(pending))
+        if not response.get("errors"):
+            self.stats.incr("flushed", len(pending))
+            return []
+        retry = []
+        for (index, document), item in zip(pending, response["items"]):
+            result = next(iter(item.values()))
+            status = result.get("status", 500)
+            if status < 300:
+                self.stats.incr("flushed")
+            elif status == 429 or status >= 500:
+                # overloaded or unavailable shard; anything else (e.g. a mapping error) would fail again
+                retry.append((index, document))
+            else:
+                self.stats.incr("failed")
+                logger.error(f"Telemetry event rejected by Elasticsearch: {result.get('error')}")
+        return retry
+
+    @staticmethod
+    def _operations(batch: list[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+        operations = []
+        for index, document in batch:
+            action = {"_index": index}
+            if document.get("event_id"):
+                action["_id"] = document["event_id"]
+            operations.append({"index": action})
+            operations.append(document)
+        return operations
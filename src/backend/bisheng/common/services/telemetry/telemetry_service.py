@@ -19,6 +19,7 @@ from bisheng.common.schemas.telemetry.base_telemetry_schema import (
     UserGroupInfo,
     UserRoleInfo,
 )
+from bisheng.common.services.telemetry.telemetry_buffer import TelemetryBuffer
 from bisheng.core.context.tenant import bypass_tenant_filter
 from bisheng.core.database import get_async_db_session, get_sync_db_session
 from bisheng.core.search.elasticsearch.manager import get_statistics_es_connection, get_statistics_es_connection_sync
@@ -106,6 +107,24 @@ class BaseTelemetryService:
         self.thread_pool = ThreadPoolExecutor(max_workers=10)
         # Create a semaphore to limit the number of concurrency
         self._semaphore = Semaphore(10)
+        # Events are shipped in bulk requests instead of one index request each
+        self._buffer: TelemetryBuffer | None = None
+        self._buffer_lock = threading.Lock()
+
+    @property
+    def buffer(self) -> TelemetryBuffer:
+        if self._buffer is None:
+            with self._buffer_lock:
+                if self._buffer is None:
+                    from bisheng.common.services.config_service import settings
+
+                    self._buffer = TelemetryBuffer(get_statistics_es_connection_sync, settings.telemetry_buffer)
+        return self._buffer
+
+    def close(self) -> None:
+        """Send the events still buffered; called on shutdown"""
+        if self._buffer is not None:
+            self._buffer.close()
 
     async def _ensure_index(self):
         """Initialize the Elasticsearch index safely"""
@@ -286,8 +305,8 @@ class BaseTelemetryService:
                     event_data=event_data,
                 )
 
-                # Send (Fire and Forget)
-                await self._es_client.index(index=self.index_name, document=event_info.model_dump())
+                # Queue for the next bulk request (Fire and Forget)
+                self.buffer.add(self.index_name, event_info.model_dump())
 
             except Exception as e:
                 logger.error(f"Error in record_event_task: {e}", exc_info=True)
@@ -327,7 +346,7 @@ class BaseTelemetryService:
             event_info = BaseTelemetryEvent(
                 event_type=event_type, user_context=user_context, trace_id=trace_id, event_data=event_data
             )
-            self._es_client_sync.index(index=self.index_name, document=event_info.model_dump())
+            self.buffer.add(self.index_name, event_info.model_dump())
         except Exception as e:
             logger.error(f"Failed to log telemetry event sync in thread: {e}", exc_info=True)
 
@@ -1,4 +1,6 @@
 """SimHash utilities for content similarity detection."""
+from collections import Counter
+
 from simhash import Simhash
 
 import jieba
@@ -17,6 +19,47 @@ def compute_simhash_64_hex(text: str) -> str:
     return f"{sh.value:016x}"
 
 
+class SimHashAccumulator:
+    """Incremental ``compute_simhash_64_hex`` for text that arrives in pieces.
+
+    SimHash sums the bits of every token hash, so token counts can be folded in piece
+    by piece. jieba never merges tokens across whitespace, and trailing whitespace is
+    carried into the next piece, so feeding ``a``, ``"\n"`` and ``b`` yields the same
+    hash as ``compute_simhash_64_hex("a\nb")``. Pieces should be split on whitespace
+    to keep that guarantee.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Counter = Counter()
+        self._pending = ""
+        self._started = False
+
+    def update(self, text: str) -> None:
+        if not text:
+            return
+        if not self._started:
+            # mirror the leading strip() of compute_simhash_64_hex
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        body = text.rstrip()
+        if not body:
+            self._pending += text
+            return
+        self._counts.update(jieba.lcut(self._pending + body))
+        # trailing whitespace only counts once more text follows it
+        self._pending = text[len(body):]
+
+    def hexdigest(self) -> str:
+        if not self._counts:
+            return "0" * 16
+        # float weights take the library's wide accumulator; integer weights above its
+        # batch cutoff overflow a uint8 array
+        sh = Simhash([(token, float(count)) for token, count in self._counts.items()], f=64)
+        return f"{sh.value:016x}"
+
+
 def hamming_distance(hex_a: str, hex_b: str) -> int:
     """Hamming distance between two 16-char hex simhashes (64 bits)."""
     a = int(hex_a, 16)
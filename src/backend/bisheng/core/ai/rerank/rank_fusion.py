@@ -0,0 +1,111 @@
+"""Rank fusion over several retrieval result lists.
+
+Candidates are keyed on a stable chunk identity instead of their text, so two
+chunks with the same text from different documents stay apart and the same
+chunk returned by several retrievers (vector + keyword, or several knowledge
+bases) is merged. Scores are accumulated with array operations over all lists
+at once.
+"""
+
+from typing import Callable, Hashable, List, Literal, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+FusionMethod = Literal["rrf", "score"]
+
+
+def chunk_key(doc: Document) -> Hashable:
+    """Stable identity of a retrieved chunk.
+
+    ``(knowledge_id, document_id, chunk_index)`` from the RAG metadata (``file_id`` for
+    QA knowledge), then the document's own ``id``; the text itself only when neither is
+    available.
+    """
+    metadata = doc.metadata
+    document_id = metadata.get("document_id")
+    if document_id is None:
+        document_id = metadata.get("file_id")
+    chunk_index = metadata.get("chunk_index")
+    if document_id is not None and chunk_index is not None:
+        return metadata.get("knowledge_id"), document_id, chunk_index
+    if doc.id is not None:
+        return "id", doc.id
+    return doc.page_content
+
+
+def _normalized_scores(doc_list: Sequence[Document], score_key: str) -> np.ndarray:
+    """Min-max normalize one list's scores into [0, 1].
+
+    Lists whose documents do not all carry a numeric ``metadata[score_key]`` are scored
+    linearly by rank instead (first 1.0, decreasing towards 0).
+    """
+    n = len(doc_list)
+    raw = [doc.metadata.get(score_key) for doc in doc_list]
+    if all(isinstance(score, (int, float)) and not isinstance(score, bool) for score in raw):
+        scores = np.asarray(raw, dtype=np.float64)
+        low, high = scores.min(), scores.max()
+        if high > low:
+            return (scores - low) / (high - low)
+        return np.ones(n)
+    return 1.0 - np.arange(n, dtype=np.float64) / n
+
+
+def fuse(
+        doc_lists: Sequence[Sequence[Document]],
+        weights: Sequence[float],
+        *,
+        c: int = 60,
+        method: FusionMethod = "rrf",
+        score_key: str = "relevance_score",
+        key: Callable[[Document], Hashable] = chunk_key,
+) -> List[Tuple[Document, float]]:
+    """Fuse ranked lists into one list of ``(document, score)``, best first.
+
+    Args:
+        doc_lists: One ranked document list per retriever.
+        weights: Weight of each list.
+        c: RRF constant; a document at 1-based rank ``r`` contributes ``weight / (r + c)``.
+        method: ``"rrf"`` for weighted reciprocal rank fusion, ``"score"`` for the weighted
+            sum of min-max normalized scores (see ``_normalized_scores``).
+        score_key: Metadata key holding a document's retrieval score, for ``"score"``.
+        key: Identity of a candidate; documents with the same key are merged and the
+            first one seen is returned.
+
+    Returns:
+        Every distinct candidate with its fused score, sorted by score in descending
+        order. Ties keep the order in which the candidates first appear.
+    """
+    if len(doc_lists) != len(weights):
+        raise ValueError("Number of rank lists must be equal to the number of weights.")
+    if method not in ("rrf", "score"):
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    slot_of: dict = {}
+    candidates: List[Document] = []
+    slots: List[int] = []  # candidate slot of every (list, rank) position, all lists flattened
+    contributions: List[np.ndarray] = []
+    for doc_list, weight in zip(doc_lists, weights):
+        if not doc_list:
+            continue
+        for doc in doc_list:
+            doc_key = key(doc)
+            slot = slot_of.get(doc_key)
+            if slot is None:
+                slot = slot_of[doc_key] = len(candidates)
+                candidates.append(doc)
+            slots.append(slot)
+        if method == "rrf":
+            contribution = weight / (np.arange(1, len(doc_list) + 1, dtype=np.float64) + c)
+        else:
+            contribution = weight * _normalized_scores(doc_list, score_key)
+        contributions.append(contribution)
+
+    if not candidates:
+        return []
+    scores = np.zeros(len(candidates), dtype=np.float64)
+    # add.at, not fancy-index +=, so a chunk listed twice in one list counts twice
+    np.add.at(scores, np.asarray(slots, dtype=np.intp), np.concatenate(contributions))
+    order = np.argsort(-scores, kind="stable")
+    return list(zip([candidates[i] for i in order.tolist()], scores[order].tolist()))
+
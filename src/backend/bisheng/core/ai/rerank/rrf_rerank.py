@@ -5,6 +5,7 @@ from langchain_core.documents import Document
 from pydantic import model_validator
 
 from bisheng.core.ai.base import BaseRerank
+from bisheng.core.ai.rerank.rank_fusion import FusionMethod, fuse
 
 
 class RRFRerank(BaseRerank):
@@ -22,11 +23,18 @@ class RRFRerank(BaseRerank):
         c: A constant added to the rank, controlling the balance between the importance
             of high-ranked items and the consideration given to lower-ranked items.
             Default is 60.
+        fusion: "rrf" (default) for reciprocal rank fusion, "score" to fuse the min-max
+            normalized ``metadata[score_key]`` of each list instead.
+
+    Documents are deduplicated on their chunk identity (see ``rank_fusion.chunk_key``),
+    not their text.
     """
     retrievers: List[Any]
     weights: List[float] = None
     c: int = 60
     remove_zero_score: bool = False
+    fusion: FusionMethod = "rrf"
+    score_key: str = "relevance_score"
 
     @model_validator(mode='before')
     @classmethod
@@ -52,32 +60,5 @@ class RRFRerank(BaseRerank):
             list: The final aggregated list of items sorted by their weighted RRF
                     scores in descending order. and remove duplicates document.
                 """
-        if len(documents) != len(self.weights):
-            raise ValueError("Number of rank lists must be equal to the number of weights.")
-
-        # Create a union of all unique documents in the input doc_lists
-        all_documents = set()
-        for doc_list in documents:
-            for doc in doc_list:
-                all_documents.add(doc.page_content)
-
-        # Initialize the RRF score dictionary for each document
-        rrf_score_dic = {doc: 0.0 for doc in all_documents}
-
-        # Calculate RRF scores for each document
-        for doc_list, weight in zip(documents, self.weights):
-            for rank, doc in enumerate(doc_list, start=1):
-                rrf_score = weight * (1 / (rank + self.c))
-                rrf_score_dic[doc.page_content] += rrf_score
-
-        # Sort documents by their RRF scores in descending order
-        sorted_documents = sorted(rrf_score_dic.keys(), key=lambda x: rrf_score_dic[x], reverse=True)
-
-        # Map the sorted page_content back to the original document objects
-        page_content_to_doc_map = {doc.page_content: doc for doc_list in documents for doc in doc_list}
-        if self.remove_zero_score:
-            sorted_docs = [page_content_to_doc_map[page_content] for page_content in sorted_documents if
-                           rrf_score_dic[page_content] > 0]
-        else:
-            sorted_docs = [page_content_to_doc_map[page_content] for page_content in sorted_documents]
-        return sorted_docs
+        fused = fuse(documents, self.weights, c=self.c, method=self.fusion, score_key=self.score_key)
+        return [doc for doc, score in fused if not self.remove_zero_score or score > 0]
@@ -0,0 +1,198 @@
+"""Value encoding for RedisClient.
+
+Values are encoded by the rule of the key's namespace (``settings.redis_codec``):
+pickle for arbitrary Python objects, orjson or msgpack for JSON-like payloads
+that are faster to encode, smaller, and readable outside Python, each with
+optional zstd compression above a size threshold.
+
+Stored layout:
+
+  - plain pickle is stored as-is, exactly what RedisClient always wrote, so
+    keys written before the codec existed (or by a process still on the old
+    release) decode unchanged;
+  - everything else starts with a two byte header: ``0xBC`` (never the first
+    byte of a pickle) and a format byte holding the codec tag, with the high
+    bit set when the payload is zstd-compressed.
+
+Decoding looks only at the stored bytes, so a namespace can switch codecs
+while keys written with the previous one are still live.
+
+orjson and msgpack only take values that decode back to the same types:
+dicts with str keys, lists, str, int, float, bool and None, plus bytes for
+msgpack. Anything else (tuples, sets, int keys, datetimes, dataclasses, ...)
+is stored with pickle rather than coming back as a list, a str key or a string.
+"""
+
+import math
+import pickle
+import threading
+from typing import Any, Optional
+
+import orjson
+from loguru import logger
+
+from bisheng.core.config.settings import RedisCodecConf, RedisCodecRule
+
+_MAGIC = 0xBC
+_COMPRESSED = 0x80
+
+
+_JSON_SCALARS = frozenset((str, int, bool, type(None)))
+
+
+def _require_json_like(value: Any, finite_floats: bool = False, binary: bool = False) -> None:
+    """Raise TypeError unless ``value`` is built only from types that decode back unchanged"""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        kind = type(item)
+        if kind in _JSON_SCALARS or (binary and kind is bytes):
+            continue
+        if kind is float:
+            if finite_floats and not math.isfinite(item):
+                raise TypeError(f'{item} is not representable')
+        elif kind is list:
+            stack.extend(item)
+        elif kind is dict:
+            for key in item:
+                if type(key) is not str:
+                    raise TypeError(f'{type(key).__name__} dict keys would come back as str')
+            stack.extend(item.values())
+        else:
+            raise TypeError(f'{kind.__name__} would not come back as {kind.__name__}')
+
+
+class PickleCodec:
+    name = 'pickle'
+    tag = 0x01
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class OrjsonCodec:
+    name = 'orjson'
+    tag = 0x02
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        # JSON has no NaN/Infinity: orjson would write them as null
+        _require_json_like(value, finite_floats=True)
+        return orjson.dumps(value, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    name = 'msgpack'
+    tag = 0x03
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise ImportError('The msgpack redis codec requires the msgpack package: pip install msgpack') from e
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        _require_json_like(value, binary=True)
+        try:
+            return self._msgpack.packb(value, use_bin_type=True)
+        except OverflowError as e:
+            # an int beyond 64 bits; pickle stores it
+            raise TypeError(str(e)) from e
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+_CODEC_TYPES = {codec.name: codec for codec in (PickleCodec, OrjsonCodec, MsgpackCodec)}
+_TAGS = {codec.tag: codec for codec in _CODEC_TYPES.values()}
+
+
+class RedisCodec:
+    """Encodes values by the rule of their key's namespace and decodes any stored layout"""
+
+    def __init__(self, conf: Optional[RedisCodecConf] = None):
+        self.conf = conf or RedisCodecConf()
+        self._codecs = {}
+        # longest prefix first, so the most specific namespace wins
+        self._rules = sorted(self.conf.namespaces.items(), key=lambda item: len(item[0]), reverse=True)
+        for rule in [self.conf.default, *self.conf.namespaces.values()]:
+            self._codec(rule.codec)
+        self._zstd_local = threading.local()
+        if any(rule.compress_threshold > 0 for rule in [self.conf.default, *self.conf.namespaces.values()]):
+            self._zstd_module()
+
+    def rule(self, key: Any) -> RedisCodecRule:
+        if self._rules:
+            if isinstance(key, bytes):
+                key = key.decode('utf-8', 'replace')
+            for prefix, rule in self._rules:
+                if key.startswith(prefix):
+                    return rule
+        return self.conf.default
+
+    def encode(self, key: Any, value: Any) -> bytes:
+        rule = self.rule(key)
+        codec = self._codec(rule.codec)
+        try:
+            payload = codec.dumps(value)
+        except TypeError as e:
+            # a value the namespace's codec cannot represent still round-trips through pickle
+            logger.debug(f'redis codec {codec.name} cannot encode {type(value).__name__} for {key}: {e}')
+            codec = self._codec(PickleCodec.name)
+            payload = codec.dumps(value)
+        compressed = 0 < rule.compress_threshold <= len(payload)
+        if codec.tag == PickleCodec.tag and not compressed:
+            return payload
+        if compressed:
+            payload = self._compressor().compress(payload)
+        return bytes((_MAGIC, codec.tag | (_COMPRESSED if compressed else 0))) + payload
+
+    def decode(self, data: bytes) -> Any:
+        if data[0] != _MAGIC:
+            return pickle.loads(data)
+        fmt = data[1]
+        payload = memoryview(data)[2:]
+        if fmt & _COMPRESSED:
+            payload = self._decompressor().decompress(payload)
+        codec_type = _TAGS.get(fmt & ~_COMPRESSED)
+        if codec_type is None:
+            raise ValueError(f'Unknown redis value format {fmt:#x}')
+        return self._codec(codec_type.name).loads(bytes(payload))
+
+    def _codec(self, name: str):
+        codec = self._codecs.get(name)
+        if codec is None:
+            codec = self._codecs[name] = _CODEC_TYPES[name]()
+        return codec
+
+    @staticmethod
+    def _zstd_module():
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError('Compressed redis values require the zstandard package: pip install zstandard') from e
+        return zstandard
+
+    # zstandard compressor objects must not be shared between threads
+    def _compressor(self):
+        compressor = getattr(self._zstd_local, 'compressor', None)
+        if compressor is None:
+            compressor = self._zstd_local.compressor = self._zstd_module().ZstdCompressor(
+                level=self.conf.compress_level)
+        return compressor
+
+    def _decompressor(self):
+        decompressor = getattr(self._zstd_local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._zstd_local.decompressor = self._zstd_module().ZstdDecompressor()
+        return decompressor
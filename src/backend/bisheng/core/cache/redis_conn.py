@@ -1,10 +1,9 @@
-import pickle
 import typing
 from typing import Dict, Optional
 
 import redis
 from loguru import logger
-from redis import ConnectionPool, RedisCluster
+from redis import BlockingConnectionPool, ConnectionPool, RedisCluster
 from redis.asyncio import Redis as AsyncRedis
 from redis.asyncio.client import Pipeline
 from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
@@ -14,10 +13,23 @@ from redis.cluster import ClusterNode
 from redis.retry import Retry
 from redis.sentinel import Sentinel
 
+from bisheng.core.cache.redis_codec import RedisCodec
 
-class RedisClient:
 
-    def __init__(self, redis_url, max_connections=100):
+class RedisClient:
+    """
+    Commands that block server-side (BLPOP) go through ``blocking_connection`` /
+    ``async_blocking_connection``: each waiter holds a connection for the whole wait, so
+    they get pools of their own and cannot exhaust the one every other command uses.
+    """
+
+    def __init__(self, redis_url, max_connections=100, codec: Optional[RedisCodec] = None,
+                 blocking_max_connections=1000):
+        self.codec = codec or RedisCodec()
+        # cluster mode pins the default node once; keyed commands are routed by redis-py's cached slot map
+        self._cluster = False
+        self._default_node_set = False
+        self._async_default_node_set = False
         # # Sentry Mode
         if isinstance(redis_url, Dict):
             redis_conf = dict(redis_url)
@@ -37,6 +49,10 @@ class RedisClient:
                                                         cluster_error_retry_attempts=1)
                 self.async_connection: typing.Union[AsyncRedisCluster, AsyncRedis] = AsyncRedisCluster.from_url(
                     cluster_url, **redis_conf, retry=Retry(ExponentialBackoff(), 6), cluster_error_retry_attempts=1)
+                self._cluster = True
+                # cluster clients keep a pool per node and open connections on demand
+                self.blocking_connection = self.connection
+                self.async_blocking_connection = self.async_connection
                 return
             hosts = [eval(x) for x in redis_conf.pop('sentinel_hosts')]
             password = redis_conf.pop('sentinel_password', None)
@@ -46,6 +62,8 @@ class RedisClient:
             # Get the connection of the master node
             self.connection = sentinel.master_for(master, **redis_conf)
             self.async_connection: AsyncRedis = async_sentinel.master_for(master, **redis_conf)
+            self.blocking_connection = sentinel.master_for(master, **redis_conf)
+            self.async_blocking_connection: AsyncRedis = async_sentinel.master_for(master, **redis_conf)
 
         else:
             # Singleplayer Mode
@@ -53,42 +71,48 @@ class RedisClient:
             self.async_pool = redis.asyncio.ConnectionPool.from_url(redis_url, max_connections=max_connections)
             self.connection = redis.StrictRedis(connection_pool=self.pool)
             self.async_connection: AsyncRedis = redis.asyncio.Redis.from_pool(self.async_pool)
+            # a waiter beyond the limit waits for a free connection instead of failing
+            self.blocking_pool = BlockingConnectionPool.from_url(redis_url, max_connections=blocking_max_connections)
+            self.async_blocking_pool = redis.asyncio.BlockingConnectionPool.from_url(
+                redis_url, max_connections=blocking_max_connections)
+            self.blocking_connection = redis.StrictRedis(connection_pool=self.blocking_pool)
+            self.async_blocking_connection: AsyncRedis = redis.asyncio.Redis.from_pool(self.async_blocking_pool)
 
     def set(self, key, value, expiration=3600, enx=None):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 self.cluster_nodes(key)
                 if expiration:
-                    result = self.connection.setex(key, expiration, pickled)
+                    result = self.connection.setex(key, expiration, encoded)
                 else:
-                    result = self.connection.set(key, pickled)
+                    result = self.connection.set(key, encoded)
                 if not result:
                     raise ValueError('RedisCache could not set the value.')
             else:
-                logger.error(f'pickle error, value={value}')
+                logger.error(f'encode error, value={value}')
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
     async def aset(self, key, value, expiration=3600):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 await self.acluster_nodes(key)
                 if expiration:
-                    result = await self.async_connection.setex(name=key, value=pickled, time=expiration)
+                    result = await self.async_connection.setex(name=key, value=encoded, time=expiration)
                 else:
-                    result = await self.async_connection.set(key, pickled)
+                    result = await self.async_connection.set(key, encoded)
                 if not result:
                     raise ValueError('RedisCache could not set the value.')
             else:
-                logger.error(f'pickle error, value={value}')
+                logger.error(f'encode error, value={value}')
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
     def setNx(self, key, value, expiration=3600):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 self.cluster_nodes(key)
-                result = self.connection.setnx(key, pickled)
+                result = self.connection.setnx(key, encoded)
                 self.connection.expire(key, expiration)
                 if not result:
                     return False
@@ -98,9 +122,9 @@ class RedisClient:
 
     async def asetNx(self, key, value, expiration=3600):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 await self.acluster_nodes(key)
-                result = await self.async_connection.setnx(key, pickled)
+                result = await self.async_connection.setnx(key, encoded)
                 await self.async_connection.expire(key, expiration)
                 if not result:
                     return False
@@ -110,25 +134,25 @@ class RedisClient:
 
     def setex(self, key, value, expiration=3600):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 self.cluster_nodes(key)
-                result = self.connection.setex(key, expiration, pickled)
+                result = self.connection.setex(key, expiration, encoded)
                 if not result:
                     raise ValueError('RedisCache could not set the value.')
             else:
-                logger.error(f'pickle error, value={value}')
+                logger.error(f'encode error, value={value}')
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
     async def asetex(self, key, value, expiration=3600):
         try:
-            if pickled := pickle.dumps(value):
+            if encoded := self.codec.encode(key, value):
                 await self.acluster_nodes(key)
-                result = await self.async_connection.setex(key, expiration, pickled)
+                result = await self.async_connection.setex(key, expiration, encoded)
                 if not result:
                     raise ValueError('RedisCache could not set the value.')
             else:
-                logger.error(f'pickle error, value={value}')
+                logger.error(f'encode error, value={value}')
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
@@ -138,7 +162,7 @@ class RedisClient:
             if not mapping:
                 return True
 
-            serialized_mapping = {k: pickle.dumps(v) for k, v in mapping.items() if v is not None}
+            serialized_mapping = {k: self.codec.encode(k, v) for k, v in mapping.items() if v is not None}
             result = self.connection.mset(serialized_mapping)
 
             if expiration:
@@ -158,7 +182,7 @@ class RedisClient:
             if not mapping:
                 return True
 
-            serialized_mapping = {k: pickle.dumps(v) for k, v in mapping.items() if v is not None}
+            serialized_mapping = {k: self.codec.encode(k, v) for k, v in mapping.items() if v is not None}
             result = await self.async_connection.mset(serialized_mapping)
 
             if expiration:
@@ -179,7 +203,7 @@ class RedisClient:
                 return []
             values = self.connection.mget(keys)
 
-            return [pickle.loads(v) for v in values if v is not None]
+            return [self.codec.decode(v) for v in values if v is not None]
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
@@ -189,7 +213,7 @@ class RedisClient:
             if not keys:
                 return []
             values = await self.async_connection.mget(keys)
-            return [pickle.loads(v) for v in values if v is not None]
+            return [self.codec.decode(v) for v in values if v is not None]
         except TypeError as exc:
             raise TypeError('RedisCache only accepts values that can be pickled. ') from exc
 
@@ -298,7 +322,7 @@ class RedisClient:
         try:
             self.cluster_nodes(key)
             value = self.connection.get(key)
-            return pickle.loads(value) if value else None
+            return self.codec.decode(value) if value else None
         except Exception as e:
             raise e
 
@@ -306,7 +330,7 @@ class RedisClient:
         try:
             await self.acluster_nodes(key)
             value = await self.async_connection.get(key)
-            return pickle.loads(value) if value else None
+            return self.codec.decode(value) if value else None
         except Exception as e:
             # Handle the case where the value is None or not picklable
             raise e
@@ -385,11 +409,34 @@ class RedisClient:
         except Exception as e:
             raise e
 
-    async def ablpop(self, key, timeout=0):
+    def lpush(self, key, value, expiration=3600):
+        try:
+            self.cluster_nodes(key)
+            ret = self.connection.lpush(key, value)
+            if expiration:
+                self.expire_key(key, expiration)
+            return ret
+        except Exception as e:
+            raise e
+
+    def blpop(self, key, timeout=0, raw: bool = False):
+        """Blocking left pop; ``raw=True`` returns the stored bytes without unpickling."""
+        try:
+            self.cluster_nodes(key)
+            value = self.blocking_connection.blpop(key, timeout)
+            if not value or not value[1]:
+                return None
+            return value[1] if raw else self.codec.decode(value[1])
+        except Exception as e:
+            raise e
+
+    async def ablpop(self, key, timeout=0, raw: bool = False):
         try:
             await self.acluster_nodes(key)
-            value = await self.async_connection.blpop(key, timeout)
-            return pickle.loads(value[1]) if value and value[1] else None
+            value = await self.async_blocking_connection.blpop(key, timeout)
+            if not value or not value[1]:
+                return None
+            return value[1] if raw else self.codec.decode(value[1])
         except Exception as e:
             raise e
 
@@ -397,14 +444,14 @@ class RedisClient:
         try:
             await self.acluster_nodes(key)
             values = await self.async_connection.lrange(key, start, end)
-            return [pickle.loads(v) for v in values if v is not None]
+            return [self.codec.decode(v) for v in values if v is not None]
         except Exception as e:
             raise e
 
     async def alrem(self, key, value):
         try:
             await self.acluster_nodes(key)
-            value = pickle.dumps(value) if not isinstance(value, bytes) else value
+            value = self.codec.encode(key, value) if not isinstance(value, bytes) else value
             return await self.async_connection.lrem(key, 0, value)
         except Exception as e:
             raise e
@@ -422,7 +469,7 @@ class RedisClient:
     async def arpush(self, key, value, expiration=3600):
         try:
             await self.acluster_nodes(key)
-            value = pickle.dumps(value) if not isinstance(value, bytes) else value
+            value = self.codec.encode(key, value) if not isinstance(value, bytes) else value
             ret = await self.async_connection.rpush(key, value)
             if expiration:
                 await self.aexpire_key(key, expiration)
@@ -474,11 +521,15 @@ class RedisClient:
 
     def close(self):
         self.connection.close()
+        if self.blocking_connection is not self.connection:
+            self.blocking_connection.close()
 
     async def aclose(self):
         """Asynchronous close method for the Redis connection."""
         if hasattr(self, 'async_connection') and self.async_connection:
             await self.async_connection.close()
+            if self.async_blocking_connection is not self.async_connection:
+                await self.async_blocking_connection.close()
         else:
             logger.warning("No async connection to close.")
 
@@ -518,13 +569,24 @@ class RedisClient:
         self.connection.delete(key)
 
     def cluster_nodes(self, key):
-        if isinstance(self.connection,
-                      RedisCluster) and self.connection.get_default_node() is None:
-            target = self.connection.get_node_from_key(key)
-            self.connection.set_default_node(target)
+        if not self._cluster or self._default_node_set:
+            return
+        if self.connection.get_default_node() is None:
+            self.connection.set_default_node(self.connection.get_node_from_key(key))
+        self._default_node_set = self.connection.get_default_node() is not None
 
     async def acluster_nodes(self, key):
-        if isinstance(self.async_connection,
-                      AsyncRedisCluster) and self.async_connection.get_default_node() is None:
-            target = self.async_connection.get_node_from_key(key)
-            self.async_connection.set_default_node(target)
+        if not self._cluster or self._async_default_node_set:
+            return
+        if self.async_connection.get_default_node() is None:
+            self.async_connection.set_default_node(self.async_connection.get_node_from_key(key))
+        # before the async client's first command the slot map may not be loaded yet
+        self._async_default_node_set = self.async_connection.get_default_node() is not None
+
+    def encode(self, key, value) -> bytes:
+        """Serialize a value the way this client stores it under ``key``, for raw pipeline writes"""
+        return self.codec.encode(key, value)
+
+    def decode(self, value: bytes):
+        """Deserialize a stored value of any codec, including plain pickle"""
+        return self.codec.decode(value)
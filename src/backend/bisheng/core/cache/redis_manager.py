@@ -1,7 +1,9 @@
 import logging
 from typing import Optional, Union, Dict
 
+from bisheng.core.config.settings import RedisCodecConf
 from bisheng.core.context import BaseContextManager
+from bisheng.core.cache.redis_codec import RedisCodec
 from bisheng.core.cache.redis_conn import RedisClient
 
 logger = logging.getLogger(__name__)
@@ -19,20 +21,22 @@ class RedisManager(BaseContextManager[RedisClient]):
     def __init__(
             self,
             redis_url: Optional[Union[str, Dict]] = None,
+            codec_conf: Optional[RedisCodecConf] = None,
             **kwargs
     ):
         super().__init__(self.name, **kwargs)
         self.redis_url = redis_url
+        self.codec_conf = codec_conf
         if not self.redis_url:
             raise ValueError("Redis URL is required. Please provide via parameter.")
 
     async def _async_initialize(self) -> RedisClient:
         """Inisialisasi Redis Connection Manager"""
-        return RedisClient(self.redis_url)
+        return RedisClient(self.redis_url, codec=RedisCodec(self.codec_conf))
 
     def _sync_initialize(self) -> RedisClient:
         """Synchronization Initialization"""
-        return RedisClient(self.redis_url)
+        return RedisClient(self.redis_url, codec=RedisCodec(self.codec_conf))
 
     def _sync_cleanup(self) -> None:
         """Synchronous Cleanup Redis reasourse"""
@@ -55,7 +59,8 @@ async def get_redis_client() -> RedisClient:
         try:
             from bisheng.common.services.config_service import settings
             app_context.register_context(RedisManager(
-                redis_url=settings.redis_url
+                redis_url=settings.redis_url,
+                codec_conf=settings.redis_codec,
             ))
             return await app_context.async_get_instance(RedisManager.name)
         except Exception as e:
@@ -73,7 +78,8 @@ def get_redis_client_sync() -> RedisClient:
         try:
             from bisheng.common.services.config_service import settings
             app_context.register_context(RedisManager(
-                redis_url=settings.redis_url
+                redis_url=settings.redis_url,
+                codec_conf=settings.redis_codec,
             ))
             return app_context.sync_get_instance(RedisManager.name)
         except Exception as e:
@@ -1,12 +1,33 @@
 """LLM configuration model."""
 
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel, Field
 
 
+class EmbeddingCacheConf(BaseModel):
+    """Cache of embedding vectors keyed by model and text hash.
+
+    Off by default. When enabled, ``BishengEmbedding`` looks every text up in the
+    cache first and only sends the misses to the model, so re-parsed files, copied
+    knowledge bases and repeated questions are not embedded again.
+    """
+
+    enabled: bool = Field(default=False, description='Whether embedding vectors are cached')
+    backend: Literal['redis', 'file'] = Field(
+        default='redis',
+        description='redis: shared by every worker; file: a local sqlite file per host',
+    )
+    max_entries: int = Field(
+        default=100_000,
+        description='Upper bound on cached vectors; the least recently used ones are evicted beyond it',
+    )
+    ttl: int = Field(default=30 * 24 * 3600, description='Seconds a vector stays cached after its last use')
+    file_path: str = Field(default='', description='sqlite file of the file backend, defaults to the cache dir')
+
+
 class LLMConf(BaseModel):
-    """LLM server registration policy.
+    """LLM server registration policy and the embedding cache.
 
     ``endpoint_whitelist`` is an optional compliance lever: when non-empty,
     non-super callers registering a new LLM server must declare a
@@ -22,3 +43,8 @@ class LLMConf(BaseModel):
             'Example: ["https://api.openai.com", "https://*.azure.com"]'
         ),
     )
+
+    embedding_cache: EmbeddingCacheConf = Field(
+        default_factory=EmbeddingCacheConf,
+        description='Embedding vector cache',
+    )
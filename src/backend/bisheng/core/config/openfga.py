@@ -1,10 +1,25 @@
 """OpenFGA configuration model."""
 
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import BaseModel, Field
 
 
+class PermissionCacheConf(BaseModel):
+    """Two-tier permission check cache: process-local L1 in front of Redis L2."""
+
+    ttl: int = Field(default=10, description='Default lifetime of a cached result in seconds, for both tiers')
+    relation_ttls: Dict[str, int] = Field(
+        default_factory=dict,
+        description='Per-relation lifetime overrides in seconds, e.g. {"can_read": 30}',
+    )
+    local_enabled: bool = Field(default=True, description='Keep a process-local L1 copy of cached results')
+    local_maxsize: int = Field(default=10000, description='Max entries in the process-local L1 cache')
+
+    def ttl_for(self, relation: str) -> int:
+        return self.relation_ttls.get(relation, self.ttl)
+
+
 class OpenFGAConf(BaseModel):
     """OpenFGA connection and behavior configuration."""
 
@@ -35,3 +50,7 @@ class OpenFGAConf(BaseModel):
         description='Previous authorization model id, used during gray period; '
                     'effective only when dual_model_mode=true',
     )
+    permission_cache: PermissionCacheConf = Field(
+        default_factory=PermissionCacheConf,
+        description='Permission check cache tiers and lifetimes',
+    )
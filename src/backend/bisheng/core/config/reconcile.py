@@ -21,6 +21,16 @@ class ReconcileConf(BaseModel):
         ),
     )
 
+    bulk_min_ops: int = Field(
+        default=200,
+        description=(
+            "Department reconcile switches to bulk mode (chunked prefetch by "
+            "external_id, batched INSERT/UPDATE statements, multi-row event "
+            "inserts) once the diff holds at least this many upsert / archive "
+            "/ move operations. Smaller diffs keep the per-department path."
+        ),
+    )
+
     relink_conflict_ttl_seconds: int = Field(
         default=604800,  # 7 days
         description=(
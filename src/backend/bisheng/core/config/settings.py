@@ -3,7 +3,7 @@ import json
 import os
 import re
 import ssl
-from typing import Union
+from typing import Literal, Union
 
 from celery.schedules import crontab
 from cryptography.fernet import Fernet
@@ -112,6 +112,52 @@ class ElasticsearchConf(BaseModel):
         return self
 
 
+class TelemetryBufferConf(BaseModel):
+    """Buffered bulk shipping of telemetry events to Elasticsearch"""
+
+    batch_size: int = Field(default=500, description="Events per bulk request; a full batch is sent at once")
+    flush_interval: float = Field(default=2.0, description="Seconds a partial batch waits before it is sent")
+    max_queue_size: int = Field(default=10000, description="Events held in memory while Elasticsearch is slow")
+    overflow: Literal["drop_oldest", "drop_newest"] = Field(
+        default="drop_oldest", description="Which events are dropped when the queue is full"
+    )
+    max_retries: int = Field(default=3, description="Retries of events rejected with 429/5xx or a failed request")
+    retry_backoff: float = Field(default=0.5, description="Seconds before the first retry, doubled on each retry")
+
+
+class LLMUsageWriterConf(BaseModel):
+    """Write-behind batching of token usage rows and model status changes"""
+
+    batch_size: int = Field(default=500, description="Token usage rows per multi-row INSERT")
+    flush_interval: float = Field(default=1.0, description="Seconds a partial batch waits before it is written")
+    max_queue_size: int = Field(default=20000, description="Rows held in memory while the database is slow")
+    max_retries: int = Field(default=3, description="Retries of a batch whose write failed")
+    retry_backoff: float = Field(default=0.5, description="Seconds before the first retry, doubled on each retry")
+    status_ttl: float = Field(default=60, description="Seconds a model status known to this process is trusted")
+
+
+class RedisCodecRule(BaseModel):
+    """How the values of one key namespace are stored in Redis"""
+
+    codec: Literal["pickle", "orjson", "msgpack"] = Field(
+        default="pickle", description="pickle keeps any Python object; orjson/msgpack take JSON-like values only and store "
+        "anything else with pickle"
+    )
+    compress_threshold: int = Field(
+        default=0, description="Encoded values of at least this many bytes are zstd-compressed; 0 disables it"
+    )
+
+
+class RedisCodecConf(BaseModel):
+    """Value encoding of RedisClient, chosen by key prefix"""
+
+    default: RedisCodecRule = Field(default_factory=RedisCodecRule, description="Rule for keys matching no namespace")
+    namespaces: dict[str, RedisCodecRule] = Field(
+        default_factory=dict, description="Key prefix -> rule; the longest matching prefix wins"
+    )
+    compress_level: int = Field(default=3, description="zstd compression level")
+
+
 class VectorStores(BaseModel):
     """Vector Storage Configuration"""
 
@@ -153,6 +199,11 @@ class WorkflowConf(BaseModel):
 
     max_steps: int = Field(default=50, description="Maximum number of steps a node can run")
     timeout: int = Field(default=720, description="Node timeout (min)")
+    durable_state: bool = Field(
+        default=False,
+        description="Checkpoint workflows paused for user input to Redis so any worker can resume them, "
+        "instead of keeping the live object in the memory of the worker that ran it",
+    )
 
 
 class CeleryConf(BaseModel):
@@ -662,6 +713,50 @@ class DatabasePoolConf(BaseModel):
         return engine_kwargs
 
 
+class DatabaseReplicaConf(BaseModel):
+    """Optional read replicas for the database engine.
+
+    Read-only sessions (``read_only=True``, ``read_replica()`` or a
+    ``replica_read`` DAO method) are served by a healthy replica; writes and the
+    reads a context issues right after its own writes stay on the primary. Each
+    replica gets engines of its own, sized by ``database_pool``. Passwords in the
+    URLs are encrypted like ``database_url``'s. No URLs keeps every session on
+    the primary.
+    """
+
+    urls: list[str] = Field(default_factory=list, description="Read replica URLs, same driver as database_url")
+    read_your_writes_s: float = Field(
+        default=5.0,
+        description="Seconds after a write during which the writing context keeps reading from the primary",
+    )
+    retry_interval_s: float = Field(
+        default=30.0,
+        description="Seconds a replica that failed to connect is skipped before being tried again",
+    )
+
+    @field_validator("urls")
+    @classmethod
+    def decrypt_urls(cls, value: list[str]) -> list[str]:
+        import re
+
+        pattern = r"(?<=:)[^:]+(?=@)"  # Match colon after to@Any character before the symbol
+        urls = []
+        for url in value:
+            match = re.search(pattern, url)
+            if match:
+                url = re.sub(pattern, decrypt_token(match.group(0)), url)
+            urls.append(url)
+        return urls
+
+    def as_connection_kwargs(self) -> dict:
+        """Return the replica kwargs consumed by ``DatabaseConnectionManager``."""
+        return {
+            "replica_urls": list(self.urls),
+            "read_your_writes_s": self.read_your_writes_s,
+            "replica_retry_s": self.retry_interval_s,
+        }
+
+
 class MetricLogConf(BaseModel):
     """Structured metric-log emission switches + thresholds (F042).
 
@@ -719,6 +814,7 @@ class Settings(BaseModel):
     redis_url: Union[str, dict] | None = None
     celery_redis_url: Union[str, dict] | None = None
     redis: dict | None = None
+    redis_codec: RedisCodecConf = RedisCodecConf()
     admin: dict = {}
     cache: str = "InMemoryCache"
     remove_api_keys: bool = False
@@ -740,6 +836,8 @@ class Settings(BaseModel):
     knowledge_qa_filter: KnowledgeQAFilterConf = KnowledgeQAFilterConf()
     cookie_conf: CookieConf = CookieConf()
     telemetry_elasticsearch: ElasticsearchConf = ElasticsearchConf()
+    telemetry_buffer: TelemetryBufferConf = TelemetryBufferConf()
+    llm_usage_writer: LLMUsageWriterConf = LLMUsageWriterConf()
 
     license_str: str | None = None  # license Contents
 
@@ -753,6 +851,7 @@ class Settings(BaseModel):
     llm: LLMConf = LLMConf()
     in_app_message_forwarding: InAppMessageForwardingConf = InAppMessageForwardingConf()
     database_pool: DatabasePoolConf = DatabasePoolConf()
+    database_replicas: DatabaseReplicaConf = DatabaseReplicaConf()
     metric_log: MetricLogConf = MetricLogConf()
 
     @field_validator("database_url")
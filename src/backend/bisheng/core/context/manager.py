@@ -73,10 +73,11 @@ class ApplicationContextManager:
             self.register_context(DatabaseManager(
                 database_url=config.database_url,
                 engine_config=config.database_pool.as_engine_kwargs(),
+                replica_config=config.database_replicas.as_connection_kwargs(),
             ))
 
             from bisheng.core.cache.redis_manager import RedisManager
-            self.register_context(RedisManager(redis_url=config.redis_url))
+            self.register_context(RedisManager(redis_url=config.redis_url, codec_conf=config.redis_codec))
 
             from bisheng.core.storage.minio.minio_manager import MinioManager
             self.register_context(MinioManager(minio_config=config.object_storage.minio))
@@ -3,7 +3,7 @@
 Provides database connection management, session management, transaction management, and context management capabilities
 """
 
-from .connection import DatabaseConnectionManager  # noqa: F401
+from .connection import DatabaseConnectionManager, read_replica, replica_read, use_primary  # noqa: F401
 from .manager import (
     get_database_connection,
     sync_get_database_connection,
@@ -16,5 +16,8 @@ __all__ = [
     'get_database_connection',
     'sync_get_database_connection',
     'get_async_db_session',
-    'get_sync_db_session'
+    'get_sync_db_session',
+    'read_replica',
+    'replica_read',
+    'use_primary',
 ]
@@ -1,16 +1,30 @@
-"""Database Connection Management Module"""
-
+"""Database Connection Management Module
+
+Besides the primary engines, optional read replicas can be configured. A session
+opened read-only (``read_only=True``, or inside ``read_replica()`` / a
+``replica_read`` DAO method) is served by a healthy replica; everything else,
+and every read issued within ``read_your_writes_s`` of a write in the same
+context (or inside ``use_primary()``), goes to the primary. A replica that fails
+to hand out a connection is skipped for ``replica_retry_s`` seconds and the
+session falls back to the next replica or the primary.
+"""
+
+import functools
+import inspect
+import itertools
 import logging
 import time
 from collections.abc import Generator
 from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from typing import Any
 
-from sqlalchemy import Engine, create_engine, event
+from sqlalchemy import Engine, TextClause, create_engine, event
 from sqlalchemy.engine.url import make_url
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import InvalidRequestError, OperationalError
 from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session as OrmSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel
@@ -70,23 +84,163 @@ def _emit_pool_wait_timeout_if_needed(engine_name: str, exc: BaseException) -> N
         emit_metric("db_pool", engine=engine_name, result="wait_timeout")
 
 
+# Session routing state of the current context (request, task or thread).
+# ``_read_only``: sessions opened without an explicit ``read_only`` go to a replica.
+# ``_primary_forced``: inside ``use_primary()``, every session uses the primary.
+# ``_primary_until``: monotonic deadline, set after a write, before which reads
+# stay on the primary.
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+_primary_forced: ContextVar[bool] = ContextVar("db_primary_forced", default=False)
+_primary_until: ContextVar[float] = ContextVar("db_primary_until", default=0.0)
+
+# Session.info flags maintained by the write-tracking listeners.
+_READ_ONLY_KEY = "bs_read_only"
+_WROTE_KEY = "bs_wrote"
+_write_tracking_installed = False
+
+
+@contextmanager
+def read_replica():
+    """Serve the sessions opened in this block from a read replica when one is healthy."""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Read-your-writes scope: every session opened in this block uses the primary."""
+    token = _primary_forced.set(True)
+    try:
+        yield
+    finally:
+        _primary_forced.reset(token)
+
+
+def replica_read(func):
+    """Decorate a read-only DAO method so the sessions it opens go to a replica."""
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with read_replica():
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# Leading keywords of raw SQL that only reads
+_READ_KEYWORDS = frozenset({"SELECT", "WITH", "SHOW", "EXPLAIN", "DESCRIBE", "DESC"})
+
+
+def _is_write_statement(orm_execute_state) -> bool:
+    if orm_execute_state.is_select:
+        return False
+    statement = orm_execute_state.statement
+    if isinstance(statement, TextClause):
+        words = statement.text.lstrip(" \t\r\n(").split(None, 1)
+        return not words or words[0].upper() not in _READ_KEYWORDS
+    return orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+
+
+def _install_write_tracking() -> None:
+    """Register the global Session listeners replica routing relies on.
+
+    A session that wrote is flagged so the context keeps reading from the
+    primary afterwards; a read-only session refuses to write, since it may be
+    bound to a replica. Safe to call multiple times — only registers once.
+    """
+    global _write_tracking_installed
+    if _write_tracking_installed:
+        return
+    _write_tracking_installed = True
+
+    @event.listens_for(OrmSession, "before_flush")
+    def _guard_flush(session, flush_context, instances):
+        if not session.info.get(_READ_ONLY_KEY):
+            return
+        if session.new or session.deleted or any(session.is_modified(obj) for obj in session.dirty):
+            raise InvalidRequestError("cannot flush changes in a read-only database session")
+
+    @event.listens_for(OrmSession, "after_flush")
+    def _track_flush(session, flush_context):
+        session.info[_WROTE_KEY] = True
+
+    @event.listens_for(OrmSession, "do_orm_execute")
+    def _track_execute(orm_execute_state):
+        if not _is_write_statement(orm_execute_state):
+            return
+        session = orm_execute_state.session
+        if session.info.get(_READ_ONLY_KEY):
+            raise InvalidRequestError("cannot execute a write statement in a read-only database session")
+        session.info[_WROTE_KEY] = True
+
+
+class _Replica:
+    """One read replica: lazily created engines plus its health window."""
+
+    def __init__(self, index: int, url: str, async_url: str) -> None:
+        self.name = f"replica_{index}"
+        self.url = url
+        self.async_url = async_url
+        self.engine: Engine | None = None
+        self.async_engine: AsyncEngine | None = None
+        self.down_until = 0.0
+
+
 class DatabaseConnectionManager:
     """Database Connection Manager
 
     Responsible for managing database engine creation, connection pool configuration and lifecycle management
+
+    Args:
+        database_url: primary database URL.
+        replica_urls: optional read replica URLs (same driver as the primary).
+        read_your_writes_s: seconds after a write during which the writing
+            context keeps reading from the primary (covers replication lag).
+        replica_retry_s: seconds a replica that failed to connect is skipped.
+        **engine_kwargs: SQLAlchemy engine options, applied to every engine.
     """
 
-    def __init__(self, database_url: str, **engine_kwargs):
+    def __init__(
+        self,
+        database_url: str,
+        replica_urls: list[str] | None = None,
+        read_your_writes_s: float = 5.0,
+        replica_retry_s: float = 30.0,
+        **engine_kwargs,
+    ):
         if "dm+dmPython" in database_url:
             database_url = self._normalize_dm_url(database_url)
         self.database_url = database_url
         self.async_database_url = self._convert_to_async_url(database_url)
         self.engine_kwargs = engine_kwargs
+        self.read_your_writes_s = read_your_writes_s
+        self.replica_retry_s = replica_retry_s
 
         self._engine: Engine | None = None
         self._async_engine: AsyncEngine | None = None
         self._async_session_maker: async_sessionmaker | None = None
 
+        self._replicas: list[_Replica] = []
+        for index, url in enumerate(replica_urls or []):
+            if "dm+dmPython" in url:
+                url = self._normalize_dm_url(url)
+            self._replicas.append(_Replica(index, url, self._convert_to_async_url(url)))
+        self._replica_cursor = itertools.count()
+        # Listeners are global; they cost nothing until the first replica exists.
+        if self._replicas:
+            _install_write_tracking()
+
     def _convert_to_async_url(self, url: str) -> str:
         """Database will be synchronizedURLConvert to AsynchronousURL"""
         if "pymysql" in url:
@@ -97,8 +251,9 @@ class DatabaseConnectionManager:
             return url.replace("dmPython", "dmAsync")
         return url
 
-    def _get_default_engine_config(self) -> dict[str, Any]:
+    def _get_default_engine_config(self, url: str | None = None) -> dict[str, Any]:
         """Get default engine configuration"""
+        url = url or self.database_url
         config = {
             "pool_size": 100,
             "max_overflow": 20,
@@ -108,7 +263,7 @@ class DatabaseConnectionManager:
         }
 
         # SQLiteSPECIAL CONFIGURATION
-        if self.database_url.startswith("sqlite"):
+        if url.startswith("sqlite"):
             config.update(
                 {
                     "connect_args": {"check_same_thread": False},
@@ -118,21 +273,21 @@ class DatabaseConnectionManager:
                 }
             )
         # MySQLSPECIAL CONFIGURATION
-        elif "mysql" in self.database_url:
+        elif "mysql" in url:
             if "connect_args" not in config:
                 config["connect_args"] = {}
             config["connect_args"]["charset"] = "utf8mb4"
 
         return config
 
-    def _get_engine_config(self) -> dict[str, Any]:
+    def _get_engine_config(self, url: str | None = None) -> dict[str, Any]:
         """Combine defaults with caller-supplied SQLAlchemy engine options.
 
         ``connect_args`` are nested options. Updating the outer configuration
         directly would replace MySQL's default ``charset`` when TLS adds an
         ``SSLContext``; merge the nested mapping instead.
         """
-        config = self._get_default_engine_config()
+        config = self._get_default_engine_config(url)
         engine_kwargs = self.engine_kwargs.copy()
         connect_args = engine_kwargs.pop("connect_args", None)
         config.update(engine_kwargs)
@@ -184,50 +339,119 @@ class DatabaseConnectionManager:
         new = new.set(query=query)
         return new.render_as_string(hide_password=False)
 
+    def _create_sync_engine(self, url: str, engine_name: str) -> Engine:
+        config = self._get_engine_config(url)
+        # StaticPool (SQLite) rejects QueuePool sizing kwargs; drop them so
+        # an externally-supplied pool config doesn't break SQLite engines.
+        if config.get("poolclass") is StaticPool:
+            for key in ("pool_size", "max_overflow", "pool_timeout"):
+                config.pop(key, None)
+
+        # DaMeng URLs are already normalized in __init__ (schema moved to
+        # the query string), so the URL is used as-is for every engine.
+        engine = create_engine(url, **config)
+        _install_db_metric_events(engine, engine_name)
+        logger.debug(f"Created {engine_name} database engine for {url}")
+        return engine
+
+    def _create_async_engine(self, url: str, engine_name: str) -> AsyncEngine:
+        config = self._get_engine_config(url)
+
+        # Remove Synchronization Engine Specific Configuration
+        config.pop("poolclass", None)
+
+        engine = create_async_engine(url, **config)
+        # Cursor events fire on the underlying sync engine; the async pool is
+        # reached via sync_engine.pool (design §5 坑 9).
+        _install_db_metric_events(engine.sync_engine, engine_name)
+        logger.debug(f"Created {engine_name} database engine for {url}")
+        return engine
+
     @property
     def engine(self) -> Engine:
         """Get Synchronization Database Engine"""
         if self._engine is None:
-            config = self._get_engine_config()
-            # StaticPool (SQLite) rejects QueuePool sizing kwargs; drop them so
-            # an externally-supplied pool config doesn't break SQLite engines.
-            if config.get("poolclass") is StaticPool:
-                for key in ("pool_size", "max_overflow", "pool_timeout"):
-                    config.pop(key, None)
-
-            # DaMeng URLs are already normalized in __init__ (schema moved to
-            # the query string), so database_url is used as-is for every engine.
-            self._engine = create_engine(self.database_url, **config)
-            _install_db_metric_events(self._engine, "sync")
-            logger.debug(f"Created sync database engine for {self.database_url}")
-
+            self._engine = self._create_sync_engine(self.database_url, "sync")
         return self._engine
 
     @property
     def async_engine(self) -> AsyncEngine:
         """Get Asynchronous Database Engine"""
         if self._async_engine is None:
-            config = self._get_engine_config()
+            self._async_engine = self._create_async_engine(self.async_database_url, "async")
+        return self._async_engine
 
-            # Remove Synchronization Engine Specific Configuration
-            config.pop("poolclass", None)
+    # -- replica routing ----------------------------------------------------
+    def _replica_engine(self, replica: _Replica) -> Engine:
+        if replica.engine is None:
+            replica.engine = self._create_sync_engine(replica.url, f"sync_{replica.name}")
+            self._watch_replica_health(replica, replica.engine)
+        return replica.engine
 
-            self._async_engine = create_async_engine(self.async_database_url, **config)
-            # Cursor events fire on the underlying sync engine; the async pool is
-            # reached via sync_engine.pool (design §5 坑 9).
-            _install_db_metric_events(self._async_engine.sync_engine, "async")
-            logger.debug(f"Created async database engine for {self.async_database_url}")
+    def _replica_async_engine(self, replica: _Replica) -> AsyncEngine:
+        if replica.async_engine is None:
+            replica.async_engine = self._create_async_engine(replica.async_url, f"async_{replica.name}")
+            self._watch_replica_health(replica, replica.async_engine.sync_engine)
+        return replica.async_engine
 
-        return self._async_engine
+    def _watch_replica_health(self, replica: _Replica, engine: Engine) -> None:
+        """Take a replica out of rotation when one of its connections is lost mid-query."""
+
+        @event.listens_for(engine, "handle_error")
+        def _on_error(exc_ctx):
+            if exc_ctx.is_disconnect:
+                self._mark_replica_down(replica, exc_ctx.original_exception)
+
+    def _mark_replica_down(self, replica: _Replica, exc: BaseException) -> None:
+        replica.down_until = time.monotonic() + self.replica_retry_s
+        logger.warning(f"Database {replica.name} unavailable, reading from the primary for "
+                       f"{self.replica_retry_s:g}s: {exc}")
+
+    def _read_candidates(self, read_only: bool | None) -> list[_Replica]:
+        """Healthy replicas to try for a session, in round-robin order (empty: use the primary)."""
+        if read_only is None:
+            read_only = _read_only.get()
+        if not read_only or not self._replicas:
+            return []
+        now = time.monotonic()
+        if _primary_forced.get() or now < _primary_until.get():
+            return []
+        start = next(self._replica_cursor)
+        count = len(self._replicas)
+        rotated = (self._replicas[(start + offset) % count] for offset in range(count))
+        return [replica for replica in rotated if replica.down_until <= now]
+
+    def _after_session(self, session) -> None:
+        """Keep the context on the primary for a while once it wrote."""
+        if session.info.get(_WROTE_KEY) and self._replicas:
+            deadline = time.monotonic() + self.read_your_writes_s
+            if deadline > _primary_until.get():
+                _primary_until.set(deadline)
 
     @contextmanager
-    def create_session(self) -> Generator[Session, Any, None]:
-        """Create a sync session"""
+    def create_session(self, read_only: bool | None = None) -> Generator[Session, Any, None]:
+        """Create a sync session
+
+        Args:
+            read_only: serve the session from a read replica when one is healthy.
+                ``None`` follows the context (``read_replica()`` / ``replica_read``).
+        """
+        bind, engine_name = self.engine, "sync"
+        for replica in self._read_candidates(read_only):
+            try:
+                # Check the connection out up front so an unreachable replica
+                # falls back here instead of failing the caller's first query.
+                bind, engine_name = self._replica_engine(replica).connect(), f"sync_{replica.name}"
+                break
+            except Exception as e:
+                self._mark_replica_down(replica, e)
         session_maker = sessionmaker(
-            bind=self.engine, class_=Session, expire_on_commit=False, autoflush=True, autocommit=False
+            bind=bind, class_=Session, expire_on_commit=False, autoflush=True, autocommit=False
         )
 
         with session_maker() as session:
+            if read_only or (read_only is None and _read_only.get()):
+                session.info[_READ_ONLY_KEY] = True
             try:
                 yield session
             except BaseException as e:
@@ -238,20 +462,38 @@ class DatabaseConnectionManager:
                 session.rollback()
                 if isinstance(e, Exception):
                     logger.error(f"Database session rolled back due to error: {e}")
-                _emit_pool_wait_timeout_if_needed("sync", e)
+                _emit_pool_wait_timeout_if_needed(engine_name, e)
                 raise
             finally:
+                self._after_session(session)
                 session.close()
+                if bind is not self._engine:
+                    bind.close()
 
     @asynccontextmanager
-    async def async_session(self):
-        """Asynchronous Session Context Manager"""
+    async def async_session(self, read_only: bool | None = None):
+        """Asynchronous Session Context Manager
 
+        Args:
+            read_only: serve the session from a read replica when one is healthy.
+                ``None`` follows the context (``read_replica()`` / ``replica_read``).
+        """
+        bind, engine_name = self.async_engine, "async"
+        for replica in self._read_candidates(read_only):
+            try:
+                # Check the connection out up front so an unreachable replica
+                # falls back here instead of failing the caller's first query.
+                bind, engine_name = await self._replica_async_engine(replica).connect(), f"async_{replica.name}"
+                break
+            except Exception as e:
+                self._mark_replica_down(replica, e)
         session_maker = async_sessionmaker(
-            bind=self.async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=True, autocommit=False
+            bind=bind, class_=AsyncSession, expire_on_commit=False, autoflush=True, autocommit=False
         )
 
         async with session_maker() as session:
+            if read_only or (read_only is None and _read_only.get()):
+                session.info[_READ_ONLY_KEY] = True
             try:
                 yield session
             except BaseException as e:
@@ -263,10 +505,13 @@ class DatabaseConnectionManager:
                 await session.rollback()
                 if isinstance(e, Exception):
                     logger.error(f"Database session rolled back due to error: {e}")
-                _emit_pool_wait_timeout_if_needed("async", e)
+                _emit_pool_wait_timeout_if_needed(engine_name, e)
                 raise
             finally:
+                self._after_session(session)
                 await session.close()
+                if bind is not self._async_engine:
+                    await bind.close()
 
     async def create_db_and_tables(self) -> None:
         """Creation of databases and tables"""
@@ -406,17 +651,24 @@ class DatabaseConnectionManager:
         if self._async_engine:
             await self._async_engine.dispose()
             logger.debug("Async database engine disposed")
+        for replica in self._replicas:
+            if replica.async_engine:
+                await replica.async_engine.dispose()
 
     def close_sync(self):
         """Synchronously close database connections"""
         if self._engine:
             self._engine.dispose()
             logger.debug("Sync database engine disposed")
+        for replica in self._replicas:
+            if replica.engine:
+                replica.engine.dispose()
 
     def __del__(self):
         """Destructor ensures release of resources"""
-        if self._engine:
-            try:
-                self._engine.dispose()
-            except Exception:
-                pass
+        for engine in [self._engine, *(replica.engine for replica in getattr(self, "_replicas", []))]:
+            if engine:
+                try:
+                    engine.dispose()
+                except Exception:
+                    pass
@@ -29,6 +29,7 @@ class DatabaseManager(BaseContextManager[DatabaseConnectionManager]):
             self,
             database_url: Optional[str] = None,
             engine_config: Optional[Dict[str, Any]] = None,
+            replica_config: Optional[Dict[str, Any]] = None,
             **kwargs
     ):
         super().__init__(self.name, **kwargs)
@@ -36,11 +37,15 @@ class DatabaseManager(BaseContextManager[DatabaseConnectionManager]):
         if not self.database_url:
             raise ValueError("Database URL is required. Please provide via parameter or settings.database_url")
         self.engine_config = engine_config or {}
+        # Read replica routing (DatabaseReplicaConf.as_connection_kwargs()); empty keeps
+        # every session on the primary.
+        self.replica_config = replica_config or {}
 
     async def _async_initialize(self) -> DatabaseConnectionManager:
         """Initialize Database Connection Manager"""
         conn_manager = DatabaseConnectionManager(
             self.database_url,
+            **self.replica_config,
             **self.engine_config
         )
         self._register_tenant_filter()
@@ -50,6 +55,7 @@ class DatabaseManager(BaseContextManager[DatabaseConnectionManager]):
         """Synchronization Initialization"""
         conn_manager = DatabaseConnectionManager(
             self.database_url,
+            **self.replica_config,
             **self.engine_config
         )
         self._register_tenant_filter()
@@ -127,6 +133,7 @@ async def get_database_connection() -> DatabaseConnectionManager:
             app_context.register_context(DatabaseManager(
                 settings.database_url,
                 engine_config=settings.database_pool.as_engine_kwargs(),
+                replica_config=settings.database_replicas.as_connection_kwargs(),
             ))
             return await app_context.async_get_instance(DatabaseManager.name)
         except Exception as e:
@@ -153,6 +160,7 @@ def sync_get_database_connection() -> DatabaseConnectionManager:
             app_context.register_context(DatabaseManager(
                 settings.database_url,
                 engine_config=settings.database_pool.as_engine_kwargs(),
+                replica_config=settings.database_replicas.as_connection_kwargs(),
             ))
             return app_context.sync_get_instance(DatabaseManager.name)
         except Exception as e:
@@ -161,32 +169,40 @@ def sync_get_database_connection() -> DatabaseConnectionManager:
 
 
 @asynccontextmanager
-async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_async_db_session(read_only: Optional[bool] = None) -> AsyncGenerator[AsyncSession, None]:
     """A convenient way to get asynchronous database sessions
 
     Example:
         async with get_async_db_session() as session:
             result = await session.execute("SELECT * FROM users")
 
+    Args:
+        read_only: serve the session from a read replica when one is configured and healthy;
+            ``None`` follows the context (``read_replica()`` / ``replica_read``)
+
     Yields:
         AsyncSession: Asynchronous database session
     """
     db_manager = await get_database_connection()
-    async with db_manager.async_session() as session:
+    async with db_manager.async_session(read_only=read_only) as session:
         yield session
 
 
 @contextmanager
-def get_sync_db_session():
+def get_sync_db_session(read_only: Optional[bool] = None):
     """Convenient way to get synchronized database sessions
 
     Example:
         with get_sync_db_session() as session:
             result = session.execute("SELECT * FROM users")
 
+    Args:
+        read_only: serve the session from a read replica when one is configured and healthy;
+            ``None`` follows the context (``read_replica()`` / ``replica_read``)
+
     Yields:
         Session: Synchronize database sessions
     """
     db_manager = sync_get_database_connection()
-    with db_manager.create_session() as session:
+    with db_manager.create_session(read_only=read_only) as session:
         yield session
@@ -268,6 +268,28 @@ def build_tenant_filter_clause(tenant_col):
     return tenant_col == tid
 
 
+def resolve_tenant_scope(table_name: str) -> frozenset[int] | None:
+    """Return the tenant ids a SELECT on ``table_name`` would be limited to.
+
+    The in-memory counterpart of ``build_tenant_filter_clause`` for callers
+    that answer a query from a cache instead of SQL: ``None`` means the event
+    listener would inject no filter (bypass active, listener not registered,
+    table not tenant-aware), otherwise the set of visible tenant ids (possibly
+    empty). Raises ``NoTenantContextError`` exactly when the listener would.
+    """
+    if not _initialized or table_name not in _tenant_aware_tables or is_tenant_filter_bypassed():
+        return None
+
+    visible = _resolve_visible_tenant_ids()
+    if visible is not None:
+        return visible
+
+    tid = _resolve_tenant_id()
+    if tid is None:
+        return None
+    return frozenset({tid})
+
+
 def _get_tenant_tables_from_statement(stmt):
     """Extract SQLAlchemy Table objects that are tenant-aware from a statement.
 
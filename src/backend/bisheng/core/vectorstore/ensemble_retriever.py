@@ -11,6 +11,7 @@ from langchain_core.callbacks import (
 )
 from langchain_core.runnables import RunnableConfig
 
+from bisheng.core.ai.rerank.rank_fusion import FusionMethod
 from bisheng.core.ai.rerank.rrf_rerank import RRFRerank
 
 
@@ -34,6 +35,7 @@ class RRFMultiVectorRetriever(BaseRetriever):
     )
     top_k: int = Field(default=5, description="The final number of documents returned. Note: Recommended settings >0 Value of")
     rrf_c: int = Field(default=60, description="RRF constant c, smooth ranking weights")
+    fusion: FusionMethod = Field(default="rrf", description="rrf: reciprocal rank fusion; score: fuse normalized scores")
     remove_zero_score: bool = Field(default=True, description="Remove or not RRF Score is 0 Documents")
     max_context_length: int = Field(default=0, description="Returns the maximum total character length of a document,0Indicates unlimited")
 
@@ -58,7 +60,8 @@ class RRFMultiVectorRetriever(BaseRetriever):
             retrievers=self._retrievers,
             weights=weights,
             c=self.rrf_c,
-            remove_zero_score=self.remove_zero_score
+            remove_zero_score=self.remove_zero_score,
+            fusion=self.fusion,
         )
 
     def _get_relevant_documents(
@@ -22,6 +22,8 @@ import threading
 from collections.abc import Callable
 from typing import Any
 
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_milvus import Milvus as _LangchainMilvus
 from loguru import logger
 from pymilvus import connections
@@ -101,6 +103,11 @@ class Milvus(_LangchainMilvus):
         self._ensure_fields_loaded()
         return await super().aadd_texts(*args, **kwargs)
 
+    def add_embeddings(self, *args: Any, **kwargs: Any) -> list[str]:
+        # Reached directly when the caller supplies precomputed vectors, without add_texts.
+        self._ensure_fields_loaded()
+        return super().add_embeddings(*args, **kwargs)
+
     @staticmethod
     def _ensure_ef_covers_k(param: dict | None, k: int) -> dict | None:
         """Raise HNSW ``ef`` to cover ``k`` so Milvus never rejects the search.
@@ -161,6 +168,50 @@ class Milvus(_LangchainMilvus):
             **kwargs,
         )
 
+    def _embeds_queries_itself(self) -> bool:
+        """A single vector field searched with the embedding function, no multi-vector or builtin function"""
+        return (
+            not self._is_multi_vector
+            and len(self._as_list(self.embedding_func)) == 1
+            and not self._as_list(self.builtin_func)
+        )
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        param: dict | None = None,
+        expr: str | None = None,
+        timeout: float | None = None,
+        query_embeddings: Embeddings | None = None,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        """``query_embeddings`` embeds the query in place of the store's embedding function for
+        this search only, e.g. one that remembers a query already embedded for another store."""
+        if query_embeddings is None or not self._embeds_queries_itself():
+            return super().similarity_search_with_score(query, k=k, param=param, expr=expr, timeout=timeout, **kwargs)
+        return self.similarity_search_with_score_by_vector(
+            query_embeddings.embed_query(query), k=k, param=param, expr=expr, timeout=timeout, **kwargs
+        )
+
+    async def asimilarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        param: dict | None = None,
+        expr: str | None = None,
+        timeout: float | None = None,
+        query_embeddings: Embeddings | None = None,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        if query_embeddings is None or not self._embeds_queries_itself():
+            return await super().asimilarity_search_with_score(
+                query, k=k, param=param, expr=expr, timeout=timeout, **kwargs
+            )
+        return await self.asimilarity_search_with_score_by_vector(
+            await query_embeddings.aembed_query(query), k=k, param=param, expr=expr, timeout=timeout, **kwargs
+        )
+
     def _select_relevance_score_fn(self) -> Callable[[float], float]:
         try:
             return super()._select_relevance_score_fn()
@@ -5,7 +5,7 @@ Part of F002-department-tree.
 
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from sqlalchemy import (
     BigInteger,
@@ -16,7 +16,9 @@ from sqlalchemy import (
     SmallInteger,
     String,
     UniqueConstraint,
+    delete,
     func,
+    insert,
     or_,
     text,
     update,
@@ -24,8 +26,10 @@ from sqlalchemy import (
 from sqlmodel import Field, select
 
 from bisheng.common.models.base import SQLModelSerializable
-from bisheng.core.database import get_async_db_session, get_sync_db_session
+from bisheng.core.database import get_async_db_session, get_sync_db_session, replica_read, use_primary
 from bisheng.core.database.dialect_helpers import UPDATE_TIME_SERVER_DEFAULT, JsonType
+from bisheng.database.models import department_tree
+from bisheng.database.models.department_tree import SUBTREE_MOVE_OPTION, DepartmentTreeIndex, parse_path
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +50,35 @@ def _normalize_id_scalar_rows(rows) -> list[int]:
     return out
 
 
+def build_synced_path(parent_path: str, dept_id: int) -> str:
+    """Materialised path of a synced department: ``parent_path`` + own id."""
+    base = (parent_path or "").strip()
+    if base and not base.endswith("/"):
+        base = f"{base}/"
+    if not base.startswith("/"):
+        base = f"/{base}" if base else "/"
+    return f"{base}{dept_id}/".replace("//", "/")
+
+
+def subtree_path_update(old_prefix: str, new_prefix: str):
+    """``UPDATE department`` moving every row under ``old_prefix`` to ``new_prefix``.
+
+    Tagged with ``SUBTREE_MOVE_OPTION`` so the committed move patches the
+    in-memory tree index (see ``department_tree``) instead of invalidating it.
+    """
+    return (
+        update(Department)
+        .where(Department.path.like(f"{old_prefix}%"))
+        .values(path=func.replace(Department.path, old_prefix, new_prefix))
+        # This LIKE-prefix WHERE is not Python-evaluatable, so the ORM would
+        # fall to the "fetch" sync strategy and inject RETURNING. DM's
+        # RETURNING ... INTO is single-row only, so a multi-row rewrite fails
+        # with [CODE:-5016] Invalid return into multi rows. We don't reuse the
+        # updated rows in-session, so disable sync to emit a plain UPDATE.
+        .execution_options(synchronize_session=False, **{SUBTREE_MOVE_OPTION: (old_prefix, new_prefix)})
+    )
+
+
 class Department(SQLModelSerializable, table=True):
     __tablename__ = "department"
 
@@ -274,6 +307,10 @@ class UserDepartment(SQLModelSerializable, table=True):
     __table_args__ = (UniqueConstraint("user_id", "department_id", name="uk_user_dept"),)
 
 
+# Keep the tree index version in step with every ORM write to department.
+department_tree.install_change_tracking()
+
+
 # ---------------------------------------------------------------------------
 # DAO: DepartmentDao
 # ---------------------------------------------------------------------------
@@ -365,6 +402,7 @@ class DepartmentDao:
             ).all()
 
     @classmethod
+    @replica_read
     async def aget_children(cls, parent_id: int | None, include_archived: bool = False) -> list[Department]:
         """Direct children of ``parent_id``, ordered by sort_order then id.
 
@@ -390,6 +428,7 @@ class DepartmentDao:
         return Department.status == "active"
 
     @classmethod
+    @replica_read
     async def aget_children_existence(cls, parent_ids: list[int], include_archived: bool = False) -> set[int]:
         """Subset of ``parent_ids`` that have at least one visible child.
 
@@ -413,6 +452,7 @@ class DepartmentDao:
             return {int(r) for r in _normalize_id_scalar_rows(result.all())}
 
     @classmethod
+    @replica_read
     async def aget_by_name_like(
         cls,
         keyword: str,
@@ -454,6 +494,7 @@ class DepartmentDao:
             ).all()
 
     @classmethod
+    @replica_read
     async def aget_subtree(cls, path_prefix: str) -> list[Department]:
         async with get_async_db_session() as session:
             result = await session.exec(
@@ -476,7 +517,12 @@ class DepartmentDao:
             return _normalize_id_scalar_rows(raw)
 
     @classmethod
+    @replica_read
     async def aget_subtree_ids(cls, path_prefix: str) -> list[int]:
+        index = await cls.aget_tree_index()
+        root = index.node_for_path(path_prefix) if index is not None else None
+        if root is not None:
+            return index.subtree_ids(root, active_only=True, tenant_ids=cls._tenant_scope())
         async with get_async_db_session() as session:
             result = await session.exec(
                 select(Department.id).where(
@@ -486,6 +532,71 @@ class DepartmentDao:
             )
             return _normalize_id_scalar_rows(result.all())
 
+    # -- Tree index: subtree / ancestor lookups without path LIKE scans --------
+
+    @classmethod
+    async def _aload_tree_rows(cls) -> list[tuple]:
+        from bisheng.core.context.tenant import bypass_tenant_filter
+
+        # The snapshot is shared by every tenant and stamped with the version
+        # read just before, so it must not come from a lagging replica.
+        with use_primary(), bypass_tenant_filter():
+            async with get_async_db_session() as session:
+                result = await session.exec(
+                    select(
+                        Department.id,
+                        Department.path,
+                        Department.status,
+                        Department.tenant_id,
+                        Department.is_tenant_root,
+                    )
+                )
+                return [tuple(row) for row in result.all()]
+
+    @classmethod
+    async def aget_tree_index(cls) -> DepartmentTreeIndex | None:
+        """Process-local tree index for the current version (see ``department_tree``).
+
+        None when the caller must answer with SQL (Redis unavailable, or the
+        stored paths do not form a consistent tree).
+        """
+        return await department_tree.aget_tree_index(cls._aload_tree_rows)
+
+    @staticmethod
+    def _tenant_scope() -> frozenset[int] | None:
+        """Tenant ids the auto filter would apply to a department SELECT here."""
+        from bisheng.core.database.tenant_filter import resolve_tenant_scope
+
+        return resolve_tenant_scope(Department.__tablename__)
+
+    @classmethod
+    async def ais_descendant_of(cls, dept_id: int, ancestor_id: int) -> bool:
+        """True when ``ancestor_id`` is ``dept_id`` itself or one of its ancestors."""
+        index = await cls.aget_tree_index()
+        if index is not None and dept_id in index.ancestors:
+            scope = cls._tenant_scope()
+            return (
+                index.visible(dept_id, scope)
+                and index.visible(ancestor_id, scope)
+                and index.in_subtree(dept_id, ancestor_id)
+            )
+        depts = {dept.id: dept for dept in await cls.aget_by_ids([dept_id, ancestor_id])}
+        dept, ancestor = depts.get(dept_id), depts.get(ancestor_id)
+        return bool(dept and ancestor and dept.path and ancestor.path and dept.path.startswith(ancestor.path))
+
+    @classmethod
+    async def aget_ancestor_ids(cls, dept_id: int) -> list[int]:
+        """Root-first ids on the path of ``dept_id``, ending with ``dept_id``."""
+        index = await cls.aget_tree_index()
+        if index is not None and dept_id in index.ancestors:
+            if not index.visible(dept_id, cls._tenant_scope()):
+                return []
+            return list(index.ancestor_ids(dept_id))
+        dept = await cls.aget_by_id(dept_id)
+        if dept is None:
+            return []
+        return list(parse_path(dept.path) or ())
+
     @classmethod
     def get_all_active(cls) -> list[Department]:
         with get_sync_db_session() as session:
@@ -528,31 +639,13 @@ class DepartmentDao:
     @classmethod
     def update_paths_batch(cls, old_prefix: str, new_prefix: str) -> None:
         with get_sync_db_session() as session:
-            session.execute(
-                update(Department)
-                .where(Department.path.like(f"{old_prefix}%"))
-                .values(path=func.replace(Department.path, old_prefix, new_prefix))
-                # This LIKE-prefix WHERE is not Python-evaluatable, so the ORM would
-                # fall to the "fetch" sync strategy and inject RETURNING. DM's
-                # RETURNING ... INTO is single-row only, so a multi-row rewrite fails
-                # with [CODE:-5016] Invalid return into multi rows. We don't reuse the
-                # updated rows in-session, so disable sync to emit a plain UPDATE.
-                .execution_options(synchronize_session=False)
-            )
+            session.execute(subtree_path_update(old_prefix, new_prefix))
             session.commit()
 
     @classmethod
     async def aupdate_paths_batch(cls, old_prefix: str, new_prefix: str) -> None:
         async with get_async_db_session() as session:
-            await session.execute(
-                update(Department)
-                .where(Department.path.like(f"{old_prefix}%"))
-                .values(path=func.replace(Department.path, old_prefix, new_prefix))
-                # synchronize_session=False: avoid the ORM "fetch" strategy injecting
-                # RETURNING, which DM rejects for multi-row UPDATE ([CODE:-5016]). See
-                # update_paths_batch above.
-                .execution_options(synchronize_session=False)
-            )
+            await session.execute(subtree_path_update(old_prefix, new_prefix))
             await session.commit()
 
     @classmethod
@@ -576,15 +669,9 @@ class DepartmentDao:
         of subtree rows whose path changed.
         """
         async with get_async_db_session() as session:
-            res = await session.execute(
-                update(Department)
-                .where(Department.path.like(f"{old_path}%"))
-                .values(path=func.replace(Department.path, old_path, new_path))
-                # synchronize_session=False: avoid the ORM "fetch" strategy injecting
-                # RETURNING, which DM rejects for multi-row UPDATE ([CODE:-5016]). Also
-                # keeps res.rowcount reliable as the plain affected-row count.
-                .execution_options(synchronize_session=False)
-            )
+            # synchronize_session=False (see subtree_path_update) also keeps
+            # res.rowcount reliable as the plain affected-row count.
+            res = await session.execute(subtree_path_update(old_path, new_path))
             await session.execute(update(Department).where(Department.id == dept_id).values(parent_id=new_parent_id))
             await session.commit()
             return res.rowcount or 0
@@ -715,7 +802,8 @@ class DepartmentDao:
     ) -> Department | None:
         """Return the nearest ancestor (or self) that is a tenant mount point.
 
-        Walks the materialized ``path`` column. Used by:
+        Walks the materialized ``path`` column (via the tree index when it is
+        available). Used by:
           - F011 mount: reject if any ancestor is already a mount point
                         (enforces INV-T1: 2-layer lock).
           - F012 TenantResolver: derive a user's leaf tenant from their
@@ -723,6 +811,14 @@ class DepartmentDao:
 
         Returns None if no ancestor (nor self) carries ``is_tenant_root=1``.
         """
+        index = await cls.aget_tree_index()
+        if index is not None and dept_id in index.ancestors:
+            scope = cls._tenant_scope()
+            if not index.visible(dept_id, scope):
+                return None
+            mount_id = index.nearest_mount(dept_id, scope)
+            return await cls.aget_by_id(mount_id) if mount_id is not None else None
+
         dept = await cls.aget_by_id(dept_id)
         if dept is None:
             return None
@@ -816,6 +912,14 @@ class DepartmentDao:
         catches "moved subtree itself contains a mount". When both fire,
         the move would produce nested mounts and must be rejected.
         """
+        index = await cls.aget_tree_index()
+        if index is not None and dept_id in index.ancestors:
+            scope = cls._tenant_scope()
+            if not index.visible(dept_id, scope):
+                return None
+            mount_id = index.descendant_mount(dept_id, scope)
+            return await cls.aget_by_id(mount_id) if mount_id is not None else None
+
         dept = await cls.aget_by_id(dept_id)
         if dept is None or not dept.path:
             return None
@@ -949,17 +1053,11 @@ class DepartmentDao:
         are bisheng-internal state and SSO sync must stay robust against
         accidental remount (PRD §5.2.5). On resurrect (previously
         ``is_deleted=1``), clears the flag and restores ``status='active'``
-        so the department becomes visible again.
+        so the department becomes visible again. A reparent rewrites the
+        paths of the whole subtree in the same transaction, like the bulk
+        :meth:`abulk_apply_synced`.
         """
 
-        def final_path(parent_path: str, dept_id: int) -> str:
-            base = (parent_path or "").strip()
-            if base and not base.endswith("/"):
-                base = f"{base}/"
-            if not base.startswith("/"):
-                base = f"/{base}" if base else "/"
-            return f"{base}{dept_id}/".replace("//", "/")
-
         existing = await cls.aget_by_source_external_id(source, external_id)
         async with get_async_db_session() as session:
             if existing is None:
@@ -979,18 +1077,22 @@ class DepartmentDao:
                 session.add(dept)
                 await session.commit()
                 await session.refresh(dept)
-                dept.path = final_path(path, int(dept.id))
+                dept.path = build_synced_path(path, int(dept.id))
                 session.add(dept)
                 await session.commit()
                 await session.refresh(dept)
                 return dept
+            new_path = build_synced_path(path, int(existing.id))
+            if existing.path and existing.path != new_path:
+                # matches the row itself too; its UPDATE below sets the same path
+                await session.execute(subtree_path_update(existing.path, new_path))
             await session.execute(
                 update(Department)
                 .where(Department.id == existing.id)
                 .values(
                     name=name,
                     parent_id=parent_id,
-                    path=final_path(path, int(existing.id)),
+                    path=new_path,
                     sort_order=sort_order,
                     status="active",
                     is_deleted=0,
@@ -1030,6 +1132,129 @@ class DepartmentDao:
             await session.commit()
         return existing
 
+    # -----------------------------------------------------------------------
+    # F015 bulk reconcile: chunked lookups and batched writes keyed by
+    # (source, external_id). One statement per chunk instead of one
+    # lookup + write per department.
+    # -----------------------------------------------------------------------
+
+    BULK_CHUNK_SIZE = 500
+
+    @classmethod
+    async def aget_by_source_external_ids(
+        cls,
+        source: str,
+        external_ids: list[str],
+    ) -> dict[str, Department]:
+        """Bulk :meth:`aget_by_source_external_id`: ``{external_id: row}`` for
+        every id that exists, ``is_deleted=1`` rows included, fetched
+        ``BULK_CHUNK_SIZE`` ids per query."""
+        async with get_async_db_session() as session:
+            return await cls._select_by_source_external_ids(session, source, external_ids)
+
+    @classmethod
+    async def _select_by_source_external_ids(
+        cls,
+        session,
+        source: str,
+        external_ids: list[str],
+    ) -> dict[str, Department]:
+        ids = list(dict.fromkeys(e for e in external_ids if e))
+        found: dict[str, Department] = {}
+        for start in range(0, len(ids), cls.BULK_CHUNK_SIZE):
+            chunk = ids[start : start + cls.BULK_CHUNK_SIZE]
+            result = await session.exec(
+                select(Department).where(
+                    Department.source == source,
+                    Department.external_id.in_(chunk),  # type: ignore[union-attr]
+                )
+            )
+            for dept in result.all():
+                found[dept.external_id] = dept
+        return found
+
+    @classmethod
+    async def abulk_apply_synced(
+        cls,
+        *,
+        source: str,
+        new_rows: list[dict],
+        plan: Callable[[dict[str, Department]], Awaitable[tuple[list[dict], list[tuple[str, str]]]]],
+        tenant_id: int = 1,
+    ) -> None:
+        """Insert new synced departments and apply the batched sync UPDATE in
+        one transaction.
+
+        Each new row carries ``external_id`` / ``name`` / ``sort_order`` /
+        ``last_sync_ts``; it is inserted unparented with an empty ``path``
+        because ids are not known before the insert. ``plan`` is awaited with
+        the inserted rows keyed by external_id and returns
+
+        - the UPDATE rows, ``{'id': ..., column: value}`` each, which give
+          the new rows their ``parent_id`` / ``path``. An inserted row left
+          out of them is deleted again;
+        - the ``(old_path, new_path)`` subtree moves, applied deepest first so
+          a moved descendant is rewritten before an ancestor's prefix changes.
+
+        Nothing is committed unless every statement succeeds, so no reader
+        ever sees a department without its place in the tree. Never set
+        ``is_tenant_root`` / ``mounted_tenant_id`` — like
+        :meth:`aupsert_by_external_id`, sync writes leave mount state alone.
+        """
+        values = [
+            {
+                "dept_id": f"{source.upper()}@{row['external_id']}",
+                "name": row["name"],
+                "parent_id": None,
+                "tenant_id": tenant_id,
+                "path": "",
+                "sort_order": row.get("sort_order") or 0,
+                "source": source,
+                "external_id": row["external_id"],
+                "status": "active",
+                "is_deleted": 0,
+                "last_sync_ts": row["last_sync_ts"],
+            }
+            for row in new_rows
+        ]
+        async with get_async_db_session() as session:
+            for start in range(0, len(values), cls.BULK_CHUNK_SIZE):
+                await session.exec(insert(Department).values(values[start : start + cls.BULK_CHUNK_SIZE]))
+            inserted = await cls._select_by_source_external_ids(
+                session, source, [row["external_id"] for row in new_rows]
+            )
+            updates, moves = await plan(inserted)
+
+            for start in range(0, len(updates), cls.BULK_CHUNK_SIZE):
+                await session.execute(update(Department), updates[start : start + cls.BULK_CHUNK_SIZE])
+            placed = {row["id"] for row in updates}
+            unplaced = [dept.id for dept in inserted.values() if dept.id not in placed]
+            for start in range(0, len(unplaced), cls.BULK_CHUNK_SIZE):
+                await session.execute(
+                    delete(Department)
+                    .where(Department.id.in_(unplaced[start : start + cls.BULK_CHUNK_SIZE]))
+                    .execution_options(synchronize_session=False)
+                )
+            for old_path, new_path in sorted(moves, key=lambda m: m[0].count("/"), reverse=True):
+                await session.execute(subtree_path_update(old_path, new_path))
+            await session.commit()
+
+    @classmethod
+    async def abulk_archive_by_ids(cls, dept_ids: list[int], last_sync_ts: int) -> None:
+        """Bulk :meth:`aarchive_by_external_id` for rows the caller already
+        resolved: one ``UPDATE ... WHERE id IN (...)`` per chunk."""
+        if not dept_ids:
+            return
+        async with get_async_db_session() as session:
+            for start in range(0, len(dept_ids), cls.BULK_CHUNK_SIZE):
+                await session.execute(
+                    update(Department)
+                    .where(Department.id.in_(dept_ids[start : start + cls.BULK_CHUNK_SIZE]))
+                    .values(status="archived", is_deleted=1, last_sync_ts=last_sync_ts)
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+
     @classmethod
     async def aget_active_descendants_under_path(
         cls,
@@ -1255,6 +1480,7 @@ class UserDepartmentDao:
             return rows, total
 
     @classmethod
+    @replica_read
     async def aget_members(
         cls,
         department_id: int,
@@ -1299,6 +1525,7 @@ class UserDepartmentDao:
             ).one()
 
     @classmethod
+    @replica_read
     async def aget_member_count(cls, department_id: int) -> int:
         async with get_async_db_session() as session:
             result = await session.exec(
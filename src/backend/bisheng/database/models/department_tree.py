@@ -0,0 +1,437 @@
+"""DepartmentTreeIndex — process-local snapshot of the department hierarchy.
+
+Subtree, ancestor and "is descendant of" questions are otherwise answered with
+``path LIKE '<prefix>%'`` scans, which degrade on large orgs and on databases
+that do not use the path index for LIKE. The index keeps, per department, its
+ancestor chain parsed from the materialized path plus its children, so:
+
+  - ``in_subtree`` is O(1) (compare one position of the ancestor chain),
+  - ``ancestor_ids`` is O(1) (the stored chain), ``nearest_mount`` O(depth),
+  - ``subtree_ids`` is O(k) in the size of the subtree,
+  - ``move_subtree`` rewrites only the moved subtree, O(k).
+
+Parent links come from the path, not ``parent_id``, so a subtree here is exactly
+the set of rows the LIKE scan matches. If any row's path does not chain onto
+its parent's (malformed or half-written), the snapshot is marked inconsistent
+and ``DepartmentDao`` keeps using SQL.
+
+Versioning: one random token in Redis (``VERSION_KEY``) identifies the
+department table's state. A process serves its snapshot only while the token
+still equals the one it was built (or last patched) under. Session listeners
+flag every flush / DML statement that touches a tree column of ``department``
+and, after commit, replace the token (``SET ... GET``; through the async client
+when the commit ran on an event loop). A commit whose only tree changes are
+subtree moves issued through ``subtree_path_update`` patches the local snapshot
+in place instead of dropping it. Writes to other columns (name, sort order,
+sync timestamps) leave the token alone.
+
+Fail-safe: when Redis is unavailable the DAO falls back to SQL, and a snapshot
+older than ``MAX_SNAPSHOT_AGE`` is rebuilt regardless, which bounds staleness
+from writes that bypass the ORM (raw SQL, migrations).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session as OrmSession
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "department"
+VERSION_KEY = "department:tree:version"
+MAX_SNAPSHOT_AGE = 300  # seconds
+# Execution option carrying ``(old_prefix, new_prefix)`` on a subtree path rewrite
+SUBTREE_MOVE_OPTION = "department_subtree_move"
+
+# Columns the index depends on; changes to any other column keep the version
+_TREE_COLUMNS = frozenset({"path", "parent_id", "status", "tenant_id", "is_tenant_root"})
+_CHANGES_KEY = "bs_department_tree_changes"
+
+TreeRow = tuple[int, Optional[str], Optional[str], Optional[int], Optional[int]]
+
+
+def parse_path(path: str | None) -> tuple[int, ...] | None:
+    """``"/1/2/3/"`` → ``(1, 2, 3)``; None for anything not in canonical form."""
+    if not path or len(path) < 3 or path[0] != "/" or path[-1] != "/":
+        return None
+    parts = path[1:-1].split("/")
+    if not all(part.isdigit() for part in parts):
+        return None
+    ids = tuple(int(part) for part in parts)
+    return ids if format_path(ids) == path else None
+
+
+def format_path(ids: tuple[int, ...]) -> str:
+    return "/" + "/".join(str(one) for one in ids) + "/"
+
+
+class DepartmentTreeIndex:
+    """Ancestor chains and children of every department with a path.
+
+    Built from ``(id, path, status, tenant_id, is_tenant_root)`` rows. Per-node
+    values are replaced, never mutated, so a reader running concurrently with
+    ``move_subtree`` sees each node either before or after the move.
+    """
+
+    def __init__(self, rows: Iterable[TreeRow]):
+        self.paths: dict[int, str] = {}
+        self.ancestors: dict[int, tuple[int, ...]] = {}  # root first, self last
+        self.children: dict[int, tuple[int, ...]] = {}
+        self.tenants: dict[int, int | None] = {}
+        self.active: set[int] = set()
+        self.mounts: set[int] = set()
+        self.consistent = True
+
+        for dept_id, path, status, tenant_id, is_tenant_root in rows:
+            dept_id = int(dept_id)
+            self.paths[dept_id] = path or ""
+            self.tenants[dept_id] = tenant_id
+            if status == "active":
+                self.active.add(dept_id)
+            if is_tenant_root:
+                self.mounts.add(dept_id)
+            if not path:
+                # an empty path never matches a prefix scan; nothing to index
+                continue
+            ids = parse_path(path)
+            if ids is None or ids[-1] != dept_id:
+                self.consistent = False
+                continue
+            self.ancestors[dept_id] = ids
+
+        children: dict[int, list[int]] = {}
+        for dept_id, ids in self.ancestors.items():
+            if len(ids) == 1:
+                continue
+            # the parent's own chain must be this chain minus the last id,
+            # otherwise the tree and the prefix scan would disagree
+            if self.ancestors.get(ids[-2]) != ids[:-1]:
+                self.consistent = False
+                continue
+            children.setdefault(ids[-2], []).append(dept_id)
+        self.children = {parent: tuple(kids) for parent, kids in children.items()}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def node_for_path(self, path: str) -> int | None:
+        """The department whose path is exactly ``path``, if indexed."""
+        ids = parse_path(path)
+        if ids is None or self.ancestors.get(ids[-1]) != ids:
+            return None
+        return ids[-1]
+
+    def visible(self, dept_id: int, tenant_ids: frozenset[int] | None) -> bool:
+        return tenant_ids is None or self.tenants.get(dept_id) in tenant_ids
+
+    def ancestor_ids(self, dept_id: int) -> tuple[int, ...]:
+        """Root-first ancestor chain, ending with ``dept_id`` itself."""
+        return self.ancestors.get(dept_id, ())
+
+    def in_subtree(self, dept_id: int, root_id: int) -> bool:
+        """True when ``root_id`` is ``dept_id`` or one of its ancestors."""
+        chain = self.ancestors.get(dept_id)
+        root_chain = self.ancestors.get(root_id)
+        if chain is None or root_chain is None or len(root_chain) > len(chain):
+            return False
+        return chain[len(root_chain) - 1] == root_id
+
+    def subtree_ids(
+        self,
+        root_id: int,
+        *,
+        active_only: bool = False,
+        tenant_ids: frozenset[int] | None = None,
+    ) -> list[int]:
+        """``root_id`` and all its descendants, depth-first."""
+        if root_id not in self.ancestors:
+            return []
+        out: list[int] = []
+        stack = [root_id]
+        while stack:
+            node = stack.pop()
+            if (not active_only or node in self.active) and self.visible(node, tenant_ids):
+                out.append(node)
+            stack.extend(self.children.get(node, ()))
+        return out
+
+    def nearest_mount(self, dept_id: int, tenant_ids: frozenset[int] | None = None) -> int | None:
+        """Closest ancestor (or self) flagged ``is_tenant_root``."""
+        for node in reversed(self.ancestors.get(dept_id, ())):
+            if node in self.mounts and self.visible(node, tenant_ids):
+                return node
+        return None
+
+    def descendant_mount(self, dept_id: int, tenant_ids: frozenset[int] | None = None) -> int | None:
+        """One descendant (or self) flagged ``is_tenant_root``."""
+        for node in sorted(self.mounts):
+            if self.in_subtree(node, dept_id) and self.visible(node, tenant_ids):
+                return node
+        return None
+
+    def move_subtree(self, old_prefix: str, new_prefix: str) -> bool:
+        """Apply ``path = replace(path, old_prefix, new_prefix)`` to the subtree.
+
+        Returns False, leaving the index untouched, when the move cannot be
+        expressed on the indexed tree (unknown subtree, new parent missing or
+        inside the moved subtree); the caller must then rebuild.
+        """
+        root = self.node_for_path(old_prefix)
+        new_chain = parse_path(new_prefix)
+        if root is None or new_chain is None or new_chain[-1] != root or root in new_chain[:-1]:
+            return False
+        if len(new_chain) > 1 and self.ancestors.get(new_chain[-2]) != new_chain[:-1]:
+            return False
+
+        old_chain = self.ancestors[root]
+        cut = len(old_chain)
+        for node in self.subtree_ids(root):
+            chain = new_chain + self.ancestors[node][cut:]
+            self.ancestors[node] = chain
+            self.paths[node] = format_path(chain)
+        if len(old_chain) > 1:
+            old_parent = old_chain[-2]
+            self.children[old_parent] = tuple(kid for kid in self.children.get(old_parent, ()) if kid != root)
+        if len(new_chain) > 1:
+            new_parent = new_chain[-2]
+            self.children[new_parent] = self.children.get(new_parent, ()) + (root,)
+        return True
+
+
+class _Snapshot:
+    __slots__ = ("version", "index", "built_at")
+
+    def __init__(self, version: str, index: DepartmentTreeIndex):
+        self.version = version
+        self.index = index
+        self.built_at = time.monotonic()
+
+
+class _TreeChanges:
+    """Tree changes a session made since its last commit."""
+
+    __slots__ = ("rebuild", "moves", "paths")
+
+    def __init__(self):
+        self.rebuild = False
+        self.moves: list[tuple[str, str]] = []
+        self.paths: dict[int, str] = {}  # dept id → path it was flushed with
+
+
+_snapshot: _Snapshot | None = None
+_lock = threading.Lock()
+_build_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_tracking_installed = False
+# version publishes still in flight, one task per async commit
+_publishing: set[asyncio.Task] = set()
+
+
+async def _redis():
+    from bisheng.core.cache.redis_manager import get_redis_client
+
+    return await get_redis_client()
+
+
+def _redis_sync():
+    from bisheng.core.cache.redis_manager import get_redis_client_sync
+
+    return get_redis_client_sync()
+
+
+def _decode(value) -> str | None:
+    if value is None:
+        return None
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+async def _aread_version() -> str:
+    conn = (await _redis()).async_connection
+    version = await conn.get(VERSION_KEY)
+    if version is None:
+        await conn.set(VERSION_KEY, uuid.uuid4().hex, nx=True)
+        version = await conn.get(VERSION_KEY)
+    return _decode(version)
+
+
+def _current(version: str) -> DepartmentTreeIndex | None:
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        return None
+    if time.monotonic() - snapshot.built_at > MAX_SNAPSHOT_AGE:
+        return None
+    return snapshot.index
+
+
+async def aget_tree_index(load: Callable[[], Awaitable[Iterable[TreeRow]]]) -> DepartmentTreeIndex | None:
+    """Return the index for the current version, building it with ``load`` on a miss.
+
+    None means "answer with SQL": Redis is unavailable or the stored paths do
+    not form a consistent tree.
+    """
+    global _snapshot
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _publishing if task.get_loop() is loop]
+    if pending:
+        # this process's own commits are reflected before it reads the version
+        await asyncio.wait(pending)
+    try:
+        version = await _aread_version()
+    except Exception as e:
+        logger.debug("Department tree version unavailable, falling back to SQL: %s", e)
+        invalidate()
+        return None
+
+    index = _current(version)
+    if index is None:
+        lock = _build_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+        async with lock:
+            index = _current(version)
+            if index is None:
+                # read under the version fetched above, so the stamp never runs ahead of the data
+                index = DepartmentTreeIndex(await load())
+                if not index.consistent:
+                    logger.warning("Department paths do not form a consistent tree; subtree queries use SQL")
+                with _lock:
+                    _snapshot = _Snapshot(version, index)
+    return index if index.consistent else None
+
+
+def invalidate() -> None:
+    """Drop this process's snapshot; the next lookup rebuilds it."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def _publish(changes: _TreeChanges) -> None:
+    """Replace the version after a commit and patch or drop the local snapshot.
+
+    Runs in the ``after_commit`` listener. On an event loop the Redis round trip
+    goes out as a task through the async client, so an async commit never blocks
+    the loop; lookups from this loop wait for it before reading the version.
+    """
+    token = uuid.uuid4().hex
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        try:
+            previous = _redis_sync().connection.set(VERSION_KEY, token, get=True)
+        except Exception as e:
+            logger.warning("Failed to bump the department tree version: %s", e)
+            invalidate()
+            return
+        _adopt(changes, token, _decode(previous))
+        return
+    task = loop.create_task(_apublish(changes, token))
+    _publishing.add(task)
+    task.add_done_callback(_publishing.discard)
+
+
+async def _apublish(changes: _TreeChanges, token: str) -> None:
+    try:
+        previous = await (await _redis()).async_connection.set(VERSION_KEY, token, get=True)
+    except Exception as e:
+        logger.warning("Failed to bump the department tree version: %s", e)
+        invalidate()
+        return
+    _adopt(changes, token, _decode(previous))
+
+
+def _adopt(changes: _TreeChanges, token: str, previous: str | None) -> None:
+    """Stamp the local snapshot with ``token`` if it can follow the commit, else drop it."""
+    global _snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None:
+            return
+        # another writer slipped in between, or the commit changed more than paths
+        if changes.rebuild or previous != snapshot.version or not _apply_moves(snapshot.index, changes):
+            _snapshot = None
+            return
+        snapshot.version = token
+
+
+def _apply_moves(index: DepartmentTreeIndex, changes: _TreeChanges) -> bool:
+    for old_prefix, new_prefix in changes.moves:
+        if not index.move_subtree(old_prefix, new_prefix):
+            return False
+    # rows whose path / parent_id were flushed directly must agree with the patched tree
+    return all(index.paths.get(dept_id) == path for dept_id, path in changes.paths.items())
+
+
+def _changes(session) -> _TreeChanges:
+    changes = session.info.get(_CHANGES_KEY)
+    if changes is None:
+        changes = session.info[_CHANGES_KEY] = _TreeChanges()
+    return changes
+
+
+def _is_department(obj) -> bool:
+    return getattr(type(obj), "__tablename__", None) == TABLE_NAME
+
+
+def install_change_tracking() -> None:
+    """Register the global Session listeners that version the index.
+
+    Safe to call multiple times — only registers once.
+    """
+    global _tracking_installed
+    if _tracking_installed:
+        return
+    _tracking_installed = True
+
+    @event.listens_for(OrmSession, "after_flush")
+    def _track_flush(session, flush_context):
+        for obj in session.new:
+            if _is_department(obj):
+                _changes(session).rebuild = True
+                return
+        for obj in session.deleted:
+            if _is_department(obj):
+                _changes(session).rebuild = True
+                return
+        for obj in session.dirty:
+            if not _is_department(obj):
+                continue
+            state = sa_inspect(obj)
+            changed = {key for key in _TREE_COLUMNS if state.attrs[key].history.has_changes()}
+            if not changed:
+                continue
+            if changed - {"path", "parent_id"}:
+                _changes(session).rebuild = True
+                return
+            _changes(session).paths[obj.id] = obj.path
+
+    @event.listens_for(OrmSession, "do_orm_execute")
+    def _track_execute(orm_execute_state):
+        if orm_execute_state.is_select:
+            return
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) != TABLE_NAME:
+            return
+        changes = _changes(orm_execute_state.session)
+        move = orm_execute_state.execution_options.get(SUBTREE_MOVE_OPTION)
+        if move is None:
+            changes.rebuild = True
+        else:
+            changes.moves.append(move)
+
+    @event.listens_for(OrmSession, "after_commit")
+    def _publish_changes(session):
+        changes = session.info.pop(_CHANGES_KEY, None)
+        if changes is not None:
+            _publish(changes)
+
+    @event.listens_for(OrmSession, "after_rollback")
+    def _discard_changes(session):
+        session.info.pop(_CHANGES_KEY, None)
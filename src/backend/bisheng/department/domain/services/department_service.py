@@ -8,7 +8,7 @@ from __future__ import annotations
 import logging
 import secrets
 
-from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy import and_, delete, func, or_
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import col, select
 
@@ -40,6 +40,7 @@ from bisheng.database.models.department import (
     DepartmentDao,
     UserDepartment,
     UserDepartmentDao,
+    subtree_path_update,
 )
 from bisheng.database.models.department_admin_grant import (
     DEPARTMENT_ADMIN_GRANT_SOURCE_MANUAL,
@@ -913,11 +914,7 @@ class DepartmentService:
             new_path = f"{new_parent.path}{dept.id}/"
 
             # Batch update subtree paths
-            await session.execute(
-                update(Department)
-                .where(Department.path.like(f"{old_path}%"))
-                .values(path=func.replace(Department.path, old_path, new_path))
-            )
+            await session.execute(subtree_path_update(old_path, new_path))
 
             # Update department itself
             dept.parent_id = data.new_parent_id
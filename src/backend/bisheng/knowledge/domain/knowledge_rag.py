@@ -9,6 +9,7 @@ from bisheng.common.errcode.http_error import NotFoundError
 from bisheng.knowledge.domain.models.knowledge import Knowledge, KnowledgeDao
 from bisheng.knowledge.rag.elasticsearch_factory import ElasticsearchFactory
 from bisheng.knowledge.rag.milvus_factory import MilvusFactory
+from bisheng.knowledge.rag.query_embedding import QueryMemoEmbeddings
 from bisheng.llm.domain import LLMService
 
 
@@ -110,11 +111,15 @@ class KnowledgeRag:
 
     @classmethod
     async def init_knowledge_milvus_vectorstore(cls, invoke_user_id: int, knowledge: Knowledge = None,
-                                                knowledge_id: int = None, embeddings=None, **kwargs) -> Milvus:
+                                                knowledge_id: int = None, embeddings=None, memoize_query: bool = False,
+                                                **kwargs) -> Milvus:
+        """ memoize_query: keep the store for a whole retrieval request and embed each query only once """
         knowledge = await cls._get_knowledge(knowledge, knowledge_id)
         if embeddings is None:
             embeddings = await LLMService.get_bisheng_knowledge_embedding(model_id=int(knowledge.model),
                                                                           invoke_user_id=invoke_user_id)
+        if memoize_query:
+            embeddings = QueryMemoEmbeddings(embeddings)
         return cls.init_milvus_vectorstore(knowledge.collection_name, embeddings, **kwargs)
 
     @classmethod
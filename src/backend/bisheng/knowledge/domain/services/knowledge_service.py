@@ -1634,10 +1634,7 @@ class KnowledgeService(KnowledgeUtils):
         try:
             from bisheng.worker.knowledge.scheduler import FileScheduler
 
-            sched = FileScheduler()
-            for f in files:
-                if f.user_id is not None:
-                    sched.purge_file(user_id=f.user_id, file_id=f.id)
+            FileScheduler().purge_files([(f.user_id, f.id) for f in files if f.user_id is not None])
         except Exception:
             logger.exception("file_scheduler: purge on delete failed; relying on self-heal")
 
@@ -511,6 +511,13 @@ class KnowledgeSpaceChatService:
             conf.retrieval_expansion_multiplier,
         )
 
+        # Both attempts search the same stores with the same query: build them once
+        # and embed the query once, only k changes between attempts.
+        milvus_vector = await KnowledgeRag.init_knowledge_milvus_vectorstore(
+            self.login_user.user_id, knowledge=space, memoize_query=True
+        )
+        es_vector = await KnowledgeRag.init_knowledge_es_vectorstore(knowledge=space)
+
         survivors: list[Document] = []
         for attempt_idx, multiplier in enumerate(multipliers, start=1):
             base_k = 100  # current retrieval default; multiplier scales it
@@ -524,10 +531,6 @@ class KnowledgeSpaceChatService:
             if base_es_filter:
                 es_kwargs["filter"] = base_es_filter
 
-            milvus_vector = await KnowledgeRag.init_knowledge_milvus_vectorstore(
-                self.login_user.user_id, knowledge=space
-            )
-            es_vector = await KnowledgeRag.init_knowledge_es_vectorstore(knowledge=space)
             vector_retriever = milvus_vector.as_retriever(search_kwargs=milvus_kwargs)
             es_retriever = es_vector.as_retriever(search_kwargs=es_kwargs)
 
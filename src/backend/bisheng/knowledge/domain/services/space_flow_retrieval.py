@@ -127,6 +127,12 @@ async def _aretrieve_one_space(
     conf = visibility._config()
     multipliers = (conf.retrieval_initial_multiplier, conf.retrieval_expansion_multiplier)
 
+    # stores and the query embedding are shared by both attempts
+    milvus_vector = await KnowledgeRag.init_knowledge_milvus_vectorstore(
+        identity_user.user_id, knowledge=space, memoize_query=True
+    )
+    es_vector = await KnowledgeRag.init_knowledge_es_vectorstore(knowledge=space)
+
     survivors: list[Document] = []
     for attempt_idx, multiplier in enumerate(multipliers, start=1):
         base_k = 100
@@ -137,8 +143,6 @@ async def _aretrieve_one_space(
         if base_es:
             es_kwargs["filter"] = base_es
 
-        milvus_vector = await KnowledgeRag.init_knowledge_milvus_vectorstore(identity_user.user_id, knowledge=space)
-        es_vector = await KnowledgeRag.init_knowledge_es_vectorstore(knowledge=space)
         retriever_tool = KnowledgeRetrieverTool(
             vector_retriever=milvus_vector.as_retriever(search_kwargs=milvus_kwargs),
             elastic_retriever=es_vector.as_retriever(search_kwargs=es_kwargs),
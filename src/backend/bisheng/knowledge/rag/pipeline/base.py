@@ -1,12 +1,17 @@
 import asyncio
+import contextvars
 import time
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Sequence
 
 from langchain_core.documents import BaseDocumentTransformer, Document
 from langchain_core.vectorstores import VectorStore
 
+from bisheng.knowledge.rag.pipeline.ingest import StageTimings, VectorStoreIngestor
 from bisheng.knowledge.rag.pipeline.loader.base import BaseBishengLoader
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 from bisheng.knowledge.rag.pipeline.types import PipelineStage, PipelineResult, PipelineConfig
 
 
@@ -22,11 +27,12 @@ class BasePipeline(ABC):
 
     @staticmethod
     def _make_result(stage: PipelineStage = PipelineStage.INGEST, docs: List[Document] = None,
-                     start: float = 0) -> PipelineResult:
+                     start: float = 0, timings: StageTimings = None) -> PipelineResult:
         result = PipelineResult(
             stage_reached=stage,
             documents=docs,
             duration_seconds=time.time() - start,
+            stage_timings=timings.as_dict() if timings else {},
         )
         return result
 
@@ -38,44 +44,186 @@ class BasePipeline(ABC):
         return await asyncio.to_thread(self.run, config)
 
 
+class _StreamingWriter:
+    """
+    Hands chunk batches to the ingestor on a small thread pool, so embedding and inserts
+    overlap with loading and splitting. At most ``max_inflight`` batches are queued or
+    running; submitting another one waits for the oldest, which keeps the producer from
+    running ahead of the writes.
+    """
+
+    def __init__(self, ingestor: VectorStoreIngestor, batch_size: int, max_inflight: int):
+        self.ingestor = ingestor
+        self.batch_size = max(1, batch_size)
+        self.max_inflight = max(1, max_inflight)
+        self._buffer: List[Document] = []
+        self._pending: deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="pipeline_ingest")
+
+    def add(self, documents: Sequence[Document]) -> None:
+        self._buffer.extend(documents)
+        while len(self._buffer) >= self.batch_size:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._submit(batch)
+
+    def _submit(self, batch: List[Document]) -> None:
+        with self.ingestor.timings.measure("ingest"):
+            while len(self._pending) >= self.max_inflight:
+                self._pending.popleft().result()
+        # executor threads do not inherit ContextVars; carry the tenant and trace_id over
+        ctx = contextvars.copy_context()
+        self._pending.append(self._executor.submit(ctx.run, self.ingestor.write, batch))
+
+    def close(self) -> None:
+        try:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                self._submit(batch)
+            with self.ingestor.timings.measure("ingest"):
+                while self._pending:
+                    self._pending.popleft().result()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self) -> None:
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+        self.ingestor.rollback()
+
+
 class NormalPipeline(BasePipeline):
+    """
+    loader -> transformers -> vector stores. The writes to all vector stores run in
+    parallel and share one embedding call per model; ``PipelineResult.stage_timings``
+    reports the seconds spent in load, transform, embed, write.<store> and ingest (the
+    wall time waiting for the writes).
+    """
+
+    def _can_stream(self, config: PipelineConfig) -> bool:
+        return config.streaming and config.stop_at == PipelineStage.INGEST and all(
+            isinstance(one, StreamingTransformer) for one in self.transformers)
+
+    def _iter_load_batches(self, batch_size: int, timings: StageTimings) -> Iterator[List[Document]]:
+        docs = self.loader.lazy_load()
+        batch = []
+        while True:
+            with timings.measure("load"):
+                doc = next(docs, None)
+            if doc is None:
+                break
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _transform_batch(self, docs: Sequence[Document], first: int = 0) -> Sequence[Document]:
+        for transformer in self.transformers[first:]:
+            if not docs:
+                break
+            docs = transformer.transform_batch(docs)
+        return docs
+
+    def _ingest(self, docs: Sequence[Document], config: PipelineConfig, timings: StageTimings) -> None:
+        ingestor = VectorStoreIngestor(self.vector_store, config.store_options, timings)
+        try:
+            with timings.measure("ingest"):
+                ingestor.write(docs)
+        except BaseException:
+            ingestor.rollback()
+            raise
+        finally:
+            ingestor.close()
+
+    def _run_streaming(self, config: PipelineConfig) -> PipelineResult:
+        """
+        Push page batches from loader.lazy_load() through the transformers and hand the
+        resulting chunks to the vector stores in bounded batches, so only a few batches
+        of chunks and embeddings are alive at any time.
+        """
+        start = time.time()
+        timings = StageTimings()
+        kept = [] if config.keep_documents else None
+        ingestor = VectorStoreIngestor(self.vector_store, config.store_options, timings)
+        writer = _StreamingWriter(ingestor, config.ingest_batch_size, config.max_inflight_batches)
+
+        def emit(docs: Sequence[Document]) -> None:
+            if not docs:
+                return
+            writer.add(docs)
+            if kept is not None:
+                kept.extend(docs)
+
+        try:
+            for transformer in self.transformers:
+                transformer.begin_stream()
+            for batch in self._iter_load_batches(max(1, config.load_batch_size), timings):
+                with timings.measure("transform"):
+                    batch = self._transform_batch(batch)
+                emit(batch)
+            # Finish in order: whatever a transformer held back still passes through the
+            # transformers after it before those are finished themselves.
+            for index, transformer in enumerate(self.transformers):
+                with timings.measure("transform"):
+                    batch = self._transform_batch(transformer.end_stream(), index + 1)
+                emit(batch)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            ingestor.close()
+        return self._make_result(stage=PipelineStage.INGEST, docs=kept, start=start, timings=timings)
+
     def run(self, config: PipelineConfig = None) -> PipelineResult:
         if config is None:
             config = PipelineConfig()
+        if self._can_stream(config):
+            return self._run_streaming(config)
 
         start = time.time()
+        timings = StageTimings()
         # ① loader
-        docs = self.loader.load()
+        with timings.measure("load"):
+            docs = self.loader.load()
         if config.stop_at == PipelineStage.LOAD:
-            return self._make_result(stage=PipelineStage.LOAD, start=start)
+            return self._make_result(stage=PipelineStage.LOAD, start=start, timings=timings)
 
         # transformer
-        for transformer in self.transformers:
-            docs = transformer.transform_documents(docs)
+        with timings.measure("transform"):
+            for transformer in self.transformers:
+                docs = transformer.transform_documents(docs)
         if config.stop_at == PipelineStage.TRANSFORMER:
-            return self._make_result(stage=PipelineStage.TRANSFORMER, docs=docs, start=start)
+            return self._make_result(stage=PipelineStage.TRANSFORMER, docs=docs, start=start, timings=timings)
 
         # insert vector
-        for vectorstore in self.vector_store:
-            vectorstore.add_documents(docs)
+        self._ingest(docs, config, timings)
 
-        return self._make_result(stage=PipelineStage.INGEST, docs=docs, start=start)
+        return self._make_result(stage=PipelineStage.INGEST, docs=docs, start=start, timings=timings)
 
     async def arun(self, config: PipelineConfig = None) -> PipelineResult:
         if config is None:
             config = PipelineConfig()
+        if self._can_stream(config):
+            return await asyncio.to_thread(self._run_streaming, config)
 
         start = time.time()
-        docs = await self.loader.aload()
+        timings = StageTimings()
+        with timings.measure("load"):
+            docs = await self.loader.aload()
         if config.stop_at == PipelineStage.LOAD:
-            return self._make_result(stage=PipelineStage.LOAD, docs=docs, start=start)
+            return self._make_result(stage=PipelineStage.LOAD, docs=docs, start=start, timings=timings)
 
-        for transformer in self.transformers:
-            docs = await transformer.atransform_documents(docs)
+        with timings.measure("transform"):
+            for transformer in self.transformers:
+                docs = await transformer.atransform_documents(docs)
         if config.stop_at == PipelineStage.TRANSFORMER:
-            return self._make_result(stage=PipelineStage.TRANSFORMER, docs=docs, start=start)
+            return self._make_result(stage=PipelineStage.TRANSFORMER, docs=docs, start=start, timings=timings)
 
-        for vectorstore in self.vector_store:
-            await vectorstore.aadd_documents(docs)
+        if self.vector_store:
+            await asyncio.to_thread(self._ingest, docs, config, timings)
 
-        return self._make_result(stage=PipelineStage.INGEST, docs=docs, start=start)
+        return self._make_result(stage=PipelineStage.INGEST, docs=docs, start=start, timings=timings)
@@ -0,0 +1,180 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_elasticsearch import ElasticsearchStore
+from langchain_milvus import Milvus
+from loguru import logger
+
+
+@dataclass
+class StoreWriteOptions:
+    """Write settings for one kind of vector store"""
+    # documents per insert / bulk request
+    batch_size: int = 500
+    # extra attempts for a failed request
+    max_retries: int = 2
+    # seconds before the first retry, doubled for every further attempt
+    retry_backoff: float = 0.5
+
+
+def store_kind(vectorstore: VectorStore) -> str:
+    """Key used for PipelineConfig.store_options and the write timings"""
+    if isinstance(vectorstore, Milvus):
+        return "milvus"
+    if isinstance(vectorstore, ElasticsearchStore):
+        return "elasticsearch"
+    return type(vectorstore).__name__.lower()
+
+
+class StageTimings:
+    """Thread-safe accumulator of seconds spent per pipeline stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = defaultdict(float)
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._seconds[stage] += seconds
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds, 4) for stage, seconds in self._seconds.items()}
+
+
+class VectorStoreIngestor:
+    """
+    Writes one list of chunks to every vector store at the same time.
+
+    Stores whose embeddings can be supplied from outside (Milvus, dense Elasticsearch)
+    share one embed_documents call per embedding model; the keyword-only stores start
+    writing while those vectors are computed. Each store is written in its own
+    batch_size slices, and a failed slice is retried with exponential backoff. The ids
+    of every slice that landed are kept so a failed file can be rolled back.
+    """
+
+    def __init__(self, vector_stores: List[VectorStore], store_options: Dict[str, StoreWriteOptions] = None,
+                 timings: StageTimings = None):
+        self.vector_stores = vector_stores
+        self.store_options = store_options or {}
+        self.timings = timings or StageTimings()
+        self._lock = threading.Lock()
+        self._written: List[tuple[VectorStore, list]] = []
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(vector_stores)),
+                                            thread_name_prefix="pipeline_store_write")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _shared_embeddings(vectorstore: VectorStore) -> Embeddings | None:
+        """The embedding model whose vectors this store can take precomputed, if any"""
+        if not isinstance(vectorstore, (Milvus, ElasticsearchStore)):
+            return None
+        embeddings = vectorstore.embeddings
+        return embeddings if isinstance(embeddings, Embeddings) else None
+
+    def _embed(self, embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+        with self.timings.measure("embed"):
+            return embeddings.embed_documents(texts)
+
+    def _write_slice(self, vectorstore: VectorStore, documents: Sequence[Document],
+                     vectors: List[List[float]] | None, options: StoreWriteOptions) -> list:
+        texts = [one.page_content for one in documents]
+        metadatas = [one.metadata for one in documents]
+        if vectors is None:
+            return vectorstore.add_documents(list(documents))
+        if isinstance(vectorstore, Milvus):
+            return vectorstore.add_embeddings(texts=texts, embeddings=vectors, metadatas=metadatas,
+                                              batch_size=options.batch_size)
+        return vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+
+    def _write_store(self, vectorstore: VectorStore, documents: Sequence[Document],
+                     vectors: List[List[float]] | None) -> None:
+        kind = store_kind(vectorstore)
+        options = self.store_options.get(kind) or StoreWriteOptions()
+        batch_size = max(1, options.batch_size)
+        with self.timings.measure(f"write.{kind}"):
+            for start in range(0, len(documents), batch_size):
+                end = start + batch_size
+                part_vectors = vectors[start:end] if vectors is not None else None
+                for attempt in range(options.max_retries + 1):
+                    try:
+                        ids = self._write_slice(vectorstore, documents[start:end], part_vectors, options) or []
+                        with self._lock:
+                            self._written.append((vectorstore, ids))
+                        break
+                    except Exception as e:
+                        if attempt >= options.max_retries:
+                            raise
+                        delay = options.retry_backoff * (2 ** attempt)
+                        logger.warning(f"vectorstore write failed store={kind} attempt={attempt + 1} "
+                                       f"retry_in={delay}s error={e}")
+                        time.sleep(delay)
+
+    def _submit_write(self, vectorstore: VectorStore, documents: List[Document],
+                      vectors: List[List[float]] | None) -> Future:
+        # executor threads do not inherit ContextVars; carry the tenant and trace_id over
+        ctx = contextvars.copy_context()
+        return self._executor.submit(ctx.run, self._write_store, vectorstore, documents, vectors)
+
+    def write(self, documents: Sequence[Document]) -> None:
+        """Write the documents to every store, waiting until all of them are done"""
+        if not documents or not self.vector_stores:
+            return
+        documents = list(documents)
+        futures = []
+        try:
+            by_model: Dict[int, List[VectorStore]] = defaultdict(list)
+            for vectorstore in self.vector_stores:
+                embeddings = self._shared_embeddings(vectorstore)
+                if embeddings is None:
+                    futures.append(self._submit_write(vectorstore, documents, None))
+                else:
+                    by_model[id(embeddings)].append(vectorstore)
+
+            texts = [one.page_content for one in documents]
+            for stores in by_model.values():
+                vectors = self._embed(self._shared_embeddings(stores[0]), texts)
+                for vectorstore in stores:
+                    futures.append(self._submit_write(vectorstore, documents, vectors))
+        finally:
+            # every started write has to finish before a failure is reported, so that
+            # rollback sees all the ids that landed
+            error = None
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+
+    def rollback(self) -> None:
+        """Delete everything this ingestor wrote, best effort"""
+        with self._lock:
+            written, self._written = self._written, []
+        for vectorstore, ids in written:
+            if not ids:
+                continue
+            try:
+                vectorstore.delete(ids)
+            except Exception:
+                logger.exception(f"rollback written chunks failed store={store_kind(vectorstore)}")
@@ -3,11 +3,12 @@ from collections.abc import Sequence
 from functools import cached_property
 from typing import Any
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
 from bisheng.knowledge.domain.services.knowledge_utils import KnowledgeUtils
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 # Default prompts for document-abstract extraction. The system prompt is used
 # only when the knowledge base does not configure a custom abstract_prompt; the
@@ -63,7 +64,7 @@ def parse_document_title(title: str) -> str:
     return title
 
 
-class AbstractTransformer(BaseDocumentTransformer):
+class AbstractTransformer(StreamingTransformer):
     """
     Use LLM to extract the abstract of the document, and add it to the metadata of the document.
     """
@@ -73,6 +74,12 @@ class AbstractTransformer(BaseDocumentTransformer):
         self.file_metadata = file_metadata or {}
         self.max_chunk_content = 7000
         self.knowledge_file = knowledge_file
+        # streaming state: the leading text and the documents held back until the
+        # abstract is known
+        self._text = ""
+        self._held: list[Document] = []
+        self._abstract: str | None = None
+        self._done = False
 
     @cached_property
     def llm_config(self):
@@ -100,6 +107,26 @@ class AbstractTransformer(BaseDocumentTransformer):
         response = llm.invoke(messages)
         return response.content if hasattr(response, "content") else str(response)
 
+    def _summarize(self, llm, abstract_config, text: str) -> str:
+        # Abstract generation is a best-effort enhancement, not part of the
+        # core parsing flow. If the LLM call fails for any reason (timeout,
+        # content-audit rejection, invalid model config, ...), leave the
+        # abstract empty so the file still parses successfully instead of
+        # being marked FAILED. The exception type is intentionally broad:
+        # any summary failure is non-critical, and the failure is logged.
+        try:
+            abstract = self._extract_abstract(llm, text, abstract_config.abstract_prompt)
+            clean_abstract = parse_document_title(abstract)
+        except Exception:
+            logger.opt(exception=True).warning(
+                "abstract generation failed for file_id={}; leaving abstract empty",
+                getattr(self.knowledge_file, "id", None),
+            )
+            clean_abstract = ""
+        if self.knowledge_file:
+            self.knowledge_file.abstract = clean_abstract
+        return clean_abstract
+
     def transform_documents(self, documents: Sequence[Document], **kwargs: Any) -> Sequence[Document]:
 
         llm, abstract_config = self.llm_config
@@ -112,23 +139,48 @@ class AbstractTransformer(BaseDocumentTransformer):
                 break
             text += document.page_content
         if text:
-            # Abstract generation is a best-effort enhancement, not part of the
-            # core parsing flow. If the LLM call fails for any reason (timeout,
-            # content-audit rejection, invalid model config, ...), leave the
-            # abstract empty so the file still parses successfully instead of
-            # being marked FAILED. The exception type is intentionally broad:
-            # any summary failure is non-critical, and the failure is logged.
-            try:
-                abstract = self._extract_abstract(llm, text, abstract_config.abstract_prompt)
-                clean_abstract = parse_document_title(abstract)
-            except Exception:
-                logger.opt(exception=True).warning(
-                    "abstract generation failed for file_id={}; leaving abstract empty",
-                    getattr(self.knowledge_file, "id", None),
-                )
-                clean_abstract = ""
-            if self.knowledge_file:
-                self.knowledge_file.abstract = clean_abstract
+            clean_abstract = self._summarize(llm, abstract_config, text)
             for document in documents:
                 document.metadata["abstract"] = clean_abstract
         return documents
+
+    def begin_stream(self) -> None:
+        self._text = ""
+        self._held = []
+        self._abstract = None
+        self._done = False
+
+    def _release(self) -> Sequence[Document]:
+        self._done = True
+        held, self._held = self._held, []
+        llm, abstract_config = self.llm_config
+        if llm and self._text:
+            self._abstract = self._summarize(llm, abstract_config, self._text)
+        return self._annotate(held)
+
+    def _annotate(self, documents: Sequence[Document]) -> Sequence[Document]:
+        if self._abstract is not None:
+            for document in documents:
+                document.metadata["abstract"] = self._abstract
+        return documents
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # Only the leading max_chunk_content characters feed the LLM, so the stream
+        # is held back just until they are collected.
+        if self._done:
+            return self._annotate(documents)
+        if not self.llm_config[0]:
+            self._done = True
+            return documents
+        for document in documents:
+            if len(self._text) <= self.max_chunk_content:
+                self._text += document.page_content
+        self._held.extend(documents)
+        if len(self._text) > self.max_chunk_content:
+            return self._release()
+        return []
+
+    def end_stream(self) -> Sequence[Document]:
+        if self._done:
+            return []
+        return self._release()
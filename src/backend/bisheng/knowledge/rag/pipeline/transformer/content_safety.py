@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Sequence
+from typing import Any, Optional, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 from bisheng.sensitive_word.domain.schemas import SensitiveWordBusinessType
 from bisheng.sensitive_word.domain.services.exceptions import ContentSafetyViolation
 from bisheng.sensitive_word.domain.services.sensitive_word_policy_service import (
     SensitiveWordPolicyService,
+    SensitiveWordStreamScanner,
 )
 
 
-class ContentSafetyTransformer(BaseDocumentTransformer):
+class ContentSafetyTransformer(StreamingTransformer):
     def __init__(
         self,
         tenant_id: int,
@@ -19,18 +21,34 @@ class ContentSafetyTransformer(BaseDocumentTransformer):
     ) -> None:
         self.tenant_id = tenant_id
         self.business_type = business_type
+        self._scanner: Optional[SensitiveWordStreamScanner] = None
+
+    def _open_scanner(self) -> SensitiveWordStreamScanner:
+        return SensitiveWordPolicyService.open_scanner(tenant_id=self.tenant_id, business_type=self.business_type)
+
+    @staticmethod
+    def _scan(scanner: SensitiveWordStreamScanner, documents: Sequence[Document]) -> None:
+        # documents are fed one by one instead of joined, and the scan stops at the first hit
+        for document in documents:
+            # the separator keeps a word from matching across two documents
+            if scanner.feed(document.page_content) or scanner.feed('\n'):
+                raise ContentSafetyViolation(scanner.result())
 
     def transform_documents(
         self,
         documents: Sequence[Document],
         **kwargs: Any,
     ) -> Sequence[Document]:
-        text = '\n'.join(document.page_content or '' for document in documents)
-        result = SensitiveWordPolicyService.check_text(
-            tenant_id=self.tenant_id,
-            business_type=self.business_type,
-            text=text,
-        )
-        if result.enabled and result.hits:
-            raise ContentSafetyViolation(result)
+        self._scan(self._open_scanner(), documents)
+        return documents
+
+    def begin_stream(self) -> None:
+        self._scanner = self._open_scanner()
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # the scanner carries its state from one batch to the next, so a word split
+        # across a batch boundary is still found
+        if self._scanner is None:
+            self._scanner = self._open_scanner()
+        self._scan(self._scanner, documents)
         return documents
@@ -1,19 +1,21 @@
 import json
 from typing import Any, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
 from bisheng.common.errcode.knowledge import KnowledgeFileChunkMaxError
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 
-class DirectChunkTransformer(BaseDocumentTransformer):
+class DirectChunkTransformer(StreamingTransformer):
     def __init__(self, max_chunk_limit: int = 10000) -> None:
         self.max_chunk_limit = max_chunk_limit
+        self._chunk_offset = 0
 
     def transform_documents(
             self, documents: Sequence[Document], **kwargs: Any
     ) -> Sequence[Document]:
-        for index, one in enumerate(documents):
+        for index, one in enumerate(documents, start=kwargs.get("chunk_offset", 0)):
             one.metadata["chunk_index"] = index
             if "bbox" not in one.metadata:
                 one.metadata["bbox"] = json.dumps({"chunk_bboxes": one.metadata.get("chunk_bboxes", "")})
@@ -22,3 +24,11 @@ class DirectChunkTransformer(BaseDocumentTransformer):
             if len(one.page_content) > self.max_chunk_limit:
                 raise KnowledgeFileChunkMaxError()
         return documents
+
+    def begin_stream(self) -> None:
+        self._chunk_offset = 0
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        documents = self.transform_documents(documents, chunk_offset=self._chunk_offset)
+        self._chunk_offset += len(documents)
+        return documents
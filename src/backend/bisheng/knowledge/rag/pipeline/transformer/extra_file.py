@@ -3,15 +3,16 @@ import os
 from collections.abc import Sequence
 from typing import Any
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
 from bisheng.core.storage.minio.minio_manager import get_minio_storage_sync
 from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile
 from bisheng.knowledge.domain.services.knowledge_utils import KnowledgeUtils
 from bisheng.knowledge.rag.pipeline.loader.base import BaseBishengLoader
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 
-class ExtraFileTransformer(BaseDocumentTransformer):
+class ExtraFileTransformer(StreamingTransformer):
     """
     Upload the per-file preview artefact (docx/xlsx/pdf form) and the bbox
     JSON to MinIO.
@@ -61,3 +62,11 @@ class ExtraFileTransformer(BaseDocumentTransformer):
             self.knowledge_file.bbox_object_name = file_bbox_object_name
 
         return documents
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        return documents
+
+    def end_stream(self) -> Sequence[Document]:
+        # preview_file_path and bbox_list are complete only once the loader is exhausted
+        self.transform_documents([])
+        return []
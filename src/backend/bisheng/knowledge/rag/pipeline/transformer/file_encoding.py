@@ -12,7 +12,7 @@ import threading
 from datetime import datetime
 from typing import Any, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 from loguru import logger
 from sqlalchemy import and_, func, or_, select
 
@@ -73,6 +73,7 @@ from bisheng.common.constants.enums.telemetry import ApplicationTypeEnum
 from bisheng.common.services.config_service import settings as bisheng_settings
 from bisheng.core.database import get_async_db_session
 from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 from bisheng.llm.domain.services.llm import LLMService
 
 CLASSIFY_PROMPT = """# 角色
@@ -146,7 +147,7 @@ FALLBACK = "STD-SC"
 SEQ_CAP = 99999999
 
 
-class FileEncodingTransformer(BaseDocumentTransformer):
+class FileEncodingTransformer(StreamingTransformer):
     """Generate file_encoding using LLM classification + monthly sequence.
 
     Skips when shougang is disabled or knowledge_file already has an encoding
@@ -165,6 +166,18 @@ class FileEncodingTransformer(BaseDocumentTransformer):
         # delegate the actual async work to a single shared runner loop so
         # cached aiomysql/aioredis clients (in bisheng_settings) live on a
         # stable loop across all worker threads — see module top.
+        self._encode()
+        return list(documents)
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        return documents
+
+    def end_stream(self) -> Sequence[Document]:
+        # Classification reads the abstract, which is final once the stream ends.
+        self._encode()
+        return []
+
+    def _encode(self) -> None:
         try:
             _async_runner.submit(self._do_work())
         except Exception as e:
@@ -172,7 +185,6 @@ class FileEncodingTransformer(BaseDocumentTransformer):
                 f"[shougang.encoding] file_id={getattr(self.knowledge_file, 'id', None)} "
                 f"transformer_error: {e}"
             )
-        return list(documents)
 
     async def _do_work(self) -> None:
         shougang_conf = await bisheng_settings.aget_shougang_conf()
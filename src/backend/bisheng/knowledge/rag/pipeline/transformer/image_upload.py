@@ -2,15 +2,16 @@ import os
 from collections.abc import Sequence
 from typing import Any
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 from loguru import logger
 
 from bisheng.core.storage.minio.minio_manager import get_minio_storage_sync
 from bisheng.knowledge.domain.services.knowledge_utils import KnowledgeUtils
 from bisheng.knowledge.rag.pipeline.loader.base import BaseBishengLoader
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 
-class ImageUploadTransformer(BaseDocumentTransformer):
+class ImageUploadTransformer(StreamingTransformer):
     """Upload every file under loader.local_image_dir to MinIO under target_dir.
 
     The mapping is by-name 1:1: ``{local_image_dir}/{fname}`` is uploaded to
@@ -41,21 +42,27 @@ class ImageUploadTransformer(BaseDocumentTransformer):
         self.knowledge_id = knowledge_id
         self.retain_images = retain_images
 
-    def transform_documents(
-        self, documents: Sequence[Document], **kwargs: Any
-    ) -> Sequence[Document]:
+    def _target_dir(self) -> str:
+        return self.loader.image_object_dir or (
+            KnowledgeUtils.get_knowledge_file_image_dir(
+                self.document_id, self.knowledge_id
+            )
+        )
+
+    def _upload_images(self):
+        """Upload the staged images; returns the MinIO client, or None when there is nothing to upload"""
         if not self.retain_images:
-            return documents
+            return None
         local_dir = self.loader.local_image_dir
         if not local_dir or not os.path.exists(local_dir):
-            return documents
+            return None
 
         files = [
             f for f in os.listdir(local_dir)
             if os.path.isfile(os.path.join(local_dir, f))
         ]
         if not files:
-            return documents
+            return None
 
         if not self.loader.image_object_dir:
             # Sanity guard: only KnowledgeFilePipeline / PreviewFilePipeline
@@ -72,12 +79,7 @@ class ImageUploadTransformer(BaseDocumentTransformer):
                 self.knowledge_id,
             )
 
-        target_dir = self.loader.image_object_dir or (
-            KnowledgeUtils.get_knowledge_file_image_dir(
-                self.document_id, self.knowledge_id
-            )
-        )
-
+        target_dir = self._target_dir()
         minio = get_minio_storage_sync()
         for fname in files:
             local_path = os.path.join(local_dir, fname)
@@ -86,11 +88,29 @@ class ImageUploadTransformer(BaseDocumentTransformer):
                 file=local_path,
                 bucket_name=minio.bucket,
             )
+        return minio
 
-        if not self.loader.image_object_dir:
-            # Fallback branch: loader embedded local absolute paths; rewrite.
-            url_prefix = f"/{minio.bucket}/{target_dir}"
-            for doc in documents:
-                doc.page_content = doc.page_content.replace(local_dir, url_prefix)
+    def _rewrite_local_paths(self, documents: Sequence[Document], bucket: str) -> None:
+        # Fallback branch: loader embedded local absolute paths; rewrite.
+        url_prefix = f"/{bucket}/{self._target_dir()}"
+        for doc in documents:
+            doc.page_content = doc.page_content.replace(self.loader.local_image_dir, url_prefix)
+
+    def transform_documents(
+        self, documents: Sequence[Document], **kwargs: Any
+    ) -> Sequence[Document]:
+        minio = self._upload_images()
+        if minio and not self.loader.image_object_dir:
+            self._rewrite_local_paths(documents, minio.bucket)
+        return documents
 
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # Images are uploaded once in end_stream; local paths are rewritten as the
+        # batches pass, since they are already written when end_stream runs.
+        if self.retain_images and not self.loader.image_object_dir and self.loader.local_image_dir:
+            self._rewrite_local_paths(documents, get_minio_storage_sync().bucket)
         return documents
+
+    def end_stream(self) -> Sequence[Document]:
+        self._upload_images()
+        return []
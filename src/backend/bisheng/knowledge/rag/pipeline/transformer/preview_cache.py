@@ -1,42 +1,69 @@
-from typing import Sequence, Any, Dict
+from typing import Sequence, Any, Dict, List
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 from loguru import logger
 
 from bisheng.common.constants.vectorstore_metadata import KNOWLEDGE_RAG_METADATA_SCHEMA
 from bisheng.knowledge.domain.services.knowledge_utils import KnowledgeUtils
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 
-class PreviewCacheTransformer(BaseDocumentTransformer):
+class PreviewCacheTransformer(StreamingTransformer):
     def __init__(self, preview_cache_key: str, file_metadata: Dict) -> None:
         super().__init__()
         self.preview_cache_key = preview_cache_key
         self.file_metadata = file_metadata
+        # streaming state: the cached chunks and whether they were already emitted
+        self._cached_chunks = None
+        self._served = False
+
+    def _cached_documents(self, all_chunk_info: Dict) -> List[Document]:
+        logger.info("get file chunk from preview cache")
+        knowledge_metadata_fields = {one.field_name for one in KNOWLEDGE_RAG_METADATA_SCHEMA}
+        documents = []
+        for key, val in all_chunk_info.items():
+            one_metadata = val["metadata"]
+            one_metadata.update(self.file_metadata)
+            for k in one_metadata.keys() - knowledge_metadata_fields:
+                del one_metadata[k]
+            doc = Document(
+                page_content=KnowledgeUtils.aggregate_chunk_metadata(val["text"], one_metadata),
+                metadata=one_metadata,
+            )
+            documents.append(doc)
+        return documents
+
+    def _aggregate(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # aggregate chunk
+        knowledge_metadata_fields = {one.field_name for one in KNOWLEDGE_RAG_METADATA_SCHEMA}
+        for doc in documents:
+            for k in doc.metadata.keys() - knowledge_metadata_fields:
+                del doc.metadata[k]
+            doc.metadata.update(self.file_metadata)
+            doc.page_content = KnowledgeUtils.aggregate_chunk_metadata(doc.page_content, doc.metadata)
+        return documents
 
     def transform_documents(
             self, documents: Sequence[Document], **kwargs: Any
     ) -> Sequence[Document]:
         all_chunk_info = KnowledgeUtils.get_preview_cache(self.preview_cache_key) if self.preview_cache_key else None
-        knowledge_metadata_fields = {one.field_name for one in KNOWLEDGE_RAG_METADATA_SCHEMA}
         if all_chunk_info:
-            logger.info("get file chunk from preview cache")
-            documents = []
-            for key, val in all_chunk_info.items():
-                one_metadata = val["metadata"]
-                one_metadata.update(self.file_metadata)
-                for k in one_metadata.keys() - knowledge_metadata_fields:
-                    del one_metadata[k]
-                doc = Document(
-                    page_content=KnowledgeUtils.aggregate_chunk_metadata(val["text"], one_metadata),
-                    metadata=one_metadata,
-                )
-                documents.append(doc)
-        else:
-            # aggregate chunk
-            for doc in documents:
-                for k in doc.metadata.keys() - knowledge_metadata_fields:
-                    del doc.metadata[k]
-                doc.metadata.update(self.file_metadata)
-                doc.page_content = KnowledgeUtils.aggregate_chunk_metadata(doc.page_content, doc.metadata)
+            return self._cached_documents(all_chunk_info)
+        return self._aggregate(documents)
 
-        return documents
+    def begin_stream(self) -> None:
+        self._cached_chunks = KnowledgeUtils.get_preview_cache(self.preview_cache_key) \
+            if self.preview_cache_key else None
+        self._served = False
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # cached chunks replace whatever the splitter produced, emitted once
+        if self._cached_chunks:
+            return self.end_stream()
+        return self._aggregate(documents)
+
+    def end_stream(self) -> Sequence[Document]:
+        if not self._cached_chunks or self._served:
+            return []
+        self._served = True
+        return self._cached_documents(self._cached_chunks)
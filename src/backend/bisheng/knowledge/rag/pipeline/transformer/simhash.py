@@ -10,17 +10,20 @@ from __future__ import annotations
 
 from typing import Any, List, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
-from bisheng.common.utils.simhash_utils import compute_simhash_64_hex
+from bisheng.common.utils.simhash_utils import SimHashAccumulator, compute_simhash_64_hex
 from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 
-class SimHashTransformer(BaseDocumentTransformer):
+class SimHashTransformer(StreamingTransformer):
     """Compute 64-bit SimHash hex and store on `knowledge_file.simhash`."""
 
     def __init__(self, knowledge_file: KnowledgeFile) -> None:
         self.knowledge_file = knowledge_file
+        self._accumulator: SimHashAccumulator | None = None
+        self._first = True
 
     def transform_documents(
         self, documents: Sequence[Document], **kwargs: Any,
@@ -35,3 +38,23 @@ class SimHashTransformer(BaseDocumentTransformer):
 
         # Return unchanged (invariant: transformer doesn't mutate documents)
         return list(documents)
+
+    def begin_stream(self) -> None:
+        self._accumulator = None if self.knowledge_file.simhash else SimHashAccumulator()
+        self._first = True
+
+    def transform_batch(self, documents: Sequence[Document]) -> List[Document]:
+        # Token counts of the running text, same hash as joining every document
+        if self._accumulator is not None:
+            for document in documents:
+                if not self._first:
+                    self._accumulator.update("\n")
+                self._first = False
+                self._accumulator.update(document.page_content or "")
+        return list(documents)
+
+    def end_stream(self) -> List[Document]:
+        if self._accumulator is not None:
+            self.knowledge_file.simhash = self._accumulator.hexdigest()
+            self._accumulator = None
+        return []
@@ -1,13 +1,14 @@
 import json
 from typing import Any, List, Optional, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
 from bisheng.common.errcode.knowledge import KnowledgeFileChunkMaxError
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 from bisheng_langchain.text_splitter import ElemCharacterTextSplitter
 
 
-class SplitterTransformer(BaseDocumentTransformer):
+class SplitterTransformer(StreamingTransformer):
     """
     Splits text documents using ElemCharacterTextSplitter.
     """
@@ -25,12 +26,13 @@ class SplitterTransformer(BaseDocumentTransformer):
             is_separator_regex=True,
             **kwargs)
         self.max_chunk_limit = 10000
+        self._chunk_offset = 0
 
     def transform_documents(
             self, documents: Sequence[Document], **kwargs: Any
     ) -> Sequence[Document]:
         documents = self.text_splitter.split_documents(documents)
-        for index, one in enumerate(documents):
+        for index, one in enumerate(documents, start=kwargs.get("chunk_offset", 0)):
             one.metadata["chunk_index"] = index
             one.metadata["bbox"] = json.dumps({"chunk_bboxes": one.metadata.get("chunk_bboxes", "")})
             one.metadata['page'] = one.metadata["chunk_bboxes"][0].get("page") if one.metadata.get("chunk_bboxes", None) \
@@ -38,3 +40,13 @@ class SplitterTransformer(BaseDocumentTransformer):
             if len(one.page_content) > 10000:
                 raise KnowledgeFileChunkMaxError()
         return documents
+
+    def begin_stream(self) -> None:
+        self._chunk_offset = 0
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        # every document is split on its own, so only chunk_index has to continue
+        # across batches
+        documents = self.transform_documents(documents, chunk_offset=self._chunk_offset)
+        self._chunk_offset += len(documents)
+        return documents
@@ -0,0 +1,27 @@
+from collections.abc import Sequence
+
+from langchain_core.documents import BaseDocumentTransformer, Document
+
+
+class StreamingTransformer(BaseDocumentTransformer):
+    """
+    A transformer that NormalPipeline can feed one page batch at a time.
+
+    ``begin_stream`` resets the per-file state, ``transform_batch`` is called for every
+    batch in order and returns what flows downstream (it may return nothing while it
+    buffers), and ``end_stream`` runs once after the loader is exhausted and returns
+    anything still held back. The defaults describe a chunk-local transformer; whole-
+    document transformers keep a running aggregate and publish it in ``end_stream``.
+
+    Transformers that do not inherit this class make the pipeline fall back to the
+    buffered run.
+    """
+
+    def begin_stream(self) -> None:
+        pass
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        return self.transform_documents(documents)
+
+    def end_stream(self) -> Sequence[Document]:
+        return []
@@ -3,16 +3,17 @@ import os
 import uuid
 from typing import Any, Sequence
 
-from langchain_core.documents import BaseDocumentTransformer, Document
+from langchain_core.documents import Document
 
 from bisheng.core.storage.minio.minio_manager import get_minio_storage_sync
 from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile
 from bisheng.knowledge.rag.pipeline.loader.base import BaseBishengLoader
+from bisheng.knowledge.rag.pipeline.transformer.streaming import StreamingTransformer
 
 logger = logging.getLogger(__name__)
 
 
-class ThumbnailTransformer(BaseDocumentTransformer):
+class ThumbnailTransformer(StreamingTransformer):
     """
     Generate and upload a thumbnail for specific file types to MinIO.
     Excludes word, excel, ppt variants.
@@ -115,3 +116,10 @@ class ThumbnailTransformer(BaseDocumentTransformer):
                 logger.error(f"Failed to upload thumbnail to minio: {e}")
 
         return documents
+
+    def transform_batch(self, documents: Sequence[Document]) -> Sequence[Document]:
+        return documents
+
+    def end_stream(self) -> Sequence[Document]:
+        self.transform_documents([])
+        return []
@@ -1,10 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List
+from typing import Dict, List, Optional
 
 from langchain_core.documents import Document
 from pydantic import BaseModel, Field
 
+from bisheng.knowledge.rag.pipeline.ingest import StoreWriteOptions
+
 
 class PipelineStage(Enum):
     """定义 Pipeline 可停止的阶段"""
@@ -16,13 +18,30 @@ class PipelineStage(Enum):
 @dataclass
 class PipelineConfig:
     stop_at: PipelineStage = PipelineStage.INGEST
+    # Stream page batches through the transformers and write chunks to the vector
+    # stores in bounded batches while loading continues. Only applies to a full
+    # ingest whose transformers all support streaming, otherwise the file is buffered.
+    streaming: bool = False
+    # documents pulled from loader.lazy_load() per batch
+    load_batch_size: int = 8
+    # chunks per add_documents call
+    ingest_batch_size: int = 128
+    # ingest batches written or queued at once; bounds the chunks held in memory
+    max_inflight_batches: int = 2
+    # collect the chunks into PipelineResult.documents; streaming callers that do not
+    # read them can turn this off to keep memory flat
+    keep_documents: bool = True
+    # write settings per store kind ("milvus", "elasticsearch", ...), see ingest.store_kind
+    store_options: Dict[str, StoreWriteOptions] = field(default_factory=dict)
 
 
 @dataclass
 class PipelineResult:
     stage_reached: PipelineStage
-    documents: List[Document]
+    documents: Optional[List[Document]]
     duration_seconds: float
+    # seconds per stage: load, transform, embed, write.<store>, ingest
+    stage_timings: Dict[str, float] = field(default_factory=dict)
 
 
 class TextBbox(BaseModel):
@@ -0,0 +1,31 @@
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class QueryMemoEmbeddings(Embeddings):
+    """
+    Wraps the embedding model of one retrieval request. Every distinct query is
+    embedded once, however many retrieval attempts search with it; documents are
+    passed straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self._queries: Dict[str, List[float]] = {}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if text not in self._queries:
+            self._queries[text] = self.embeddings.embed_query(text)
+        return self._queries[text]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if text not in self._queries:
+            self._queries[text] = await self.embeddings.aembed_query(text)
+        return self._queries[text]
@@ -1,13 +1,13 @@
 """Plain-Redis LangGraph checkpoint saver for Linsight HITL (F035 Track B).
 
 Replaces ``langgraph-checkpoint-redis`` which requires Redis Stack / RediSearch.
-Uses only standard Redis commands — HSET/HGETALL, ZADD/ZREVRANGEBYSCORE, SCAN, DEL, EXPIRE —
+Uses only standard Redis commands — HSET/HGETALL, ZADD/ZRANGE/ZREVRANGEBYSCORE, DEL, EXPIRE —
 so it works with any plain Redis 6+ deployment.
 
 Key schema (all keys are UTF-8):
   Checkpoint data:
     ``linsight:ckpt:data:{thread_id}:{checkpoint_ns}:{checkpoint_id}``
-    HASH fields: type, data (bytes), metadata_type, metadata (bytes), pid
+    HASH fields: type, data (bytes), metadata_type, metadata (bytes), pid, widx
 
   Chronological index (ZSET, score = Unix timestamp of put()):
     ``linsight:ckpt:idx:{thread_id}:{checkpoint_ns}``
@@ -18,6 +18,13 @@ Key schema (all keys are UTF-8):
     HASH fields: task_id, channel, type, value (bytes), task_path
     task_id is base64url-encoded in the key to avoid ambiguity with the colon delimiter.
 
+  Pending-write index per checkpoint (ZSET, every score 0 so members sort by key):
+    ``linsight:ckpt:widx:{thread_id}:{checkpoint_ns}:{checkpoint_id}``
+    member = pending write key
+    Reading a checkpoint's writes is one ZRANGE plus one pipelined HGETALL per write
+    instead of a SCAN over the whole keyspace. Checkpoints written before the index
+    existed carry no ``widx`` field and are still read with SCAN.
+
 All keys expire after ``ttl_seconds`` (default: 7 days).
 
 Thread lifecycle:
@@ -53,6 +60,7 @@ from langgraph.checkpoint.base import (
 _CKPT_DATA_KEY = "linsight:ckpt:data:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
 _CKPT_IDX_KEY = "linsight:ckpt:idx:{thread_id}:{checkpoint_ns}"
 _CKPT_WRITE_KEY = "linsight:ckpt:write:{thread_id}:{checkpoint_ns}:{checkpoint_id}:{task_id_b64}:{idx}"
+_CKPT_WRITE_IDX_KEY = "linsight:ckpt:widx:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
 _DEFAULT_TTL = 7 * 24 * 3600  # 7 days
 
 
@@ -107,6 +115,9 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
             idx=idx,
         )
 
+    def _write_idx_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return _CKPT_WRITE_IDX_KEY.format(thread_id=thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint_id)
+
     def _write_scan_pattern(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
         return _CKPT_WRITE_KEY.format(
             thread_id=thread_id,
@@ -122,14 +133,22 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
         thread_id: str,
         checkpoint_ns: str,
         checkpoint_id: str,
+        indexed: bool = True,
     ) -> list[PendingWrite]:
-        pattern = self._write_scan_pattern(thread_id, checkpoint_ns, checkpoint_id)
-        keys = [k async for k in rc.scan_iter(match=pattern, count=100)]
+        if indexed:
+            keys = await rc.zrange(self._write_idx_key(thread_id, checkpoint_ns, checkpoint_id), 0, -1)
+        else:
+            # written before the index existed
+            pattern = self._write_scan_pattern(thread_id, checkpoint_ns, checkpoint_id)
+            keys = sorted([k async for k in rc.scan_iter(match=pattern, count=100)])
         if not keys:
             return []
+        async with rc.pipeline(transaction=False) as pipe:
+            for key in keys:
+                await pipe.hgetall(key)
+            raws = await pipe.execute()
         writes: list[PendingWrite] = []
-        for key in sorted(keys):
-            raw = await rc.hgetall(key)
+        for raw in raws:
             if not raw:
                 continue
             task_id = raw[b"task_id"].decode()
@@ -153,7 +172,9 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
         checkpoint: Checkpoint = self.serde.loads_typed((raw[b"type"].decode(), raw[b"data"]))
         metadata: CheckpointMetadata = self.serde.loads_typed((raw[b"metadata_type"].decode(), raw[b"metadata"]))
         parent_id = raw.get(b"pid", b"").decode() or None
-        pending_writes = await self._fetch_pending_writes(rc, thread_id, checkpoint_ns, checkpoint_id)
+        pending_writes = await self._fetch_pending_writes(
+            rc, thread_id, checkpoint_ns, checkpoint_id, indexed=b"widx" in raw
+        )
 
         return CheckpointTuple(
             config={
@@ -271,6 +292,8 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
                     "metadata_type": meta_type,
                     "metadata": meta_data,
                     "pid": parent_id,
+                    # pending writes of this checkpoint are listed in its write index
+                    "widx": "1",
                 },
             )
             await pipe.expire(self._ckpt_key(thread_id, checkpoint_ns, checkpoint_id), self._ttl)
@@ -301,6 +324,7 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
         checkpoint_ns: str = configurable.get("checkpoint_ns", "")
         checkpoint_id: str = configurable["checkpoint_id"]
 
+        idx_key = self._write_idx_key(thread_id, checkpoint_ns, checkpoint_id)
         client = await self._get_redis_client()
         async with client.async_pipeline(transaction=False) as pipe:
             for idx, (channel, value) in enumerate(writes):
@@ -318,6 +342,8 @@ class PlainRedisCheckpointer(BaseCheckpointSaver):
                     },
                 )
                 await pipe.expire(write_key, self._ttl)
+                await pipe.zadd(idx_key, {write_key: 0})
+            await pipe.expire(idx_key, self._ttl)
             await pipe.execute()
 
     # ------------------------------------------------------------------
@@ -1,5 +1,4 @@
 import asyncio
-import pickle
 from enum import Enum
 from typing import Any
 
@@ -29,6 +28,48 @@ def _preview(value: Any) -> str:
     return text if len(text) <= _PREVIEW_LIMIT else f"{text[:_PREVIEW_LIMIT]}…(+{len(text) - _PREVIEW_LIMIT} chars)"
 
 
+def merge_execution_steps(steps: list[dict], history: list[dict] | None = None) -> list[dict]:
+    """Fold step frames from a task's step log into its history entries.
+
+    A streamed step is stored as ONE history entry instead of one-per-token /
+    one-per-frame (F035 problem 1, design-增量-步骤持久化修复.md), upserted by call_id:
+      - thinking: deltas accumulate (concatenate output text)
+      - tool/knowledge/subagent: the end frame supersedes the start frame
+        (same call_id; end carries params + output)
+      - no call_id (NeedUserInput call_user_input step): append, so
+        set_user_input can still read history[-1].
+
+    ``history`` is an already folded prefix (a DB row, or a header written by a
+    release that kept history inline) that ``steps`` continue; it is extended in place.
+    """
+    history = [] if history is None else history
+    positions = {
+        entry["call_id"]: i for i, entry in enumerate(history) if isinstance(entry, dict) and entry.get("call_id")
+    }
+    # index -> output pieces of a thinking entry, joined once at the end
+    thinking: dict[int, list[str]] = {}
+    for step in steps:
+        call_id = step.get("call_id")
+        i = positions.get(call_id) if call_id else None
+        is_thinking = step.get("step_type") == "thinking"
+        if i is None:
+            i = len(history)
+            history.append(step)
+            if call_id:
+                positions[call_id] = i
+            if is_thinking:
+                thinking[i] = [step.get("output") or ""]
+            continue
+        if is_thinking:
+            thinking.setdefault(i, [history[i].get("output") or ""]).append(step.get("output") or "")
+        else:
+            thinking.pop(i, None)
+        history[i] = step
+    for i, pieces in thinking.items():
+        history[i] = {**history[i], "output": "".join(pieces)}
+    return history
+
+
 class MessageEventType(str, Enum):
     """
     Message event type enumeration
@@ -72,18 +113,22 @@ class LinsightStateMessageManager:
     DEFAULT_RETRY_ATTEMPTS = 3
     DEFAULT_RETRY_DELAY = 1
     KEY_PREFIX = "linsight_tasks:"
-    # Max interval (seconds) between DB rewrites of a task's `history` while a
-    # single thinking segment streams. A reasoning model streams thinking
-    # token-by-token and each delta upserts into the SAME history entry, so the
-    # old per-delta DB write rewrote the whole (growing, ~MB) history JSON
-    # thousands of times for one task. On DM8 (达梦) that exhausted the undo
-    # segment and wedged the giant UPDATE mid-flight (-7120 "Undo record version
-    # too old"), making the row unreadable and white-screening the task page.
-    # Coalescing the thinking-delta DB writes to at most one per this interval
-    # cuts the write amplification by 1-2 orders of magnitude. Tool / subagent /
-    # status frames and a thinking segment's FIRST delta still persist
-    # immediately, so deliverables and reload data are never delayed.
-    THINKING_DB_FLUSH_INTERVAL = 2.0
+    # Max interval (seconds) between DB rewrites of a task's `history`. Steps are
+    # appended to the task's Redis step log as they arrive, but the DB column
+    # holds the whole history JSON, so each rewrite costs the full (growing, ~MB)
+    # history. A reasoning model streams thinking token-by-token; the old
+    # per-step DB write rewrote that JSON thousands of times for one task, and on
+    # DM8 (达梦) it exhausted the undo segment and wedged the giant UPDATE
+    # mid-flight (-7120 "Undo record version too old"), making the row
+    # unreadable and white-screening the task page. Coalescing the writes to at
+    # most one per this interval cuts the write amplification by 1-2 orders of
+    # magnitude. A task's first step, a call_user_input step (the worker parks
+    # and may not come back within the Redis TTL) and every status update still
+    # persist immediately, and _cleanup_resources flushes the rest at the end of
+    # a run; the Redis step log is authoritative in between. The deltas of a
+    # thinking segment are joined in memory and reach the step log as one frame
+    # per flush, so the log grows with steps rather than with streamed tokens.
+    HISTORY_DB_FLUSH_INTERVAL = 2.0
 
     def __init__(self, session_version_id: str):
         """
@@ -102,10 +147,23 @@ class LinsightStateMessageManager:
             "session_version_info": f"{self._key_prefix}session_version_info",
             "messages": f"{self._key_prefix}messages",
             "execution_tasks": f"{self._key_prefix}execution_tasks:",
+            # one append-only list of step frames per task, next to its header
+            "execution_steps": f"{self._key_prefix}execution_steps:",
         }
         # task_id -> event-loop monotonic time of its last `history` DB flush;
-        # drives THINKING_DB_FLUSH_INTERVAL coalescing in add_execution_task_step.
+        # drives HISTORY_DB_FLUSH_INTERVAL coalescing in add_execution_task_step.
         self._last_history_db_flush: dict[str, float] = {}
+        # tasks with steps appended by this manager that are not in the DB yet
+        self._dirty_histories: set[str] = set()
+        # task_id -> the thinking frame whose deltas are still being joined; it is
+        # appended to the step log by the next flush or the next non-delta step
+        self._pending_thinking: dict[str, dict[str, Any]] = {}
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{self._keys['execution_tasks']}{task_id}"
+
+    def _steps_key(self, task_id: str) -> str:
+        return f"{self._keys['execution_steps']}{task_id}"
 
     async def _handle_redis_operation(self, operation, *args, **kwargs):
         """
@@ -177,7 +235,7 @@ class LinsightStateMessageManager:
                 # Write AgainRedis
                 await pipe.set(
                     self._keys["session_version_info"],
-                    pickle.dumps(session_version_model.model_dump()),
+                    self._redis_client.encode(self._keys["session_version_info"], session_version_model.model_dump()),
                     ex=self.DEFAULT_EXPIRATION,
                 )
                 await pipe.execute()
@@ -224,11 +282,23 @@ class LinsightStateMessageManager:
             return
 
         try:
-            # Batch WriteRedis
-            tasks_mapping = {f"{self._keys['execution_tasks']}{task.id}": task.model_dump() for task in tasks}
+            # Batch WriteRedis: the headers, without history
+            tasks_mapping = {self._task_key(task.id): self._task_header(task) for task in tasks}
 
             await self._redis_client.amset(tasks_mapping, expiration=self.DEFAULT_EXPIRATION)
 
+            # Seed the step log from the stored history, unless it is still live in Redis
+            # (e.g. a HITL resume replaying write_todos with rows that may trail it)
+            seeded = [task for task in tasks if task.history]
+            if seeded:
+                async with self._redis_client.async_pipeline(transaction=False) as pipe:
+                    for task in seeded:
+                        await pipe.llen(self._steps_key(task.id))
+                    lengths = await pipe.execute()
+                for task, length in zip(seeded, lengths):
+                    if not length:
+                        await self._write_task(task)
+
         except Exception as e:
             self._logger.error(f"Failed to set execution tasks: {e}")
             raise
@@ -249,6 +319,12 @@ class LinsightStateMessageManager:
             Updated task data
         """
         try:
+            # Steps still waiting for their batched DB flush go out in the same UPDATE
+            flushed = task_id in self._dirty_histories and "history" not in kwargs
+            if flushed:
+                await self._append_pending_thinking(task_id)
+                kwargs["history"] = await self._read_history(task_id)
+
             # Update database first
             task_model = await LinsightExecuteTaskDao.update_by_id(task_id, status=status, **kwargs)
             if task_model is None:
@@ -257,12 +333,15 @@ class LinsightStateMessageManager:
                 # of crashing on None.model_dump() and retrying 3x.
                 self._logger.warning(f"Task {task_id} not found; skipping status update")
                 return {}
+            if flushed:
+                self._mark_history_flushed(task_id)
 
-            # Update againRedis
-            task_key = f"{self._keys['execution_tasks']}{task_id}"
+            # Update againRedis: only the header, the step log stays as it is
             task_data = task_model.model_dump()
 
-            await self._redis_client.aset(task_key, task_data, expiration=self.DEFAULT_EXPIRATION)
+            await self._redis_client.aset(
+                self._task_key(task_id), self._task_header(task_model), expiration=self.DEFAULT_EXPIRATION
+            )
 
             self._logger.info(f"Updated task {task_id} status to {status}")
             return task_data
@@ -281,9 +360,9 @@ class LinsightStateMessageManager:
             user_input: User input
             files: Related Documents List
         """
-        task_key = f"{self._keys['execution_tasks']}{task_id}"
-
         try:
+            # _write_task below replaces the step log with the history read here
+            await self._append_pending_thinking(task_id)
             task_model = await self.get_execution_task(task_id)
 
             if not task_model:
@@ -323,9 +402,7 @@ class LinsightStateMessageManager:
             task_model.task_data = {**(task_model.task_data or {}), "clarify_answers": clarify_answers}
 
             # Using Transactions to Ensure Data Consistency
-            async with self._redis_client.async_pipeline() as pipe:
-                await pipe.set(task_key, pickle.dumps(task_model.model_dump()), ex=self.DEFAULT_EXPIRATION)
-                await pipe.execute()
+            await self._write_task(task_model)
 
             # Database updating
             await LinsightExecuteTaskDao.update_by_id(
@@ -335,6 +412,8 @@ class LinsightStateMessageManager:
                 task_data=task_model.task_data,
             )
 
+            self._mark_history_flushed(task_id)
+
             self._logger.info(f"Set user input for task {task_id}")
 
         except Exception as e:
@@ -358,6 +437,7 @@ class LinsightStateMessageManager:
         no answer yet is left untouched. Best-effort and idempotent.
         """
         try:
+            await self._append_pending_thinking(task_id)
             task_model = await self.get_execution_task(task_id)
             if not task_model or not task_model.history:
                 return
@@ -383,9 +463,9 @@ class LinsightStateMessageManager:
             if not changed:
                 return
 
-            task_key = f"{self._keys['execution_tasks']}{task_id}"
-            await self._redis_client.aset(task_key, task_model.model_dump(), expiration=self.DEFAULT_EXPIRATION)
+            await self._write_task(task_model)
             await LinsightExecuteTaskDao.update_by_id(task_id, history=task_model.history)
+            self._mark_history_flushed(task_id)
             self._logger.info(f"Re-stamped {answer_idx} clarify answer(s) onto task {task_id} history")
         except Exception as e:
             # Non-critical: live rendering is unaffected; only the refreshed view
@@ -403,13 +483,13 @@ class LinsightStateMessageManager:
         Returns:
             Execute Task Model orNone
         """
-        task_key = f"{self._keys['execution_tasks']}{task_id}"
-
         try:
-            task_data = await self._redis_client.aget(task_key)
+            header, steps = await self._read_task(task_id)
 
-            if task_data:
-                return LinsightExecuteTask.model_validate(task_data)
+            if header:
+                task_model = LinsightExecuteTask.model_validate(header)
+                task_model.history = merge_execution_steps(steps, header.get("history"))
+                return task_model
 
             # Not in Redis — fall back to the database.
             task_model = await LinsightExecuteTaskDao.get_by_id(task_id)
@@ -425,80 +505,86 @@ class LinsightStateMessageManager:
             self._logger.error(f"Failed to get execution task {task_id}: {e}")
             return None
 
+    async def get_execution_task_steps(
+        self, task_id: str, start: int = 0, count: int = 100
+    ) -> tuple[list[dict[str, Any]], int]:
+        """
+        Read a page of the task's step log, oldest first
+
+        The log holds the frames add_execution_task_step appended (a thinking
+        segment is many deltas, a tool call a start and an end frame); fold them
+        with merge_execution_steps. Passing the returned cursor back as ``start``
+        reads only the frames appended since, so a live view never re-reads the
+        whole history; a negative ``start`` reads the last ``-start`` frames.
+        Thinking text still being joined by this manager is not in the log yet.
+
+        Args:
+            task_id: TaskID
+            start: Index of the first frame, negative to count from the end
+            count: Maximum number of frames
+
+        Returns:
+            The frames and the cursor of the next page
+        """
+        steps_key = self._steps_key(task_id)
+        end = start + count - 1 if start >= 0 or start + count < 0 else -1
+        async with self._redis_client.async_pipeline(transaction=False) as pipe:
+            await pipe.lrange(steps_key, start, end)
+            await pipe.llen(steps_key)
+            frames, length = await pipe.execute()
+
+        first = start if start >= 0 else max(length + start, 0)
+        return [self._redis_client.decode(frame) for frame in frames], first + len(frames)
+
     @retry_async(num_retries=DEFAULT_RETRY_ATTEMPTS, delay=DEFAULT_RETRY_DELAY)
     async def add_execution_task_step(self, task_id: str, step: BaseEvent) -> None:
         """
         Add Execute Task Step
 
+        The frame is appended to the task's step log: one RPUSH however long the
+        history already is, and concurrent writers never overwrite each other's
+        steps. Readers fold the frames into history entries (merge_execution_steps).
+        The deltas of a thinking segment are joined here first and appended as one
+        frame at the next history flush, or ahead of the next step that is not one
+        of its deltas.
+
         Args:
             task_id: TaskID
             step: Execution Steps
         """
-        task_key = f"{self._keys['execution_tasks']}{task_id}"
+        step_dump = step.model_dump()
+        step_type = step_dump.get("step_type")
 
         try:
-            task_data = await self.get_execution_task(task_id)
+            pending = self._pending_thinking.pop(task_id, None)
+            if step_type == "thinking" and step_dump.get("call_id"):
+                if pending and pending.get("call_id") == step_dump["call_id"]:
+                    step_dump = {**step_dump, "output": (pending.get("output") or "") + (step_dump.get("output") or "")}
+                    pending = None
+                frames = [pending] if pending else []
+            else:
+                frames = [pending, step_dump] if pending else [step_dump]
 
-            if not task_data:
+            if frames and not await self._append_steps(task_id, frames):
                 # Orphan step: a top-level agent step whose task_id is the
                 # session id (no sub-task was planned for it). Skip persistence
                 # instead of failing the whole run — the caller still streams
                 # the step to the client via push_message.
                 self._logger.warning(f"Task {task_id} not found; skipping step persistence")
                 return
-
-            task_model = LinsightExecuteTask.model_validate(task_data)
-
-            # Initialization History
-            if task_model.history is None:
-                task_model.history = []
-
-            # Upsert by call_id so a streamed step is stored as ONE history entry
-            # instead of one-per-token / one-per-frame (F035 problem 1,
-            # design-增量-步骤持久化修复.md):
-            #   - thinking: deltas accumulate (concatenate output text)
-            #   - tool/knowledge/subagent: the end frame supersedes the start
-            #     frame (same call_id; end carries params + output)
-            #   - no call_id (NeedUserInput call_user_input step): append, so
-            #     set_user_input can still read history[-1].
-            step_dump = step.model_dump()
-            call_id = step_dump.get("call_id")
-            merged = False
-            if call_id:
-                for i in range(len(task_model.history) - 1, -1, -1):
-                    prev = task_model.history[i]
-                    if isinstance(prev, dict) and prev.get("call_id") == call_id:
-                        if step_dump.get("step_type") == "thinking":
-                            step_dump["output"] = (prev.get("output") or "") + (step_dump.get("output") or "")
-                        task_model.history[i] = step_dump
-                        merged = True
-                        break
-            if not merged:
-                task_model.history.append(step_dump)
-
-            # Redis always carries the freshest history: get_execution_task reads
-            # it back to accumulate the next step, and the live WS view derives from
-            # push_message — so it is written every step (no -7120 risk on Redis).
-            await self._redis_client.aset(task_key, task_model.model_dump(), expiration=self.DEFAULT_EXPIRATION)
-
-            # DB write-amplification guard (DM8 -7120 incident, 2026-06): a thinking
-            # segment streams as many token-delta frames that all merge into ONE
-            # history entry. Rewriting the whole (growing, ~MB) history JSON to the
-            # DB on every such delta is what exhausted the DM8 undo segment and
-            # wedged the giant UPDATE. Coalesce them — a merged thinking delta flushes
-            # the DB at most once per THINKING_DB_FLUSH_INTERVAL. EVERY other frame
-            # (tool / subagent / knowledge / call_user_input, a NEW thinking segment's
-            # first delta, anything non-thinking) flushes immediately, so deliverables
-            # / outputs / a reloaded view are never behind. Redis stays authoritative
-            # in the throttle window, so no step is lost.
-            now = asyncio.get_event_loop().time()
-            is_thinking_delta = merged and step_dump.get("step_type") == "thinking"
-            recently_flushed = (
-                now - self._last_history_db_flush.get(task_id, float("-inf"))
-            ) < self.THINKING_DB_FLUSH_INTERVAL
-            if not (is_thinking_delta and recently_flushed):
-                await LinsightExecuteTaskDao.update_by_id(task_id, history=task_model.history)
-                self._last_history_db_flush[task_id] = now
+            if step_type == "thinking" and step_dump.get("call_id"):
+                self._pending_thinking[task_id] = step_dump
+
+            # The DB keeps the folded history in one JSON column: rewrite it at most once
+            # per HISTORY_DB_FLUSH_INTERVAL. A call_user_input step parks the task, so it
+            # is persisted right away for the resume to find.
+            self._dirty_histories.add(task_id)
+            last_flush = self._last_history_db_flush.get(task_id, float("-inf"))
+            if (
+                step_type == "call_user_input"
+                or asyncio.get_event_loop().time() - last_flush >= self.HISTORY_DB_FLUSH_INTERVAL
+            ):
+                await self.flush_execution_history(task_id)
 
             # Tool-call steps carry the model's chosen input params (e.g. the
             # knowledge_id / query passed to search_knowledge_base) + result. The
@@ -506,7 +592,6 @@ class LinsightStateMessageManager:
             # later investigation (e.g. "why was this knowledge base searched?")
             # is greppable from the backend log without dumping the history JSON.
             # Thinking deltas merge per-token, so they are left to the bland line.
-            step_type = step_dump.get("step_type")
             if step_type in ("tool_call", "knowledge", "subagent", "call_user_input"):
                 self._logger.info(
                     f"Tool step persisted task={task_id} call_id={step_dump.get('call_id')!r} "
@@ -520,6 +605,101 @@ class LinsightStateMessageManager:
             self._logger.error(f"Failed to add step to task {task_id}: {e}")
             raise
 
+    async def _append_steps(self, task_id: str, step_dumps: list[dict[str, Any]]) -> bool:
+        """Append frames to the task's step log; False when the task is unknown"""
+        task_key = self._task_key(task_id)
+        steps_key = self._steps_key(task_id)
+        frames = [self._redis_client.encode(steps_key, step_dump) for step_dump in step_dumps]
+
+        # Refreshing the header's TTL doubles as the existence check: it answers 0
+        # when the header is not in Redis (never loaded here, or expired while the
+        # task sat idle), and the task is then reloaded before its log is extended.
+        async with self._redis_client.async_pipeline(transaction=False) as pipe:
+            await pipe.expire(task_key, self.DEFAULT_EXPIRATION)
+            await pipe.rpush(steps_key, *frames)
+            await pipe.expire(steps_key, self.DEFAULT_EXPIRATION)
+            header_alive, _, _ = await pipe.execute()
+
+        if not header_alive:
+            # Drop the frames so the reload can seed the log from the DB history
+            await self._redis_client.adelete(steps_key)
+            if not await self.get_execution_task(task_id):
+                return False
+            async with self._redis_client.async_pipeline(transaction=False) as pipe:
+                await pipe.rpush(steps_key, *frames)
+                await pipe.expire(steps_key, self.DEFAULT_EXPIRATION)
+                await pipe.execute()
+        return True
+
+    async def _append_pending_thinking(self, task_id: str) -> None:
+        """Move the task's joined thinking deltas, if any, into its step log"""
+        pending = self._pending_thinking.pop(task_id, None)
+        if pending:
+            await self._append_steps(task_id, [pending])
+
+    async def flush_execution_history(self, task_id: str) -> None:
+        """
+        Write the task's history, folded from its step log, to the database
+
+        Args:
+            task_id: TaskID
+        """
+        if task_id not in self._dirty_histories:
+            return
+        await self._append_pending_thinking(task_id)
+        history = await self._read_history(task_id)
+        await LinsightExecuteTaskDao.update_by_id(task_id, history=history)
+        self._mark_history_flushed(task_id)
+
+    async def flush_execution_histories(self) -> None:
+        """
+        Write every history with steps not yet in the database; called when a run ends
+        """
+        for task_id in list(self._dirty_histories):
+            try:
+                await self.flush_execution_history(task_id)
+            except Exception as e:
+                self._logger.error(f"Failed to flush history of task {task_id}: {e}")
+
+    async def _read_task(self, task_id: str) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+        """The task's header and step log frames, in one round trip"""
+        async with self._redis_client.async_pipeline(transaction=False) as pipe:
+            await pipe.get(self._task_key(task_id))
+            await pipe.lrange(self._steps_key(task_id), 0, -1)
+            header, frames = await pipe.execute()
+        decode = self._redis_client.decode
+        steps = [decode(frame) for frame in frames]
+        if task_id in self._pending_thinking:
+            steps.append(self._pending_thinking[task_id])
+        return (decode(header) if header else None), steps
+
+    async def _read_history(self, task_id: str) -> list[dict[str, Any]]:
+        header, steps = await self._read_task(task_id)
+        return merge_execution_steps(steps, (header or {}).get("history"))
+
+    async def _write_task(self, task: LinsightExecuteTask) -> None:
+        """Replace the task's header and step log, one frame per history entry, atomically"""
+        task_key = self._task_key(task.id)
+        steps_key = self._steps_key(task.id)
+        async with self._redis_client.async_pipeline() as pipe:
+            await pipe.set(
+                task_key, self._redis_client.encode(task_key, self._task_header(task)), ex=self.DEFAULT_EXPIRATION
+            )
+            await pipe.delete(steps_key)
+            if task.history:
+                await pipe.rpush(steps_key, *[self._redis_client.encode(steps_key, entry) for entry in task.history])
+                await pipe.expire(steps_key, self.DEFAULT_EXPIRATION)
+            await pipe.execute()
+
+    def _mark_history_flushed(self, task_id: str) -> None:
+        self._dirty_histories.discard(task_id)
+        self._last_history_db_flush[task_id] = asyncio.get_event_loop().time()
+
+    @staticmethod
+    def _task_header(task: LinsightExecuteTask) -> dict[str, Any]:
+        # history lives in the step log
+        return task.model_dump(exclude={"history"})
+
     async def get_execution_tasks(self):
         """
         Get All Execute Tasks
@@ -534,8 +714,20 @@ class LinsightStateMessageManager:
             if not task_keys:
                 return []
 
-            tasks_data = await self._redis_client.amget(task_keys)
-            tasks = [LinsightExecuteTask.model_validate(task) for task in tasks_data if task]
+            headers = [header for header in await self._redis_client.amget(task_keys) if header]
+            tasks = []
+            if headers:
+                async with self._redis_client.async_pipeline(transaction=False) as pipe:
+                    for header in headers:
+                        await pipe.lrange(self._steps_key(header["id"]), 0, -1)
+                    step_logs = await pipe.execute()
+                for header, frames in zip(headers, step_logs):
+                    task = LinsightExecuteTask.model_validate(header)
+                    steps = [self._redis_client.decode(frame) for frame in frames]
+                    if header["id"] in self._pending_thinking:
+                        steps.append(self._pending_thinking[header["id"]])
+                    task.history = merge_execution_steps(steps, header.get("history"))
+                    tasks.append(task)
 
             if not tasks:
                 tasks = await LinsightExecuteTaskDao.get_by_session_version_id(
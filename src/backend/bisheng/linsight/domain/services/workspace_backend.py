@@ -19,6 +19,11 @@ Key properties (design §9.3.2):
     cache miss.
   - **ls authoritative from MinIO**: directory listings reflect the object store,
     not just the local cache.
+  - **workspace index**: ``glob``/``grep`` resolve paths against a per-task index
+    (path, size, etag, mtime) built from one MinIO listing, kept in sync by this
+    backend's own writes and re-listed every ``INDEX_REFRESH_INTERVAL`` seconds to
+    pick up objects written around it. The local cache is validated against the
+    indexed etag, so ``grep`` only downloads files that are missing or changed.
   - **tenant isolation**: every object key is prefixed ``workspace/{svid}/`` and
     the cache lives under a per-session ``file_dir``.
 
@@ -35,8 +40,10 @@ MinIO layout under ``workspace/{svid}/``:
 from __future__ import annotations
 
 import asyncio
+import fnmatch
 import hashlib
 import os
+import threading
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -203,6 +210,10 @@ class WorkspaceBackend(FilesystemBackend):
         file_dir: local cache directory (per-task; safe to clear).
     """
 
+    INDEX_REFRESH_INTERVAL = 30.0
+    """Seconds a listing-built workspace index is trusted before glob/grep list
+    MinIO again (picks up objects written around this backend, e.g. attachments)."""
+
     def __init__(self, svid: str, minio, file_dir: str) -> None:
         if not _DEEPAGENTS_AVAILABLE:
             # TODO(Wave2): align with deepagents FilesystemBackend once the
@@ -217,6 +228,13 @@ class WorkspaceBackend(FilesystemBackend):
         self.minio = minio
         self.file_dir = file_dir
         os.makedirs(self.file_dir, exist_ok=True)
+        # Workspace index: rel path -> FileEntry whose ``md5`` holds the object
+        # etag. Built lazily from one listing; None until then.
+        self._index: dict[str, FileEntry] | None = None
+        self._index_listed_at = 0.0
+        # etag of the bytes currently held in the local cache, per rel path.
+        self._cached_etags: dict[str, str] = {}
+        self._index_lock = threading.Lock()
 
     # -- key / cache helpers ------------------------------------------------
     def _object_key(self, rel_path: str) -> str:
@@ -262,15 +280,135 @@ class WorkspaceBackend(FilesystemBackend):
         if data is None:
             return None
         self._cache_write(rel_path, data)
+        self._cached_etags[rel_path] = self.md5_bytes(data)
         return data
 
     def _materialize(self, rel_path: str) -> bytes | None:
         """Return file bytes, preferring cache, lazily loading from MinIO."""
+        index = self._index
+        entry = index.get(rel_path) if index is not None else None
+        if entry is not None:
+            return self._read_indexed(entry)
         data = self._cache_read(rel_path)
         if data is not None:
             return data
         return self._load_into_cache(rel_path)
 
+    # -- workspace index ----------------------------------------------------
+    def _list_entries(self, rel_prefix: str = "") -> list[FileEntry]:
+        """List MinIO objects under ``rel_prefix`` as workspace-relative entries."""
+        key_prefix = f"{WORKSPACE_PREFIX}/{self.svid}/"
+        objects = self.minio.minio_client_sync.list_objects(
+            self._bucket(), prefix=key_prefix + rel_prefix, recursive=True
+        )
+        entries: list[FileEntry] = []
+        for obj in objects:
+            # Return workspace-relative paths (strip the ``workspace/{svid}/``
+            # object-key prefix). Otherwise the agent reads back the listed
+            # path and _object_key prepends the prefix a second time, yielding
+            # ``workspace/{svid}/workspace/{svid}/...`` (NoSuchKey).
+            name = obj.object_name
+            modified = getattr(obj, "last_modified", None)
+            entries.append(
+                FileEntry(
+                    path=name[len(key_prefix) :] if name.startswith(key_prefix) else name,
+                    size=int(getattr(obj, "size", 0) or 0),
+                    md5=(getattr(obj, "etag", None) or "").strip('"'),
+                    is_dir=bool(getattr(obj, "is_dir", False)),
+                    mtime=modified.timestamp() if modified is not None else time.time(),
+                )
+            )
+        return entries
+
+    def _merge_listing(self, rel_prefix: str, entries: list[FileEntry], listed_since: float) -> None:
+        """Replace the indexed subtree under ``rel_prefix`` with a fresh listing.
+
+        Entries this backend wrote after the listing started (``mtime`` at or
+        after ``listed_since``) are kept even when the listing missed them.
+        """
+        with self._index_lock:
+            previous = self._index
+            if previous is None and rel_prefix:
+                # A partial listing cannot stand in for the whole workspace.
+                return
+            index = {
+                path: entry
+                for path, entry in (previous or {}).items()
+                if not path.startswith(rel_prefix) or entry.mtime >= listed_since
+            }
+            for entry in entries:
+                kept = index.get(entry.path)
+                if not entry.is_dir and (kept is None or kept.mtime < listed_since):
+                    index[entry.path] = entry
+            self._index = index
+            if not rel_prefix:
+                self._index_listed_at = time.monotonic()
+
+    def _workspace_index(self) -> dict[str, FileEntry]:
+        """Return the workspace index, listing MinIO when missing or stale."""
+        with self._index_lock:
+            fresh = (
+                self._index is not None
+                and time.monotonic() - self._index_listed_at < self.INDEX_REFRESH_INTERVAL
+            )
+        if not fresh:
+            listed_since = time.time()
+            self._merge_listing("", self._list_entries(), listed_since)
+        return self._index
+
+    def _indexed_entries(self, base: str, pattern: str | None = None) -> list[FileEntry]:
+        """Indexed files under ``base`` whose path or basename match ``pattern``."""
+        index = self._workspace_index()
+        with self._index_lock:
+            entries = [entry for path, entry in index.items() if path.startswith(base)]
+        if pattern:
+            entries = [
+                entry
+                for entry in entries
+                if fnmatch.fnmatch(entry.path, pattern) or fnmatch.fnmatch(os.path.basename(entry.path), pattern)
+            ]
+        return sorted(entries, key=lambda entry: entry.path)
+
+    def _read_indexed(self, entry: FileEntry) -> bytes | None:
+        """Return an indexed file's bytes, downloading only when the cache is stale.
+
+        The cached copy is served when it was stored for the indexed etag, or
+        when its content hashes to it (a cache left by an earlier run); anything
+        else is fetched from MinIO.
+        """
+        rel = entry.path
+        data = self._cache_read(rel)
+        if data is not None:
+            if self._cached_etags.get(rel) == entry.md5:
+                return data
+            if len(data) == entry.size and self.md5_bytes(data) == entry.md5:
+                self._cached_etags[rel] = entry.md5
+                return data
+        data = self._load_into_cache(rel)
+        with self._index_lock:
+            if data is None:
+                # Deleted behind the index's back: forget it until the next listing.
+                if self._index is not None:
+                    self._index.pop(rel, None)
+                self._cached_etags.pop(rel, None)
+            else:
+                # A multipart or encrypted upload's etag is not the content md5;
+                # pin the cache to the etag it was fetched for.
+                self._cached_etags[rel] = entry.md5
+        return data
+
+    def _record_write(self, rel_path: str, data: bytes) -> None:
+        """Keep the index and cache etags in sync with a write-through."""
+        etag = self.md5_bytes(data)
+        with self._index_lock:
+            self._cached_etags[rel_path] = etag
+            if self._index is not None:
+                self._index[rel_path] = FileEntry(path=rel_path, size=len(data), md5=etag)
+
+    @staticmethod
+    def _file_info(entry: FileEntry) -> FileInfo:
+        return FileInfo(path="/" + entry.path, is_dir=entry.is_dir, size=entry.size)
+
     @staticmethod
     def _to_bytes(content) -> bytes:
         if isinstance(content, bytes):
@@ -292,6 +430,7 @@ class WorkspaceBackend(FilesystemBackend):
         # cache first (fast local), then write-through to MinIO (truth).
         self._cache_write(rel, data)
         self._minio_put_sync(rel, data)
+        self._record_write(rel, data)
         return WriteResult(path="/" + rel)
 
     # -- read ---------------------------------------------------------------
@@ -310,31 +449,15 @@ class WorkspaceBackend(FilesystemBackend):
     # -- ls (authoritative from MinIO) --------------------------------------
     def ls(self, path: str = "") -> LsResult:
         rel_prefix = normalize_workspace_path(path) if path else ""
-        object_prefix = f"{WORKSPACE_PREFIX}/{self.svid}/"
-        if rel_prefix:
-            object_prefix += rel_prefix
-        entries: list[FileInfo] = []
-        key_prefix = f"{WORKSPACE_PREFIX}/{self.svid}/"
         try:
-            objects = self.minio.minio_client_sync.list_objects(self._bucket(), prefix=object_prefix, recursive=True)
-            for obj in objects:
-                # Return workspace-relative paths (strip the ``workspace/{svid}/``
-                # object-key prefix). Otherwise the agent reads back the listed
-                # path and _object_key prepends the prefix a second time, yielding
-                # ``workspace/{svid}/workspace/{svid}/...`` (NoSuchKey).
-                name = obj.object_name
-                rel_key = name[len(key_prefix) :] if name.startswith(key_prefix) else name
-                entries.append(
-                    FileInfo(
-                        path="/" + rel_key,
-                        is_dir=bool(getattr(obj, "is_dir", False)),
-                        size=int(getattr(obj, "size", 0) or 0),
-                    )
-                )
+            listed_since = time.time()
+            listed = self._list_entries(rel_prefix)
         except Exception as e:
             logger.exception("workspace ls failed for svid=%s prefix=%s", self.svid, path)
             return LsResult(error=f"Error listing '{path}': {e}")
-        return LsResult(entries=entries)
+        # The listing is fresh truth: fold it into the index glob/grep read.
+        self._merge_listing(rel_prefix, listed, listed_since)
+        return LsResult(entries=[self._file_info(entry) for entry in listed])
 
     # -- edit (cache mutation + write-through) ------------------------------
     def edit(
@@ -364,49 +487,38 @@ class WorkspaceBackend(FilesystemBackend):
         new_data = new_text.encode("utf-8")
         self._cache_write(rel, new_data)
         self._minio_put_sync(rel, new_data)
+        self._record_write(rel, new_data)
         return EditResult(path="/" + rel, occurrences=occurrences)
 
-    # -- glob ---------------------------------------------------------------
+    # -- glob (resolved against the workspace index) -----------------------
     def glob(self, pattern: str, path: str | None = None) -> GlobResult:
-        import fnmatch
-
         base = normalize_workspace_path(path) if path else ""
-        ls_res = self.ls(base)
-        if ls_res.error is not None:
-            return GlobResult(error=ls_res.error)
-        prefix = f"/{WORKSPACE_PREFIX}/{self.svid}/"
-        matches: list[FileInfo] = []
-        for entry in ls_res.entries or []:
-            rel = entry["path"]
-            rel_in_ws = rel[len(prefix) :] if rel.startswith(prefix) else rel.lstrip("/")
-            if fnmatch.fnmatch(rel_in_ws, pattern) or fnmatch.fnmatch(os.path.basename(rel_in_ws), pattern):
-                matches.append(entry)
-        return GlobResult(matches=matches)
-
-    # -- grep ---------------------------------------------------------------
+        try:
+            entries = self._indexed_entries(base, pattern)
+        except Exception as e:
+            logger.exception("workspace glob failed for svid=%s prefix=%s", self.svid, path)
+            return GlobResult(error=f"Error listing '{base}': {e}")
+        return GlobResult(matches=[self._file_info(entry) for entry in entries])
+
+    # -- grep (reads only files missing from or stale in the cache) ---------
     def grep(self, pattern: str, path: str | None = None, glob: str | None = None) -> GrepResult:
         from deepagents.backends.protocol import GrepMatch
 
         base = normalize_workspace_path(path) if path else ""
-        ls_res = self.ls(base)
-        if ls_res.error is not None:
-            return GrepResult(error=ls_res.error)
-        prefix = f"/{WORKSPACE_PREFIX}/{self.svid}/"
+        try:
+            entries = self._indexed_entries(base, glob)
+        except Exception as e:
+            logger.exception("workspace grep failed for svid=%s prefix=%s", self.svid, path)
+            return GrepResult(error=f"Error listing '{base}': {e}")
         matches: list = []
-        import fnmatch
-
-        for entry in ls_res.entries or []:
-            full = entry["path"]
-            rel_in_ws = full[len(prefix) :] if full.startswith(prefix) else full.lstrip("/")
-            if glob and not (fnmatch.fnmatch(rel_in_ws, glob) or fnmatch.fnmatch(os.path.basename(rel_in_ws), glob)):
-                continue
-            data = self._materialize(rel_in_ws)
+        for entry in entries:
+            data = self._read_indexed(entry)
             if data is None:
                 continue
             text = data.decode("utf-8", errors="replace")
             for lineno, line in enumerate(text.splitlines(), start=1):
                 if pattern in line:
-                    matches.append(GrepMatch(path=full, line=lineno, text=line))
+                    matches.append(GrepMatch(path="/" + entry.path, line=lineno, text=line))
         return GrepResult(matches=matches)
 
     # -- upload / download (worker <-> workspace bulk ops) ------------------
@@ -418,6 +530,7 @@ class WorkspaceBackend(FilesystemBackend):
                 data = self._to_bytes(content)
                 self._cache_write(rel, data)
                 self._minio_put_sync(rel, data)
+                self._record_write(rel, data)
                 responses.append(FileUploadResponse(path="/" + rel))
             except ValueError:
                 responses.append(FileUploadResponse(path=raw_path, error="invalid_path"))
@@ -451,6 +564,7 @@ class WorkspaceBackend(FilesystemBackend):
             object_name=self._object_key(rel),
             file=data,
         )
+        self._record_write(rel, data)
         return WriteResult(path="/" + rel)
 
     async def aread(self, file_path: str, offset: int = 0, limit: int = 2000) -> ReadResult:
@@ -473,6 +587,7 @@ class WorkspaceBackend(FilesystemBackend):
                 data = None
             if data is not None:
                 await asyncio.to_thread(self._cache_write, rel, data)
+                self._cached_etags[rel] = self.md5_bytes(data)
         if data is None:
             return ReadResult(error=f"File '{file_path}' not found")
         text = data.decode("utf-8", errors="replace")
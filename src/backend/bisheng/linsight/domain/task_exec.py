@@ -144,6 +144,10 @@ class LinsightWorkflowTask:
             # Stop Terminating Monitoring
             await self._stop_termination_monitor()
 
+            # Persist step histories still waiting for their batched DB write
+            if self._state_manager:
+                await self._state_manager.flush_execution_histories()
+
             # Clean File Directory
             if self.file_dir and os.path.exists(self.file_dir):
                 shutil.rmtree(self.file_dir, ignore_errors=True)
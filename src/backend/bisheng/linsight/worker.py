@@ -1,7 +1,6 @@
 import argparse
 import asyncio
 import logging
-import pickle
 import socket
 import uuid
 from multiprocessing import Manager, Process, set_start_method
@@ -138,36 +137,140 @@ class NodeManager:
         return exists > 0
 
 
+# Payloads are stored under "<session_version_id>:<score>", so a put that lands
+# between a pop and its payload fetch re-adds the member under a new score and
+# keeps its own payload. Adding with ZADD NX and the payload write run as one
+# script so the field always matches the member's score.
+_QUEUE_ADD = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score then
+    score = redis.call('INCR', KEYS[3]) * tonumber(ARGV[3])
+    redis.call('ZADD', KEYS[1], score, ARGV[1])
+end
+redis.call('HSET', KEYS[2], ARGV[1] .. ':' .. string.format('%d', tonumber(score)), ARGV[2])
+local ttl = tonumber(ARGV[4])
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+_QUEUE_REMOVE = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[2], ARGV[1] .. ':' .. string.format('%d', tonumber(score)))
+end
+return 1
+"""
+
+
 # LinsightQueue queue
 class LinsightQueue:
+    """
+    Linsight task queue: two sorted sets sharing one hash tag (so a cluster keeps
+    them in one slot), each member a session_version_id scored by an INCR sequence,
+    with the item payloads in a hash per lane.
+
+      - ``new`` lane: put() appends at the tail, FIFO;
+      - ``resume`` lane: put_head() items are served before any new task, newest
+        first, exactly like the LPUSH to the head of the list they replace.
+
+    Rank and removal are O(log n) instead of an LRANGE + decode of the whole queue
+    per position poll. A session has at most one item per lane: enqueuing it again
+    keeps its place and takes the latest payload; enqueuing it after it was popped
+    queues a new item. Items still in the list written
+    by the previous release (``namespace:name``) are served first and counted in
+    positions until it is drained.
+    """
+
+    # get_wait re-checks the legacy list at least this often (seconds) while blocking
+    LEGACY_POLL_INTERVAL = 5
+
     def __init__(self, name, namespace, redis):
         self.__db: RedisClient = redis
         self.key = "%s:%s" % (namespace, name)
+        tag = "{%s}" % self.key
+        self._seq_key = f"{tag}:seq"
+        self._lanes = {
+            "resume": (f"{tag}:resume", f"{tag}:resume:items"),
+            "new": (f"{tag}:new", f"{tag}:new:items"),
+        }
+        self._add_item = self.__db.async_connection.register_script(_QUEUE_ADD)
+        self._remove_item = self.__db.async_connection.register_script(_QUEUE_REMOVE)
 
     async def qsize(self):
-        return await self.__db.allen(self.key)  # Back to queuelistNumber of inner elements
+        async with self.__db.async_pipeline(transaction=False) as pipe:
+            for zset_key, _ in self._lanes.values():
+                await pipe.zcard(zset_key)
+            await pipe.llen(self.key)
+            return sum(await pipe.execute())
 
     async def put(self, data, timeout=None):
-        await self.__db.arpush(self.key, data, expiration=timeout)  # Add a new element to the far right of the queue
+        # Add a new task at the tail of the queue
+        await self._add("new", data, 1, timeout)
 
     async def put_head(self, data, timeout=None):
-        # Add a new element to the far LEFT (head) of the queue so it is picked
-        # up before any tail-queued task. Used by park-and-release for resume
-        # items (PRD §4.4.4: an answered task continues ahead of new tasks).
-        # RedisClient.alpush does not pickle, but ablpop/lrange unpickle, so we
-        # must pickle here to keep the queue's serialization uniform with put().
-        payload = pickle.dumps(data) if not isinstance(data, bytes) else data
-        await self.__db.alpush(self.key, payload, expiration=timeout)
+        # Add an item ahead of every new task so it is picked up first. Used by
+        # park-and-release for resume items (PRD §4.4.4: an answered task
+        # continues ahead of new tasks).
+        await self._add("resume", data, -1, timeout)
+
+    async def _add(self, lane: str, data, direction: int, timeout=None):
+        zset_key, items_key = self._lanes[lane]
+        session_version_id = _item_session_version_id(data)
+        payload = self.__db.encode(self.key, data) if not isinstance(data, bytes) else data
+        await self._add_item(
+            keys=[zset_key, items_key, self._seq_key],
+            args=[session_version_id, payload, direction, int(timeout or 0)],
+        )
 
     async def get_wait(self, timeout=None):
         # Returns the first element of the queue, if empty, wait until an element is queued (the timeout threshold istimeout, if isNonehas been waiting)
-        item = await self.__db.ablpop(self.key, timeout=timeout)
-        return item
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        zset_keys = [zset_key for zset_key, _ in self._lanes.values()]
+        while True:
+            legacy = await self.__db.alpop(self.key)
+            if legacy is not None:
+                return self.__db.decode(legacy)
+            wait = self.LEGACY_POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+                if wait <= 0:
+                    return None
+            popped = await self.__db.async_connection.bzpopmin(zset_keys, timeout=wait)
+            if popped is not None:
+                item = await self._take(*popped)
+                if item is not None:
+                    return item
 
     async def get_nowait(self):
         # Returns the first element of the queue directly, if the queue is emptyNone
-        item = await self.__db.alpop(self.key)
-        return item
+        legacy = await self.__db.alpop(self.key)
+        if legacy is not None:
+            return self.__db.decode(legacy)
+        for zset_key, _ in self._lanes.values():
+            while popped := await self.__db.async_connection.zpopmin(zset_key):
+                item = await self._take(zset_key, *popped[0])
+                if item is not None:
+                    return item
+        return None
+
+    async def _take(self, zset_key, session_version_id, score):
+        """Payload of a popped member; None when remove() deleted it in between"""
+        if isinstance(zset_key, bytes):
+            zset_key = zset_key.decode()
+        if isinstance(session_version_id, bytes):
+            session_version_id = session_version_id.decode()
+        items_key = next(items for zset, items in self._lanes.values() if zset == zset_key)
+        field = f"{session_version_id}:{int(score)}"
+        async with self.__db.async_pipeline() as pipe:
+            await pipe.hget(items_key, field)
+            await pipe.hdel(items_key, field)
+            payload, _ = await pipe.execute()
+        return self.__db.decode(payload) if payload is not None else None
 
     # Get the position of a task's data in the queue
     async def index(self, session_version_id):
@@ -176,24 +279,26 @@ class LinsightQueue:
 
         Position semantics (C1, consumed by frontend Track H): the returned
         1-based index counts ONLY new (resume=False) tasks ahead of the target,
-        because resume items are lpush'd to the head to jump the queue and must
-        NOT inflate other users' perceived wait position. A resume item itself
-        has no queue position (returns 0). Items are addressed by
-        session_version_id, tolerating both dict and legacy bare-string entries.
+        because resume items are queued ahead of new tasks and must NOT inflate
+        other users' perceived wait position. A resume item itself has no queue
+        position (returns 0).
 
         :param session_version_id: the session_version_id to locate
         :return: 1-based position among new tasks; 0 if not found / not a new task
         """
-        items = await self.__db.alrange(self.key)
-        position = 0
-        for item in items:
-            if _item_is_resume(item):
-                # Resume items jump the queue; they don't count toward position.
-                continue
-            position += 1
-            if _item_session_version_id(item) == session_version_id:
-                return position
-        return 0
+        async with self.__db.async_pipeline(transaction=False) as pipe:
+            await pipe.llen(self.key)
+            await pipe.zrank(self._lanes["new"][0], session_version_id)
+            legacy_size, rank = await pipe.execute()
+        legacy_ahead = 0
+        if legacy_size:
+            for item in await self.__db.alrange(self.key):
+                if _item_is_resume(item):
+                    continue
+                legacy_ahead += 1
+                if _item_session_version_id(item) == session_version_id:
+                    return legacy_ahead
+        return 0 if rank is None else legacy_ahead + rank + 1
 
     # Delete a task data
     async def remove(self, session_version_id):
@@ -201,12 +306,14 @@ class LinsightQueue:
         Delete all queue items (new or resume) for a session_version_id.
 
         Addresses items by session_version_id so callers (e.g. terminate) need
-        not reconstruct the exact payload. Tolerates legacy bare-string entries.
+        not reconstruct the exact payload.
         """
-        items = await self.__db.alrange(self.key)
-        for item in items:
-            if _item_session_version_id(item) == session_version_id:
-                await self.__db.alrem(self.key, item)
+        for zset_key, items_key in self._lanes.values():
+            await self._remove_item(keys=[zset_key, items_key], args=[session_version_id])
+        if await self.__db.allen(self.key):
+            for item in await self.__db.alrange(self.key):
+                if _item_session_version_id(item) == session_version_id:
+                    await self.__db.alrem(self.key, item)
 
 
 class ScheduleCenterProcess(Process):
@@ -4,7 +4,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing_extensions import Self
 
 from bisheng.common.constants.enums.telemetry import ApplicationTypeEnum
-from ..models import LLMModel, LLMServer, LLMDao
+from ..models import LLMModel, LLMServer
+from ..services.usage_writer import get_llm_usage_writer
 from ..share_fallback import (
     aget_model_by_id_with_share_fallback,
     aget_server_by_id_with_share_fallback,
@@ -71,16 +72,14 @@ class BishengBase(BaseModel):
 
     async def update_model_status(self, status: int, remark: str = ''):
         """Update model status"""
-        if self.model_info.status != status:
-            self.model_info.status = status
-            await LLMDao.aupdate_model_status(self.model_id, status,
-                                              remark[-500:])  # Limit note length to500characters.
+        self.sync_update_model_status(status, remark)
 
     def sync_update_model_status(self, status: int, remark: str = ''):
-        """Update model status"""
-        if self.model_info.status != status:
-            self.model_info.status = status
-            LLMDao.update_model_status(self.model_id, status, remark[-500:])
+        """Update model status; only transitions are written, in the background"""
+        current = self.model_info.status
+        self.model_info.status = status
+        # Limit note length to500characters.
+        get_llm_usage_writer().update_model_status(self.model_id, status, remark[-500:], current=current)
 
     def get_server_info_config(self):
         if self.server_info and self.server_info.config:
@@ -1,5 +1,7 @@
+import contextvars
 import json
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Iterator, List, Tuple
 
 import numpy as np
 from langchain_core.embeddings import Embeddings
@@ -11,6 +13,7 @@ from bisheng.core.ai import OllamaEmbeddings, OpenAIEmbeddings, AzureOpenAIEmbed
     VolcengineEmbeddings
 from bisheng.llm.domain.const import LLMServerType, LLMModelType
 from .base import BishengBase
+from .embedding_cache import get_embedding_cache
 from ..models import LLMModel, LLMServer
 from ..utils import wrapper_bisheng_model_limit_check
 
@@ -94,6 +97,9 @@ class BishengEmbedding(BishengBase, Embeddings):
     max_retries: int = Field(default=6, description='embeddingNumber of failed model call retries')
     request_timeout: int = Field(default=200, description='embeddingModel Call Timeout')
     model_kwargs: dict = Field(default={}, description='embeddingModel Call Parameters')
+    batch_size: int = Field(default=64, description='Most texts sent in one embedding request')
+    max_batch_tokens: int = Field(default=0, description='Most estimated tokens in one request, 0 for no limit')
+    max_concurrency: int = Field(default=4, description='Embedding requests in flight at the same time')
 
     embeddings: Optional[Embeddings] = Field(default=None)
 
@@ -128,6 +134,11 @@ class BishengEmbedding(BishengBase, Embeddings):
         self.model_info: LLMModel = model_info
         self.server_info: LLMServer = server_info
         self.model_name = model_info.model_name
+        # batching can be tuned per model to match what the serving endpoint accepts
+        model_config = self.get_model_info_config()
+        for one in ('batch_size', 'max_batch_tokens', 'max_concurrency'):
+            if model_config.get(one):
+                setattr(self, one, int(model_config[one]))
 
         class_object = self._get_embedding_class(server_info.type)
         params = self._get_embedding_params(server_info, **kwargs)
@@ -161,21 +172,74 @@ class BishengEmbedding(BishengBase, Embeddings):
         params = params_handler(default_params, server_config, model_config)
         return params
 
-    @wrapper_bisheng_model_limit_check
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """embedding"""
-        ret = self.embeddings.embed_documents(texts)
-        # Whether the disc single vector is normalized
-        if ret:
-            vector = ret[0]
-            if np.linalg.norm(vector) != 1:
-                ret = [(np.array(doc) / np.linalg.norm(doc)).tolist() for doc in ret]
-        return ret
+        """embedding, served from the embedding cache when it is enabled"""
+        cache = get_embedding_cache()
+        if cache is None:
+            return self._embed_documents(texts)
+        return cache.embed(self.model_id, self.model_name, texts, self._embed_documents)
 
-    @wrapper_bisheng_model_limit_check
     def embed_query(self, text: str) -> List[float]:
-        """embedding"""
-        ret = self.embeddings.embed_query(text)
-        if np.linalg.norm(ret) != 1:
-            ret = (np.array(ret) / np.linalg.norm(ret)).tolist()
-        return ret
+        """embedding, served from the embedding cache when it is enabled"""
+        cache = get_embedding_cache()
+        if cache is None:
+            return self._embed_query(text)
+        return cache.embed(self.model_id, self.model_name, [text],
+                           lambda texts: [self._embed_query(one) for one in texts], kind='query')[0]
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """L2-normalize every row of the batch at once, as float32"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            return matrix
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        matrix /= norms
+        return matrix
+
+    def _iter_batches(self, texts: List[str]) -> Iterator[Tuple[int, int]]:
+        """(start, end) of every request, bounded by batch_size and max_batch_tokens"""
+        batch_size = max(1, self.batch_size)
+        start, tokens = 0, 0
+        for index, text in enumerate(texts):
+            # one token per character over-counts latin text and fits CJK, which keeps
+            # the estimate on the safe side without a tokenizer
+            text_tokens = len(text)
+            full = index - start >= batch_size or (
+                    self.max_batch_tokens and index > start and tokens + text_tokens > self.max_batch_tokens)
+            if full:
+                yield start, index
+                start, tokens = index, 0
+            tokens += text_tokens
+        if start < len(texts):
+            yield start, len(texts)
+
+    @wrapper_bisheng_model_limit_check
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self._normalize(self.embeddings.embed_documents(texts))
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = list(self._iter_batches(texts))
+        if len(batches) <= 1:
+            return self._embed_batch(texts).tolist() if texts else []
+
+        result: Optional[np.ndarray] = None
+
+        def run(start: int, end: int) -> Tuple[int, int, np.ndarray]:
+            return start, end, self._embed_batch(texts[start:end])
+
+        workers = max(1, min(self.max_concurrency, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bisheng_embedding') as executor:
+            # each request carries the caller's context vars (trace id) into the telemetry
+            futures = [executor.submit(contextvars.copy_context().run, run, start, end) for start, end in batches]
+            for future in futures:
+                start, end, vectors = future.result()
+                if result is None:
+                    result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+                result[start:end] = vectors
+        return result.tolist()
+
+    @wrapper_bisheng_model_limit_check
+    def _embed_query(self, text: str) -> List[float]:
+        return self._normalize([self.embeddings.embed_query(text)])[0].tolist()
@@ -0,0 +1,239 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from bisheng.common.services.metric_log import emit_metric
+from bisheng.core.config.llm import EmbeddingCacheConf
+
+_KEY_PREFIX = 'embedding_cache'
+
+
+def _encode(vector: Sequence[float]) -> bytes:
+    # float32 is what Milvus and Elasticsearch store anyway, and half the size of float64
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _decode(raw: bytes) -> List[float]:
+    return np.frombuffer(raw, dtype=np.float32).tolist()
+
+
+class EmbeddingCacheStore(ABC):
+    """Key -> vector storage behind EmbeddingCache"""
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Vectors in the order of keys, None for a miss"""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        pass
+
+
+class RedisEmbeddingCacheStore(EmbeddingCacheStore):
+    """
+    Vectors as float32 strings with a ttl. A sorted set indexes every key by its last
+    use, which is what bounds the cache: after a write, everything beyond max_entries
+    is dropped oldest first. Keys are read and written through non-transactional
+    pipelines of the shared RedisClient, so the store also works on a Redis cluster.
+    """
+
+    def __init__(self, conf: EmbeddingCacheConf, redis_client=None):
+        self.max_entries = conf.max_entries
+        self.ttl = conf.ttl
+        self.index_key = f'{_KEY_PREFIX}:index'
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            from bisheng.core.cache.redis_manager import get_redis_client_sync
+            self._redis_client = get_redis_client_sync()
+        return self._redis_client
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not keys:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+        values = pipe.execute()
+        hits = {key: time.time() for key, value in zip(keys, values) if value is not None}
+        if hits:
+            # refresh recency and ttl of the hits so hot vectors are not evicted
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(self.index_key, hits)
+            if self.ttl:
+                for key in hits:
+                    pipe.expire(key, self.ttl)
+            pipe.execute()
+        return [_decode(value) if value is not None else None for value in values]
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key, vector in items.items():
+            pipe.set(key, _encode(vector), ex=self.ttl or None)
+        pipe.zadd(self.index_key, {key: now for key in items})
+        if self.ttl:
+            pipe.zremrangebyscore(self.index_key, '-inf', now - self.ttl)
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zpopmin(self.index_key, size - self.max_entries)
+            evicted = [one[0] for one in pipe.execute()[0]]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in evicted:
+                pipe.delete(key)
+            pipe.execute()
+
+
+class FileEmbeddingCacheStore(EmbeddingCacheStore):
+    """Vectors in a local sqlite file, evicted least recently used beyond max_entries"""
+
+    # sqlite caps the number of bound parameters per statement
+    _CHUNK = 500
+
+    def __init__(self, conf: EmbeddingCacheConf):
+        self.max_entries = conf.max_entries
+        self.ttl = conf.ttl
+        if conf.file_path:
+            self.path = Path(conf.file_path)
+        else:
+            from bisheng.core.cache.utils import CACHE_DIR
+            self.path = Path(CACHE_DIR) / 'embedding_cache.sqlite3'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS embedding_cache '
+                               '(key TEXT PRIMARY KEY, vector BLOB NOT NULL, used REAL NOT NULL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS embedding_cache_used ON embedding_cache (used)')
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        found: Dict[str, bytes] = {}
+        now = time.time()
+        with self._lock, self._conn:
+            for start in range(0, len(keys), self._CHUNK):
+                part = keys[start:start + self._CHUNK]
+                marks = ','.join('?' * len(part))
+                rows = self._conn.execute(
+                    f'SELECT key, vector, used FROM embedding_cache WHERE key IN ({marks})', part).fetchall()
+                for key, vector, used in rows:
+                    if not self.ttl or used >= now - self.ttl:
+                        found[key] = vector
+                hit_keys = [key for key in part if key in found]
+                if hit_keys:
+                    self._conn.execute(
+                        f'UPDATE embedding_cache SET used = ? WHERE key IN ({",".join("?" * len(hit_keys))})',
+                        [now, *hit_keys])
+        return [_decode(found[key]) if key in found else None for key in keys]
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO embedding_cache (key, vector, used) VALUES (?, ?, ?)',
+                                   [(key, _encode(vector), now) for key, vector in items.items()])
+            if self.ttl:
+                self._conn.execute('DELETE FROM embedding_cache WHERE used < ?', (now - self.ttl,))
+            size = self._conn.execute('SELECT COUNT(*) FROM embedding_cache').fetchone()[0]
+            if size > self.max_entries:
+                self._conn.execute('DELETE FROM embedding_cache WHERE key IN '
+                                   '(SELECT key FROM embedding_cache ORDER BY used LIMIT ?)',
+                                   (size - self.max_entries,))
+
+
+class EmbeddingCacheStats:
+    """Per-process hit and miss counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """
+    Looks texts up by (model, sha256(text)) and sends only the misses to the model.
+    A failing store never fails the embedding: the texts are then embedded as if the
+    cache was off.
+    """
+
+    def __init__(self, store: EmbeddingCacheStore):
+        self.store = store
+        self.stats = EmbeddingCacheStats()
+
+    @staticmethod
+    def make_key(model_id: int, model_name: str, text: str) -> str:
+        # the model name is hashed in too, so re-pointing a model id at another model
+        # does not serve the vectors of the old one
+        digest = hashlib.sha256(f'{model_name}\0{text}'.encode('utf-8')).hexdigest()
+        return f'{_KEY_PREFIX}:{model_id}:{digest}'
+
+    def embed(self, model_id: int, model_name: str, texts: List[str],
+              embed_func: Callable[[List[str]], List[List[float]]], kind: str = 'documents') -> List[List[float]]:
+        if not texts:
+            return embed_func(texts)
+        keys = [self.make_key(model_id, model_name, text) for text in texts]
+        # the same text twice in one call is embedded once
+        unique: Dict[str, str] = dict(zip(keys, texts))
+        try:
+            cached = dict(zip(unique, self.store.get_many(list(unique))))
+        except Exception as e:
+            logger.warning(f'embedding cache lookup failed, embedding without cache: {e}')
+            cached = {}
+        missing = [key for key in unique if cached.get(key) is None]
+        if missing:
+            vectors = embed_func([unique[key] for key in missing])
+            fresh = dict(zip(missing, vectors))
+            cached.update(fresh)
+            try:
+                self.store.set_many(fresh)
+            except Exception as e:
+                logger.warning(f'embedding cache write failed: {e}')
+
+        self.stats.record(len(unique) - len(missing), len(missing))
+        emit_metric('embedding_cache', model_id=model_id, kind=kind, hits=len(unique) - len(missing),
+                    misses=len(missing), hit_rate=self.stats.hit_rate)
+        return [cached[key] for key in keys]
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[EmbeddingCache] = None
+_cache_conf: Optional[EmbeddingCacheConf] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """The process-wide cache, or None when it is not enabled"""
+    global _cache, _cache_conf
+    from bisheng.common.services.config_service import settings
+
+    conf = settings.llm.embedding_cache
+    if not conf.enabled:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache_conf != conf:
+            store = FileEmbeddingCacheStore(conf) if conf.backend == 'file' else RedisEmbeddingCacheStore(conf)
+            _cache, _cache_conf = EmbeddingCache(store), conf.model_copy()
+        return _cache
@@ -392,6 +392,17 @@ class LLMDao:
                                                                             remark=remark))
             await session.commit()
 
+    @classmethod
+    def update_models_status(cls, statuses: Dict[int, tuple[int, str]]):
+        """ Update the status of several models in one transaction, {model_id: (status, remark)} """
+        if not statuses:
+            return
+        with get_sync_db_session() as session:
+            for model_id, (status, remark) in statuses.items():
+                session.exec(
+                    update(LLMModel).where(col(LLMModel.id) == model_id).values(status=status, remark=remark))
+            session.commit()
+
     @classmethod
     def update_model_online(cls, model_id: int, online: bool):
         """ Update model online status """
@@ -21,7 +21,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, DateTime, Integer, String, text
+from sqlalchemy import Column, DateTime, Integer, String, insert, text
 from sqlmodel import Field, select
 
 from bisheng.common.models.base import SQLModelSerializable
@@ -101,6 +101,16 @@ class LLMTokenLogDao:
             session.refresh(log)
             return log
 
+    @classmethod
+    def create_many(cls, logs: List[LLMTokenLog]) -> None:
+        """Insert all rows with one multi-row INSERT; ``created_at`` is left to the server default."""
+        if not logs:
+            return
+        rows = [log.model_dump(exclude={'id', 'created_at'}) for log in logs]
+        with get_sync_db_session() as session:
+            session.exec(insert(LLMTokenLog).values(rows))
+            session.commit()
+
     @classmethod
     async def alist_by_tenant(cls, tenant_id: int, limit: int = 100) -> List[LLMTokenLog]:
         async with get_async_db_session() as session:
@@ -1,7 +1,7 @@
 """F017 LLMTokenTracker — INV-T13 compliant token usage recorder.
 
 Contract:
-  - ``record_usage`` writes one ``llm_token_log`` row stamped with
+  - ``record_usage`` queues one ``llm_token_log`` row stamped with
     ``tenant_id = get_current_tenant_id()`` (the user's leaf tenant, NOT
     the model's tenant). This is the write half of AC-09: Child's token
     consumption against a Root-shared model accrues to the Child's monthly
@@ -10,6 +10,9 @@ Contract:
     A missing context means an HTTP / WS / Celery middleware failed to set
     the ContextVar, which is a system bug — silent attribution to a wrong
     tenant (or NULL) pollutes F016's quota accounting.
+  - Rows are written behind the call by ``LLMUsageWriter`` in multi-row
+    INSERTs, so they reach the table within ``llm_usage_writer.flush_interval``
+    seconds rather than before ``record_usage`` returns.
 
 Call sites:
   - ``LLMUsageCallbackHandler.on_llm_end`` (T18) — every LangChain
@@ -25,7 +28,8 @@ from typing import Optional
 
 from bisheng.common.errcode.tenant_sharing import TenantContextMissingError
 from bisheng.core.context.tenant import get_current_tenant_id
-from bisheng.llm.domain.models.llm_token_log import LLMTokenLog, LLMTokenLogDao
+from bisheng.llm.domain.models.llm_token_log import LLMTokenLog
+from bisheng.llm.domain.services.usage_writer import get_llm_usage_writer
 from bisheng.utils.async_utils import run_async_safe
 
 logger = logging.getLogger(__name__)
@@ -46,8 +50,8 @@ class LLMTokenTracker:
         session_id: Optional[str] = None,
         total_tokens: Optional[int] = None,
     ) -> LLMTokenLog:
-        """Persist one row. Raises ``TenantContextMissingError`` on
-        missing ContextVar.
+        """Queue one row for the batched writer. Raises
+        ``TenantContextMissingError`` on missing ContextVar.
         """
         tenant_id = get_current_tenant_id()
         if tenant_id is None:
@@ -68,7 +72,8 @@ class LLMTokenTracker:
             completion_tokens=int(completion_tokens or 0),
             total_tokens=resolved_total,
         )
-        return await LLMTokenLogDao.acreate(log)
+        get_llm_usage_writer().add_token_log(log)
+        return log
 
     @classmethod
     def record_usage_sync(
@@ -0,0 +1,139 @@
+"""Write-behind writer for the per-call rows of the LLM call path.
+
+Every model call used to insert its own ``llm_token_log`` row and, whenever the
+instance's cached status disagreed, update ``llm_model.status`` on the request
+thread. ``LLMUsageWriter`` takes both off the hot path:
+
+  - token usage rows are queued in memory and written by a background thread
+    with one multi-row INSERT per ``batch_size`` rows (or per
+    ``flush_interval`` seconds for a partial batch);
+  - status reports are compared with the caller's view of the stored status,
+    so only transitions are queued, and several transitions of one model
+    within a flush collapse into the final one.
+
+Rows carry their ``tenant_id`` from the caller's context (INV-T13), so the
+writer thread needs no tenant context of its own. A failed write is retried
+with exponential backoff; ``close`` writes what is still queued within a
+bounded time and is called from the API lifespan and the Celery worker
+shutdown hook. Queueing, the worker thread and retries come from
+``BackgroundBatcher``, shared with the telemetry buffer.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+
+from bisheng.core.config.settings import LLMUsageWriterConf
+from bisheng.llm.domain.models.llm_server import LLMDao
+from bisheng.llm.domain.models.llm_token_log import LLMTokenLog, LLMTokenLogDao
+from bisheng.utils.background_batcher import BackgroundBatcher, BatcherStats
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageWriterStats(BatcherStats):
+    """Cumulative counters of one writer"""
+
+    counters = ('queued', 'written', 'dropped', 'retried', 'status_skipped', 'status_written')
+
+
+class LLMUsageWriter(BackgroundBatcher[LLMTokenLog]):
+    """Batches ``llm_token_log`` inserts and ``llm_model.status`` transitions."""
+
+    thread_name = 'llm-usage-writer'
+    item_label = 'token usage rows'
+    stats_class = LLMUsageWriterStats
+
+    def __init__(self, conf: Optional[LLMUsageWriterConf] = None):
+        super().__init__(conf or LLMUsageWriterConf())
+        # model_id -> (status, remark) still to be written
+        self._pending_status: Dict[int, tuple[int, str]] = {}
+        # model_id -> last status written or queued by this process
+        self._known_status: TTLCache = TTLCache(maxsize=10000, ttl=self.conf.status_ttl)
+
+    def add_token_log(self, log: LLMTokenLog) -> bool:
+        """Queue one usage row; returns False when it was dropped"""
+        # when full the oldest rows go: they have waited longest for a database that is not keeping up
+        if not self._enqueue(log):
+            logger.warning('[F017] token usage row dropped, writer is closed: %s', log)
+            return False
+        return True
+
+    def update_model_status(self, model_id: int, status: int, remark: str = '',
+                            current: Optional[int] = None) -> bool:
+        """
+        Queue a status write if it changes the model's status. ``current`` is the caller's
+        view of the stored status; only callers without one rely on the last status this
+        process wrote, which another process may have changed since.
+        Returns False when the report was not a transition.
+        """
+        with self._cond:
+            known = current if current is not None else self._known_status.get(model_id)
+            if known == status:
+                self.stats.incr('status_skipped')
+                return False
+            self._known_status[model_id] = status
+            self._pending_status[model_id] = (status, remark)
+            closed = self._closed
+            if not closed:
+                self._ensure_worker()
+        if closed:
+            # no worker is left to write it later
+            self.flush()
+        return True
+
+    def _after_fork(self) -> None:
+        super()._after_fork()
+        self._pending_status = {}
+
+    def _take_batch(self, min_size: int) -> Optional[tuple[List[LLMTokenLog], Dict[int, tuple[int, str]]]]:
+        # pending status changes go out with every batch, even one without rows
+        logs = super()._take_batch(min_size)
+        statuses, self._pending_status = self._pending_status, {}
+        return (logs, statuses) if logs or statuses else None
+
+    def _send_batch(self, batch: tuple[List[LLMTokenLog], Dict[int, tuple[int, str]]]) -> None:
+        logs, statuses = batch
+        if statuses:
+            failed = self._retry(self._write_statuses, list(statuses.items()), 'model status changes')
+            self.stats.incr('status_written', len(statuses) - len(failed))
+        if logs:
+            failed = self._retry(self._write_logs, logs, 'token usage rows')
+            self.stats.incr('written', len(logs) - len(failed))
+            self.stats.incr('dropped', len(failed))
+
+    @staticmethod
+    def _write_statuses(statuses: List[tuple[int, tuple[int, str]]]) -> list:
+        LLMDao.update_models_status(dict(statuses))
+        return []
+
+    @staticmethod
+    def _write_logs(logs: List[LLMTokenLog]) -> list:
+        LLMTokenLogDao.create_many(logs)
+        return []
+
+
+_writer: Optional[LLMUsageWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_llm_usage_writer() -> LLMUsageWriter:
+    """Process-wide writer, configured from ``settings.llm_usage_writer``"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from bisheng.common.services.config_service import settings
+
+                _writer = LLMUsageWriter(settings.llm_usage_writer)
+    return _writer
+
+
+def close_llm_usage_writer(timeout: float = 10) -> None:
+    """Write what is still queued; called on graceful shutdown"""
+    if _writer is not None:
+        _writer.close(timeout)
@@ -16,6 +16,9 @@ from bisheng.core.cache.redis_manager import get_redis_client, get_redis_client_
 from bisheng.core.logger import trace_id_var
 from bisheng.llm.domain.const import LLM_CACHE, LLMModelStatus
 
+# The per-day call counter outlives the day it counts, however long a server sits idle
+MODEL_LIMIT_TTL = 86400
+
 
 def _stringify_reasoning_value(value: Any) -> str:
     if value is None:
@@ -101,7 +104,12 @@ async def bisheng_model_limit_check(self: "BishengBase"):
         # Number of calls checked
         cache_key = f"model_limit:{now}:{self.server_info.id}"
         redis_client = await get_redis_client()
-        use_num = await redis_client.aincr(cache_key)
+        await redis_client.acluster_nodes(cache_key)
+        # INCR and EXPIRE share one round trip
+        pipe = redis_client.async_pipeline(transaction=False)
+        pipe.incr(cache_key)
+        pipe.expire(cache_key, MODEL_LIMIT_TTL)
+        use_num, _ = await pipe.execute()
         if use_num > self.server_info.limit:
             raise Exception(f"{self.server_info.name}/{self.model_info.model_name} Quota used up")
 
@@ -111,7 +119,12 @@ def sync_bisheng_model_limit_check(self: "BishengBase"):
     if self.server_info.limit_flag:
         # Number of calls checked
         cache_key = f"model_limit:{now}:{self.server_info.id}"
-        use_num = get_redis_client_sync().incr(cache_key)
+        redis_client = get_redis_client_sync()
+        redis_client.cluster_nodes(cache_key)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(cache_key)
+        pipe.expire(cache_key, MODEL_LIMIT_TTL)
+        use_num, _ = pipe.execute()
         if use_num > self.server_info.limit:
             raise Exception(f"{self.server_info.name}/{self.model_info.model_name} Quota used up")
 
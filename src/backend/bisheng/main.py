@@ -85,8 +85,25 @@ async def lifespan(app: FastAPI):
         await backfill_linsight_default_model()
     except Exception:
         logger.exception("linsight default-model backfill failed; continuing startup")
+    # Enables the process-local permission cache tier. Without it checks still go
+    # through the shared Redis tier, so a failure must never block startup.
+    try:
+        from bisheng.permission.domain.services.permission_cache import PermissionCache
+
+        PermissionCache.start_invalidation_listener()
+    except Exception:
+        logger.exception("permission cache invalidation listener failed to start; continuing startup")
     # LangfuseInstance.update()
     yield
+    from bisheng.permission.domain.services.permission_cache import PermissionCache
+
+    PermissionCache.stop_invalidation_listener()
+    from bisheng.common.services import telemetry_service
+
+    telemetry_service.close()
+    from bisheng.llm.domain.services.usage_writer import close_llm_usage_writer
+
+    close_llm_usage_writer()
     thread_pool.tear_down()
     await close_app_context()
 
@@ -15,6 +15,7 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    insert,
     text,
     update,
 )
@@ -514,3 +515,42 @@ class OrgSyncLogDao:
             error_details=error_details,
         )
         return await cls.acreate(log)
+
+    @classmethod
+    async def acreate_events(
+        cls,
+        events: list[dict],
+        *,
+        config_id: int,
+        tenant_id: int = 1,
+        chunk_size: int = 500,
+    ) -> int:
+        """Bulk :meth:`acreate_event`: one multi-row INSERT per ``chunk_size``
+        events instead of one INSERT + refresh per row.
+
+        Each event dict carries ``event_type`` / ``level`` and optionally
+        ``external_id`` / ``source_ts`` / ``error_details`` — the shape the
+        reconcile service accumulates in ``event_rows``. Returns the number
+        of rows written.
+        """
+        if not events:
+            return 0
+        rows = [
+            {
+                "tenant_id": tenant_id,
+                "config_id": config_id,
+                "trigger_type": "event",
+                "status": "success",
+                "event_type": ev["event_type"],
+                "level": ev["level"],
+                "external_id": ev.get("external_id"),
+                "source_ts": ev.get("source_ts"),
+                "error_details": ev.get("error_details"),
+            }
+            for ev in events
+        ]
+        async with get_async_db_session() as session:
+            for start in range(0, len(rows), chunk_size):
+                await session.exec(insert(OrgSyncLog).values(rows[start : start + chunk_size]))
+            await session.commit()
+        return len(rows)
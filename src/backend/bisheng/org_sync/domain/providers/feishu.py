@@ -5,7 +5,11 @@ Uses Feishu Open Platform Contact API v3:
   - Departments: GET /contact/v3/departments/{dept_id}/children (BFS)
   - Members: GET /contact/v3/users?department_id=X (page_token pagination)
 
-Rate limit: asyncio.Semaphore(5) + 429 exponential backoff (1s/2s/4s).
+Rate limit: asyncio.Semaphore(MAX_CONCURRENT_REQUESTS) + 429 exponential
+backoff (1s/2s/4s). Independent page chains — the children of every
+department on one BFS level, the members of every department — are fetched
+concurrently under that semaphore; pages within one chain stay sequential
+because each page_token comes from the previous page.
 Token cache: 2-hour TTL (Feishu token validity).
 """
 
@@ -24,6 +28,8 @@ FEISHU_BASE_URL = 'https://open.feishu.cn/open-apis'
 TOKEN_TTL_SECONDS = 7200  # 2 hours
 MAX_RETRIES = 3
 BACKOFF_BASE = 1  # seconds
+PAGE_SIZE = 50  # API maximum for both departments/children and users
+MAX_CONCURRENT_REQUESTS = 5
 
 
 class FeishuProvider(OrgSyncProvider):
@@ -32,7 +38,7 @@ class FeishuProvider(OrgSyncProvider):
         super().__init__(auth_config)
         self._token: Optional[str] = None
         self._token_expires_at: float = 0
-        self._semaphore = asyncio.Semaphore(5)
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
     # ------------------------------------------------------------------
     # HTTP helper with rate-limit retry
@@ -108,42 +114,70 @@ class FeishuProvider(OrgSyncProvider):
             await self._ensure_token(client)
             return True
 
+    async def _fetch_pages(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: dict,
+        params: dict,
+    ) -> list[dict]:
+        """Follow one page_token chain and return every item in order."""
+        items: list[dict] = []
+        page_token: Optional[str] = None
+        while True:
+            page_params = {**params, 'page_size': PAGE_SIZE}
+            if page_token:
+                page_params['page_token'] = page_token
+
+            data = await self._request(
+                client, 'GET', url, headers=headers, params=page_params,
+            )
+            items.extend(data.get('data', {}).get('items', []))
+
+            has_more = data.get('data', {}).get('has_more', False)
+            page_token = data.get('data', {}).get('page_token')
+            if not has_more or not page_token:
+                return items
+
     async def fetch_departments(
         self, root_dept_ids: Optional[list[str]] = None,
     ) -> list[RemoteDepartmentDTO]:
-        """BFS traversal of the Feishu department tree."""
+        """BFS traversal of the Feishu department tree, one level at a time.
+
+        The children of every department on a level are fetched
+        concurrently; results keep plain FIFO BFS order.
+        """
         results: list[RemoteDepartmentDTO] = []
         async with httpx.AsyncClient(timeout=30) as client:
             token = await self._ensure_token(client)
             headers = self._auth_headers(token)
 
             # Starting points: provided root IDs or Feishu root "0"
-            queue = list(root_dept_ids) if root_dept_ids else ['0']
+            level = list(root_dept_ids) if root_dept_ids else ['0']
             visited: set[str] = set()
 
-            while queue:
-                parent_id = queue.pop(0)
-                if parent_id in visited:
-                    continue
-                visited.add(parent_id)
+            while level:
+                parents = []
+                for parent_id in level:
+                    if parent_id not in visited:
+                        visited.add(parent_id)
+                        parents.append(parent_id)
 
-                page_token: Optional[str] = None
-                while True:
-                    params = {
-                        'department_id_type': 'open_department_id',
-                        'parent_department_id': parent_id,
-                        'page_size': 50,
-                    }
-                    if page_token:
-                        params['page_token'] = page_token
-
-                    data = await self._request(
-                        client, 'GET',
+                pages = await asyncio.gather(*(
+                    self._fetch_pages(
+                        client,
                         f'{FEISHU_BASE_URL}/contact/v3/departments/{parent_id}/children',
-                        headers=headers,
-                        params=params,
+                        headers,
+                        {
+                            'department_id_type': 'open_department_id',
+                            'parent_department_id': parent_id,
+                        },
                     )
-                    items = data.get('data', {}).get('items', [])
+                    for parent_id in parents
+                ))
+
+                level = []
+                for parent_id, items in zip(parents, pages):
                     for item in items:
                         dept_id = item.get('open_department_id', '')
                         results.append(RemoteDepartmentDTO(
@@ -152,19 +186,19 @@ class FeishuProvider(OrgSyncProvider):
                             parent_external_id=parent_id if parent_id != '0' else None,
                             sort_order=int(item.get('order', '0') or '0'),
                         ))
-                        queue.append(dept_id)
-
-                    has_more = data.get('data', {}).get('has_more', False)
-                    page_token = data.get('data', {}).get('page_token')
-                    if not has_more or not page_token:
-                        break
+                        level.append(dept_id)
 
         return results
 
     async def fetch_members(
         self, department_ids: Optional[list[str]] = None,
     ) -> list[RemoteMemberDTO]:
-        """Fetch members from specified departments (or all)."""
+        """Fetch members from specified departments (or all).
+
+        Departments are paged concurrently; members are de-duplicated in
+        ``department_ids`` order, so a user listed under several departments
+        keeps the entry of the first one.
+        """
         results: list[RemoteMemberDTO] = []
         seen_user_ids: set[str] = set()
 
@@ -175,54 +209,45 @@ class FeishuProvider(OrgSyncProvider):
             if not department_ids:
                 department_ids = ['0']
 
-            for dept_id in department_ids:
-                page_token: Optional[str] = None
-                while True:
-                    params = {
+            pages = await asyncio.gather(*(
+                self._fetch_pages(
+                    client,
+                    f'{FEISHU_BASE_URL}/contact/v3/users',
+                    headers,
+                    {
                         'department_id_type': 'open_department_id',
                         'department_id': dept_id,
-                        'page_size': 50,
-                    }
-                    if page_token:
-                        params['page_token'] = page_token
-
-                    data = await self._request(
-                        client, 'GET',
-                        f'{FEISHU_BASE_URL}/contact/v3/users',
-                        headers=headers,
-                        params=params,
-                    )
-                    items = data.get('data', {}).get('items', [])
-                    for item in items:
-                        user_id = item.get('open_id', '') or item.get('user_id', '')
-                        if user_id in seen_user_ids:
-                            continue
-                        seen_user_ids.add(user_id)
-
-                        dept_ids_list = item.get('department_ids', [])
-                        primary_dept = dept_ids_list[0] if dept_ids_list else dept_id
-                        secondary_depts = [d for d in dept_ids_list[1:] if d != primary_dept]
-
-                        status = 'active'
-                        if item.get('status', {}).get('is_frozen', False):
-                            status = 'disabled'
-                        if item.get('status', {}).get('is_resigned', False):
-                            status = 'disabled'
-
-                        results.append(RemoteMemberDTO(
-                            external_id=user_id,
-                            name=item.get('name', ''),
-                            email=item.get('email'),
-                            phone=item.get('mobile'),
-                            primary_dept_external_id=primary_dept,
-                            secondary_dept_external_ids=secondary_depts,
-                            status=status,
-                        ))
-
-                    has_more = data.get('data', {}).get('has_more', False)
-                    page_token = data.get('data', {}).get('page_token')
-                    if not has_more or not page_token:
-                        break
+                    },
+                )
+                for dept_id in department_ids
+            ))
+
+            for dept_id, items in zip(department_ids, pages):
+                for item in items:
+                    user_id = item.get('open_id', '') or item.get('user_id', '')
+                    if user_id in seen_user_ids:
+                        continue
+                    seen_user_ids.add(user_id)
+
+                    dept_ids_list = item.get('department_ids', [])
+                    primary_dept = dept_ids_list[0] if dept_ids_list else dept_id
+                    secondary_depts = [d for d in dept_ids_list[1:] if d != primary_dept]
+
+                    status = 'active'
+                    if item.get('status', {}).get('is_frozen', False):
+                        status = 'disabled'
+                    if item.get('status', {}).get('is_resigned', False):
+                        status = 'disabled'
+
+                    results.append(RemoteMemberDTO(
+                        external_id=user_id,
+                        name=item.get('name', ''),
+                        email=item.get('email'),
+                        phone=item.get('mobile'),
+                        primary_dept_external_id=primary_dept,
+                        secondary_dept_external_ids=secondary_depts,
+                        status=status,
+                    ))
 
         return results
 
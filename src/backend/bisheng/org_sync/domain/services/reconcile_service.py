@@ -7,7 +7,8 @@ Drives one reconcile run for a single ``org_sync_config`` row:
   3. Instantiate the provider + fetch the remote department tree.
   4. Load the local active-department snapshot for the config's tenant.
   5. Diff via :class:`RemoteDeptDiffer` — each op carries ``incoming_ts``.
-  6. Upsert loop: per-op OrgSyncTsGuard → APPLY/SKIP_TS.
+  6. Upsert loop: per-op OrgSyncTsGuard → APPLY/SKIP_TS. Parent-only
+     moves are upserts too; a reparent rewrites the subtree's paths.
   7. Archive loop: per-op guard → APPLY/SKIP_TS; on APPLY, detect the
      same-ts upsert-vs-remove collision and, if detected, write the
      ``ts_conflict`` event row + audit_log.action='dept.sync_conflict'
@@ -19,6 +20,13 @@ Drives one reconcile run for a single ``org_sync_config`` row:
      :meth:`OrgSyncLogDao.acreate_event`.
  11. Return :class:`ReconcileResult` for caller telemetry.
 
+Bulk mode (``bulk=True``, or automatically once the diff reaches
+``settings.reconcile.bulk_min_ops`` operations) keeps the same decisions but
+changes the I/O shape of steps 6, 7 and 10: existing rows are fetched by
+external_id in chunks, TsGuard verdicts and parent resolution run in memory,
+inserts / updates / moves / archives go out as batched statements and the
+event rows as multi-row INSERTs.
+
 The service touches every F011/F012/F013/F014 component but owns no
 mutation logic on its own — all writes delegate to existing DAOs.
 """
@@ -45,8 +53,10 @@ from bisheng.core.context.tenant import (
 )
 from bisheng.database.models.audit_log import AuditLogDao
 from bisheng.database.models.department import (
+    Department,
     DepartmentDao,
     UserDepartmentDao,
+    build_synced_path,
 )
 from bisheng.department.domain.services.department_archive_cleanup_service import (
     DepartmentArchiveCleanupService,
@@ -131,7 +141,14 @@ class OrgReconcileService:
     SKIP_PROVIDER = 'sso_realtime'
 
     @classmethod
-    async def reconcile_config(cls, config_id: int) -> ReconcileResult:
+    async def reconcile_config(
+        cls, config_id: int, bulk: Optional[bool] = None,
+    ) -> ReconcileResult:
+        """Run one reconcile for ``config_id``.
+
+        ``bulk`` forces bulk mode on or off; ``None`` picks it from the
+        diff size (``settings.reconcile.bulk_min_ops``).
+        """
         config = await OrgSyncConfigDao.aget_by_id(config_id)
         if config is None:
             return ReconcileResult(skipped=True, skip_reason='config_not_found')
@@ -151,7 +168,7 @@ class OrgReconcileService:
             with bypass_tenant_filter():
                 tok = set_current_tenant_id(config.tenant_id or 1)
                 try:
-                    return await cls._run(config)
+                    return await cls._run(config, bulk=bulk)
                 finally:
                     current_tenant_id.reset(tok)
 
@@ -160,7 +177,7 @@ class OrgReconcileService:
     # ------------------------------------------------------------------
 
     @classmethod
-    async def _run(cls, config) -> ReconcileResult:
+    async def _run(cls, config, bulk: Optional[bool] = None) -> ReconcileResult:
         result = ReconcileResult()
 
         provider = cls._build_provider(config)
@@ -190,19 +207,31 @@ class OrgReconcileService:
         buffer = OrgSyncLogBuffer()
         event_rows: list[dict] = []
 
-        # --- Upserts -------------------------------------------------------
-        for op in diff.upserts:
-            await cls._apply_upsert(
-                op, config=config, buffer=buffer,
-                event_rows=event_rows, result=result,
-            )
+        if bulk is None:
+            op_count = len(diff.upserts) + len(diff.archives) + len(diff.moves)
+            bulk = op_count >= settings.reconcile.bulk_min_ops
 
-        # --- Archives ------------------------------------------------------
-        for op in diff.archives:
-            await cls._apply_archive(
-                op, config=config, buffer=buffer,
+        # parent-only moves reparent through the upsert path in both modes
+        upserts = _with_parent_moves(diff, remote)
+        if bulk:
+            await cls._run_bulk(
+                diff, upserts=upserts, config=config, buffer=buffer,
                 event_rows=event_rows, result=result,
             )
+        else:
+            # --- Upserts ---------------------------------------------------
+            for op in upserts:
+                await cls._apply_upsert(
+                    op, config=config, buffer=buffer,
+                    event_rows=event_rows, result=result,
+                )
+
+            # --- Archives --------------------------------------------------
+            for op in diff.archives:
+                await cls._apply_archive(
+                    op, config=config, buffer=buffer,
+                    event_rows=event_rows, result=result,
+                )
 
         # --- Cross-tenant moves -------------------------------------------
         for mv in diff.moves:
@@ -219,6 +248,17 @@ class OrgReconcileService:
             logger.exception(f'flush_log failed for config {config.id}')
             result.errors.append(f'flush_log: {e!s}')
 
+        if bulk:
+            try:
+                await OrgSyncLogDao.acreate_events(
+                    event_rows, config_id=config.id, tenant_id=config.tenant_id,
+                )
+            except Exception as e:
+                logger.exception(
+                    f'event_rows persist failed for config {config.id}: {e}')
+                result.errors.append(f'event_rows: {e!s}')
+            return result
+
         for ev in event_rows:
             try:
                 await OrgSyncLogDao.acreate_event(
@@ -358,65 +398,16 @@ class OrgReconcileService:
             )
 
             if is_same_ts_conflict:
-                event_rows.append({
-                    'event_type': EventType.TS_CONFLICT,
-                    'level': EventLevel.WARN,
-                    'external_id': op.external_id,
-                    'source_ts': op.incoming_ts,
-                    'error_details': {
-                        'resolution': 'remove_wins',
-                        'via': 'celery_reconcile',
-                    },
-                })
-                try:
-                    await AuditLogDao.ainsert_v2(
-                        tenant_id=config.tenant_id, operator_id=0,
-                        operator_tenant_id=config.tenant_id,
-                        action=AuditAction.DEPT_SYNC_CONFLICT,
-                        target_type='department',
-                        target_id=str(existing.id),
-                        metadata={
-                            'external_id': op.external_id,
-                            'source_ts': op.incoming_ts,
-                            'resolution': 'remove_wins',
-                            'via': 'celery_reconcile',
-                        },
-                        ip_address='internal',
-                    )
-                except Exception as e:  # audit failure must not abort the op
-                    logger.exception(
-                        f'audit_log.ainsert_v2 failed for {op.external_id}: {e}')
-                    result.errors.append(f'audit {op.external_id}: {e!s}')
-                # Error class is documented but not raised — admins watch
-                # event rows + audit_log instead of HTTP surface.
-                logger.warning(
-                    f'{SsoSameTsRemoveAppliedWarnError.Code} '
-                    f'{SsoSameTsRemoveAppliedWarnError.Msg}: {op.external_id}'
+                await cls._record_same_ts_conflict(
+                    op, existing, config=config,
+                    event_rows=event_rows, result=result,
                 )
-                result.conflicts += 1
 
             await DepartmentDao.aarchive_by_external_id(
                 source=config.provider, external_id=op.external_id,
                 last_sync_ts=op.incoming_ts,
             )
-            try:
-                await DepartmentArchiveCleanupService.arun_for_archived_department(
-                    int(existing.id), reason='celery_reconcile_archive',
-                )
-            except Exception as e:  # noqa: BLE001
-                logger.warning(
-                    'archive_cleanup failed for dept %s: %s', existing.id, e,
-                )
-            try:
-                await DepartmentDeletionHandler.on_deleted(
-                    existing.id, DeletionSource.CELERY_RECONCILE,
-                )
-            except Exception as e:
-                logger.exception(
-                    f'DepartmentDeletionHandler.on_deleted failed '
-                    f'for dept {existing.id}: {e}')
-                result.errors.append(
-                    f'on_deleted {existing.id}: {e!s}')
+            await cls._run_archive_hooks(existing, result=result)
 
             buffer.dept_archived += 1
             result.applied_archive += 1
@@ -426,6 +417,79 @@ class OrgReconcileService:
             buffer.error('archive', op.external_id, str(e))
             result.errors.append(f'archive {op.external_id}: {e!s}')
 
+    @classmethod
+    async def _record_same_ts_conflict(
+        cls,
+        op: ArchiveOp,
+        existing,
+        *,
+        config,
+        event_rows: list[dict],
+        result: ReconcileResult,
+    ) -> None:
+        """AC-11 bookkeeping for a remove applied at the ts of a prior
+        upsert: ``ts_conflict`` event row + ``dept.sync_conflict`` audit."""
+        event_rows.append({
+            'event_type': EventType.TS_CONFLICT,
+            'level': EventLevel.WARN,
+            'external_id': op.external_id,
+            'source_ts': op.incoming_ts,
+            'error_details': {
+                'resolution': 'remove_wins',
+                'via': 'celery_reconcile',
+            },
+        })
+        try:
+            await AuditLogDao.ainsert_v2(
+                tenant_id=config.tenant_id, operator_id=0,
+                operator_tenant_id=config.tenant_id,
+                action=AuditAction.DEPT_SYNC_CONFLICT,
+                target_type='department',
+                target_id=str(existing.id),
+                metadata={
+                    'external_id': op.external_id,
+                    'source_ts': op.incoming_ts,
+                    'resolution': 'remove_wins',
+                    'via': 'celery_reconcile',
+                },
+                ip_address='internal',
+            )
+        except Exception as e:  # audit failure must not abort the op
+            logger.exception(
+                f'audit_log.ainsert_v2 failed for {op.external_id}: {e}')
+            result.errors.append(f'audit {op.external_id}: {e!s}')
+        # Error class is documented but not raised — admins watch
+        # event rows + audit_log instead of HTTP surface.
+        logger.warning(
+            f'{SsoSameTsRemoveAppliedWarnError.Code} '
+            f'{SsoSameTsRemoveAppliedWarnError.Msg}: {op.external_id}'
+        )
+        result.conflicts += 1
+
+    @classmethod
+    async def _run_archive_hooks(
+        cls, existing, *, result: ReconcileResult,
+    ) -> None:
+        """Resource cleanup + tenant deletion handling for an archived dept."""
+        try:
+            await DepartmentArchiveCleanupService.arun_for_archived_department(
+                int(existing.id), reason='celery_reconcile_archive',
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                'archive_cleanup failed for dept %s: %s', existing.id, e,
+            )
+        try:
+            await DepartmentDeletionHandler.on_deleted(
+                existing.id, DeletionSource.CELERY_RECONCILE,
+            )
+        except Exception as e:
+            logger.exception(
+                f'DepartmentDeletionHandler.on_deleted failed '
+                f'for dept {existing.id}: {e}')
+            result.errors.append(
+                f'on_deleted {existing.id}: {e!s}')
+
     @classmethod
     async def _apply_move(
         cls,
@@ -459,6 +523,199 @@ class OrgReconcileService:
                 buffer.error('sync_user', str(uid), str(e))
                 result.errors.append(f'sync_user {uid}: {e!s}')
 
+    # ------------------------------------------------------------------
+    # Bulk mode
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def _run_bulk(
+        cls,
+        diff: ReconcileDiff,
+        *,
+        upserts: list[UpsertOp],
+        config,
+        buffer: OrgSyncLogBuffer,
+        event_rows: list[dict],
+        result: ReconcileResult,
+    ) -> None:
+        """Steps 6–7 with one chunked prefetch and batched writes; every
+        reparent in ``upserts`` lands in the same batched UPDATE."""
+        wanted = [op.external_id for op in upserts]
+        wanted += [op.parent_external_id for op in upserts if op.parent_external_id]
+        wanted += [op.external_id for op in diff.archives]
+        try:
+            existing = await DepartmentDao.aget_by_source_external_ids(
+                config.provider, wanted,
+            )
+        except Exception as e:
+            logger.exception(f'bulk prefetch failed for config {config.id}')
+            result.errors.append(f'prefetch: {e!s}')
+            return
+
+        await cls._bulk_upserts(
+            upserts, existing=existing, config=config, buffer=buffer,
+            event_rows=event_rows, result=result,
+        )
+        await cls._bulk_archives(
+            diff.archives, existing=existing, config=config, buffer=buffer,
+            event_rows=event_rows, result=result,
+        )
+
+    @classmethod
+    async def _bulk_upserts(
+        cls,
+        upserts: list[UpsertOp],
+        *,
+        existing: dict[str, Department],
+        config,
+        buffer: OrgSyncLogBuffer,
+        event_rows: list[dict],
+        result: ReconcileResult,
+    ) -> None:
+        applied: dict[str, tuple[UpsertOp, Optional[Department]]] = {}
+        for op in upserts:
+            row = existing.get(op.external_id)
+            decision = await OrgSyncTsGuard.check_and_update(
+                row, op.incoming_ts, ReconcileAction.UPSERT,
+            )
+            if decision == GuardDecision.SKIP_TS:
+                cls._record_stale_ts(
+                    op=op, existing=row, action=ReconcileAction.UPSERT,
+                    buffer=buffer, event_rows=event_rows, result=result,
+                )
+                continue
+            applied[op.external_id] = (op, row)
+
+        failed: dict[str, str] = {}
+        _fail_orphans(applied, existing, failed)
+
+        # Multi-row INSERT for the new departments; parent + path follow in
+        # the batched UPDATE of the same transaction once their ids are known.
+        new_rows = [
+            {
+                'external_id': op.external_id, 'name': op.name,
+                'sort_order': op.sort_order, 'last_sync_ts': op.incoming_ts,
+            }
+            for ext, (op, row) in applied.items()
+            if row is None and ext not in failed
+        ]
+
+        async def plan(inserted: dict[str, Department]) -> tuple[list[dict], list[tuple[str, str]]]:
+            rows_by_ext = {**existing, **inserted}
+
+            # INV-T1 gate for every existing row that changes parent.
+            for ext, (op, row) in applied.items():
+                if row is None or ext in failed:
+                    continue
+                parent_id = _parent_id(op, rows_by_ext)
+                if (row.parent_id or 0) != (parent_id or 0):
+                    try:
+                        await DepartmentDao.aassert_reparent_legal(row.id, parent_id)
+                    except Exception as e:
+                        failed[ext] = str(e)
+            _fail_orphans(applied, rows_by_ext, failed)
+
+            paths: dict[str, str] = {}
+            for ext in applied:
+                if ext not in failed:
+                    _resolve_path(ext, applied, rows_by_ext, failed, paths)
+
+            updates: list[dict] = []
+            moved: list[tuple[str, str]] = []
+            for ext, (op, row) in applied.items():
+                if ext in failed:
+                    continue
+                dept = rows_by_ext[ext]
+                updates.append({
+                    'id': dept.id,
+                    'name': op.name,
+                    'parent_id': _parent_id(op, rows_by_ext),
+                    'path': paths[ext],
+                    'sort_order': op.sort_order,
+                    'status': 'active',
+                    'is_deleted': 0,
+                    'last_sync_ts': op.incoming_ts,
+                })
+                if row is not None and row.path and row.path != paths[ext]:
+                    moved.append((row.path, paths[ext]))
+            return updates, moved
+
+        try:
+            # one transaction: a new department is never visible without its parent and path
+            await DepartmentDao.abulk_apply_synced(
+                source=config.provider, new_rows=new_rows, plan=plan,
+                tenant_id=config.tenant_id or 1,
+            )
+        except Exception as e:
+            logger.exception(f'bulk write failed for config {config.id}')
+            for ext in applied:
+                failed.setdefault(ext, f'write: {e!s}')
+
+        for ext, message in failed.items():
+            buffer.error('upsert', ext, message)
+            result.errors.append(f'upsert {ext}: {message}')
+        for ext, (op, _row) in applied.items():
+            if ext in failed:
+                continue
+            if op.is_new:
+                buffer.dept_created += 1
+            else:
+                buffer.dept_updated += 1
+            result.applied_upsert += 1
+
+    @classmethod
+    async def _bulk_archives(
+        cls,
+        archives: list[ArchiveOp],
+        *,
+        existing: dict[str, Department],
+        config,
+        buffer: OrgSyncLogBuffer,
+        event_rows: list[dict],
+        result: ReconcileResult,
+    ) -> None:
+        to_archive: list[tuple[ArchiveOp, Department]] = []
+        for op in archives:
+            row = existing.get(op.external_id)
+            if row is None:
+                continue
+            decision = await OrgSyncTsGuard.check_and_update(
+                row, op.incoming_ts, ReconcileAction.REMOVE,
+            )
+            if decision == GuardDecision.SKIP_TS:
+                cls._record_stale_ts(
+                    op=op, existing=row, action=ReconcileAction.REMOVE,
+                    buffer=buffer, event_rows=event_rows, result=result,
+                )
+                continue
+            if (
+                int(row.last_sync_ts or 0) == op.incoming_ts
+                and int(row.is_deleted or 0) == 0
+            ):
+                await cls._record_same_ts_conflict(
+                    op, row, config=config,
+                    event_rows=event_rows, result=result,
+                )
+            to_archive.append((op, row))
+
+        by_ts: dict[int, list[int]] = {}
+        for op, row in to_archive:
+            by_ts.setdefault(op.incoming_ts, []).append(row.id)
+        try:
+            for ts, dept_ids in by_ts.items():
+                await DepartmentDao.abulk_archive_by_ids(dept_ids, ts)
+        except Exception as e:
+            logger.exception(f'bulk archive failed for config {config.id}')
+            for op, _row in to_archive:
+                buffer.error('archive', op.external_id, str(e))
+                result.errors.append(f'archive {op.external_id}: {e!s}')
+            return
+
+        for _op, row in to_archive:
+            await cls._run_archive_hooks(row, result=result)
+            buffer.dept_archived += 1
+            result.applied_archive += 1
+
     # ------------------------------------------------------------------
     # Redis SETNX lock (AC-13)
     # ------------------------------------------------------------------
@@ -504,3 +761,100 @@ class OrgReconcileService:
                 f'decrypt_auth_config failed for config {config.id}: {e}')
             auth_dict = {}
         return get_provider(config.provider, auth_dict)
+
+
+# ---------------------------------------------------------------------------
+# Bulk-mode parent resolution (in memory)
+# ---------------------------------------------------------------------------
+
+
+def _with_parent_moves(diff: ReconcileDiff, remote: list) -> list[UpsertOp]:
+    """``diff.upserts`` plus an upsert for every parent-only move, so a
+    department is reparented (and its subtree paths rewritten) whether or not
+    its name changed too."""
+    remote_by_ext = {d.external_id: d for d in remote}
+    upserts = list(diff.upserts)
+    covered = {op.external_id for op in upserts}
+    for mv in diff.moves:
+        dto = remote_by_ext.get(mv.external_id)
+        if mv.external_id in covered or dto is None:
+            continue
+        covered.add(mv.external_id)
+        upserts.append(UpsertOp(
+            external_id=mv.external_id,
+            name=dto.name,
+            parent_external_id=mv.new_parent_external_id,
+            sort_order=dto.sort_order,
+            incoming_ts=mv.incoming_ts,
+            is_new=False,
+            existing_dept_id=mv.dept_id,
+        ))
+    return upserts
+
+
+def _fail_orphans(
+    applied: dict[str, tuple[UpsertOp, Optional[Department]]],
+    rows_by_ext: dict[str, Department],
+    failed: dict[str, str],
+) -> None:
+    """:meth:`DeptUpsertService.upsert_from_sync_payload` parent rule for a
+    whole batch: the parent must be upserted by this run or be a live row of
+    the same source. Runs to a fixpoint so children of a failed op fail too.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for ext, (op, _row) in applied.items():
+            parent_ext = op.parent_external_id
+            if ext in failed or not parent_ext:
+                continue
+            if parent_ext in applied and parent_ext not in failed:
+                continue
+            parent = rows_by_ext.get(parent_ext)
+            if parent is not None and int(parent.is_deleted or 0) == 0:
+                continue
+            failed[ext] = f'parent {parent_ext} not synced for child {ext}'
+            changed = True
+
+
+def _parent_id(op: UpsertOp, rows_by_ext: dict[str, Department]) -> Optional[int]:
+    if not op.parent_external_id:
+        return None
+    return rows_by_ext[op.parent_external_id].id
+
+
+def _resolve_path(
+    ext: str,
+    applied: dict[str, tuple[UpsertOp, Optional[Department]]],
+    rows_by_ext: dict[str, Department],
+    failed: dict[str, str],
+    paths: dict[str, str],
+    visiting: frozenset = frozenset(),
+) -> Optional[str]:
+    """Materialised path ``ext`` gets from this run, memoised in ``paths``.
+
+    A parent upserted in the same run contributes its new path; any other
+    parent its current one. A parent cycle fails every op on it.
+    """
+    if ext in paths:
+        return paths[ext]
+    if ext in failed:
+        return None
+    if ext in visiting:
+        failed[ext] = f'parent cycle through {ext}'
+        return None
+    op, _row = applied[ext]
+    parent_ext = op.parent_external_id
+    if not parent_ext:
+        parent_path = ''
+    elif parent_ext in applied and parent_ext not in failed:
+        parent_path = _resolve_path(
+            parent_ext, applied, rows_by_ext, failed, paths, visiting | {ext},
+        )
+        if parent_path is None:
+            failed.setdefault(ext, f'parent {parent_ext} not synced for child {ext}')
+            return None
+    else:
+        parent_path = rows_by_ext[parent_ext].path or ''
+    paths[ext] = build_synced_path(parent_path, int(rows_by_ext[ext].id))
+    return paths[ext]
@@ -4,6 +4,7 @@ Compares remote DTOs against local database records and produces
 typed operation lists. No IO, no side effects — fully unit-testable.
 """
 
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -116,6 +117,8 @@ def reconcile_departments(
     for d in local_depts:
         if d.external_id:
             local_by_ext[d.external_id] = d
+    ext_by_id = {d.id: d.external_id for d in local_depts}
+    parent_map = {d.id: d.parent_id for d in local_depts}
 
     creates: list[CreateDept] = []
     updates: list[UpdateDept] = []
@@ -145,7 +148,7 @@ def reconcile_departments(
                 ))
 
             # Parent change
-            current_parent_ext = _get_parent_external_id(local, local_depts)
+            current_parent_ext = _get_parent_external_id(local, ext_by_id)
             if remote.parent_external_id != current_parent_ext:
                 moves.append(MoveDept(
                     local=local,
@@ -161,7 +164,7 @@ def reconcile_departments(
     archived_ids = {a.local.id for a in archives}
     for dept in local_depts:
         if dept.id not in archived_ids and dept.status == 'active':
-            if _is_descendant_of_any(dept, archived_ids, local_depts):
+            if _is_descendant_of_any(dept, archived_ids, parent_map):
                 archives.append(ArchiveDept(local=dept))
                 archived_ids.add(dept.id)
 
@@ -181,22 +184,22 @@ def reconcile_departments(
 
 
 def _get_parent_external_id(
-    dept: Department, all_depts: list[Department],
+    dept: Department, ext_by_id: dict[int, Optional[str]],
 ) -> Optional[str]:
     """Get the external_id of a department's parent."""
     if dept.parent_id is None:
         return None
-    for d in all_depts:
-        if d.id == dept.parent_id:
-            return d.external_id
-    return None
+    return ext_by_id.get(dept.parent_id)
 
 
 def _is_descendant_of_any(
-    dept: Department, ancestor_ids: set[int], all_depts: list[Department],
+    dept: Department, ancestor_ids: set[int], parent_map: dict[int, Optional[int]],
 ) -> bool:
-    """Check if dept is a descendant of any department in ancestor_ids."""
-    parent_map = {d.id: d.parent_id for d in all_depts}
+    """Check if dept is a descendant of any department in ancestor_ids.
+
+    ``parent_map`` (id → parent_id) is built once per reconcile so the
+    descendant scan stays linear in the tree size.
+    """
     current = dept.parent_id
     visited: set[int] = set()
     while current is not None:
@@ -234,10 +237,10 @@ def _topo_sort_creates(
             children[parent_ext].append(c.remote.external_id)
 
     # Kahn's algorithm
-    queue = [eid for eid, deg in in_degree.items() if deg == 0]
+    queue = deque(eid for eid, deg in in_degree.items() if deg == 0)
     sorted_result: list[CreateDept] = []
     while queue:
-        eid = queue.pop(0)
+        eid = queue.popleft()
         sorted_result.append(create_map[eid])
         for child_eid in children.get(eid, []):
             in_degree[child_eid] -= 1
@@ -290,6 +293,7 @@ def reconcile_members(
     transfers: list[TransferMember] = []
     disables: list[DisableMember] = []
     reactivates: list[ReactivateMember] = []
+    dept_id_to_ext = {v: k for k, v in ext_to_local_dept.items()}
 
     # Pass 1: process remote members
     for ext_id, remote in remote_map.items():
@@ -347,6 +351,7 @@ def reconcile_members(
         user_depts = local_user_depts.get(local.user_id, [])
         _check_dept_changes(
             local, remote, user_depts, ext_to_local_dept, transfers,
+            dept_id_to_ext=dept_id_to_ext,
         )
 
     # Pass 2: detect disables (local exists with matching source, not in remote)
@@ -377,8 +382,13 @@ def _check_dept_changes(
     user_depts: list[UserDepartment],
     ext_to_local_dept: dict[str, int],
     transfers: list[TransferMember],
+    dept_id_to_ext: Optional[dict[int, str]] = None,
 ) -> None:
-    """Detect primary/secondary department changes for an existing user."""
+    """Detect primary/secondary department changes for an existing user.
+
+    ``dept_id_to_ext`` is the reverse of ``ext_to_local_dept``;
+    :func:`reconcile_members` builds it once instead of per transfer.
+    """
     current_primary_dept_id: Optional[int] = None
     current_secondary_dept_ids: set[int] = set()
 
@@ -405,7 +415,8 @@ def _check_dept_changes(
 
     if primary_changed or to_add_secondary or to_remove_secondary:
         # Build add_secondary_external_ids from to_add_secondary
-        dept_id_to_ext = {v: k for k, v in ext_to_local_dept.items()}
+        if dept_id_to_ext is None:
+            dept_id_to_ext = {v: k for k, v in ext_to_local_dept.items()}
         add_ext = [dept_id_to_ext[did] for did in to_add_secondary if did in dept_id_to_ext]
 
         transfers.append(TransferMember(
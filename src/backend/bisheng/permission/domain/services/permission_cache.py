@@ -1,22 +1,73 @@
-"""PermissionCache — L2 Redis cache for permission checks (T08).
+"""PermissionCache — two-tier cache for permission checks (T08).
 
-Key patterns (tenant-isolated):
-  perm:chk:{tenant_id}:{user_id}:{relation}:{object_type}:{object_id} → "1" or "0"
-  perm:lst:{tenant_id}:{user_id}:{relation}:{object_type} → pickled list[str]
+L1: process-local LRU of results (relation_roster_cache._VersionedLRU). Only used
+    while the process listens to invalidation broadcasts, so a result is never
+    served from memory after another process revoked it.
+L2: Redis, shared by every process.
 
-TTL: 10 seconds (AC-05).
+Key patterns (tenant-isolated, version-stamped):
+  perm:chk:{tenant_id}:{user_id}:{relation}:{object_type}:{object_id}:v{version} → "1" or "0"
+  perm:lst:{tenant_id}:{user_id}:{relation}:{object_type}:v{version} → list[str] in the RedisClient codec
+  perm:ver → hash of version counters: "all", "{tenant_id}:u:{user_id}", "{tenant_id}:t:{object_type}"
+
+``version`` is the (all, user, object type) counter triple. Invalidation bumps
+the matching counter plus a broadcast of the new value on ``perm:invalidate``:
+entries stamped with an older version are never read again and simply expire,
+so no keys are scanned or deleted.
+
+A bump moves a counter to at least the current time in milliseconds, so every
+counter also records when it was last bumped. The invalidation listener trims
+user and object type counters idle for longer than any entry can live; a trimmed
+counter reads as 0 (all entries stamped 0 expired long before) and its next bump
+lands above the value it had before.
+
+TTL: 10 seconds by default (AC-05), overridable per relation in
+openfga.permission_cache.relation_ttls. Both tiers use the same TTL.
 UNCACHEABLE_RELATIONS (can_manage, can_delete) bypass cache entirely.
 """
 
 from __future__ import annotations
 
+import json
 import logging
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bisheng.core.config.openfga import PermissionCacheConf
+from bisheng.permission.domain.services.relation_roster_cache import _MISS, _VersionedLRU
 
 logger = logging.getLogger(__name__)
 
 KEY_PREFIX = 'perm:'
-TTL = 10  # seconds
+TTL = 10  # seconds, default when openfga.permission_cache does not override it
+VERSION_KEY = f'{KEY_PREFIX}ver'
+INVALIDATE_CHANNEL = f'{KEY_PREFIX}invalidate'
+
+# Bound on the version counters a process remembers; they are re-read from Redis after a reset
+_MAX_KNOWN_VERSIONS = 100_000
+_RESUBSCRIBE_DELAY = 5  # seconds
+
+# perm:ver trimming: at most once per interval across all processes, dropping counters
+# idle for longer than the largest ttl plus a margin for clock skew between hosts
+TRIM_LOCK_KEY = f'{KEY_PREFIX}ver:trim'
+_TRIM_INTERVAL = 600  # seconds
+_TRIM_MARGIN = 300  # seconds
+_TRIM_BATCH = 500
+# HDEL the given fields whose counter is still older than the cutoff, atomically with
+# respect to a bump racing the trim
+_TRIM_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local value = tonumber(redis.call('HGET', KEYS[1], ARGV[i]))
+    if value and value < tonumber(ARGV[1]) then
+        removed = removed + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+Version = Tuple[int, int, int]
 
 
 def _get_tenant_id() -> int:
@@ -25,8 +76,65 @@ def _get_tenant_id() -> int:
     return get_current_tenant_id() or 1
 
 
+def _get_conf() -> PermissionCacheConf:
+    try:
+        from bisheng.common.services.config_service import settings
+        return settings.openfga.permission_cache
+    except Exception:
+        return PermissionCacheConf(ttl=TTL)
+
+
+class PermissionCacheStats:
+    """Per-process counters. ``stale`` counts L1 entries dropped because their version was bumped."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def record(self, l1_hits: int = 0, l2_hits: int = 0, misses: int = 0, stale: int = 0) -> None:
+        with self._lock:
+            self.l1_hits += l1_hits
+            self.l2_hits += l2_hits
+            self.misses += misses
+            self.stale += stale
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.l1_hits + self.l2_hits + self.misses
+        return (self.l1_hits + self.l2_hits) / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_rate': self.hit_rate,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.l1_hits = self.l2_hits = self.misses = self.stale = 0
+
+
 class PermissionCache:
-    """Stateless cache helper for permission data. All methods are @classmethod."""
+    """Cache helper for permission data. All methods are @classmethod.
+
+    The only state is process-local: the L1 entries, the version counters this
+    process has seen, and the invalidation listener thread.
+    """
+
+    stats = PermissionCacheStats()
+
+    _lock = threading.Lock()
+    _local = _VersionedLRU(maxsize=PermissionCacheConf().local_maxsize)
+    _versions: Dict[str, int] = {}
+    _listening = False
+    _listener: Optional[threading.Thread] = None
+    _stop: Optional[threading.Event] = None
 
     @classmethod
     async def get_check(
@@ -41,10 +149,17 @@ class PermissionCache:
             redis = await cls._get_redis()
             if redis is None:
                 return None
-            key = cls._check_key(user_id, relation, object_type, object_id)
-            value = await redis.aget(key)
+            version = await cls._get_version(redis, user_id, object_type)
+            local_key = ('chk', _get_tenant_id(), user_id, relation, object_type, object_id)
+            value = cls._local_get(local_key, version)
+            if value is not _MISS:
+                return value
+            value = await redis.aget(cls._check_key(user_id, relation, object_type, object_id, version))
             if value is not None:
+                cls.stats.record(l2_hits=1)
+                cls._local_set(local_key, version, bool(value), relation)
                 return bool(value)
+            cls.stats.record(misses=1)
             return None
         except Exception as e:
             logger.debug('Cache get_check error: %s', e)
@@ -64,11 +179,86 @@ class PermissionCache:
             redis = await cls._get_redis()
             if redis is None:
                 return
-            key = cls._check_key(user_id, relation, object_type, object_id)
-            await redis.aset(key, 1 if allowed else 0, expiration=TTL)
+            version = await cls._get_version(redis, user_id, object_type)
+            key = cls._check_key(user_id, relation, object_type, object_id, version)
+            await redis.aset(key, 1 if allowed else 0, expiration=cls._ttl(relation))
+            local_key = ('chk', _get_tenant_id(), user_id, relation, object_type, object_id)
+            cls._local_set(local_key, version, allowed, relation)
         except Exception as e:
             logger.debug('Cache set_check error: %s', e)
 
+    @classmethod
+    async def get_checks(
+        cls,
+        user_id: int,
+        relation: str,
+        object_type: str,
+        object_ids: List[str],
+    ) -> Dict[str, bool]:
+        """Bulk get_check in one pipelined round-trip. Misses are left out of the result."""
+        if not object_ids:
+            return {}
+        try:
+            redis = await cls._get_redis()
+            if redis is None:
+                return {}
+            version = await cls._get_version(redis, user_id, object_type)
+            tid = _get_tenant_id()
+            found: Dict[str, bool] = {}
+            for object_id in object_ids:
+                value = cls._local_get(('chk', tid, user_id, relation, object_type, object_id), version)
+                if value is not _MISS:
+                    found[object_id] = value
+            remote_ids = [one for one in object_ids if one not in found]
+            if not remote_ids:
+                return found
+            # RedisClient.amget drops misses, so read through a pipeline to keep
+            # values aligned with their keys.
+            pipe = redis.async_pipeline(transaction=False)
+            for object_id in remote_ids:
+                pipe.get(cls._check_key(user_id, relation, object_type, object_id, version))
+            values = await pipe.execute()
+            hits = 0
+            for object_id, value in zip(remote_ids, values):
+                if value is not None:
+                    found[object_id] = bool(redis.decode(value))
+                    cls._local_set(('chk', tid, user_id, relation, object_type, object_id), version,
+                                   found[object_id], relation)
+                    hits += 1
+            cls.stats.record(l2_hits=hits, misses=len(remote_ids) - hits)
+            return found
+        except Exception as e:
+            logger.debug('Cache get_checks error: %s', e)
+            return {}
+
+    @classmethod
+    async def set_checks(
+        cls,
+        user_id: int,
+        relation: str,
+        object_type: str,
+        results: Dict[str, bool],
+    ) -> None:
+        """Bulk set_check in one pipelined round-trip."""
+        if not results:
+            return
+        try:
+            redis = await cls._get_redis()
+            if redis is None:
+                return
+            version = await cls._get_version(redis, user_id, object_type)
+            ttl = cls._ttl(relation)
+            tid = _get_tenant_id()
+            pipe = redis.async_pipeline(transaction=False)
+            for object_id, allowed in results.items():
+                key = cls._check_key(user_id, relation, object_type, object_id, version)
+                pipe.setex(key, ttl, redis.encode(key, 1 if allowed else 0))
+            await pipe.execute()
+            for object_id, allowed in results.items():
+                cls._local_set(('chk', tid, user_id, relation, object_type, object_id), version, allowed, relation)
+        except Exception as e:
+            logger.debug('Cache set_checks error: %s', e)
+
     @classmethod
     async def get_list_objects(
         cls,
@@ -81,10 +271,17 @@ class PermissionCache:
             redis = await cls._get_redis()
             if redis is None:
                 return None
-            key = cls._list_key(user_id, relation, object_type)
-            value = await redis.aget(key)
+            version = await cls._get_version(redis, user_id, object_type)
+            local_key = ('lst', _get_tenant_id(), user_id, relation, object_type)
+            value = cls._local_get(local_key, version)
+            if value is not _MISS:
+                return list(value)
+            value = await redis.aget(cls._list_key(user_id, relation, object_type, version))
             if value is not None and isinstance(value, list):
+                cls.stats.record(l2_hits=1)
+                cls._local_set(local_key, version, tuple(value), relation)
                 return value
+            cls.stats.record(misses=1)
             return None
         except Exception as e:
             logger.debug('Cache get_list_objects error: %s', e)
@@ -103,78 +300,243 @@ class PermissionCache:
             redis = await cls._get_redis()
             if redis is None:
                 return
-            key = cls._list_key(user_id, relation, object_type)
-            await redis.aset(key, ids, expiration=TTL)
+            version = await cls._get_version(redis, user_id, object_type)
+            key = cls._list_key(user_id, relation, object_type, version)
+            await redis.aset(key, ids, expiration=cls._ttl(relation))
+            # stored as a tuple so callers mutating their list cannot change the cached one
+            cls._local_set(('lst', _get_tenant_id(), user_id, relation, object_type), version, tuple(ids), relation)
         except Exception as e:
             logger.debug('Cache set_list_objects error: %s', e)
 
+    # ── Invalidation ────────────────────────────────────────────
+
     @classmethod
     async def invalidate_user(cls, user_id: int) -> None:
-        """Invalidate all permission cache entries for a user.
+        """Invalidate all permission cache entries for a user (current tenant)."""
+        try:
+            await cls._bump_version(f'{_get_tenant_id()}:u:{user_id}')
+        except Exception as e:
+            logger.debug('Cache invalidate_user error: %s', e)
 
-        Uses two SCAN passes with exact prefixes to avoid false matches.
-        """
+    @classmethod
+    async def invalidate_object_type(cls, object_type: str) -> None:
+        """Invalidate all permission cache entries on one resource type (current tenant)."""
         try:
-            redis = await cls._get_redis()
-            if redis is None:
+            await cls._bump_version(f'{_get_tenant_id()}:t:{object_type}')
+        except Exception as e:
+            logger.debug('Cache invalidate_object_type error: %s', e)
+
+    @classmethod
+    async def invalidate_all(cls) -> None:
+        """Invalidate all permission cache entries, across tenants."""
+        try:
+            await cls._bump_version('all')
+        except Exception as e:
+            logger.debug('Cache invalidate_all error: %s', e)
+
+    @classmethod
+    async def _bump_version(cls, field: str) -> None:
+        redis = await cls._get_redis()
+        if redis is None:
+            return
+        conn = redis.async_connection
+        version = int(await conn.hincrby(VERSION_KEY, field, 1))
+        now_ms = int(time.time() * 1000)
+        if version < now_ms:
+            # the counter doubles as the time of its last bump, which is what trimming reads
+            version = int(await conn.hincrby(VERSION_KEY, field, now_ms - version))
+        cls._remember_version(field, version)
+        await conn.publish(INVALIDATE_CHANNEL, json.dumps({'field': field, 'version': version}))
+        logger.debug('Bumped permission cache version %s to %d', field, version)
+
+    # ── Invalidation listener ───────────────────────────────────
+
+    @classmethod
+    def start_invalidation_listener(cls, redis_client=None) -> None:
+        """Subscribe to invalidation broadcasts in a daemon thread, which enables the L1 tier.
+
+        Processes that never start the listener (workers, scripts) still share
+        L2 correctly, but read the version counters from Redis on every call.
+        """
+        with cls._lock:
+            if cls._listener is not None and cls._listener.is_alive():
                 return
+            cls._stop = threading.Event()
+            cls._listener = threading.Thread(
+                target=cls._listen,
+                args=(redis_client, cls._stop),
+                name='permission-cache-invalidation',
+                daemon=True,
+            )
+            cls._listener.start()
 
-            conn = redis.async_connection
-            deleted = 0
-            tid = _get_tenant_id()
-            # Scan with exact prefixes to avoid matching user_id=1 against user_id=11
-            for prefix in (f'{KEY_PREFIX}chk:{tid}:{user_id}:', f'{KEY_PREFIX}lst:{tid}:{user_id}:'):
-                pattern = f'{prefix}*'
-                cursor = 0
-                while True:
-                    cursor, keys = await conn.scan(cursor=cursor, match=pattern, count=100)
-                    if keys:
-                        await conn.delete(*keys)
-                        deleted += len(keys)
-                    if cursor == 0:
+    @classmethod
+    def stop_invalidation_listener(cls, timeout: float = 5) -> None:
+        with cls._lock:
+            listener, stop = cls._listener, cls._stop
+            cls._listener = cls._stop = None
+        if stop is not None:
+            stop.set()
+        if listener is not None:
+            listener.join(timeout)
+        cls._set_listening(False)
+
+    @classmethod
+    def _listen(cls, redis_client, stop: threading.Event) -> None:
+        while not stop.is_set():
+            pubsub = None
+            try:
+                if redis_client is None:
+                    from bisheng.core.cache.redis_manager import get_redis_client_sync
+                    redis_client = get_redis_client_sync()
+                pubsub = redis_client.connection.pubsub()
+                pubsub.subscribe(INVALIDATE_CHANNEL)
+                # wait for the confirmation: only bumps after it are guaranteed to reach us
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'subscribe':
                         break
+                # broadcasts may have been missed while unsubscribed, so start from Redis again
+                cls._set_listening(True)
+                next_trim = time.monotonic()
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        cls._on_invalidate_message(message['data'])
+                    if time.monotonic() >= next_trim:
+                        next_trim = time.monotonic() + _TRIM_INTERVAL
+                        try:
+                            cls.trim_versions(redis_client.connection)
+                        except Exception as e:
+                            logger.warning('Permission cache version trim error: %s', e)
+            except Exception as e:
+                logger.warning('Permission cache invalidation listener error: %s', e)
+            finally:
+                cls._set_listening(False)
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            stop.wait(_RESUBSCRIBE_DELAY)
 
-            if deleted:
-                logger.debug('Invalidated %d cache entries for user %d', deleted, user_id)
-        except Exception as e:
-            logger.debug('Cache invalidate_user error: %s', e)
+    @classmethod
+    def trim_versions(cls, connection, force: bool = False) -> int:
+        """Drop user and object type counters idle for longer than any cached entry lives.
+
+        Runs at most once per ``_TRIM_INTERVAL`` across processes unless ``force``.
+        Returns the number of counters removed.
+        """
+        if not force and not connection.set(TRIM_LOCK_KEY, 1, nx=True, ex=_TRIM_INTERVAL):
+            return 0
+        conf = _get_conf()
+        max_ttl = max([conf.ttl, *conf.relation_ttls.values()])
+        cutoff = int((time.time() - max_ttl - _TRIM_MARGIN) * 1000)
+        script = connection.register_script(_TRIM_SCRIPT)
+        removed, idle = 0, []
+        for field, value in connection.hscan_iter(VERSION_KEY, count=_TRIM_BATCH):
+            if field in (b'all', 'all') or int(value) >= cutoff:
+                continue
+            idle.append(field)
+            if len(idle) >= _TRIM_BATCH:
+                removed += int(script(keys=[VERSION_KEY], args=[cutoff, *idle]))
+                idle = []
+        if idle:
+            removed += int(script(keys=[VERSION_KEY], args=[cutoff, *idle]))
+        if removed:
+            logger.info('Trimmed %d idle permission cache version counters', removed)
+        return removed
 
     @classmethod
-    async def invalidate_all(cls) -> None:
-        """Invalidate all permission cache entries."""
+    def _on_invalidate_message(cls, data) -> None:
         try:
-            redis = await cls._get_redis()
-            if redis is None:
+            payload = json.loads(data)
+            cls._remember_version(payload['field'], int(payload['version']))
+        except Exception as e:
+            logger.debug('Ignoring malformed permission cache invalidation %r: %s', data, e)
+
+    @classmethod
+    def _set_listening(cls, listening: bool) -> None:
+        with cls._lock:
+            cls._listening = listening
+            cls._local = _VersionedLRU(maxsize=_get_conf().local_maxsize)
+            cls._versions.clear()
+
+    # ── L1 and versions ─────────────────────────────────────────
+
+    @classmethod
+    async def _get_version(cls, redis, user_id: int, object_type: str) -> Version:
+        tid = _get_tenant_id()
+        fields = ('all', f'{tid}:u:{user_id}', f'{tid}:t:{object_type}')
+        if cls._listening:
+            with cls._lock:
+                known = tuple(cls._versions.get(field) for field in fields)
+            if None not in known:
+                return known
+        raw = await redis.async_connection.hmget(VERSION_KEY, list(fields))
+        version = tuple(int(one or 0) for one in raw)
+        if cls._listening:
+            for field, value in zip(fields, version):
+                cls._remember_version(field, value)
+        return version
+
+    @classmethod
+    def _remember_version(cls, field: str, version: int) -> None:
+        with cls._lock:
+            if not cls._listening:
                 return
+            if len(cls._versions) >= _MAX_KNOWN_VERSIONS and field not in cls._versions:
+                cls._versions.clear()
+            # never go back: a broadcast can overtake the HMGET that read an older value
+            cls._versions[field] = max(cls._versions.get(field, 0), version)
 
-            conn = redis.async_connection
-            pattern = f'{KEY_PREFIX}*'
-            cursor = 0
-            deleted = 0
-            while True:
-                cursor, keys = await conn.scan(cursor=cursor, match=pattern, count=200)
-                if keys:
-                    await conn.delete(*keys)
-                    deleted += len(keys)
-                if cursor == 0:
-                    break
-
-            if deleted:
-                logger.debug('Invalidated %d total permission cache entries', deleted)
-        except Exception as e:
-            logger.debug('Cache invalidate_all error: %s', e)
+    @classmethod
+    def _local_get(cls, key: tuple, version: Version):
+        if not cls._listening:
+            return _MISS
+        with cls._lock:
+            entry = cls._local.get(key, version)
+            if entry is _MISS:
+                stale = key in cls._local
+                if stale:
+                    cls._local.discard(key)
+            elif entry[0] <= time.monotonic():
+                cls._local.discard(key)
+                entry, stale = _MISS, False
+        if entry is _MISS:
+            if stale:
+                cls.stats.record(stale=1)
+            return _MISS
+        cls.stats.record(l1_hits=1)
+        return entry[1]
+
+    @classmethod
+    def _local_set(cls, key: tuple, version: Version, value, relation: str) -> None:
+        if not cls._listening:
+            return
+        conf = _get_conf()
+        if not conf.local_enabled:
+            return
+        with cls._lock:
+            cls._local.set(key, version, (time.monotonic() + conf.ttl_for(relation), value))
 
     # ── Key builders ────────────────────────────────────────────
 
     @staticmethod
-    def _check_key(user_id: int, relation: str, object_type: str, object_id: str) -> str:
+    def _ttl(relation: str) -> int:
+        return _get_conf().ttl_for(relation)
+
+    @staticmethod
+    def _check_key(user_id: int, relation: str, object_type: str, object_id: str, version: Version) -> str:
         tid = _get_tenant_id()
-        return f'{KEY_PREFIX}chk:{tid}:{user_id}:{relation}:{object_type}:{object_id}'
+        stamp = '.'.join(map(str, version))
+        return f'{KEY_PREFIX}chk:{tid}:{user_id}:{relation}:{object_type}:{object_id}:v{stamp}'
 
     @staticmethod
-    def _list_key(user_id: int, relation: str, object_type: str) -> str:
+    def _list_key(user_id: int, relation: str, object_type: str, version: Version) -> str:
         tid = _get_tenant_id()
-        return f'{KEY_PREFIX}lst:{tid}:{user_id}:{relation}:{object_type}'
+        stamp = '.'.join(map(str, version))
+        return f'{KEY_PREFIX}lst:{tid}:{user_id}:{relation}:{object_type}:v{stamp}'
 
     @staticmethod
     async def _get_redis():
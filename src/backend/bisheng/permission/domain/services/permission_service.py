@@ -2,7 +2,8 @@
 
 Permission check chain (AC-02 / F013 spec §6):
   L1: Super admin shortcircuit (等效 owner，无 FGA 元组)
-  L2: Redis cache (10s TTL, UNCACHEABLE_RELATIONS bypass)
+  L2: Permission cache — process-local L1 + Redis L2 (10s default TTL,
+      UNCACHEABLE_RELATIONS bypass)
   L3: F013 — Tenant IN-list visibility gate (resolve resource tenant_id;
       reject when not in user's visible set unless tenant#shared_to#member)
   L4: F013 — Child Tenant admin shortcut (skip Root: no tenant#admin tuples
@@ -76,6 +77,11 @@ class PermissionService:
         }
     )
 
+    #: OpenFGA's default per-request limit for batch-check (OPENFGA_MAX_CHECKS_PER_BATCH_CHECK)
+    _FGA_BATCH_CHECK_SIZE = 50
+    _FGA_BATCH_CHECK_CONCURRENCY = 4
+    _IMPLICIT_LEVEL_CONCURRENCY = 8
+
     # ── Public API ──────────────────────────────────────────────
 
     @classmethod
@@ -214,6 +220,102 @@ class PermissionService:
             logger.error("Unexpected error during permission check: %s", e)
             return False
 
+    @classmethod
+    async def check_many(
+        cls,
+        user_id: int,
+        relation: str,
+        object_type: str,
+        object_ids: list[str],
+        login_user=None,
+    ) -> dict[str, bool]:
+        """Bulk ``check`` of one relation on many objects of one type.
+
+        Walks the same chain as ``check`` level by level for all objects at
+        once instead of object by object: the tenant gate resolves owning
+        tenants in one query, cache entries are read and written in one
+        pipelined round-trip each, and whatever is left goes to OpenFGA in
+        ``batch_check`` requests of ``_FGA_BATCH_CHECK_SIZE`` tuples. Legacy
+        alias and owner fallbacks only run for the objects FGA denied.
+
+        Returns ``{object_id: allowed}`` for every (deduplicated) object id.
+        """
+        ids = list(dict.fromkeys(str(one) for one in (object_ids or [])))
+        if not ids:
+            return {}
+        # L1: Super admin shortcircuit
+        if login_user and login_user.is_admin():
+            return dict.fromkeys(ids, True)
+
+        results: dict[str, bool] = {}
+        # L3 / L4 — F013 tenant gating
+        denied_ids, shortcut_levels = await cls._evaluate_tenant_gate_many(user_id, object_type, ids, login_user)
+        for object_id in denied_ids:
+            results[object_id] = False
+        for object_id, level in shortcut_levels.items():
+            results[object_id] = cls._permission_level_satisfies_relation(level, relation, object_type)
+        pending = [one for one in ids if one not in results]
+
+        # L2: Cache lookup
+        cacheable = relation not in UNCACHEABLE_RELATIONS
+        if pending and cacheable:
+            from bisheng.permission.domain.services.permission_cache import PermissionCache
+
+            cached = await PermissionCache.get_checks(user_id, relation, object_type, pending)
+            results.update(cached)
+            pending = [one for one in pending if one not in cached]
+        if not pending:
+            return results
+
+        # L5: OpenFGA batch check
+        try:
+            fga = await cls._aget_fga()
+            if fga is None:
+                logger.warning("FGAClient not available, falling back to owner / department-space member")
+                results.update(await cls._implicit_allowed_many(user_id, relation, object_type, pending))
+                return results
+
+            decided = await cls._fga_batch_check(fga, user_id, relation, object_type, pending)
+
+            # _legacy_alias_object_types only ever aliases knowledge_library to knowledge_space
+            denied = [one for one, allowed in decided.items() if not allowed]
+            legacy_ids = []
+            if denied and object_type == "knowledge_library":
+                legacy_ids = await cls._filter_legacy_alias_ids(object_type, denied)
+            if legacy_ids:
+                legacy = await cls._fga_batch_check(fga, user_id, relation, "knowledge_space", legacy_ids)
+                decided.update({one: True for one, allowed in legacy.items() if allowed})
+
+            # L4: Owner fallback, same rule as check(): only while no other owner tuple remains
+            denied = [one for one, allowed in decided.items() if not allowed]
+            if denied:
+                decided.update(
+                    await cls._implicit_allowed_many(
+                        user_id,
+                        relation,
+                        object_type,
+                        denied,
+                        require_no_active_owner=True,
+                    )
+                )
+
+            if cacheable:
+                from bisheng.permission.domain.services.permission_cache import PermissionCache
+
+                await PermissionCache.set_checks(user_id, relation, object_type, decided)
+            results.update(decided)
+            return results
+
+        except FGAConnectionError as e:
+            # Same degraded, uncached owner/implicit fallback as check()
+            logger.error("OpenFGA unreachable during check_many, falling back to owner/implicit: %s", e)
+            results.update(await cls._implicit_allowed_many(user_id, relation, object_type, pending))
+            return results
+        except Exception as e:
+            logger.error("Unexpected error during bulk permission check: %s", e)
+            results.update(dict.fromkeys(pending, False))
+            return results
+
     @classmethod
     async def list_accessible_ids(
         cls,
@@ -1035,6 +1137,129 @@ class PermissionService:
 
         return False, None
 
+    @classmethod
+    async def _evaluate_tenant_gate_many(
+        cls,
+        user_id: int,
+        object_type: str,
+        object_ids: list[str],
+        login_user=None,
+    ) -> tuple[set[str], dict[str, str]]:
+        """Bulk ``_evaluate_tenant_gate``: ``(denied_ids, {object_id: shortcut_level})``.
+
+        Owning tenants come from one query; shared_to and tenant-admin lookups
+        run once per distinct tenant instead of once per object.
+        """
+        visible_tenants = getattr(login_user, "get_visible_tenants", None)
+        if login_user is None or not callable(visible_tenants):
+            return set(), {}
+
+        tenant_map = await cls._resource_tenant_map(object_type, object_ids)
+        if not tenant_map:
+            return set(), {}
+
+        from bisheng.database.models.tenant import ROOT_TENANT_ID, TenantDao
+
+        visible = await visible_tenants()
+        tenant_ids = sorted(set(tenant_map.values()))
+        hidden = [tid for tid in tenant_ids if tid not in visible]
+        shared = await asyncio.gather(
+            *[cls._is_shared_to(user_id, tid, visible_tenant_ids=visible) for tid in hidden]
+        )
+        denied_tenants = {tid for tid, allowed in zip(hidden, shared) if not allowed}
+
+        admin_tenants: set[int] = set()
+        has_tenant_admin = getattr(login_user, "has_tenant_admin", None)
+        child_candidates = [tid for tid in tenant_ids if tid not in denied_tenants and tid != ROOT_TENANT_ID]
+        if child_candidates and callable(has_tenant_admin):
+            tenants = await asyncio.gather(*[TenantDao.aget_by_id(tid) for tid in child_candidates])
+            child_tenants = [
+                tid
+                for tid, tenant in zip(child_candidates, tenants)
+                if tenant is not None and tenant.parent_tenant_id is not None
+            ]
+            admin_checks = await asyncio.gather(*[has_tenant_admin(tid) for tid in child_tenants])
+            admin_tenants = {tid for tid, allowed in zip(child_tenants, admin_checks) if allowed}
+
+        denied_ids = {one for one, tid in tenant_map.items() if tid in denied_tenants}
+        shortcut_levels = {
+            one: PermissionLevel.owner.value for one, tid in tenant_map.items() if tid in admin_tenants
+        }
+        return denied_ids, shortcut_levels
+
+    @classmethod
+    async def _fga_batch_check(
+        cls,
+        fga,
+        user_id: int,
+        relation: str,
+        object_type: str,
+        object_ids: list[str],
+    ) -> dict[str, bool]:
+        """``{object_id: allowed}`` from OpenFGA in ``_FGA_BATCH_CHECK_SIZE`` sized batch_check calls."""
+        batches = [
+            object_ids[start : start + cls._FGA_BATCH_CHECK_SIZE]
+            for start in range(0, len(object_ids), cls._FGA_BATCH_CHECK_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(cls._FGA_BATCH_CHECK_CONCURRENCY)
+
+        async def _one(batch: list[str]) -> list[bool]:
+            async with semaphore:
+                return await fga.batch_check(
+                    [
+                        {"user": f"user:{user_id}", "relation": relation, "object": f"{object_type}:{one}"}
+                        for one in batch
+                    ]
+                )
+
+        allowed_lists = await asyncio.gather(*[_one(batch) for batch in batches])
+        return {
+            object_id: bool(allowed)
+            for batch, allowed_list in zip(batches, allowed_lists)
+            for object_id, allowed in zip(batch, allowed_list)
+        }
+
+    @classmethod
+    async def _implicit_allowed_many(
+        cls,
+        user_id: int,
+        relation: str,
+        object_type: str,
+        object_ids: list[str],
+        *,
+        require_no_active_owner: bool = False,
+    ) -> dict[str, bool]:
+        """Bulk owner / department-space fallback.
+
+        Only objects that can have an implicit level are resolved one by one:
+        the ones the user created (one query for all of them) and department
+        knowledge spaces. Everything else has no implicit level.
+        """
+        candidates = object_ids
+        if object_type != "knowledge_space":
+            try:
+                created = set(await cls._resource_ids_by_creator_user_ids(object_type, {user_id}))
+                candidates = [one for one in object_ids if one in created]
+            except Exception as e:
+                logger.debug("Could not list resources created by user %s: %s", user_id, e)
+
+        semaphore = asyncio.Semaphore(cls._IMPLICIT_LEVEL_CONCURRENCY)
+
+        async def _one(object_id: str) -> bool:
+            async with semaphore:
+                level = await cls._get_implicit_permission_level_after_gate(
+                    user_id,
+                    object_type,
+                    object_id,
+                    require_no_active_owner=require_no_active_owner,
+                )
+            return cls._permission_level_satisfies_relation(level, relation, object_type)
+
+        allowed = await asyncio.gather(*[_one(one) for one in candidates])
+        results = dict.fromkeys(object_ids, False)
+        results.update(zip(candidates, allowed))
+        return results
+
     @classmethod
     async def _get_implicit_permission_level_after_gate(
         cls,
@@ -48,9 +48,18 @@ class _VersionedLRU:
         while len(self._data) > self._max:
             self._data.popitem(last=False)
 
+    def discard(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
     def clear(self) -> None:
         self._data.clear()
 
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
 
 # One bucket per roster kind. Keyed by tenant_id (defensive: config is currently
 # global, but keying by tenant keeps it correct if it ever becomes tenant-scoped and
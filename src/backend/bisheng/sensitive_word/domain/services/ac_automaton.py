@@ -1,55 +1,365 @@
 from __future__ import annotations
 
+import json
+import os
+import struct
+import tempfile
+from array import array
 from collections import Counter, deque
-from dataclasses import dataclass, field
-from typing import Dict, Iterable, List
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 
-@dataclass
-class _Node:
-    children: Dict[str, '_Node'] = field(default_factory=dict)
-    fail: '_Node | None' = None
-    outputs: List[str] = field(default_factory=list)
+# Codepoints fit in 21 bits, so (state << 21) | codepoint is a unique transition key
+_CHAR_BITS = 21
+_MAGIC = b'BSAC\x01'
+_HEADER = struct.Struct('<5sI')
+
+# Texts at least this long are scanned with numpy instead of walking the automaton
+_VECTOR_MIN_CHARS = 4096
+# Longest word the numpy scan handles; lexicons with longer words always walk the automaton
+_VECTOR_MAX_WORD = 64
+_VECTOR_CHUNK = 1 << 20
+_HASH_BASE = 0x100000001B3
+_HASH_MASK = (1 << 64) - 1
+# the hash filter gets about 64 bits per word, within these bounds
+_FILTER_MIN_BITS = 16
+_FILTER_MAX_BITS = 26
+
+
+def _word_hash(word: str) -> int:
+    value = 0
+    for code in map(ord, word):
+        value = (value * _HASH_BASE + code) & _HASH_MASK
+    return value
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    # murmur3 finalizer: the polynomial hash of short words leaves the top bits empty
+    hashes = hashes ^ (hashes >> np.uint64(33))
+    hashes = hashes * np.uint64(0xFF51AFD7ED558CCD)
+    return hashes ^ (hashes >> np.uint64(33))
+
+
+def _count_matches(matches: Iterable[Tuple[int, int, int]], counts: Dict[int, int]) -> None:
+    for _, _, word_id in matches:
+        counts[word_id] = counts.get(word_id, 0) + 1
 
 
 class ACAutomaton:
-    def __init__(self, words: Iterable[str]) -> None:
-        self.root = _Node()
-        self.root.fail = self.root
-        for word in words:
-            self._insert(word)
-        self._build_fail_links()
-
-    def _insert(self, word: str) -> None:
-        node = self.root
-        for char in word:
-            node = node.children.setdefault(char, _Node())
-        if word not in node.outputs:
-            node.outputs.append(word)
-
-    def _build_fail_links(self) -> None:
-        queue = deque()
-        for child in self.root.children.values():
-            child.fail = self.root
-            queue.append(child)
+    """
+    Aho-Corasick automaton compiled into flat arrays.
+
+    States are numbered breadth first with 0 as the root. Per state:
+      fail[s]  fail link
+      word[s]  id of the word ending exactly at s, -1 if none
+      out[s]   nearest state on the fail chain of s (s included) where a word ends, 0 if none
+    Transitions are one dict keyed by ``(state << 21) | codepoint``, which is rebuilt from
+    two arrays on load. Everything but that dict is plain arrays, so a compiled automaton
+    can be written to a file once and loaded by other worker processes with
+    ``to_bytes``/``from_bytes``.
+
+    Long texts skip the per-character walk: a rolling hash of every substring with a
+    lexicon word length is computed with numpy, a bit filter of the word hashes picks the
+    few candidate positions and only those are compared in Python. Both paths report
+    the same counts in the same order (by end position, longer words first).
+    """
 
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self.words: List[str] = []
+        self.fail = array('i', [0])
+        self.word = array('i', [-1])
+        self.out = array('i', [0])
+        self.word_hash = array('Q')
+        self._goto: Dict[int, int] = {}
+        self._alphabet: frozenset = frozenset()
+        self._vector_index = None
+        self._compile(words)
+
+    def _compile(self, words: Iterable[str]) -> None:
+        # the trie is built straight into the transition dict: a dict of ints only is not
+        # tracked by the garbage collector, unlike one dict of children per state
+        goto: Dict[int, int] = {}
+        word_at = [-1]
+        for item in words:
+            if not item:
+                continue
+            state = 0
+            for code in map(ord, item):
+                key = (state << _CHAR_BITS) | code
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = goto[key] = len(word_at)
+                    word_at.append(-1)
+                state = nxt
+            if word_at[state] < 0:
+                word_at[state] = len(self.words)
+                self.words.append(item)
+                self.word_hash.append(_word_hash(item))
+
+        # sorted keys group the edges of each state together; first[s] is where s starts
+        size = len(word_at)
+        keys = array('q', sorted(goto))
+        targets = array('i', map(goto.__getitem__, keys))
+        first = [0] * (size + 1)
+        for key in keys:
+            first[(key >> _CHAR_BITS) + 1] += 1
+        for state in range(size):
+            first[state + 1] += first[state]
+
+        mask = (1 << _CHAR_BITS) - 1
+        fail = [0] * size
+        out = [0] * size
+        queue = deque(targets[first[0]:first[1]])
         while queue:
-            current = queue.popleft()
-            for char, child in current.children.items():
-                fail_node = current.fail
-                while fail_node is not self.root and char not in fail_node.children:
-                    fail_node = fail_node.fail
-                child.fail = fail_node.children.get(char, self.root) if fail_node else self.root
-                child.outputs.extend(child.fail.outputs if child.fail else [])
+            state = queue.popleft()
+            fail_state = fail[state]
+            for index in range(first[state], first[state + 1]):
+                child = targets[index]
+                # the root's children keep fail 0
+                if state:
+                    code = keys[index] & mask
+                    f = fail_state
+                    while f and ((f << _CHAR_BITS) | code) not in goto:
+                        f = fail[f]
+                    fail[child] = goto.get((f << _CHAR_BITS) | code, 0)
                 queue.append(child)
+            out[state] = state if word_at[state] >= 0 else out[fail_state]
+
+        self.fail = array('i', fail)
+        self.word = array('i', word_at)
+        self.out = array('i', out)
+        self._set_transitions(keys, targets, goto)
+
+    def _set_transitions(self, keys: array, targets: array, goto: Optional[Dict[int, int]] = None) -> None:
+        self._keys = keys
+        self._targets = targets
+        self._goto = goto if goto is not None else dict(zip(keys, targets))
+        self.max_word_length = max(map(len, self.words), default=0)
+        mask = (1 << _CHAR_BITS) - 1
+        self._alphabet = frozenset(key & mask for key in keys)
+
+    @property
+    def state_count(self) -> int:
+        return len(self.fail)
 
     def find_all(self, text: str) -> Counter[str]:
-        counter: Counter[str] = Counter()
-        node = self.root
-        for char in text:
-            while node is not self.root and char not in node.children:
-                node = node.fail or self.root
-            node = node.children.get(char, self.root)
-            for word in node.outputs:
-                counter[word] += 1
-        return counter
+        counts: Dict[int, int] = {}
+        if self._use_vector(text):
+            _count_matches(self._scan_vectorized(text), counts)
+        else:
+            self._walk(text, counts)
+        return self._to_counter(counts)
+
+    def scanner(self, stop_at_hit: bool = False) -> 'ACStreamScanner':
+        return ACStreamScanner(self, stop_at_hit=stop_at_hit)
+
+    def _to_counter(self, counts: Dict[int, int]) -> Counter[str]:
+        words = self.words
+        return Counter({words[word_id]: count for word_id, count in counts.items()})
+
+    def _use_vector(self, text: str) -> bool:
+        return len(text) >= _VECTOR_MIN_CHARS and 0 < self.max_word_length <= _VECTOR_MAX_WORD
+
+    def _walk(self, text: str, counts: Dict[int, int], state: int = 0, stop_at_hit: bool = False) -> Tuple[int, bool]:
+        """Walk from ``state`` adding hits to ``counts``; returns the final state and whether it stopped at a hit"""
+        goto_get = self._goto.get
+        alphabet = self._alphabet
+        fail, word, out = self.fail, self.word, self.out
+        for code in map(ord, text):
+            if code not in alphabet:
+                # no state has a transition on this character, so matching restarts at the root
+                state = 0
+                continue
+            while True:
+                nxt = goto_get((state << _CHAR_BITS) | code)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            hit = out[state]
+            if not hit:
+                continue
+            while hit:
+                word_id = word[hit]
+                counts[word_id] = counts.get(word_id, 0) + 1
+                hit = out[fail[hit]]
+            if stop_at_hit:
+                return state, True
+        return state, False
+
+    def _state_after(self, text: str) -> int:
+        """The state reached after ``text``; only its last ``max_word_length`` characters matter"""
+        goto_get = self._goto.get
+        fail = self.fail
+        state = 0
+        for code in map(ord, text[-self.max_word_length:] if self.max_word_length else ''):
+            while True:
+                nxt = goto_get((state << _CHAR_BITS) | code)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+        return state
+
+    def _get_vector_index(self):
+        """(sorted word lengths, filter shift, packed filter of word hashes, word -> id), built on first use"""
+        if self._vector_index is None:
+            lengths = sorted({len(word) for word in self.words})
+            filter_bits = min(max((len(self.words) * 64).bit_length(), _FILTER_MIN_BITS), _FILTER_MAX_BITS)
+            shift = np.uint64(64 - filter_bits)
+            bits = np.zeros(1 << (filter_bits - 3), dtype=np.uint8)
+            if self.words:
+                slots = _mix(np.frombuffer(self.word_hash, dtype=np.uint64)) >> shift
+                np.bitwise_or.at(bits, (slots >> np.uint64(3)).astype(np.intp),
+                                 np.left_shift(1, (slots & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+            self._vector_index = (lengths, shift, bits, {word: i for i, word in enumerate(self.words)})
+        return self._vector_index
+
+    def _scan_vectorized(self, text: str, skip: int = 0) -> List[Tuple[int, int, int]]:
+        """Matches as (end, -length, word id) in walk order, leaving out those ending within ``skip``"""
+        lengths, shift, bits, word_ids = self._get_vector_index()
+        max_length = lengths[-1]
+        wanted = set(lengths)
+        base = np.uint64(_HASH_BASE)
+        matches = []
+        for start in range(0, len(text), _VECTOR_CHUNK):
+            # overlap by the longest word so matches across the chunk border are seen;
+            # only matches starting inside the chunk are kept, the rest belong to the next one
+            segment = text[start:start + _VECTOR_CHUNK + max_length - 1]
+            own = min(_VECTOR_CHUNK, len(segment))
+            codes = np.frombuffer(segment.encode('utf-32-le', 'surrogatepass'), dtype='<u4').astype(np.uint64)
+            hashes = codes
+            for length in range(1, max_length + 1):
+                if length > 1:
+                    hashes = hashes[:-1] * base + codes[length - 1:]
+                if length not in wanted:
+                    continue
+                slots = _mix(hashes[:own]) >> shift
+                hit = (bits[(slots >> np.uint64(3)).astype(np.intp)] >> (slots & np.uint64(7)).astype(np.uint8)) & 1
+                for pos in np.flatnonzero(hit).tolist():
+                    word_id = word_ids.get(segment[pos:pos + length])
+                    if word_id is not None and start + pos + length > skip:
+                        matches.append((start + pos + length, -length, word_id))
+        matches.sort()
+        return matches
+
+    # ── serialization ────────────────────────────────────────────
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({
+            'words': self.words,
+            'states': self.state_count,
+            'edges': len(self._keys),
+        }, ensure_ascii=False).encode('utf-8')
+        return b''.join([
+            _HEADER.pack(_MAGIC, len(header)),
+            header,
+            self.fail.tobytes(),
+            self.word.tobytes(),
+            self.out.tobytes(),
+            self.word_hash.tobytes(),
+            self._keys.tobytes(),
+            self._targets.tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ACAutomaton':
+        magic, header_size = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError('not a compiled Aho-Corasick automaton')
+        offset = _HEADER.size
+        header = json.loads(data[offset:offset + header_size].decode('utf-8'))
+        offset += header_size
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal offset
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            return values
+
+        automaton = cls.__new__(cls)
+        automaton.words = header['words']
+        automaton.fail = take('i', header['states'])
+        automaton.word = take('i', header['states'])
+        automaton.out = take('i', header['states'])
+        automaton.word_hash = take('Q', len(automaton.words))
+        automaton._vector_index = None
+        keys = take('q', header['edges'])
+        automaton._set_transitions(keys, take('i', header['edges']))
+        return automaton
+
+    def save(self, path: Path) -> None:
+        """Write atomically, so a concurrently loading process never sees a partial file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.to_bytes())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['ACAutomaton']:
+        try:
+            return cls.from_bytes(path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+
+class ACStreamScanner:
+    """
+    ``find_all`` over text that arrives in pieces, e.g. pages of a parsed file or tokens
+    of an LLM answer. The automaton state carries over from one piece to the next, so a
+    word split across pieces is found once, when its last character arrives.
+
+    With ``stop_at_hit`` scanning ends at the first position where a word ends; every
+    ``feed`` after that is a no-op.
+    """
+
+    def __init__(self, automaton: ACAutomaton, stop_at_hit: bool = False) -> None:
+        self.automaton = automaton
+        self.stop_at_hit = stop_at_hit
+        self.stopped = False
+        self._state = 0
+        self._counts: Dict[int, int] = {}
+
+    def feed(self, text: str) -> bool:
+        """Scan the next piece; returns True once scanning has stopped at a hit"""
+        if self.stopped or not text:
+            return self.stopped
+        automaton = self.automaton
+        if automaton._use_vector(text):
+            # words ending in the first max_word_length - 1 characters may have started in an
+            # earlier piece: walk those from the carried state, scan the rest with numpy
+            head = automaton.max_word_length - 1
+            self._state, self.stopped = automaton._walk(text[:head], self._counts, self._state, self.stop_at_hit)
+            if not self.stopped:
+                matches = automaton._scan_vectorized(text, skip=head)
+                if self.stop_at_hit and matches:
+                    first_end = matches[0][0]
+                    matches = [match for match in matches if match[0] == first_end]
+                    self.stopped = True
+                _count_matches(matches, self._counts)
+                self._state = automaton._state_after(text)
+        else:
+            self._state, self.stopped = automaton._walk(text, self._counts, self._state, self.stop_at_hit)
+        return self.stopped
+
+    @property
+    def has_hits(self) -> bool:
+        return bool(self._counts)
+
+    @property
+    def hits(self) -> Counter[str]:
+        return self.automaton._to_counter(self._counts)
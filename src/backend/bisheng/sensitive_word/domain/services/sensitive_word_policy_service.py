@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import os
 import re
+import time
 from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
 
 from bisheng.sensitive_word.domain.models.sensitive_word_policy import (
     SensitiveWordPolicy,
@@ -18,7 +23,7 @@ from bisheng.sensitive_word.domain.schemas import (
     SensitiveWordPolicyResp,
     SensitiveWordScopeType,
 )
-from bisheng.sensitive_word.domain.services.ac_automaton import ACAutomaton
+from bisheng.sensitive_word.domain.services.ac_automaton import ACAutomaton, ACStreamScanner
 
 if TYPE_CHECKING:
     from bisheng.common.dependencies.user_deps import UserPayload
@@ -27,10 +32,78 @@ DEFAULT_AUTO_REPLY = '上传内容命中敏感词，已被系统拒绝。'
 BUILTIN_WORDS_TYPE = 'builtin'
 CUSTOM_WORDS_TYPE = 'custom'
 WORD_SEPARATOR_RE = re.compile(r'[\r\n,，;；|]+')
+# Seconds a policy loaded for is_effective/open_scanner is reused before it is read again
+POLICY_CACHE_TTL = 10
+# Seconds an unused compiled lexicon file is kept before a later compile sweeps it away
+LEXICON_FILE_TTL = 7 * 24 * 3600
+
+
+def _build_hits(counter: Dict[str, int], normalized_map: Dict[str, str], max_hits: Any) -> List[SensitiveWordHit]:
+    hits = [SensitiveWordHit(word=normalized_map.get(word, word), count=count) for word, count in counter.items()]
+    if isinstance(max_hits, int) and max_hits > 0:
+        hits = hits[:max_hits]
+    return hits
+
+
+class SensitiveWordStreamScanner:
+    """
+    Checks text that arrives in pieces against one policy, e.g. the pages of a file being
+    ingested or the tokens of an LLM answer, without joining them first. A word split
+    across two pieces is still found. With ``stop_at_hit`` (the default) scanning ends at
+    the first hit: ``feed`` returns True and the caller should stop and reply with
+    ``result().auto_reply``.
+    """
+
+    def __init__(
+        self,
+        scanner: Optional[ACStreamScanner] = None,
+        normalized_map: Optional[Dict[str, str]] = None,
+        case_sensitive: bool = False,
+        auto_reply: str = DEFAULT_AUTO_REPLY,
+        max_hits: Any = None,
+    ) -> None:
+        self._scanner = scanner
+        self._normalized_map = normalized_map or {}
+        self._case_sensitive = case_sensitive
+        self._auto_reply = auto_reply
+        self._max_hits = max_hits
+
+    @property
+    def enabled(self) -> bool:
+        return self._scanner is not None
+
+    @property
+    def blocked(self) -> bool:
+        """Whether any word was found so far"""
+        return self._scanner is not None and self._scanner.has_hits
+
+    def feed(self, text: Optional[str]) -> bool:
+        """Scan the next piece; returns True once scanning stopped at a hit"""
+        if self._scanner is None:
+            return False
+        if text:
+            self._scanner.feed(text if self._case_sensitive else text.lower())
+        return self._scanner.stopped
+
+    def result(self) -> SensitiveWordCheckResult:
+        if self._scanner is None:
+            return SensitiveWordCheckResult(enabled=False, hits=[], auto_reply=DEFAULT_AUTO_REPLY)
+        return SensitiveWordCheckResult(
+            enabled=True,
+            hits=_build_hits(self._scanner.hits, self._normalized_map, self._max_hits),
+            auto_reply=self._auto_reply,
+        )
 
 
 class SensitiveWordPolicyService:
-    _automaton_cache: Dict[Tuple, Tuple[ACAutomaton, Dict[str, str]]] = {}
+    # (tenant_id, business_type, scope_type, scope_id) -> (lexicon version, compiled lexicon or None when empty)
+    _automaton_cache: Dict[Tuple, Tuple[str, Optional[Tuple[ACAutomaton, Dict[str, str]]]]] = {}
+    # lexicon version -> compiled lexicon, shared by every policy with the same words
+    _lexicon_cache: Dict[str, Tuple[ACAutomaton, Dict[str, str]]] = {}
+    # (tenant_id, business_type, scope_type, scope_id) -> (loaded at, policy, effective)
+    _policy_cache: Dict[Tuple, Tuple[float, Optional[SensitiveWordPolicy], bool]] = {}
+    # (builtin words tuple, digest); the tuple is kept so its identity stays a valid memo key
+    _builtin_digest: Tuple[Tuple[str, ...], str] = ((), '')
 
     @staticmethod
     def _current_tenant_id(login_user: UserPayload) -> int:
@@ -70,8 +143,52 @@ class SensitiveWordPolicyService:
     @classmethod
     def clear_cache(cls) -> None:
         cls._automaton_cache.clear()
+        cls._lexicon_cache.clear()
+        cls._policy_cache.clear()
+        cls._builtin_digest = ((), '')
         cls.load_builtin_words.cache_clear()
 
+    @classmethod
+    def invalidate_policy(cls, tenant_id: int, business_type: str, scope_type: str, scope_id: str) -> None:
+        """Drop the compiled lexicon of one policy; other tenants and policies keep theirs."""
+        cls._policy_cache.pop((tenant_id, business_type, scope_type, scope_id), None)
+        cached = cls._automaton_cache.pop((tenant_id, business_type, scope_type, scope_id), None)
+        if cached:
+            cls._release_lexicon(cached[0])
+
+    @classmethod
+    def _release_lexicon(cls, version: str) -> None:
+        """Forget a lexicon no policy of this process uses any more, in memory and on disk"""
+        if all(entry[0] != version for entry in cls._automaton_cache.values()):
+            cls._lexicon_cache.pop(version, None)
+            # a process still holding it keeps its copy in memory; a cold one recompiles
+            cls._remove_lexicon_files(cls._lexicon_path(version))
+
+    @staticmethod
+    def _remove_lexicon_files(path: Path) -> None:
+        for file in (path, path.with_suffix('.json')):
+            try:
+                file.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f'remove compiled sensitive words {file} failed: {e}')
+
+    @classmethod
+    def _sweep_lexicon_files(cls, directory: Path) -> None:
+        """
+        Remove compiled lexicons no process has loaded or written for LEXICON_FILE_TTL,
+        e.g. those of policies changed while their workers were down, or of an older
+        builtin word list. Leftover temporary files of interrupted writes go as well.
+        """
+        expire_before = time.time() - LEXICON_FILE_TTL
+        for file in directory.glob('*.bsac*'):
+            if file.suffix not in ('.bsac', '.tmp') or file.stem in cls._lexicon_cache:
+                continue
+            try:
+                if file.stat().st_mtime < expire_before:
+                    cls._remove_lexicon_files(file)
+            except OSError:
+                continue
+
     @classmethod
     def default_response(cls, tenant_id: int, business_type: str) -> SensitiveWordPolicyResp:
         return SensitiveWordPolicyResp(
@@ -133,7 +250,7 @@ class SensitiveWordPolicyService:
             scope_type=SensitiveWordScopeType.TENANT.value,
             scope_id=str(tenant_id),
         )
-        cls.clear_cache()
+        cls.invalidate_policy(tenant_id, business_type.value, SensitiveWordScopeType.TENANT.value, str(tenant_id))
         return cls.to_response(policy, tenant_id, business_type.value)
 
     @classmethod
@@ -156,6 +273,42 @@ class SensitiveWordPolicyService:
             deduped.append(word)
         return deduped
 
+    @classmethod
+    def _has_words(cls, policy: Optional[SensitiveWordPolicy]) -> bool:
+        if policy is None or not policy.enabled:
+            return False
+        # any() stops at the first word instead of resolving and deduplicating the whole lexicon
+        words_types = cls.normalize_words_types(policy.words_types)
+        if BUILTIN_WORDS_TYPE in words_types and cls.load_builtin_words():
+            return True
+        return CUSTOM_WORDS_TYPE in words_types and any(
+            item.strip() for item in WORD_SEPARATOR_RE.split(policy.custom_words or '')
+        )
+
+    @classmethod
+    def _get_cached_policy(
+        cls,
+        tenant_id: int,
+        business_type: str,
+        scope_type: str,
+        scope_id: str,
+    ) -> Tuple[Optional[SensitiveWordPolicy], bool]:
+        """The policy and whether it has any words, read at most once per POLICY_CACHE_TTL"""
+        key = (tenant_id, business_type, scope_type, scope_id)
+        cached = cls._policy_cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[0] < POLICY_CACHE_TTL:
+            return cached[1], cached[2]
+        policy = SensitiveWordPolicyDao.get_policy(
+            tenant_id=tenant_id,
+            business_type=business_type,
+            scope_type=scope_type,
+            scope_id=scope_id,
+        )
+        effective = cls._has_words(policy)
+        cls._policy_cache[key] = (now, policy, effective)
+        return policy, effective
+
     @classmethod
     def is_effective(
         cls,
@@ -164,36 +317,90 @@ class SensitiveWordPolicyService:
         scope_type: SensitiveWordScopeType = SensitiveWordScopeType.TENANT,
         scope_id: Optional[str] = None,
     ) -> bool:
-        policy = SensitiveWordPolicyDao.get_policy(
-            tenant_id=tenant_id,
-            business_type=business_type.value,
-            scope_type=scope_type.value,
-            scope_id=scope_id or str(tenant_id),
-        )
-        return bool(cls._resolve_words(policy))
+        return cls._get_cached_policy(tenant_id, business_type.value, scope_type.value, scope_id or str(tenant_id))[1]
+
+    @classmethod
+    def _builtin_words_digest(cls) -> str:
+        words = cls.load_builtin_words()
+        memo_words, digest = cls._builtin_digest
+        if memo_words is not words:
+            digest = hashlib.sha256('\n'.join(words).encode('utf-8')).hexdigest()
+            cls._builtin_digest = (words, digest)
+        return digest
+
+    @classmethod
+    def _lexicon_version(cls, policy: SensitiveWordPolicy, case_sensitive: bool) -> str:
+        """
+        Digest of everything the compiled lexicon depends on. It is computed without
+        resolving the word list, so an unchanged policy skips the whole rebuild path.
+        """
+        words_types = cls.normalize_words_types(policy.words_types)
+        parts = [','.join(words_types), str(case_sensitive)]
+        if BUILTIN_WORDS_TYPE in words_types:
+            parts.append(cls._builtin_words_digest())
+        if CUSTOM_WORDS_TYPE in words_types:
+            parts.append(hashlib.sha256((policy.custom_words or '').encode('utf-8')).hexdigest())
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _lexicon_path(version: str) -> Path:
+        from bisheng.core.cache.utils import CACHE_DIR
+
+        return Path(CACHE_DIR) / 'sensitive_word' / f'{version}.bsac'
+
+    @classmethod
+    def _load_lexicon(cls, version: str) -> Optional[Tuple[ACAutomaton, Dict[str, str]]]:
+        """Load a lexicon another worker process has already compiled"""
+        path = cls._lexicon_path(version)
+        try:
+            automaton = ACAutomaton.load(path)
+            if automaton is None:
+                return None
+            renamed = json.loads(path.with_suffix('.json').read_text(encoding='utf-8'))
+            # marks the file as in use for _sweep_lexicon_files
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f'load compiled sensitive words {path} failed: {e}')
+            return None
+        return automaton, {word: renamed.get(word, word) for word in automaton.words}
 
     @classmethod
-    def _build_cache_key(
+    def _save_lexicon(cls, version: str, automaton: ACAutomaton, normalized_map: Dict[str, str]) -> None:
+        path = cls._lexicon_path(version)
+        try:
+            # only words whose case was folded need their original spelling stored
+            renamed = {word: original for word, original in normalized_map.items() if word != original}
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.with_suffix('.json').write_text(json.dumps(renamed, ensure_ascii=False), encoding='utf-8')
+            # written last: a reader only trusts the sidecar once the automaton exists
+            automaton.save(path)
+            cls._sweep_lexicon_files(path.parent)
+        except OSError as e:
+            logger.warning(f'save compiled sensitive words {path} failed: {e}')
+
+    @classmethod
+    def _compile_lexicon(
         cls,
-        tenant_id: int,
-        business_type: str,
-        scope_type: str,
-        scope_id: str,
+        version: str,
         policy: SensitiveWordPolicy,
-        words: List[str],
         case_sensitive: bool,
-    ) -> Tuple:
-        words_digest = hashlib.sha256('\n'.join(words).encode('utf-8')).hexdigest()
-        return (
-            tenant_id,
-            business_type,
-            scope_type,
-            scope_id,
-            bool(policy.enabled),
-            tuple(cls.normalize_words_types(policy.words_types)),
-            case_sensitive,
-            words_digest,
-        )
+    ) -> Optional[Tuple[ACAutomaton, Dict[str, str]]]:
+        compiled = cls._lexicon_cache.get(version) or cls._load_lexicon(version)
+        if compiled is None:
+            normalized_map: Dict[str, str] = {}
+            normalized_words: List[str] = []
+            for word in cls._resolve_words(policy):
+                normalized = word if case_sensitive else word.lower()
+                if not normalized or normalized in normalized_map:
+                    continue
+                normalized_map[normalized] = word
+                normalized_words.append(normalized)
+            if not normalized_words:
+                return None
+            compiled = (ACAutomaton(normalized_words), normalized_map)
+            cls._save_lexicon(version, *compiled)
+        cls._lexicon_cache[version] = compiled
+        return compiled
 
     @classmethod
     def _get_automaton(
@@ -203,33 +410,53 @@ class SensitiveWordPolicyService:
         scope_type: str,
         scope_id: str,
         policy: SensitiveWordPolicy,
-        words: List[str],
         case_sensitive: bool,
-    ) -> Tuple[ACAutomaton, Dict[str, str]]:
-        normalized_map: Dict[str, str] = {}
-        normalized_words: List[str] = []
-        for word in words:
-            normalized = word if case_sensitive else word.lower()
-            if not normalized or normalized in normalized_map:
-                continue
-            normalized_map[normalized] = word
-            normalized_words.append(normalized)
+    ) -> Optional[Tuple[ACAutomaton, Dict[str, str]]]:
+        """Compiled lexicon of the policy, or None when it has no words"""
+        key = (tenant_id, business_type, scope_type, scope_id)
+        version = cls._lexicon_version(policy, case_sensitive)
+        cached = cls._automaton_cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+        compiled = cls._compile_lexicon(version, policy, case_sensitive)
+        cls._automaton_cache[key] = (version, compiled)
+        if cached:
+            cls._release_lexicon(cached[0])
+        return compiled
 
-        key = cls._build_cache_key(
+    @classmethod
+    def open_scanner(
+        cls,
+        tenant_id: int,
+        business_type: SensitiveWordBusinessType,
+        scope_type: SensitiveWordScopeType = SensitiveWordScopeType.TENANT,
+        scope_id: Optional[str] = None,
+        stop_at_hit: bool = True,
+    ) -> SensitiveWordStreamScanner:
+        final_scope_id = scope_id or str(tenant_id)
+        policy, effective = cls._get_cached_policy(tenant_id, business_type.value, scope_type.value, final_scope_id)
+        if not effective:
+            return SensitiveWordStreamScanner()
+        extra_config = policy.extra_config or {}
+        case_sensitive = bool(extra_config.get('case_sensitive', False))
+        compiled = cls._get_automaton(
             tenant_id,
-            business_type,
-            scope_type,
-            scope_id,
+            business_type.value,
+            scope_type.value,
+            final_scope_id,
             policy,
-            normalized_words,
             case_sensitive,
         )
-        cached = cls._automaton_cache.get(key)
-        if cached:
-            return cached
-        automaton = ACAutomaton(normalized_words)
-        cls._automaton_cache[key] = (automaton, normalized_map)
-        return automaton, normalized_map
+        if compiled is None:
+            return SensitiveWordStreamScanner()
+        automaton, normalized_map = compiled
+        return SensitiveWordStreamScanner(
+            automaton.scanner(stop_at_hit=stop_at_hit),
+            normalized_map,
+            case_sensitive=case_sensitive,
+            auto_reply=policy.auto_reply or DEFAULT_AUTO_REPLY,
+            max_hits=extra_config.get('max_hits'),
+        )
 
     @classmethod
     def check_text(
@@ -264,39 +491,34 @@ class SensitiveWordPolicyService:
             scope_type=scope_type.value,
             scope_id=final_scope_id,
         )
-        words = cls._resolve_words(policy)
-        if policy is None or not words:
+        compiled = None
+        if policy is not None and policy.enabled:
+            extra_config = policy.extra_config or {}
+            case_sensitive = bool(extra_config.get('case_sensitive', False))
+            max_hits = extra_config.get('max_hits')
+            compiled = cls._get_automaton(
+                tenant_id,
+                business_type.value,
+                scope_type.value,
+                final_scope_id,
+                policy,
+                case_sensitive,
+            )
+        if compiled is None:
             return [
                 SensitiveWordCheckResult(enabled=False, hits=[], auto_reply=DEFAULT_AUTO_REPLY)
                 for _ in texts
             ]
 
-        extra_config = policy.extra_config or {}
-        case_sensitive = bool(extra_config.get('case_sensitive', False))
-        max_hits = extra_config.get('max_hits')
-        automaton, normalized_map = cls._get_automaton(
-            tenant_id,
-            business_type.value,
-            scope_type.value,
-            final_scope_id,
-            policy,
-            words,
-            case_sensitive,
-        )
+        automaton, normalized_map = compiled
 
         results: List[SensitiveWordCheckResult] = []
         for text in texts:
             scan_text = '' if text is None else str(text)
             counter = automaton.find_all(scan_text if case_sensitive else scan_text.lower()) if scan_text else {}
-            hits: List[SensitiveWordHit] = [
-                SensitiveWordHit(word=normalized_map.get(word, word), count=count)
-                for word, count in counter.items()
-            ]
-            if isinstance(max_hits, int) and max_hits > 0:
-                hits = hits[:max_hits]
             results.append(SensitiveWordCheckResult(
                 enabled=True,
-                hits=hits,
+                hits=_build_hits(counter, normalized_map, max_hits),
                 auto_reply=policy.auto_reply or DEFAULT_AUTO_REPLY,
             ))
         return results
@@ -3,7 +3,7 @@ from typing import List
 from sqlalchemy import or_, and_, func, text
 from sqlmodel import col, select, delete, update
 
-from bisheng.core.database import get_async_db_session
+from bisheng.core.database import get_async_db_session, replica_read
 from .dashboard import Dashboard, DashboardType, DashboardStatus, DashboardComponent, DashboardDefault
 
 
@@ -88,6 +88,7 @@ class DashboardDao:
         return statement
 
     @classmethod
+    @replica_read
     async def get_dashboards(cls, keyword: str = None, dashboard_type: List[DashboardType] = None,
                              manage_ids: List[int] = None, extra_ids: List[int] = None,
                              extra_status: DashboardStatus = None, user_id: int = None,
@@ -104,6 +105,7 @@ class DashboardDao:
             return result.all()
 
     @classmethod
+    @replica_read
     async def count_dashboards(cls, keyword: str = None, dashboard_type: List[DashboardType] = None,
                                manage_ids: List[int] = None, extra_ids: List[int] = None,
                                extra_status: DashboardStatus = None, user_id: int = None) -> int:
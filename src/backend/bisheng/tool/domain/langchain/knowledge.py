@@ -27,6 +27,14 @@ messages = [
 CHAT_PROMPT = ChatPromptTemplate.from_messages(messages)
 
 
+def sort_by_source_and_index(docs: List[Document]) -> List[Document]:
+    """Put the chunks back in reading order when they all come from one file"""
+    same_file_id = {(doc.metadata.get('document_id'), doc.metadata.get('document_name')) for doc in docs}
+    if len(same_file_id) != 1:
+        return docs
+    return sorted(docs, key=lambda x: (x.metadata.get('document_name', ""), x.metadata.get('chunk_index', 0)))
+
+
 class ToolInputSchema(BaseModel):
     query: str = Field(description='question asked by the user.')
 
@@ -80,20 +88,17 @@ class KnowledgeRetrieverTool(BaseTool):
 
         # limit by max_chunk_size
         doc_num, doc_content_sum = 0, 0
-        same_file_id = set()
 
         for doc in finally_docs:
             if doc_content_sum > self.max_content:
                 break
             doc_content_sum += len(doc.page_content)
-            same_file_id.add((doc.metadata.get('document_id'), doc.metadata.get('document_name')))
             doc_num += 1
         finally_docs = finally_docs[:doc_num]
 
         # sort by source and index if only one file
-        if self.sort_by_source_and_index and len(same_file_id) == 1:
-            finally_docs = sorted(finally_docs,
-                                  key=lambda x: (x.metadata.get('document_name', ""), x.metadata.get('chunk_index', 0)))
+        if self.sort_by_source_and_index:
+            finally_docs = sort_by_source_and_index(finally_docs)
         return finally_docs
 
 
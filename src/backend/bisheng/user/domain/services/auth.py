@@ -495,6 +495,22 @@ class LoginUser(BaseModel):
             login_user=self,
         )
 
+    async def rebac_check_many(self, relation: str, object_type: str, object_ids: list[str]) -> dict[str, bool]:
+        """Bulk ``rebac_check`` for filtering a list of resources of one type.
+
+        Delegates to PermissionService.check_many(), which batches the cache and
+        OpenFGA round-trips instead of running one chain per object.
+        """
+        from bisheng.permission.domain.services.permission_service import PermissionService
+
+        return await PermissionService.check_many(
+            user_id=self.user_id,
+            relation=relation,
+            object_type=object_type,
+            object_ids=object_ids,
+            login_user=self,
+        )
+
     async def rebac_list_accessible(self, relation: str, object_type: str) -> list[str] | None:
         """List accessible resource IDs via ReBAC.
 
@@ -0,0 +1,198 @@
+"""Bounded in-memory queue drained in batches by a background thread.
+
+Shared by the write-behind paths that take per-request I/O off the request thread
+(telemetry events, LLM token usage rows). Producers only append to the queue; a
+daemon thread sends a batch as soon as ``batch_size`` items are queued and otherwise
+every ``flush_interval`` seconds. A failed send is retried with exponential backoff,
+and ``close`` sends what is still queued within a bounded time.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BatcherStats:
+    """Cumulative counters of one batcher; subclasses add their own names to ``counters``"""
+
+    counters: Sequence[str] = ("queued", "dropped", "retried")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        for name in self.counters:
+            setattr(self, name, 0)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {name: getattr(self, name) for name in self.counters}
+
+
+class BackgroundBatcher(Generic[T]):
+    """
+    Base of the write-behind queues. ``conf`` provides ``batch_size``, ``flush_interval``,
+    ``max_queue_size``, ``max_retries`` and ``retry_backoff``. Subclasses implement
+    ``_send_batch`` and may override ``_take_batch`` to send more than the queued items.
+    """
+
+    thread_name = "background-batcher"
+    # plural noun for log messages, e.g. "telemetry events"
+    item_label = "items"
+    stats_class = BatcherStats
+
+    def __init__(self, conf: Any):
+        self.conf = conf
+        self.stats = self.stats_class()
+        self._queue: deque[T] = deque()
+        self._cond = threading.Condition()
+        # one batch in flight at a time, whether sent by the worker or by flush()
+        self._send_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        # set by close(): retries stop once it has passed
+        self._deadline: Optional[float] = None
+        self._close_at_exit = False
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _enqueue(self, item: T, drop_newest: bool = False) -> bool:
+        """Queue an item; returns False when it was dropped"""
+        with self._cond:
+            if self._closed:
+                self.stats.incr("dropped")
+                return False
+            if len(self._queue) >= self.conf.max_queue_size:
+                self.stats.incr("dropped")
+                if drop_newest:
+                    return False
+                self._queue.popleft()
+            self._queue.append(item)
+            self.stats.incr("queued")
+            self._ensure_worker()
+            if len(self._queue) >= self.conf.batch_size:
+                self._cond.notify()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def flush(self) -> None:
+        """Send everything queued so far from the calling thread"""
+        while self._send_next(timeout=-1):
+            pass
+
+    def close(self, timeout: float = 10) -> None:
+        """
+        Stop the worker and send what is still queued, giving up after ``timeout`` seconds so
+        an unreachable backend cannot hold up shutdown; items added later are dropped.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._deadline = time.monotonic() + timeout
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        while (remaining := self._deadline - time.monotonic()) > 0 and self._send_next(timeout=remaining):
+            pass
+        with self._cond:
+            if self._queue:
+                logger.error(f"Dropped {len(self._queue)} {self.item_label} not sent before shutdown")
+                self.stats.incr("dropped", len(self._queue))
+                self._queue.clear()
+
+    def _after_fork(self) -> None:
+        # a forked worker process starts empty: the parent's thread and locks do not carry over
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._worker = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._worker.start()
+            # once per instance: a worker restarted after a fork must not add another hook
+            if not self._close_at_exit:
+                self._close_at_exit = True
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.conf.flush_interval
+                while not self._closed and len(self._queue) < self.conf.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+                # woken by a full batch: send full batches only; interval over: send everything
+                min_size = self.conf.batch_size if len(self._queue) >= self.conf.batch_size else 1
+            try:
+                while self._send_next(timeout=0, min_size=min_size):
+                    pass
+            except Exception as e:
+                logger.error(f"Flushing {self.item_label} failed: {e}", exc_info=True)
+
+    def _send_next(self, timeout: float, min_size: int = 1) -> bool:
+        """
+        Send one batch; False when there was nothing to send or another thread kept
+        sending for longer than ``timeout`` seconds (-1 waits for it)
+        """
+        if not self._send_lock.acquire(timeout=timeout):
+            return False
+        try:
+            with self._cond:
+                batch = self._take_batch(min_size)
+            if not batch:
+                return False
+            self._send_batch(batch)
+            return True
+        finally:
+            self._send_lock.release()
+
+    def _take_batch(self, min_size: int) -> Any:
+        """Pop the next batch under the queue lock; empty when fewer than ``min_size`` items are queued"""
+        if not self._queue or len(self._queue) < min_size:
+            return []
+        return [self._queue.popleft() for _ in range(min(self.conf.batch_size, len(self._queue)))]
+
+    def _send_batch(self, batch: Any) -> None:
+        raise NotImplementedError
+
+    def _retry(self, send: Callable[[List[Any]], List[Any]], items: List[Any], label: str) -> List[Any]:
+        """
+        Call ``send`` with ``items`` and again, after an exponential backoff, with the items it
+        returns as worth retrying (all of them when it raises). Returns the items given up on.
+        """
+        pending = items
+        for attempt in range(self.conf.max_retries + 1):
+            if attempt:
+                backoff = self.conf.retry_backoff * 2 ** (attempt - 1)
+                if self._deadline is not None and time.monotonic() + backoff > self._deadline:
+                    break
+                self.stats.incr("retried", len(pending))
+                time.sleep(backoff)
+            try:
+                pending = send(pending)
+            except Exception as e:
+                logger.warning(f"Sending {len(pending)} {label} failed (attempt {attempt + 1}): {e}")
+                continue
+            if not pending:
+                return []
+        logger.error(f"Gave up sending {len(pending)} {label}")
+        return pending
@@ -51,9 +51,44 @@ end
 
 redis.call('SADD', inflight_key, file_id)
 redis.call('SADD', prefix .. 'inflight_users', user_id)
+redis.call('HSET', prefix .. 'inflight_owner', file_id, user_id)
 return file_id
 """
 
+DISPATCH_BATCH = r"""
+local prefix = '{bisheng_fs}:'
+local active_key = prefix .. 'active_users'
+
+-- ARGV is the ordered list of picks (one user id per file) planned by the
+-- Python dispatch round, so the weighted least-in-flight fairness stays in one
+-- place. Each pick pops one file exactly like DISPATCH_ONE and returns it with
+-- its payload; a user whose queue runs dry gets false for its remaining picks.
+local result = {}
+local drained = {}
+for i, user_id in ipairs(ARGV) do
+    local file_id = false
+    if not drained[user_id] then
+        local queue_key = prefix .. 'queue:' .. user_id
+        file_id = redis.call('RPOP', queue_key)
+        if not file_id or redis.call('LLEN', queue_key) == 0 then
+            drained[user_id] = true
+            redis.call('SREM', active_key, user_id)
+        end
+        if file_id then
+            redis.call('SADD', prefix .. 'inflight:' .. user_id, file_id)
+            redis.call('SADD', prefix .. 'inflight_users', user_id)
+            redis.call('HSET', prefix .. 'inflight_owner', file_id, user_id)
+        end
+    end
+    if file_id then
+        result[i] = {file_id, redis.call('HGETALL', prefix .. 'payload:' .. file_id)}
+    else
+        result[i] = {false}
+    end
+end
+return result
+"""
+
 CONFIRM_DISPATCH = r"""
 local prefix = '{bisheng_fs}:'
 local file_id = KEYS[1]
@@ -74,6 +109,7 @@ local user_id = KEYS[1]
 local file_id = ARGV[1]
 
 redis.call('SREM', prefix .. 'inflight:' .. user_id, file_id)
+redis.call('HDEL', prefix .. 'inflight_owner', file_id)
 -- RPUSH puts the file back at the tail, which is the very next position RPOP
 -- will read — preserves FIFO retry order, NOT a deprioritization.
 redis.call('RPUSH', prefix .. 'queue:' .. user_id, file_id)
@@ -92,6 +128,7 @@ local file_id = ARGV[1]
 -- what turns it into a poison pill. The file was never confirmed, so the queue
 -- counter was never bumped and must not be touched here.
 redis.call('SREM', prefix .. 'inflight:' .. user_id, file_id)
+redis.call('HDEL', prefix .. 'inflight_owner', file_id)
 redis.call('DEL',  prefix .. 'payload:' .. file_id)
 if redis.call('SCARD', prefix .. 'inflight:' .. user_id) == 0 then
     redis.call('SREM', prefix .. 'inflight_users', user_id)
@@ -105,6 +142,7 @@ local user_id = KEYS[1]
 local file_id = ARGV[1]
 
 redis.call('SREM', prefix .. 'inflight:' .. user_id, file_id)
+redis.call('HDEL', prefix .. 'inflight_owner', file_id)
 
 -- Return the file's slot to whichever queue it was dispatched on.
 local queue = redis.call('HGET', prefix .. 'inflight_queue', file_id)
@@ -119,6 +157,35 @@ end
 return 1
 """
 
+PURGE_FILE = r"""
+local prefix = '{bisheng_fs}:'
+local user_id = KEYS[1]
+local file_id = ARGV[1]
+
+local queue_key    = prefix .. 'queue:'    .. user_id
+local inflight_key = prefix .. 'inflight:' .. user_id
+
+-- Remove a deleted file from the scheduler entirely (queue + inflight + payload)
+-- in one round trip. If it was already confirmed in-flight, return its slot to
+-- the queue counter so deleting a parsing file doesn't leak capacity.
+redis.call('LREM', queue_key, 0, file_id)
+redis.call('SREM', inflight_key, file_id)
+redis.call('HDEL', prefix .. 'inflight_owner', file_id)
+redis.call('DEL',  prefix .. 'payload:' .. file_id)
+local queue = redis.call('HGET', prefix .. 'inflight_queue', file_id)
+if queue then
+    redis.call('DECR', prefix .. 'inflight_total:' .. queue)
+    redis.call('HDEL', prefix .. 'inflight_queue', file_id)
+end
+if redis.call('SCARD', inflight_key) == 0 then
+    redis.call('SREM', prefix .. 'inflight_users', user_id)
+end
+if redis.call('LLEN', queue_key) == 0 then
+    redis.call('SREM', prefix .. 'active_users', user_id)
+end
+return 1
+"""
+
 RELEASE_LOCK = r"""
 local current = redis.call('GET', KEYS[1])
 if current == ARGV[1] then
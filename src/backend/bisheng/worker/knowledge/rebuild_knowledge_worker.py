@@ -1,3 +1,4 @@
+from langchain_core.documents import Document
 from loguru import logger
 
 from bisheng.common.constants.vectorstore_metadata import KNOWLEDGE_RAG_METADATA_SCHEMA
@@ -9,6 +10,7 @@ from bisheng.knowledge.domain.knowledge_rag import KnowledgeRag
 from bisheng.knowledge.domain.models.knowledge import Knowledge, KnowledgeDao, KnowledgeState
 from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile, KnowledgeFileDao, KnowledgeFileStatus
 from bisheng.knowledge.domain.services.knowledge_service import KnowledgeService
+from bisheng.knowledge.rag.pipeline.ingest import VectorStoreIngestor
 from bisheng.llm.domain import LLMService
 from bisheng.worker.main import bisheng_celery
 
@@ -332,9 +334,13 @@ def _rebuild_knowledge_file_chunk(db_file: KnowledgeFile):
         except Exception as e:
             logger.warning(f"Failed to delete old pk(s) from Milvus: {e!s}")
 
-    # Re-insert into Milvus and ES
+    # Re-insert into Milvus and ES, both at once
     logger.info(f"Re-inserting {len(texts)} chunks for file_id={db_file.id} into vector stores")
-    milvus_client.add_texts(texts=texts, metadatas=metadatas)
-    es_client.add_texts(texts=texts, metadatas=metadatas)
+    ingestor = VectorStoreIngestor([milvus_client, es_client])
+    try:
+        ingestor.write([Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)])
+    finally:
+        ingestor.close()
+    logger.info(f"rebuild_knowledge_file_chunk timings file_id={db_file.id} {ingestor.timings.as_dict()}")
 
     logger.info(f"rebuild_knowledge_file_chunk completed successfully for file_id={db_file.id}")
@@ -20,9 +20,11 @@ from bisheng.knowledge.domain.models.knowledge_file import (
 from bisheng.worker.knowledge.lua_scripts import (
     COMPLETE_FILE,
     CONFIRM_DISPATCH,
+    DISPATCH_BATCH,
     DISPATCH_ONE,
     DROP_DISPATCH,
     ENQUEUE_FILE,
+    PURGE_FILE,
     REFRESH_LOCK,
     RELEASE_LOCK,
     ROLLBACK_DISPATCH,
@@ -79,6 +81,13 @@ def decide_queue(file_name_or_ext: str) -> str:
     return settings.knowledge_file_worker.ocr_queue if needs_ocr_queue(file_name_or_ext) else KNOWLEDGE_QUEUE
 
 
+def dispatch_queues() -> list[str]:
+    """Every queue ``decide_queue`` can route a file to."""
+    if not _ocr_queue_enabled():
+        return [KNOWLEDGE_QUEUE]
+    return [KNOWLEDGE_QUEUE, settings.knowledge_file_worker.ocr_queue]
+
+
 # ---------------------------------------------------------------------------
 # Redis key constants (all share the {bisheng_fs} hash tag for cluster slot
 # consistency — must not be changed without updating the Lua scripts too)
@@ -88,6 +97,8 @@ PREFIX = "{bisheng_fs}:"
 ACTIVE_USERS_KEY = f"{PREFIX}active_users"
 INFLIGHT_USERS_KEY = f"{PREFIX}inflight_users"
 INFLIGHT_QUEUE_KEY = f"{PREFIX}inflight_queue"
+# Reverse index file_id -> user_id of every in-flight file
+INFLIGHT_OWNER_KEY = f"{PREFIX}inflight_owner"
 DISPATCH_LOCK_KEY = f"{PREFIX}dispatch_lock"
 
 
@@ -131,10 +142,12 @@ class FileScheduler:
             self._conn = get_redis_client_sync().connection
         self._enqueue = self._conn.register_script(ENQUEUE_FILE)
         self._dispatch_one = self._conn.register_script(DISPATCH_ONE)
+        self._dispatch_batch = self._conn.register_script(DISPATCH_BATCH)
         self._confirm = self._conn.register_script(CONFIRM_DISPATCH)
         self._rollback = self._conn.register_script(ROLLBACK_DISPATCH)
         self._drop = self._conn.register_script(DROP_DISPATCH)
         self._complete = self._conn.register_script(COMPLETE_FILE)
+        self._purge = self._conn.register_script(PURGE_FILE)
         self._release_lock_script = self._conn.register_script(RELEASE_LOCK)
         self._refresh_lock_script = self._conn.register_script(REFRESH_LOCK)
 
@@ -167,6 +180,33 @@ class FileScheduler:
             return None
         return result.decode() if isinstance(result, bytes) else str(result)
 
+    def dispatch_batch(self, *, user_ids: list[str]) -> list[tuple[str, str | None, dict[str, str]]]:
+        """Pop one file per pick in a single round trip.
+
+        ``user_ids`` is the ordered pick list (a user may appear many times).
+        Returns ``(user_id, file_id, payload)`` per pick; ``file_id`` is None once
+        that user's queue is empty, and ``payload`` is empty if it expired.
+        """
+        if not user_ids:
+            return []
+        picks = [str(u) for u in user_ids]
+        result = self._dispatch_batch(keys=[], args=picks)
+        popped = []
+        for user_id, entry in zip(picks, result):
+            file_id = entry[0] if entry else None
+            if file_id is None:
+                popped.append((user_id, None, {}))
+                continue
+            flat = [v.decode() if isinstance(v, bytes) else v for v in entry[1]]
+            popped.append(
+                (
+                    user_id,
+                    file_id.decode() if isinstance(file_id, bytes) else str(file_id),
+                    dict(zip(flat[::2], flat[1::2])),
+                )
+            )
+        return popped
+
     def confirm_dispatch(self, *, file_id: str, queue: str) -> None:
         """Confirm a successful dispatch: record queue, bump the queue's global
         in-flight counter, drop the payload. Called only after apply_async OK."""
@@ -175,6 +215,13 @@ class FileScheduler:
     def inflight_count(self, *, user_id: str) -> int:
         return int(self._conn.scard(_inflight_key(user_id)))
 
+    def inflight_counts(self, *, user_ids: list[str]) -> dict[str, int]:
+        """``inflight_count`` for many users in one pipelined round trip."""
+        pipe = self._conn.pipeline(transaction=False)
+        for uid in user_ids:
+            pipe.scard(_inflight_key(uid))
+        return {uid: int(count) for uid, count in zip(user_ids, pipe.execute())}
+
     def inflight_total(self, *, queue: str) -> int:
         raw = self._conn.get(_inflight_total_key(queue))
         return int(raw) if raw else 0
@@ -188,8 +235,10 @@ class FileScheduler:
         for _fid, q in (raw or {}).items():
             q = q.decode() if isinstance(q, bytes) else q
             counts[q] = counts.get(q, 0) + 1
+        pipe = self._conn.pipeline(transaction=False)
         for q in set(queues) | set(counts):
-            self._conn.set(_inflight_total_key(q), counts.get(q, 0))
+            pipe.set(_inflight_total_key(q), counts.get(q, 0))
+        pipe.execute()
 
     def rollback_dispatch(self, *, user_id: str, file_id: str) -> None:
         self._rollback(keys=[str(user_id)], args=[str(file_id)])
@@ -255,11 +304,28 @@ class FileScheduler:
         Returns True if a slot was released.
         """
         target = str(file_id)
-        for uid in self.inflight_users():
-            if target in self.inflight_files(user_id=uid):
-                self.complete_file(user_id=uid, file_id=target)
-                return True
-        return False
+        owner = self._conn.hget(INFLIGHT_OWNER_KEY, target)
+        if owner is None:
+            owner = self._scan_inflight_owner(target)
+            if owner is None:
+                return False
+        owner = owner.decode() if isinstance(owner, bytes) else owner
+        self.complete_file(user_id=owner, file_id=target)
+        return True
+
+    def _scan_inflight_owner(self, file_id: str) -> str | None:
+        """Fallback for files dispatched before the owner index existed: check
+        every in-flight user's set in one pipelined round trip."""
+        users = self.inflight_users()
+        if not users:
+            return None
+        pipe = self._conn.pipeline(transaction=False)
+        for uid in users:
+            pipe.sismember(_inflight_key(uid), file_id)
+        for uid, member in zip(users, pipe.execute()):
+            if member:
+                return uid
+        return None
 
     def purge_file(self, *, user_id: str, file_id: str) -> None:
         """Remove a file from the scheduler entirely (queue + inflight + payload).
@@ -267,22 +333,16 @@ class FileScheduler:
         Called when a file is deleted so it does not linger as a ghost entry
         that later gets dispatched against a non-existent DB row.
         """
-        uid = str(user_id)
-        fid = str(file_id)
-        self._conn.lrem(_queue_key(uid), 0, fid)
-        self._conn.srem(_inflight_key(uid), fid)
-        self._conn.delete(_payload_key(fid))
-        # If the file was already confirmed in-flight, return its slot to the
-        # queue counter so deleting a parsing file doesn't leak capacity.
-        q = self._conn.hget(INFLIGHT_QUEUE_KEY, fid)
-        if q:
-            q = q.decode() if isinstance(q, bytes) else q
-            self._conn.decr(_inflight_total_key(q))
-            self._conn.hdel(INFLIGHT_QUEUE_KEY, fid)
-        if self._conn.scard(_inflight_key(uid)) == 0:
-            self._conn.srem(INFLIGHT_USERS_KEY, uid)
-        if self._conn.llen(_queue_key(uid)) == 0:
-            self._conn.srem(ACTIVE_USERS_KEY, uid)
+        self._purge(keys=[str(user_id)], args=[str(file_id)])
+
+    def purge_files(self, files: list[tuple[int | str, int | str]]) -> None:
+        """``purge_file`` for many ``(user_id, file_id)`` pairs in one pipelined round trip."""
+        if not files:
+            return
+        pipe = self._conn.pipeline(transaction=False)
+        for user_id, file_id in files:
+            self._purge(keys=[str(user_id)], args=[str(file_id)], client=pipe)
+        pipe.execute()
 
     def get_payload(self, *, file_id: str) -> dict[str, str]:
         raw = self._conn.hgetall(_payload_key(file_id))
@@ -449,6 +509,23 @@ def _recover_payload(
     return payload
 
 
+# Upper bound on the files popped by one DISPATCH_BATCH call.
+_DISPATCH_BATCH_SIZE = 64
+
+
+def _plan_picks(users: list[str], share: dict[str, int], skipped: set[str], conf, size: int) -> list[str]:
+    """Next ``size`` picks of the weighted least-in-flight order, assuming every
+    pick gets dispatched. Ties go to the earlier user in ``users``."""
+    planned = dict(share)
+    picks: list[str] = []
+    eligible = [u for u in users if u not in skipped]
+    while eligible and len(picks) < size:
+        user_id = min(eligible, key=lambda u: planned[u] / conf.weight_for(u))
+        picks.append(user_id)
+        planned[user_id] += 1
+    return picks
+
+
 def run_dispatch_round(*, scheduler: FileScheduler | None = None) -> None:
     """Fill each queue up to its global concurrency cap, fairly.
 
@@ -459,6 +536,10 @@ def run_dispatch_round(*, scheduler: FileScheduler | None = None) -> None:
     ceiling; fairness comes from always serving the user currently holding the
     fewest slots, so a freed slot goes to whoever is most starved (not to the
     user with the longest queue).
+
+    Picks are planned in batches bounded by the free capacity and popped with
+    one DISPATCH_BATCH call each, so a round costs a handful of Redis round
+    trips instead of several per file.
     """
     conf = _fair_scheduler_conf()
     sched = scheduler if scheduler is not None else FileScheduler()
@@ -472,7 +553,7 @@ def run_dispatch_round(*, scheduler: FileScheduler | None = None) -> None:
             return
 
         # Current in-flight share per user (local snapshot, bumped as we go).
-        share = {u: sched.inflight_count(user_id=u) for u in users}
+        share = sched.inflight_counts(user_ids=users)
         cap: dict[str, int] = {}
         inflight: dict[str, int] = {}
         saturated: set[str] = set()
@@ -484,72 +565,97 @@ def run_dispatch_round(*, scheduler: FileScheduler | None = None) -> None:
                 inflight[q] = sched.inflight_total(queue=q)
             return cap[q], inflight[q]
 
+        def _skip_user(popped: list, index: int, user_id: str) -> None:
+            # Put back every file popped for this user from ``index`` on, newest
+            # first, so the oldest one is again the next RPOP (FIFO kept).
+            files = [fid for uid, fid, _ in popped[index:] if uid == user_id and fid is not None]
+            for fid in reversed(files):
+                sched.rollback_dispatch(user_id=user_id, file_id=fid)
+            skipped.add(user_id)
+
+        def _requeue_pending(popped: list, index: int) -> None:
+            # A failure mid-batch leaves the files popped from ``index`` on in flight
+            # with nobody to dispatch them; put them back, newest first, so reconcile
+            # does not have to re-queue them later out of FIFO order.
+            for user_id, file_id, _ in reversed(popped[index:]):
+                if file_id is not None and user_id not in skipped:
+                    sched.rollback_dispatch(user_id=user_id, file_id=file_id)
+
+        for q in dispatch_queues():
+            _queue_state(q)
+
         while True:
-            eligible = [u for u in users if u not in skipped]
-            if not eligible:
+            free = sum(max(cap[q] - inflight[q], 0) for q in cap if q not in saturated)
+            picks = _plan_picks(users, share, skipped, conf, min(free, _DISPATCH_BATCH_SIZE))
+            if not picks:
                 break
-            user_id = min(eligible, key=lambda u: share[u] / conf.weight_for(u))
-
-            file_id = sched.dispatch_one(user_id=user_id)
-            if file_id is None:
-                skipped.add(user_id)  # user's queue is empty
-                continue
-
-            payload = sched.get_payload(file_id=file_id)
-            if not payload:
-                # The payload expired (TTL) or was removed while the id lingered in
-                # the FIFO. Self-heal instead of re-queuing-as-is: a payload-less
-                # file pushed back to the tail is a poison pill that blocks the
-                # whole queue (head-of-line blocking). Rebuild it from the DB if
-                # the file still needs parsing, otherwise discard the ghost. Either
-                # way DON'T skip the user — keep draining the round.
-                payload = _recover_payload(sched, conf, user_id=user_id, file_id=file_id)
-                if payload is None:
-                    continue
-
-            queue = decide_queue(payload.get("file_ext", ""))
-            q_cap, q_inflight = _queue_state(queue)
-            if queue in saturated or q_inflight >= q_cap:
-                # Target queue is full. The user's FIFO head is stuck behind it,
-                # so put the file back and skip this user for the round (avoids
-                # repeatedly popping/rolling back the same file).
-                saturated.add(queue)
-                sched.rollback_dispatch(user_id=user_id, file_id=file_id)
-                skipped.add(user_id)
-                continue
-
-            # Stamp the parse task with the file's OWNING tenant (captured at
-            # enqueue time), not the tenant driving this round. Beat-driven
-            # rounds run under the default tenant; without this a cross-tenant
-            # file would be parsed under the wrong context and never found.
-            payload_tenant = payload.get("tenant_id") or ""
-            tenant_token = current_tenant_id.set(int(payload_tenant)) if payload_tenant else None
+            popped = sched.dispatch_batch(user_ids=picks)
+            pending = 0  # first popped entry not yet dispatched, discarded or put back
             try:
-                _parse_apply_async(
-                    args=[
-                        int(file_id),
-                        payload.get("preview_cache_key", ""),
-                        payload.get("callback_url", ""),
-                    ],
-                    queue=queue,
-                )
-            except Exception as exc:
-                sched.rollback_dispatch(user_id=user_id, file_id=file_id)
-                logger.exception(
-                    "file_scheduler: dispatch failed for file_id={}; rolled back: {}",
-                    file_id,
-                    exc,
-                )
-                skipped.add(user_id)
-                continue
-            finally:
-                if tenant_token is not None:
-                    current_tenant_id.reset(tenant_token)
-
-            # apply_async succeeded → confirm (record queue + INCR counter + drop payload)
-            sched.confirm_dispatch(file_id=file_id, queue=queue)
-            inflight[queue] += 1
-            share[user_id] += 1
+                for index, (user_id, file_id, payload) in enumerate(popped):
+                    pending = index
+                    if user_id in skipped:
+                        continue
+                    if file_id is None:
+                        skipped.add(user_id)  # user's queue is empty
+                        continue
+
+                    if not payload:
+                        # The payload expired (TTL) or was removed while the id lingered in
+                        # the FIFO. Self-heal instead of re-queuing-as-is: a payload-less
+                        # file pushed back to the tail is a poison pill that blocks the
+                        # whole queue (head-of-line blocking). Rebuild it from the DB if
+                        # the file still needs parsing, otherwise discard the ghost. Either
+                        # way DON'T skip the user — keep draining the round.
+                        payload = _recover_payload(sched, conf, user_id=user_id, file_id=file_id)
+                        if payload is None:
+                            continue
+
+                    queue = decide_queue(payload.get("file_ext", ""))
+                    q_cap, q_inflight = _queue_state(queue)
+                    if queue in saturated or q_inflight >= q_cap:
+                        # Target queue is full. The user's FIFO head is stuck behind it,
+                        # so put the file back and skip this user for the round (avoids
+                        # repeatedly popping/rolling back the same file).
+                        saturated.add(queue)
+                        _skip_user(popped, index, user_id)
+                        continue
+
+                    # Stamp the parse task with the file's OWNING tenant (captured at
+                    # enqueue time), not the tenant driving this round. Beat-driven
+                    # rounds run under the default tenant; without this a cross-tenant
+                    # file would be parsed under the wrong context and never found.
+                    payload_tenant = payload.get("tenant_id") or ""
+                    tenant_token = current_tenant_id.set(int(payload_tenant)) if payload_tenant else None
+                    try:
+                        _parse_apply_async(
+                            args=[
+                                int(file_id),
+                                payload.get("preview_cache_key", ""),
+                                payload.get("callback_url", ""),
+                            ],
+                            queue=queue,
+                        )
+                    except Exception as exc:
+                        _skip_user(popped, index, user_id)
+                        logger.exception(
+                            "file_scheduler: dispatch failed for file_id={}; rolled back: {}",
+                            file_id,
+                            exc,
+                        )
+                        continue
+                    finally:
+                        if tenant_token is not None:
+                            current_tenant_id.reset(tenant_token)
+
+                    # apply_async succeeded → confirm (record queue + INCR counter + drop payload)
+                    pending = index + 1
+                    sched.confirm_dispatch(file_id=file_id, queue=queue)
+                    inflight[queue] += 1
+                    share[user_id] += 1
+            except Exception:
+                _requeue_pending(popped, pending)
+                raise
     finally:
         sched.release_dispatch_lock(token)
 
@@ -2,7 +2,7 @@ import threading
 import time
 
 from celery import Celery
-from celery.signals import celeryd_after_setup, worker_shutting_down
+from celery.signals import celeryd_after_setup, worker_process_shutdown, worker_shutting_down
 from loguru import logger
 
 import bisheng.worker.tenant_context  # noqa: F401 — register tenant signals
@@ -93,3 +93,20 @@ def on_worker_shutdown(*args, **kwargs):
     from bisheng.utils.async_utils import set_preferred_bridge_loop
 
     set_preferred_bridge_loop(None)
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(*args, **kwargs):
+    # prefork children exit through os._exit, which skips the atexit hooks of the write-behind buffers
+    try:
+        from bisheng.common.services import telemetry_service
+
+        telemetry_service.close()
+    except Exception as e:
+        logger.warning("Flushing buffered telemetry events failed: {}", e)
+    try:
+        from bisheng.llm.domain.services.usage_writer import close_llm_usage_writer
+
+        close_llm_usage_writer()
+    except Exception as e:
+        logger.warning("Flushing buffered token usage rows failed: {}", e)
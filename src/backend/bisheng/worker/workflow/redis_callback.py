@@ -1,4 +1,3 @@
-import asyncio
 import json
 import os
 import time
@@ -36,6 +35,15 @@ from bisheng.workflow.callback.event import NodeStartData, NodeEndData, UserInpu
     OutputMsgData, StreamMsgData, StreamMsgOverData, OutputMsgChooseData, OutputMsgInputData
 from bisheng.workflow.common.workflow import WorkflowStatus
 
+# Control signals share the event list with chat responses. They are pushed to the
+# head of the list so a reader blocked on BLPOP wakes on status/stop changes ahead
+# of any queued events, without polling the status and stop keys.
+WORKFLOW_SIGNAL_PREFIX = '__workflow_signal__:'
+WORKFLOW_SIGNAL_STATUS = 'status'
+WORKFLOW_SIGNAL_STOP = 'stop'
+# Seconds a reader blocks waiting for an event before re-checking the status timestamps
+WORKFLOW_EVENT_BLOCK_TIMEOUT = 1
+
 
 class RedisCallback(BaseCallback):
 
@@ -63,6 +71,7 @@ class RedisCallback(BaseCallback):
         self.workflow_event_key = f'workflow:{unique_id}:event'
         self.workflow_input_key = f'workflow:{unique_id}:input'
         self.workflow_stop_key = f'workflow:{unique_id}:stop'
+        self.workflow_checkpoint_key = f'workflow:{unique_id}:checkpoint'
         self.workflow_expire_time = settings.get_workflow_conf().timeout * 60 + 60
 
     def set_workflow_data(self, data: Dict, override: Dict = None):
@@ -102,19 +111,23 @@ class RedisCallback(BaseCallback):
         self.redis_client.set(self.workflow_status_key,
                               {'status': status, 'reason': reason, 'time': time.time()},
                               expiration=3600 * 24 * 7)
+        self._push_workflow_signal(WORKFLOW_SIGNAL_STATUS)
         if status in [WorkflowStatus.FAILED.value, WorkflowStatus.SUCCESS.value]:
             # Message Events and StatuskeyConsumption may also be required
             self.redis_client.delete(self.workflow_data_key)
             self.redis_client.delete(self.workflow_input_key)
+            self.redis_client.delete(self.workflow_checkpoint_key)
 
     async def async_set_workflow_status(self, status: str, reason: str = None):
         await self.redis_client.aset(self.workflow_status_key,
                                      {'status': status, 'reason': reason, 'time': time.time()},
                                      expiration=3600 * 24 * 7)
+        await self._async_push_workflow_signal(WORKFLOW_SIGNAL_STATUS)
         if status in [WorkflowStatus.FAILED.value, WorkflowStatus.SUCCESS.value]:
             # Message Events and StatuskeyConsumption may also be required
             await self.redis_client.adelete(self.workflow_data_key)
             await self.redis_client.adelete(self.workflow_input_key)
+            await self.redis_client.adelete(self.workflow_checkpoint_key)
 
     def get_workflow_status(self) -> dict | None:
         workflow_status = self.redis_client.get(self.workflow_status_key)
@@ -128,33 +141,84 @@ class RedisCallback(BaseCallback):
         self.redis_client.delete(self.workflow_status_key)
         self.redis_client.delete(self.workflow_stop_key)
         self.redis_client.delete(self.workflow_data_key)
+        self.redis_client.delete(self.workflow_checkpoint_key)
 
     async def async_clear_workflow_status(self):
         await self.redis_client.adelete(self.workflow_status_key)
         await self.redis_client.adelete(self.workflow_stop_key)
         await self.redis_client.adelete(self.workflow_data_key)
+        await self.redis_client.adelete(self.workflow_checkpoint_key)
+
+    def save_workflow_checkpoint(self, workflow) -> bool:
+        """ Persist a workflow paused for user input so any worker can resume it """
+        try:
+            self.redis_client.set(self.workflow_checkpoint_key, workflow.dump_checkpoint(),
+                                  expiration=self.workflow_expire_time)
+            return True
+        except Exception as e:
+            # Node outputs that cannot be pickled keep the run on the in-memory path
+            logger.warning(f'save workflow checkpoint failed, unique_id: {self.unique_id}, error: {e}')
+            return False
+
+    def get_workflow_checkpoint(self) -> dict | None:
+        return self.redis_client.get(self.workflow_checkpoint_key)
 
     def insert_workflow_response(self, event: dict):
         self.redis_client.rpush(self.workflow_event_key, json.dumps(event), expiration=self.workflow_expire_time)
 
+    def _push_workflow_signal(self, signal: str):
+        self.redis_client.lpush(self.workflow_event_key, f'{WORKFLOW_SIGNAL_PREFIX}{signal}',
+                                expiration=self.workflow_expire_time)
+
+    async def _async_push_workflow_signal(self, signal: str):
+        await self.redis_client.alpush(self.workflow_event_key, f'{WORKFLOW_SIGNAL_PREFIX}{signal}',
+                                       expiration=self.workflow_expire_time)
+
+    @staticmethod
+    def _parse_workflow_event(value: bytes | str | None) -> tuple[str | None, ChatResponse | None]:
+        """ Split a raw item of the event list into (signal, chat_response) """
+        if not value:
+            return None, None
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        if value.startswith(WORKFLOW_SIGNAL_PREFIX):
+            return value[len(WORKFLOW_SIGNAL_PREFIX):], None
+        return None, ChatResponse(**json.loads(value))
+
     def get_workflow_response(self) -> ChatResponse | None:
-        response = self.redis_client.lpop(self.workflow_event_key)
+        """ Non-blocking pop of the next chat response, skipping control signals """
+        while True:
+            signal, response = self._parse_workflow_event(self.redis_client.lpop(self.workflow_event_key))
+            if signal is None:
+                break
         if self.get_workflow_stop():
             self.redis_client.delete(self.workflow_event_key)
             return None
-        if response:
-            response = ChatResponse(**json.loads(response))
         return response
 
     async def async_get_workflow_response(self) -> ChatResponse | None:
-        response = await self.redis_client.alpop(self.workflow_event_key)
+        """ Non-blocking pop of the next chat response, skipping control signals """
+        while True:
+            signal, response = self._parse_workflow_event(await self.redis_client.alpop(self.workflow_event_key))
+            if signal is None:
+                break
         if await self.async_get_workflow_stop():
             await self.redis_client.adelete(self.workflow_event_key)
             return None
-        if response:
-            response = ChatResponse(**json.loads(response))
         return response
 
+    def wait_workflow_response(self, timeout: int = WORKFLOW_EVENT_BLOCK_TIMEOUT) \
+            -> tuple[str | None, ChatResponse | None]:
+        """ Block until a chat response or a control signal arrives; (None, None) on timeout """
+        value = self.redis_client.blpop(self.workflow_event_key, timeout=timeout, raw=True)
+        return self._parse_workflow_event(value)
+
+    async def async_wait_workflow_response(self, timeout: int = WORKFLOW_EVENT_BLOCK_TIMEOUT) \
+            -> tuple[str | None, ChatResponse | None]:
+        """ Block until a chat response or a control signal arrives; (None, None) on timeout """
+        value = await self.redis_client.ablpop(self.workflow_event_key, timeout=timeout, raw=True)
+        return self._parse_workflow_event(value)
+
     def build_chat_response(self, category, category_type, message, extra=None, files=None):
         return ChatResponse(
             user_id=self.user_id,
@@ -190,9 +254,11 @@ class RedisCallback(BaseCallback):
                                             WorkFlowTaskOtherError(exception=status_info['reason']).to_dict())
 
     def sync_get_response_until_break(self) -> Iterator[ChatResponse]:
+        # Status is only re-read when a signal or the block timeout wakes the reader,
+        # streamed events are delivered as soon as the worker pushes them.
+        stopped = self.get_workflow_stop()
+        status_info = self.get_workflow_status()
         while True:
-            # get workflow status
-            status_info = self.get_workflow_status()
             if not status_info:
                 yield self.build_chat_response(WorkflowEventType.Error.value, 'over',
                                                message=WorkFlowTaskOtherError(
@@ -231,18 +297,25 @@ class RedisCallback(BaseCallback):
                 self.set_workflow_status(WorkflowStatus.FAILED.value, 'workflow status not update over 1 day')
                 self.set_workflow_stop()
                 break
-            else:
-                chat_response = self.get_workflow_response()
-                if not chat_response:
-                    time.sleep(1)
-                    continue
-                yield chat_response
+
+            signal, chat_response = self.wait_workflow_response()
+            if chat_response:
+                # Events produced after a stop are discarded, same as the non-blocking pop
+                if not stopped:
+                    yield chat_response
+                continue
+            if signal == WORKFLOW_SIGNAL_STOP and self.get_workflow_stop():
+                # The stop key is re-checked so a stale signal left by a cleared run is ignored
+                stopped = True
+                self.redis_client.delete(self.workflow_event_key)
+            # Woken by a status change or the block timeout
+            status_info = self.get_workflow_status()
 
     async def get_response_until_break(self) -> AsyncIterator[ChatResponse]:
         """ Continuous accessworkflowright of privacyresponseuntil the end of the run is encountered or pending entry """
+        stopped = await self.async_get_workflow_stop()
+        status_info = await self.async_get_workflow_status()
         while True:
-            # get workflow status
-            status_info = await self.async_get_workflow_status()
             if not status_info:
                 yield self.build_chat_response(WorkflowEventType.Error.value, 'over',
                                                message=WorkFlowTaskOtherError(
@@ -281,12 +354,16 @@ class RedisCallback(BaseCallback):
                                                      'workflow status not update over 1 day')
                 await self.async_set_workflow_stop()
                 break
-            else:
-                chat_response = await self.async_get_workflow_response()
-                if not chat_response:
-                    await asyncio.sleep(0.01)
-                    continue
-                yield chat_response
+
+            signal, chat_response = await self.async_wait_workflow_response()
+            if chat_response:
+                if not stopped:
+                    yield chat_response
+                continue
+            if signal == WORKFLOW_SIGNAL_STOP and await self.async_get_workflow_stop():
+                stopped = True
+                await self.redis_client.adelete(self.workflow_event_key)
+            status_info = await self.async_get_workflow_status()
 
     def set_user_input(self, data: dict, message_id: int = None, message_content: str = None,
                        verify_input: bool = False):
@@ -398,11 +475,13 @@ class RedisCallback(BaseCallback):
     def set_workflow_stop(self):
         from bisheng.worker.workflow.tasks import stop_workflow
         self.redis_client.set(self.workflow_stop_key, 1, expiration=3600 * 24)
+        self._push_workflow_signal(WORKFLOW_SIGNAL_STOP)
         stop_workflow.delay(self.unique_id, self.workflow_id, self.chat_id, self.user_id)
 
     async def async_set_workflow_stop(self):
         from bisheng.worker.workflow.tasks import stop_workflow
         await self.redis_client.aset(self.workflow_stop_key, 1, expiration=3600 * 24)
+        await self._async_push_workflow_signal(WORKFLOW_SIGNAL_STOP)
         stop_workflow.delay(self.unique_id, self.workflow_id, self.chat_id, self.user_id)
 
     def get_workflow_stop(self) -> bool | None:
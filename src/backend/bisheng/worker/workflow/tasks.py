@@ -39,9 +39,12 @@ def _judge_workflow_status(redis_callback: RedisCallback, workflow: Workflow):
         _clear_workflow_obj(redis_callback.unique_id)
         return
     if workflow.status() == WorkflowStatus.INPUT.value:
-        # If it is an input state, place the object in memory
-        _global_workflow[redis_callback.unique_id] = workflow
-        # redis_callback.save_workflow_object(workflow)
+        if settings.get_workflow_conf().durable_state and redis_callback.save_workflow_checkpoint(workflow):
+            # Any worker can resume from the checkpoint, so the paused run is not held in memory
+            _global_workflow.pop(redis_callback.unique_id, None)
+        else:
+            # If it is an input state, place the object in memory
+            _global_workflow[redis_callback.unique_id] = workflow
         redis_callback.set_workflow_status(status, reason)
         return
     logger.error(f"unexpected workflow status error: {status}")
@@ -49,7 +52,8 @@ def _judge_workflow_status(redis_callback: RedisCallback, workflow: Workflow):
     _clear_workflow_obj(redis_callback.unique_id)
 
 
-def _execute_workflow(unique_id: str, workflow_id: str, chat_id: str, user_id: int, source: str = "platform"):
+def _init_workflow(redis_callback: RedisCallback, workflow_id: str, user_id: int) -> Workflow:
+    """Build the workflow of this run from the data stored in redis"""
     # F022 INV-T18: resolve Flow.tenant_id once; reuse for both Workflow
     # node tenant threading and RedisCallback's sync workbench reads.
     workflow_info = FlowDao.get_flow_by_id(workflow_id)
@@ -58,31 +62,49 @@ def _execute_workflow(unique_id: str, workflow_id: str, chat_id: str, user_id: i
     # by this identity when the permission toggle is OFF (distinct from `user_id`,
     # the runtime user who triggered the run).
     flow_user_id = getattr(workflow_info, "user_id", None)
-    redis_callback = RedisCallback(unique_id, workflow_id, chat_id, user_id, source=source, tenant_id=flow_tenant_id)
+    redis_callback.tenant_id = flow_tenant_id
+
+    # get workflow data
+    workflow_data = redis_callback.get_workflow_data()
+    if not workflow_data:
+        raise Exception("workflow data not found maybe data is expired")
+
+    # init workflow
+    workflow_conf = settings.get_workflow_conf()
+    workflow_name = workflow_info.name if workflow_info else workflow_id
+    workflow = Workflow(
+        workflow_id,
+        workflow_name,
+        user_id,
+        workflow_data,
+        False,
+        workflow_conf.max_steps,
+        workflow_conf.timeout,
+        redis_callback,
+        tenant_id=flow_tenant_id,
+        flow_user_id=flow_user_id,
+    )
+    redis_callback.workflow = workflow
+    return workflow
+
+
+def _restore_workflow(redis_callback: RedisCallback, workflow_id: str, user_id: int) -> Workflow | None:
+    """Rebuild a paused workflow from its checkpoint, the run may have been paused by another worker"""
+    checkpoint = redis_callback.get_workflow_checkpoint()
+    if not checkpoint:
+        return None
+    workflow = _init_workflow(redis_callback, workflow_id, user_id)
+    workflow.load_checkpoint(checkpoint)
+    logger.debug(f"restore workflow object from checkpoint for unique_id: {redis_callback.unique_id}")
+    return workflow
+
+
+def _execute_workflow(unique_id: str, workflow_id: str, chat_id: str, user_id: int, source: str = "platform"):
+    redis_callback = RedisCallback(unique_id, workflow_id, chat_id, user_id, source=source)
     try:
         # update workflow status
         redis_callback.set_workflow_status(WorkflowStatus.RUNNING.value)
-        # get workflow data
-        workflow_data = redis_callback.get_workflow_data()
-        if not workflow_data:
-            raise Exception("workflow data not found maybe data is expired")
-
-        # init workflow
-        workflow_conf = settings.get_workflow_conf()
-        workflow_name = workflow_info.name if workflow_info else workflow_id
-        workflow = Workflow(
-            workflow_id,
-            workflow_name,
-            user_id,
-            workflow_data,
-            False,
-            workflow_conf.max_steps,
-            workflow_conf.timeout,
-            redis_callback,
-            tenant_id=flow_tenant_id,
-            flow_user_id=flow_user_id,
-        )
-        redis_callback.workflow = workflow
+        workflow = _init_workflow(redis_callback, workflow_id, user_id)
         status, reason = workflow.run()
         _judge_workflow_status(redis_callback, workflow)
     except IgnoreException as e:
@@ -126,6 +148,8 @@ def _continue_workflow(unique_id: str, workflow_id: str, chat_id: str, user_id:
     redis_callback = RedisCallback(unique_id, workflow_id, chat_id, user_id, source=source)
     try:
         workflow = _global_workflow.get(redis_callback.unique_id, None)
+        if not workflow:
+            workflow = _restore_workflow(redis_callback, workflow_id, user_id)
         if not workflow:
             raise Exception("workflow object not found maybe data is expired")
         if workflow.status() not in [WorkflowStatus.INPUT.value, WorkflowStatus.INPUT_OVER.value]:
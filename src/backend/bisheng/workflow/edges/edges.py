@@ -1,7 +1,69 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Callable, Dict, Iterable
 
 from pydantic import BaseModel, Field
 
+# Virtual root linked to every condition node, used to compare branches of different condition nodes
+_CONDITION_ROOT = "__condition_root__"
+
+
+def _immediate_dominators(root: str, successors: Callable[[str], Iterable[str]]) -> Dict[str, str]:
+    """ immediate dominator of every node reachable from root (Cooper-Harvey-Kennedy), root maps to itself """
+    # iterative dfs, recursion would overflow on deep workflows
+    postorder = []
+    visited = {root}
+    stack = [(root, iter(successors(root)))]
+    while stack:
+        node_id, next_iter = stack[-1]
+        for one in next_iter:
+            if one not in visited:
+                visited.add(one)
+                stack.append((one, iter(successors(one))))
+                break
+        else:
+            stack.pop()
+            postorder.append(node_id)
+
+    order = postorder[::-1]
+    index = {node_id: i for i, node_id in enumerate(order)}
+    preds = {node_id: [] for node_id in order}
+    for node_id in order:
+        for one in successors(node_id):
+            preds[one].append(node_id)
+
+    idom = {root: root}
+
+    def intersect(a: str, b: str) -> str:
+        while a != b:
+            while index[a] > index[b]:
+                a = idom[a]
+            while index[b] > index[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node_id in order[1:]:
+            new_idom = None
+            for one in preds[node_id]:
+                if one in idom:
+                    new_idom = one if new_idom is None else intersect(one, new_idom)
+            if idom.get(node_id) != new_idom:
+                idom[node_id] = new_idom
+                changed = True
+    return idom
+
+
+def _dominates(idom: Dict[str, str], node_id: str, other: str) -> bool:
+    """ whether node_id lies on every path from the root to other """
+    while True:
+        if other == node_id:
+            return True
+        parent = idom[other]
+        if parent == other:
+            return False
+        other = parent
+
 
 class EdgeBase(BaseModel):
     id: str = Field(..., description="Unique id for edge")
@@ -33,6 +95,9 @@ class EdgeManage:
                 self.target_map[one.target] = []
             self.target_map[one.target].append(one)
 
+        # root node id: {node_id: immediate dominator}
+        self._dominator_cache = {}
+
     def get_target_node(self, source: str) -> List[str] | None:
         """ get target node id by source node id"""
         if source not in self.source_map:
@@ -83,22 +148,89 @@ class EdgeManage:
 
     def get_next_nodes(self, node_id: str, exclude: Optional[List[str]] = None) -> List[str] | None:
         """ get all next nodes by node id"""
-        # Get direct downstream nodes
-        output_nodes = self.get_target_node(node_id)
-        if not output_nodes:
-            return []
-        if not exclude:
-            exclude = [node_id]
-
-        # Exclude specified nodes
-        for one in exclude:
-            if one in output_nodes:
-                output_nodes.remove(one)
-
-        exclude.extend(output_nodes)
-        for one in output_nodes:
-            next_nodes = self.get_next_nodes(one, exclude=exclude)
-            if next_nodes:
-                output_nodes.extend(next_nodes)
-
-        return output_nodes
+        exclude = set(exclude) if exclude else set()
+        exclude.add(node_id)
+        output_nodes = []
+        index = 0
+        current = node_id
+        while True:
+            for one in self.get_target_node(current) or []:
+                if one not in exclude:
+                    exclude.add(one)
+                    output_nodes.append(one)
+            if index >= len(output_nodes):
+                return output_nodes
+            current = output_nodes[index]
+            index += 1
+
+    def get_node_levels(self, start_node_id: str) -> Dict[str, int]:
+        """ longest distance from start node to every reachable node, edges that close a loop are ignored """
+        def successors(node_id: str) -> List[str]:
+            return self.get_target_node(node_id) or []
+
+        # iterative dfs, an edge pointing to a node still on the stack closes a loop
+        postorder = []
+        visited = {start_node_id}
+        on_stack = {start_node_id}
+        loop_edges = set()
+        stack = [(start_node_id, iter(successors(start_node_id)))]
+        while stack:
+            node_id, next_iter = stack[-1]
+            for one in next_iter:
+                if one in on_stack:
+                    loop_edges.add((node_id, one))
+                elif one not in visited:
+                    visited.add(one)
+                    on_stack.add(one)
+                    stack.append((one, iter(successors(one))))
+                    break
+            else:
+                stack.pop()
+                on_stack.discard(node_id)
+                postorder.append(node_id)
+
+        # reverse postorder is a topological order once the loop edges are dropped
+        levels = {start_node_id: 0}
+        for node_id in reversed(postorder):
+            for one in successors(node_id):
+                if (node_id, one) not in loop_edges:
+                    levels[one] = max(levels.get(one, 0), levels[node_id] + 1)
+        return levels
+
+    def get_dominators(self, root_node_id: str) -> Dict[str, str]:
+        """ immediate dominator of every node reachable from root node, cached per root """
+        if root_node_id not in self._dominator_cache:
+            self._dominator_cache[root_node_id] = _immediate_dominators(
+                root_node_id, lambda node_id: self.get_target_node(node_id) or [])
+        return self._dominator_cache[root_node_id]
+
+    def is_exclusive_branch_end(self, node_id: str, condition_nodes: List[str]) -> bool:
+        """
+        Whether two branches starting at condition nodes reach node_id without sharing any intermediate node.
+        Same answer as comparing every pair of paths returned by get_all_edges_nodes, without enumerating them.
+        """
+        sources = [one for one in condition_nodes if one != node_id and node_id in self.get_dominators(one)]
+        for one in sources:
+            dominators = self.get_dominators(one)
+            direct_count = self.get_target_node(one).count(node_id)
+            if not direct_count:
+                # no intermediate node is on every path from the condition node, so two paths are disjoint
+                if dominators[node_id] == one:
+                    return True
+                continue
+            # a direct edge is a branch without intermediate nodes, disjoint from any other branch
+            if direct_count > 1 or len(sources) > 1:
+                return True
+            for source in self.get_source_node(node_id):
+                if source != one and source in dominators and not _dominates(dominators, node_id, source):
+                    return True
+
+        if len(sources) < 2:
+            return False
+        # branches starting at different condition nodes
+        cache_key = (_CONDITION_ROOT, tuple(sources))
+        if cache_key not in self._dominator_cache:
+            self._dominator_cache[cache_key] = _immediate_dominators(
+                _CONDITION_ROOT,
+                lambda one: sources if one == _CONDITION_ROOT else self.get_target_node(one) or [])
+        return self._dominator_cache[cache_key][node_id] == _CONDITION_ROOT
@@ -0,0 +1,107 @@
+"""Process-level LRU of compiled workflow topologies.
+
+Building a ``GraphEngine`` parses the edges, computes node levels and the fan-in
+plan and compiles the langgraph ``StateGraph``. All of that depends only on the
+workflow data, so it is cached per flow and keyed by a hash of that data: a new
+version of the flow (or node param overrides) produces a different hash and
+replaces the entry.
+
+The compiled graph never references node instances. Its nodes and conditional
+edges dispatch through ``config["configurable"]`` to the per-run node map, and
+every run attaches its own checkpointer via ``CompiledTopology.bind``, so one
+cached topology is safely shared by concurrent runs.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from bisheng.workflow.edges.edges import EdgeManage
+
+# configurable key carrying the per-run {node_id: node_instance} map
+NODES_CONFIG_KEY = "__bisheng_nodes"
+
+_MAXSIZE = 256
+
+
+@dataclass
+class CompiledTopology:
+    """Everything GraphEngine derives from the workflow data, minus per-run state"""
+
+    edges: EdgeManage
+    # langgraph compiled without a checkpointer
+    graph: Any
+    nodes_fan_in: dict[str, list[str] | None] = field(default_factory=dict)
+    nodes_next_nodes: dict[str, list[str]] = field(default_factory=dict)
+    node_level: dict[str, int] = field(default_factory=dict)
+    condition_nodes: list[str] = field(default_factory=list)
+    # number of executable nodes and end nodes, used for the recursion limit
+    node_count: int = 0
+    end_node_count: int = 0
+
+    def bind(self):
+        """Per-run copy of the compiled graph with its own in-memory checkpointer"""
+        return self.graph.copy(update={"checkpointer": MemorySaver()})
+
+
+def workflow_version_hash(workflow_data: dict) -> str:
+    """Stable hash of the workflow data, any change to nodes, params or edges changes it"""
+    raw = json.dumps(workflow_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CompiledGraphCache:
+    """Thread-safe LRU holding one (version, topology) per key; a version mismatch is a miss"""
+
+    def __init__(self, maxsize: int = _MAXSIZE):
+        self._data: OrderedDict[Any, tuple[str, CompiledTopology]] = OrderedDict()
+        self._max = maxsize
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any, version: str) -> CompiledTopology | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == version:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key: Any, version: str, topology: CompiledTopology) -> None:
+        with self._lock:
+            self._data[key] = (version, topology)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Per-process singleton shared by every GraphEngine
+compiled_graph_cache = CompiledGraphCache()
+
+
+def get_graph_cache_stats() -> dict:
+    return compiled_graph_cache.stats()
@@ -1,18 +1,26 @@
 import operator
+import time
 from typing import Annotated, Any
 
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableConfig
 from langgraph.constants import END, START
 from langgraph.graph import StateGraph
 from loguru import logger
 from typing_extensions import TypedDict
 
+from bisheng.common.services.metric_log import emit_metric
 from bisheng.utils.exceptions import IgnoreException
 from bisheng.workflow.callback.base_callback import BaseCallback
 from bisheng.workflow.callback.event import UserInputData
 from bisheng.workflow.common.node import BaseNodeData, NodeType
 from bisheng.workflow.common.workflow import WorkflowStatus
 from bisheng.workflow.edges.edges import EdgeManage
+from bisheng.workflow.graph.graph_cache import (
+    NODES_CONFIG_KEY,
+    CompiledTopology,
+    compiled_graph_cache,
+    workflow_version_hash,
+)
 from bisheng.workflow.graph.graph_state import GraphState
 from bisheng.workflow.nodes.base import BaseNode
 from bisheng.workflow.nodes.node_manage import NodeFactory
@@ -24,6 +32,29 @@ class TempState(TypedDict):
     flag: Annotated[bool, operator.and_]
 
 
+# The compiled graph is cached and shared between runs, so its nodes and conditional edges
+# must not bind node instances; they look up the current run's instance from the config.
+def _node_runner(node_id: str, async_mode: bool):
+    if async_mode:
+
+        async def arun(state: dict, config: RunnableConfig):
+            return await config["configurable"][NODES_CONFIG_KEY][node_id].arun(state)
+
+        return arun
+
+    def run(state: dict, config: RunnableConfig):
+        return config["configurable"][NODES_CONFIG_KEY][node_id].run(state)
+
+    return run
+
+
+def _node_router(node_id: str):
+    def route_node(state: dict, config: RunnableConfig):
+        return config["configurable"][NODES_CONFIG_KEY][node_id].route_node(state)
+
+    return route_node
+
+
 class GraphEngine:
     def __init__(
         self,
@@ -68,21 +99,60 @@ class GraphEngine:
         self.edges = None
         self.graph_state = GraphState()
 
-        # init langgraph state graph
-        self.graph_builder = StateGraph(TempState)
+        # init langgraph state graph, only used when the compiled topology is not cached
+        self.graph_builder = None
         self.graph = None
-        self.graph_config = {"configurable": {"thread_id": "1"}, "recursion_limit": 50}
+        # workflow_data derived structures shared through the process-level graph cache
+        self.topology: CompiledTopology | None = None
+        self.graph_config = {
+            "configurable": {"thread_id": "1", NODES_CONFIG_KEY: self.nodes_map},
+            "recursion_limit": 50,
+        }
 
         self.status = WorkflowStatus.RUNNING.value
         self.reason = ""  # Failure Reason
 
-        self.build_edges()
-        self.build_nodes()
+        # Drafts validated without a workflow id are not cached
+        self.cache_key = (self.workflow_id, self.async_mode) if self.workflow_id else None
+        self.cache_version = workflow_version_hash(self.workflow_data) if self.cache_key else None
+        topology = compiled_graph_cache.get(self.cache_key, self.cache_version) if self.cache_key else None
+        if topology:
+            self.load_topology(topology)
+            emit_metric("workflow_graph_cache", workflow_id=self.workflow_id, hit=True)
+        else:
+            start = time.perf_counter()
+            self.build_edges()
+            self.build_nodes()
+            if self.cache_key:
+                compiled_graph_cache.set(self.cache_key, self.cache_version, self.topology)
+                emit_metric(
+                    "workflow_graph_cache",
+                    workflow_id=self.workflow_id,
+                    hit=False,
+                    build_ms=(time.perf_counter() - start) * 1000,
+                )
 
     def build_edges(self):
         # init edges
         self.edges = EdgeManage(self.workflow_data.get("edges", []))
 
+    def load_topology(self, topology: CompiledTopology):
+        """Reuse a cached topology, only the node instances are created for this run"""
+        self.topology = topology
+        self.edges = topology.edges
+        self.nodes_fan_in = topology.nodes_fan_in
+        self.nodes_next_nodes = topology.nodes_next_nodes
+        self.node_level = topology.node_level
+        self.condition_nodes = topology.condition_nodes
+        self.init_nodes(self.workflow_data.get("nodes", []), build_topology=False)
+        self.graph = topology.bind()
+        self.set_recursion_limit(topology.node_count, topology.end_node_count)
+
+    def set_recursion_limit(self, node_count: int, end_node_count: int):
+        self.graph_config["recursion_limit"] = (
+            max((node_count - end_node_count - 1) * self.max_steps, 1) + end_node_count + 1
+        )
+
     def add_node_edge(self, node_instance: BaseNode):
         """Link edges of nodes"""
         if node_instance.type == NodeType.END.value or node_instance.type == NodeType.FAKE_OUTPUT.value:
@@ -97,20 +167,17 @@ class GraphEngine:
         # output Node followed by afake Nodes are used to handle interrupts
         if node_instance.type == NodeType.OUTPUT.value:
             fake_node = self.nodes_map[f"{node_instance.id}_fake"]
-            if self.async_mode:
-                self.graph_builder.add_node(fake_node.id, fake_node.arun)
-            else:
-                self.graph_builder.add_node(fake_node.id, fake_node.run)
+            self.graph_builder.add_node(fake_node.id, _node_runner(fake_node.id, self.async_mode))
             self.graph_builder.add_edge(node_instance.id, fake_node.id)
             self.graph_builder.add_conditional_edges(
-                fake_node.id, node_instance.route_node, {node_id: node_id for node_id in target_node_ids}
+                fake_node.id, _node_router(node_instance.id), {node_id: node_id for node_id in target_node_ids}
             )
             return
 
         # condition And output Need to connect behind the node langgraphright of privacy edge_condition
         if node_instance.type == NodeType.CONDITION.value:
             self.graph_builder.add_conditional_edges(
-                node_instance.id, node_instance.route_node, {node_id: node_id for node_id in target_node_ids}
+                node_instance.id, _node_router(node_instance.id), {node_id: node_id for node_id in target_node_ids}
             )
             return
 
@@ -151,28 +218,8 @@ class GraphEngine:
             return [], [one for one in source_ids if not one.startswith(("output_", "condition_"))]
 
         # Determine if there is aconditionNode oroutputNode (selective interaction) to this node Two unique paths
-        all_branches = []
-        for one in self.condition_nodes:
-            if node_id == one:
-                continue
-            branches = self.edges.get_all_edges_nodes(one, node_id)
-            for branch in branches:
-                if node_id not in branch:
-                    continue
-                branch.remove(node_id)
-                branch.remove(one)
-                all_branches.append(branch)
-
-        def judge_not_same_branch():
-            # Determine if there are two unique paths in all edges
-            for i in range(len(all_branches)):
-                for j in range(i + 1, len(all_branches)):
-                    if not (set(all_branches[i]) & set(all_branches[j])):
-                        return True
-            return False
-
         # Explain that it is a mutually exclusive ending node, there is no need to wait
-        if judge_not_same_branch():
+        if self.edges.is_exclusive_branch_end(node_id, self.condition_nodes):
             return [], [one for one in source_ids if not one.startswith(("output_", "condition_"))]
 
         # Explain that it is not a mutually exclusive closing node, and you need to wait for all the predecessor nodes to finish executing before executing
@@ -185,26 +232,9 @@ class GraphEngine:
 
     def build_node_level(self, start_node: str):
         """Calculate hierarchy for all nodes"""
+        self.node_level = self.edges.get_node_levels(start_node)
 
-        # Hierarchy of marker nodes
-        def mark_node_level(node_id, node_map: dict, level: int):
-            # The nodes that have been traversed are no longer traversed, indicating that they are looped
-            if node_id in node_map:
-                return
-            self.node_level[node_id] = max(self.node_level.get(node_id, 0), level)
-            node_map[node_id] = True
-            next_nodes = self.edges.get_target_node(node_id)
-            if not next_nodes:
-                return
-
-            for one_node in next_nodes:
-                tmp_node_map = node_map.copy()
-                mark_node_level(one_node, tmp_node_map, level + 1)
-            return
-
-        mark_node_level(start_node, {}, 0)
-
-    def init_nodes(self, nodes):
+    def init_nodes(self, nodes, build_topology: bool = True):
         """return node id"""
         start_node = None
         end_nodes = []
@@ -229,18 +259,13 @@ class GraphEngine:
                 tenant_id=self.tenant_id,
                 flow_user_id=self.flow_user_id,
             )
-            if node_instance.is_condition_node():
-                self.condition_nodes.append(node_instance.id)
             self.nodes_map[node_data.id] = node_instance
-            self.nodes_fan_in[node_instance.id] = self.edges.get_source_node(node_instance.id)
-            if node_instance.type not in [NodeType.START.value]:
-                self.nodes_next_nodes[node_instance.id] = self.edges.get_next_nodes(node_instance.id)
-
-            # add node into langgraph
-            if self.async_mode:
-                self.graph_builder.add_node(node_instance.id, node_instance.arun)
-            else:
-                self.graph_builder.add_node(node_instance.id, node_instance.run)
+            if build_topology:
+                if node_instance.is_condition_node():
+                    self.condition_nodes.append(node_instance.id)
+                self.nodes_fan_in[node_instance.id] = self.edges.get_source_node(node_instance.id)
+                if node_instance.type not in [NodeType.START.value]:
+                    self.nodes_next_nodes[node_instance.id] = self.edges.get_next_nodes(node_instance.id)
 
             # find special node
             if node_instance.type == NodeType.START.value:
@@ -268,6 +293,12 @@ class GraphEngine:
 
         if not start_node:
             raise Exception("workflow must have start node")
+
+        # add nodes into langgraph, the fake output nodes are added with their output node edges
+        self.graph_builder = StateGraph(TempState)
+        for node_id, node_instance in self.nodes_map.items():
+            if node_instance.type != NodeType.FAKE_OUTPUT.value:
+                self.graph_builder.add_node(node_id, _node_runner(node_id, self.async_mode))
         self.graph_builder.add_edge(START, start_node)
         if end_nodes:
             for end_node in end_nodes:
@@ -283,11 +314,19 @@ class GraphEngine:
         # Handle nodes with multiple fan-in nodes
         self.build_more_fan_in_node()
 
-        # compile langgraph
-        self.graph = self.graph_builder.compile(checkpointer=MemorySaver(), interrupt_before=interrupt_nodes)
-        self.graph_config["recursion_limit"] = (
-            max((len(nodes) - len(end_nodes) - 1) * self.max_steps, 1) + len(end_nodes) + 1
+        # compile langgraph, the checkpointer is attached per run
+        self.topology = CompiledTopology(
+            edges=self.edges,
+            graph=self.graph_builder.compile(interrupt_before=interrupt_nodes),
+            nodes_fan_in=self.nodes_fan_in,
+            nodes_next_nodes=self.nodes_next_nodes,
+            node_level=self.node_level,
+            condition_nodes=self.condition_nodes,
+            node_count=len(nodes),
+            end_node_count=len(end_nodes),
         )
+        self.graph = self.topology.bind()
+        self.set_recursion_limit(len(nodes), len(end_nodes))
 
         # import datetime
         # with open(f"./bisheng/data/graph/graph_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.png",
@@ -364,6 +403,56 @@ class GraphEngine:
         # Resumegraph
         await self._arun(None)
 
+    def dump_checkpoint(self) -> dict:
+        """
+        Snapshot of everything a paused run needs to resume in another process:
+        the variables pool, chat history, per-node run state and the latest langgraph checkpoint.
+        The graph topology itself is rebuilt from workflow_data on restore.
+        """
+        saved = self.graph.checkpointer.get_tuple(self.graph_config)
+        graph_checkpoint = None
+        if saved:
+            graph_checkpoint = {
+                "checkpoint": saved.checkpoint,
+                "metadata": saved.metadata,
+                "pending_writes": saved.pending_writes or [],
+            }
+        return {
+            "status": self.status,
+            "reason": self.reason,
+            "variables_pool": self.graph_state.variables_pool,
+            "history_memory": self.graph_state.history_memory,
+            "nodes": {node_id: node.dump_checkpoint() for node_id, node in self.nodes_map.items()},
+            "graph_checkpoint": graph_checkpoint,
+        }
+
+    def load_checkpoint(self, data: dict):
+        """Restore a snapshot produced by dump_checkpoint onto a freshly built engine"""
+        self.status = data["status"]
+        self.reason = data["reason"]
+        self.graph_state.variables_pool = data["variables_pool"]
+        self.graph_state.history_memory = data["history_memory"]
+        for node_id, node_data in data["nodes"].items():
+            node_instance = self.nodes_map.get(node_id)
+            if node_instance is None:
+                raise IgnoreException(f"{node_id} -- workflow node is update")
+            node_instance.load_checkpoint(node_data)
+
+        graph_checkpoint = data["graph_checkpoint"]
+        if not graph_checkpoint:
+            return
+        checkpointer = self.graph.checkpointer
+        checkpoint = graph_checkpoint["checkpoint"]
+        put_config = {"configurable": {**self.graph_config["configurable"], "checkpoint_ns": ""}}
+        config = checkpointer.put(
+            put_config, checkpoint, graph_checkpoint["metadata"], checkpoint["channel_versions"]
+        )
+        task_writes = {}
+        for task_id, channel, value in graph_checkpoint["pending_writes"]:
+            task_writes.setdefault(task_id, []).append((channel, value))
+        for task_id, writes in task_writes.items():
+            checkpointer.put_writes(config, writes, task_id)
+
     def judge_status(self):
         # Judgment Status
         snapshot = self.graph.get_state(self.graph_config)
@@ -97,6 +97,15 @@ class Workflow:
             await self.graph_engine.acontinue_run()
         return self.graph_engine.status, self.graph_engine.reason
 
+    def dump_checkpoint(self) -> dict:
+        """Serializable run state of a workflow paused for user input"""
+        return {"current_time": self.current_time, "engine": self.graph_engine.dump_checkpoint()}
+
+    def load_checkpoint(self, data: dict):
+        """Resume from dump_checkpoint output; the workflow must be built from the same workflow_data"""
+        self.current_time = data["current_time"]
+        self.graph_engine.load_checkpoint(data["engine"])
+
     def stop(self):
         self.graph_engine.stop()
 
@@ -18,6 +18,9 @@ from bisheng.workflow.nodes.prompt_template import PromptTemplateParser
 
 
 class BaseNode(ABC):
+    # Extra per-run attributes a paused run needs to resume in another process
+    checkpoint_attrs: tuple[str, ...] = ()
+
     def __init__(
         self,
         node_data: BaseNodeData,
@@ -250,5 +253,22 @@ class BaseNode(ABC):
     async def arun(self, state: dict) -> Any:
         return self.run(state)
 
+    def dump_checkpoint(self) -> dict[str, Any]:
+        """Per-run state persisted while the workflow waits for user input"""
+        data = {
+            "current_step": self.current_step,
+            "node_params": self.node_params,
+            "other_node_variable": self.other_node_variable,
+            "exec_unique_id": self.exec_unique_id,
+        }
+        for attr in self.checkpoint_attrs:
+            data[attr] = getattr(self, attr)
+        return data
+
+    def load_checkpoint(self, data: dict[str, Any]) -> None:
+        """Restore the state produced by dump_checkpoint onto a freshly built node"""
+        for key, value in data.items():
+            setattr(self, key, value)
+
     def stop(self):
         self.stop_flag = True
@@ -5,6 +5,7 @@ from bisheng.workflow.nodes.code.code_parse import CodeParser
 
 
 class CodeNode(BaseNode):
+    checkpoint_attrs = ('_code_input', '_code_output', '_code')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -22,6 +23,11 @@ class CodeNode(BaseNode):
         self._code_output = self.node_params['code_output']
         self._code = self.node_params['code']
 
+    def load_checkpoint(self, data: dict) -> None:
+        super().load_checkpoint(data)
+        self._code_parser = CodeParser(self._code)
+        self._parse_code()
+
     def _parse_code(self):
         try:
             self._code_parser.parse_code()
@@ -30,6 +30,9 @@ class ParseModeEnum(str, Enum):
 
 
 class InputNode(BaseNode):
+    # Form file keys are regenerated on every init, so the mapping must survive a restore
+    checkpoint_attrs = ("_node_params_map", "_file_key_map")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Node Current Version
@@ -12,6 +12,8 @@ from bisheng.workflow.nodes.prompt_template import PromptTemplateParser
 
 
 class OutputNode(BaseNode):
+    checkpoint_attrs = ('_handled_output_result', '_parsed_output_msg', '_parsed_files',
+                        '_source_documents', '_citation_registry_items')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
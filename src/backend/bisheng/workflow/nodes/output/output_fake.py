@@ -28,5 +28,12 @@ class OutputFakeNode(BaseModel):
     def get_input_schema(self):
         return self.output_node.get_input_schema()
 
+    def dump_checkpoint(self) -> dict:
+        # Stateless, the wrapped output node carries its own checkpoint
+        return {}
+
+    def load_checkpoint(self, data: dict) -> None:
+        pass
+
     def stop(self):
         pass
@@ -16,6 +16,7 @@ from bisheng.workflow.nodes.base import BaseNode
 
 
 class StartNode(BaseNode):
+    checkpoint_attrs = ('_user_info',)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
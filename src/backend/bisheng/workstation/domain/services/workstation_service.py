@@ -1,7 +1,10 @@
+import asyncio
 import json
+import time
 from typing import Any
 
 from fastapi import BackgroundTasks, Request
+from langchain_core.embeddings import Embeddings
 from langchain_core.messages import AIMessage, HumanMessage
 from loguru import logger
 from sqlmodel import col, select
@@ -22,6 +25,7 @@ from bisheng.common.errcode.server import EmbeddingModelStatusError
 from bisheng.common.models.config import Config, ConfigDao, ConfigKeyEnum
 from bisheng.common.services.base import BaseService
 from bisheng.common.services.config_service import settings
+from bisheng.core.ai.rerank.rrf_rerank import RRFRerank
 from bisheng.core.context.tenant import (
     DEFAULT_TENANT_ID,
     bypass_tenant_filter,
@@ -37,14 +41,18 @@ from bisheng.knowledge.domain.knowledge_rag import KnowledgeRag
 from bisheng.knowledge.domain.models.knowledge import KnowledgeCreate, KnowledgeDao, KnowledgeTypeEnum
 from bisheng.knowledge.domain.services.knowledge_permission_service import KnowledgePermissionService
 from bisheng.knowledge.domain.services.knowledge_service import KnowledgeService
+from bisheng.knowledge.rag.query_embedding import QueryMemoEmbeddings
 from bisheng.llm.domain.schemas import WorkbenchModelConfig
 from bisheng.llm.domain.services import LLMService
 from bisheng.tool.domain.const import ToolPresetType
-from bisheng.tool.domain.langchain.knowledge import KnowledgeRetrieverTool
+from bisheng.tool.domain.langchain.knowledge import KnowledgeRetrieverTool, sort_by_source_and_index
 from bisheng.tool.domain.models.gpts_tools import GptsTools, GptsToolsDao, GptsToolsType
 
 from ..models import TenantWorkstationConfigDao
 
+# Knowledge bases searched at the same time by queryChunksFromDB
+_KB_FANOUT_CONCURRENCY = 8
+
 
 class WorkStationService(BaseService):
     _TENANT_KEYS = {
@@ -1054,6 +1062,150 @@ class WorkStationService(BaseService):
         permitted = await visibility.post_filter_visible_files(int(kb_id), unique_file_ids)
         return [d for d in docs if int((getattr(d, "metadata", {}) or {}).get("document_id", -1)) in permitted]
 
+    @classmethod
+    async def _ainit_kb_vectorstore(
+        cls,
+        semaphore: asyncio.Semaphore,
+        kb_id: int,
+        is_space_bucket: bool,
+        login_user: UserPayload,
+    ) -> tuple[dict, dict | None]:
+        """Build the Milvus / ES stores of one KB; returns (vectorstore_info, failure)."""
+        source = "space" if is_space_bucket else "organization"
+        async with semaphore:
+            try:
+                vectorstore_info = await KnowledgeRag.get_multi_knowledge_vectorstore(
+                    invoke_user_id=login_user.user_id,
+                    knowledge_ids=[kb_id],
+                    check_auth=False,
+                )
+            except Exception as exc:
+                err_msg = str(exc) or exc.__class__.__name__
+                logger.warning(f"[queryChunksFromDB] kb={kb_id} source={source} init failed: {err_msg}")
+                return {}, {"id": kb_id, "name": "", "error": err_msg}
+        if not vectorstore_info:
+            logger.warning(f"[queryChunksFromDB] kb={kb_id} source={source} unavailable")
+            return {}, {"id": kb_id, "name": "", "error": "Knowledge base is unavailable"}
+        return vectorstore_info, None
+
+    @classmethod
+    async def _aembed_query_once(cls, question: str, knowledge_vector_list: dict) -> dict:
+        """Embed the question once per distinct embedding model; returns, per KB, the
+        embeddings its Milvus search should embed the query with to reuse that vector.
+        The stores themselves are shared and left untouched."""
+        memos: dict = {}
+        query_embeddings: dict = {}
+        for kb_id, vectorstore_info in knowledge_vector_list.items():
+            embeddings = getattr(vectorstore_info.get("milvus"), "embedding_func", None)
+            if not isinstance(embeddings, Embeddings):
+                continue
+            model_key = getattr(vectorstore_info.get("knowledge"), "model", None) or id(embeddings)
+            if model_key not in memos:
+                memos[model_key] = QueryMemoEmbeddings(embeddings)
+            query_embeddings[kb_id] = memos[model_key]
+
+        async def warm(memo: QueryMemoEmbeddings) -> None:
+            try:
+                await memo.aembed_query(question)
+            except Exception as exc:
+                # surfaced per KB by the search itself, which embeds again on a miss
+                logger.warning(f"[queryChunksFromDB] query embedding failed: {exc}")
+
+        await asyncio.gather(*[warm(memo) for memo in memos.values()])
+        return query_embeddings
+
+    @classmethod
+    async def _aretrieve_kb_docs(
+        cls,
+        semaphore: asyncio.Semaphore,
+        *,
+        kb_id,
+        vectorstore_info: dict,
+        question: str,
+        max_token: int,
+        login_user: UserPayload,
+        space_kb_id_set: set[int],
+        query_embeddings: Embeddings | None = None,
+    ) -> tuple[Any, list, dict | None, float]:
+        """Search one KB and post-filter it; returns (kb_id, docs, failure, elapsed_ms)."""
+        milvus_vectorstore = vectorstore_info.get("milvus")
+        es_vectorstore = vectorstore_info.get("es")
+        kb_row = vectorstore_info.get("knowledge")
+        kb_name = getattr(kb_row, "name", "") or ""
+        failure_id = int(kb_id) if isinstance(kb_id, (int, str)) and str(kb_id).isdigit() else kb_id
+        if milvus_vectorstore is None and es_vectorstore is None:
+            logger.info(f"[queryChunksFromDB] kb={kb_id} no vectorstore, skip")
+            return kb_id, [], {"id": failure_id, "name": kb_name, "error": "知识库未初始化向量存储"}, 0.0
+
+        start = time.perf_counter()
+        async with semaphore:
+            try:
+                per_kb_milvus = (
+                    MultiRetriever(
+                        vectors=[milvus_vectorstore],
+                        search_kwargs=[
+                            {"k": 100, "param": {"ef": 110}}
+                            | ({"query_embeddings": query_embeddings} if query_embeddings else {})
+                        ],
+                        finally_k=100,
+                    )
+                    if milvus_vectorstore is not None
+                    else None
+                )
+                per_kb_es = (
+                    MultiRetriever(
+                        vectors=[es_vectorstore],
+                        search_kwargs=[{"k": 100}],
+                        finally_k=100,
+                    )
+                    if es_vectorstore is not None
+                    else None
+                )
+                per_kb_tool = KnowledgeRetrieverTool(
+                    vector_retriever=per_kb_milvus,
+                    elastic_retriever=per_kb_es,
+                    max_content=max_token,
+                    rrf_remove_zero_score=True,
+                    # keep the relevance order for the cross-KB fusion; the
+                    # source/index sort runs on the fused result
+                    sort_by_source_and_index=False,
+                )
+                kb_docs = await per_kb_tool.ainvoke({"query": question})
+                pre_filter_count = len(kb_docs) if kb_docs else 0
+
+                # F029 Stage 3: post-filter docs by view_file when the KB
+                # belongs to the space bucket; org-bucket KBs pass through.
+                kb_id_int = int(kb_id) if isinstance(kb_id, (int, str)) and str(kb_id).isdigit() else None
+                is_space_bucket = kb_id_int is not None and kb_id_int in space_kb_id_set
+                kb_docs = await cls._post_filter_kb_docs_by_view_file(
+                    login_user=login_user,
+                    kb_id=kb_id_int if kb_id_int is not None else 0,
+                    docs=kb_docs or [],
+                    is_space_bucket=is_space_bucket,
+                )
+            except Exception as exc:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                err_msg = str(exc) or exc.__class__.__name__
+                logger.warning(f"[queryChunksFromDB] kb={kb_id} failed: {err_msg} elapsed_ms={elapsed_ms:.1f}")
+                return kb_id, [], {"id": failure_id, "name": kb_name, "error": err_msg}, elapsed_ms
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        docs_count = len(kb_docs)
+        dropped = pre_filter_count - docs_count
+        if not kb_docs:
+            logger.info(
+                f"[queryChunksFromDB] kb={kb_id} post-filter-empty "
+                f"pre_filter_candidate_size={pre_filter_count} "
+                f"post_filter_dropped_count={dropped} elapsed_ms={elapsed_ms:.1f}"
+            )
+        else:
+            logger.info(
+                f"[queryChunksFromDB] kb={kb_id} ok docs={docs_count} "
+                f"pre_filter_candidate_size={pre_filter_count} "
+                f"post_filter_dropped_count={dropped} elapsed_ms={elapsed_ms:.1f}"
+            )
+        return kb_id, kb_docs, None, elapsed_ms
+
     @classmethod
     async def queryChunksFromDB(
         cls,
@@ -1103,147 +1255,77 @@ class WorkStationService(BaseService):
                 for kb_id in visibility_filter["space_kb_ids"]
             ]
 
+            # Every KB is initialized and searched concurrently (bounded by
+            # _KB_FANOUT_CONCURRENCY); results keep the input KB order so the
+            # failure list and the fusion below are deterministic.
+            semaphore = asyncio.Semaphore(_KB_FANOUT_CONCURRENCY)
+            init_results = await asyncio.gather(
+                *[
+                    cls._ainit_kb_vectorstore(semaphore, kb_id, is_space_bucket, login_user)
+                    for kb_id, is_space_bucket in vectorstore_targets
+                ]
+            )
             knowledge_vector_list = {}
-            for kb_id, is_space_bucket in vectorstore_targets:
-                try:
-                    vectorstore_info = await KnowledgeRag.get_multi_knowledge_vectorstore(
-                        invoke_user_id=login_user.user_id,
-                        knowledge_ids=[kb_id],
-                        check_auth=False,
-                    )
-                    if not vectorstore_info:
-                        failures.append(
-                            {
-                                "id": kb_id,
-                                "name": "",
-                                "error": "Knowledge base is unavailable",
-                            }
-                        )
-                        logger.warning(
-                            f"[queryChunksFromDB] kb={kb_id} source="
-                            f"{'space' if is_space_bucket else 'organization'} unavailable"
-                        )
-                        continue
+            for vectorstore_info, failure in init_results:
+                if failure:
+                    failures.append(failure)
+                else:
                     knowledge_vector_list.update(vectorstore_info)
-                except Exception as exc:
-                    err_msg = str(exc) or exc.__class__.__name__
-                    failures.append(
-                        {
-                            "id": kb_id,
-                            "name": "",
-                            "error": err_msg,
-                        }
-                    )
-                    logger.warning(
-                        f"[queryChunksFromDB] kb={kb_id} source="
-                        f"{'space' if is_space_bucket else 'organization'} init failed: {err_msg}"
-                    )
+
+            # KBs sharing an embedding model share one query embedding.
+            query_embeddings = await cls._aembed_query_once(question, knowledge_vector_list)
 
             # Per-KB failure isolation — a single KB whose embedding model is
             # broken (e.g. expired Volcengine key → 403) must not poison the
             # whole batch. Run each KB's retriever independently; record
             # failures so the caller can render them in the UI as failed KB
             # chips instead of silently dropping them.
-            finally_docs: list = []
-            kb_succeed: list = []
-            max_total_docs = 100  # parity with old MultiRetriever finally_k
-
-            for kb_id, vectorstore_info in knowledge_vector_list.items():
-                if len(finally_docs) >= max_total_docs:
-                    break
-                milvus_vectorstore = vectorstore_info.get("milvus")
-                es_vectorstore = vectorstore_info.get("es")
-                kb_row = vectorstore_info.get("knowledge")
-                kb_name = getattr(kb_row, "name", "") or ""
-                if milvus_vectorstore is None and es_vectorstore is None:
-                    logger.info(f"[queryChunksFromDB] kb={kb_id} no vectorstore, skip")
-                    failures.append(
-                        {
-                            "id": int(kb_id) if isinstance(kb_id, (int, str)) and str(kb_id).isdigit() else kb_id,
-                            "name": kb_name,
-                            "error": "知识库未初始化向量存储",
-                        }
-                    )
-                    continue
-
-                try:
-                    per_kb_milvus = (
-                        MultiRetriever(
-                            vectors=[milvus_vectorstore],
-                            search_kwargs=[{"k": 100, "param": {"ef": 110}}],
-                            finally_k=100,
-                        )
-                        if milvus_vectorstore is not None
-                        else None
-                    )
-                    per_kb_es = (
-                        MultiRetriever(
-                            vectors=[es_vectorstore],
-                            search_kwargs=[{"k": 100}],
-                            finally_k=100,
-                        )
-                        if es_vectorstore is not None
-                        else None
-                    )
-                    per_kb_tool = KnowledgeRetrieverTool(
-                        vector_retriever=per_kb_milvus,
-                        elastic_retriever=per_kb_es,
-                        max_content=max_token,
-                        rrf_remove_zero_score=True,
-                        sort_by_source_and_index=True,
-                    )
-                    kb_docs = await per_kb_tool.ainvoke({"query": question})
-                    pre_filter_count = len(kb_docs) if kb_docs else 0
-
-                    # F029 Stage 3: post-filter docs by view_file when the KB
-                    # belongs to the space bucket; org-bucket KBs pass through.
-                    kb_id_int = int(kb_id) if isinstance(kb_id, (int, str)) and str(kb_id).isdigit() else None
-                    is_space_bucket = kb_id_int is not None and kb_id_int in space_kb_id_set
-                    kb_docs = await cls._post_filter_kb_docs_by_view_file(
+            kb_results = await asyncio.gather(
+                *[
+                    cls._aretrieve_kb_docs(
+                        semaphore,
+                        kb_id=kb_id,
+                        vectorstore_info=vectorstore_info,
+                        question=question,
+                        max_token=max_token,
                         login_user=login_user,
-                        kb_id=kb_id_int if kb_id_int is not None else 0,
-                        docs=kb_docs or [],
-                        is_space_bucket=is_space_bucket,
+                        space_kb_id_set=space_kb_id_set,
+                        query_embeddings=query_embeddings.get(kb_id),
                     )
-                    docs_count = len(kb_docs)
-                    dropped = pre_filter_count - docs_count
-                    if not kb_docs:
-                        logger.info(
-                            f"[queryChunksFromDB] kb={kb_id} post-filter-empty "
-                            f"pre_filter_candidate_size={pre_filter_count} "
-                            f"post_filter_dropped_count={dropped}"
-                        )
-                        continue
-                    finally_docs.extend(kb_docs)
+                    for kb_id, vectorstore_info in knowledge_vector_list.items()
+                ]
+            )
+            kb_doc_lists: list[list] = []
+            kb_succeed: list = []
+            kb_timings: dict = {}
+            for kb_id, kb_docs, failure, elapsed_ms in kb_results:
+                kb_timings[kb_id] = round(elapsed_ms, 1)
+                if failure:
+                    failures.append(failure)
+                elif kb_docs:
+                    kb_doc_lists.append(kb_docs)
                     kb_succeed.append(kb_id)
-                    logger.info(
-                        f"[queryChunksFromDB] kb={kb_id} ok docs={docs_count} "
-                        f"pre_filter_candidate_size={pre_filter_count} "
-                        f"post_filter_dropped_count={dropped}"
-                    )
-                except Exception as exc:
-                    err_msg = str(exc) or exc.__class__.__name__
-                    failures.append(
-                        {
-                            "id": int(kb_id) if isinstance(kb_id, (int, str)) and str(kb_id).isdigit() else kb_id,
-                            "name": kb_name,
-                            "error": err_msg,
-                        }
-                    )
-                    logger.warning(f"[queryChunksFromDB] kb={kb_id} failed: {err_msg}")
-                    continue
+            logger.info(f"[queryChunksFromDB] kb_timings_ms={kb_timings}")
 
             if failures:
                 logger.warning(
                     f"[queryChunksFromDB] partial failure: succeed={kb_succeed} failed={[f['id'] for f in failures]}"
                 )
 
-            if not finally_docs:
+            if not kb_doc_lists:
                 return [], [], failures
 
-            # Cap to match old MultiRetriever finally_k=100 ceiling.
-            if len(finally_docs) > max_total_docs:
-                finally_docs = finally_docs[:max_total_docs]
+            # One global ranking across KBs (equal-weight RRF over the per-KB
+            # rankings) before truncation, so the best hits of every KB make it
+            # in instead of whichever KB happened to be listed first.
+            max_total_docs = 100  # parity with old MultiRetriever finally_k
+            if len(kb_doc_lists) == 1:
+                finally_docs = list(kb_doc_lists[0])
+            else:
+                finally_docs = list(
+                    RRFRerank(retrievers=kb_doc_lists).compress_documents(documents=kb_doc_lists, query=question)
+                )
+            finally_docs = sort_by_source_and_index(finally_docs[:max_total_docs])
 
             formatted_results = []
             for doc in finally_docs:
@@ -0,0 +1,175 @@
+"""TelemetryBuffer ships events to Elasticsearch in bulk requests.
+
+Runs the real Elasticsearch client against a stub HTTP server that answers ``_bulk``
+and can reject chosen items, so batching by size and by interval, retries of partial
+failures, the overflow policies and the flush on close are checked end to end.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+# The real client is needed here; other telemetry tests may have stubbed it when missing.
+for _mod in ("elasticsearch", "elasticsearch.exceptions"):
+    if isinstance(sys.modules.get(_mod), MagicMock):
+        sys.modules.pop(_mod)
+elasticsearch = pytest.importorskip("elasticsearch")
+
+# Drop the conftest pre-mock of the telemetry package so the real module loads.
+for _mod in (
+    "bisheng.common.services.telemetry.telemetry_buffer",
+    "bisheng.common.services.telemetry.telemetry_service",
+    "bisheng.common.services.telemetry",
+    "bisheng.common.services",
+):
+    sys.modules.pop(_mod, None)
+
+from bisheng.common.services.telemetry.telemetry_buffer import TelemetryBuffer  # noqa: E402
+from bisheng.core.config.settings import TelemetryBufferConf  # noqa: E402
+
+
+class _BulkServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _BulkHandler)
+        self.requests = []
+        # per request: {event_id: status} for items to reject, consumed in order
+        self.rejections = []
+
+
+class _BulkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        actions = [(lines[i]["index"], lines[i + 1]) for i in range(0, len(lines), 2)]
+        self.server.requests.append(actions)
+        rejections = self.server.rejections.pop(0) if self.server.rejections else {}
+        items = []
+        for action, document in actions:
+            status = rejections.get(document["event_id"], 201)
+            result = {"_index": action["_index"], "_id": action.get("_id"), "status": status}
+            if status >= 300:
+                result["error"] = {"type": "rejected", "reason": "stub"}
+            items.append({"index": result})
+        payload = json.dumps({"took": 1, "errors": any(item["index"]["status"] >= 300 for item in items),
+                              "items": items}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_PUT = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = _BulkServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _buffer(server, **conf) -> TelemetryBuffer:
+    conf = TelemetryBufferConf(**{"flush_interval": 30, "retry_backoff": 0.01, **conf})
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    return TelemetryBuffer(lambda: elasticsearch.Elasticsearch(url), conf)
+
+
+def _event(i: int) -> dict:
+    return {"event_id": f"e{i}", "event_type": "test", "event_data": {"n": i}}
+
+
+def _wait_for(predicate, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _received_ids(server) -> list[str]:
+    return [action["_id"] for request in server.requests for action, _ in request]
+
+
+def test_full_batches_are_sent_and_close_flushes_the_rest(server):
+    buffer = _buffer(server, batch_size=50)
+    for i in range(120):
+        assert buffer.add("events", _event(i))
+
+    _wait_for(lambda: buffer.stats.flushed == 100)
+    assert len(buffer) == 20
+    buffer.close()
+
+    # 120 events in 3 bulk requests instead of 120 index requests
+    assert [len(request) for request in server.requests] == [50, 50, 20]
+    assert _received_ids(server) == [f"e{i}" for i in range(120)]
+    assert buffer.stats.snapshot() == {
+        "queued": 120, "flushed": 120, "dropped": 0, "failed": 0, "retried": 0, "bulk_requests": 3,
+    }
+    assert buffer.add("events", _event(999)) is False
+
+
+def test_partial_batch_is_sent_after_interval(server):
+    buffer = _buffer(server, batch_size=1000, flush_interval=0.1)
+    for i in range(5):
+        buffer.add("events", _event(i))
+
+    _wait_for(lambda: buffer.stats.flushed == 5)
+    assert len(server.requests) == 1
+    buffer.close()
+
+
+def test_retries_only_retryable_items(server):
+    server.rejections = [{"e1": 429, "e2": 400, "e3": 503}, {"e3": 503}]
+    buffer = _buffer(server, batch_size=10)
+    for i in range(5):
+        buffer.add("events", _event(i))
+    buffer.close()
+
+    assert _received_ids(server) == ["e0", "e1", "e2", "e3", "e4", "e1", "e3", "e3"]
+    stats = buffer.stats.snapshot()
+    assert (stats["flushed"], stats["failed"], stats["retried"]) == (4, 1, 3)
+
+
+def test_failed_request_is_retried_then_counted(server):
+    buffer = _buffer(server, batch_size=10, max_retries=2)
+    buffer._client_factory = lambda: elasticsearch.Elasticsearch("http://127.0.0.1:9", max_retries=0)
+    buffer.add("events", _event(0))
+    buffer.close()
+
+    assert buffer.stats.snapshot()["bulk_requests"] == 3
+    assert buffer.stats.snapshot()["failed"] == 1
+
+
+@pytest.mark.parametrize("overflow, kept", [("drop_oldest", ["e2", "e3", "e4"]), ("drop_newest", ["e0", "e1", "e2"])])
+def test_overflow_policy(server, overflow, kept):
+    buffer = _buffer(server, batch_size=100, max_queue_size=3, overflow=overflow)
+    results = [buffer.add("events", _event(i)) for i in range(5)]
+    buffer.close()
+
+    assert results == ([True] * 5 if overflow == "drop_oldest" else [True] * 3 + [False] * 2)
+    assert _received_ids(server) == kept
+    assert buffer.stats.dropped == 2
+
+
+def test_close_is_registered_at_exit_once(server, monkeypatch):
+    hooks = []
+    monkeypatch.setattr("bisheng.utils.background_batcher.atexit.register", hooks.append)
+    buffer = _buffer(server, batch_size=100)
+    buffer.add("events", _event(0))
+    # a forked child starts its own worker, which must not add a second hook
+    buffer._after_fork()
+    buffer.add("events", _event(1))
+    buffer.close()
+
+    assert hooks == [buffer.close]
@@ -259,3 +259,23 @@ def test_client(monkeypatch):
     from starlette.testclient import TestClient
     with TestClient(app) as client:
         yield client
+
+
+# ---------------------------------------------------------------------------
+# Opt-in benchmarks
+# ---------------------------------------------------------------------------
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--run-benchmark', action='store_true', default=False,
+        help='run the tests marked benchmark (wall-clock timings, skipped by default)',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmark'):
+        return
+    skip = pytest.mark.skip(reason='benchmark: run with --run-benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
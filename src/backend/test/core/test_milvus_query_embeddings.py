@@ -0,0 +1,61 @@
+"""A search can embed its query with embeddings passed for that call only, so
+stores sharing an embedding model reuse one query vector without swapping the
+embedding function of a shared store."""
+
+from __future__ import annotations
+
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from bisheng.core.vectorstore.milvus import Milvus
+
+
+class _FixedEmbeddings(Embeddings):
+    def __init__(self, vector: list[float]):
+        self.vector = vector
+        self.queries = 0
+
+    def embed_documents(self, texts):
+        return [self.vector for _ in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return self.vector
+
+
+def _make_store(monkeypatch, embeddings: Embeddings) -> tuple[Milvus, list]:
+    searched = []
+
+    def collection_search(embedding_or_text, k=4, param=None, expr=None, timeout=None, **kwargs):
+        searched.append((embedding_or_text, kwargs))
+        return []
+
+    async def acollection_search(*args, **kwargs):
+        return collection_search(*args, **kwargs)
+
+    store = object.__new__(Milvus)
+    store.embedding_func = embeddings
+    store.builtin_func = None
+    store._bisheng_orm_ready = True
+    monkeypatch.setattr(Milvus, "col", property(lambda self: object()))
+    monkeypatch.setattr(Milvus, "_is_multi_vector", property(lambda self: False), raising=False)
+    monkeypatch.setattr(store, "_collection_search", collection_search)
+    monkeypatch.setattr(store, "_acollection_search", acollection_search)
+    monkeypatch.setattr(store, "_parse_documents_from_search_results", lambda results: results)
+    return store, searched
+
+
+def test_query_embeddings_replace_the_store_embeddings_for_one_search(monkeypatch):
+    own, shared = _FixedEmbeddings([1.0, 0.0]), _FixedEmbeddings([0.0, 1.0])
+    store, searched = _make_store(monkeypatch, own)
+
+    store.similarity_search_with_score("q", k=3, query_embeddings=shared)
+    asyncio.run(store.asimilarity_search_with_score("q", k=3, query_embeddings=shared))
+    store.similarity_search_with_score("q", k=3)
+
+    assert [vector for vector, _ in searched] == [[0.0, 1.0], [0.0, 1.0], [1.0, 0.0]]
+    # the argument is consumed here, not forwarded to the Milvus search
+    assert all("query_embeddings" not in kwargs for _, kwargs in searched)
+    assert store.embedding_func is own
+    assert (own.queries, shared.queries) == (1, 2)
@@ -0,0 +1,145 @@
+"""Rank fusion behind ``RRFRerank``: chunk-identity dedup, weighted RRF with array
+operations, score-normalized fusion and deterministic tie order.
+
+The opt-in benchmark fuses 10 synthetic result lists of 200 chunks each,
+compared with the text-keyed loop ``RRFRerank`` used before.
+"""
+
+import random
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from bisheng.core.ai.rerank.rank_fusion import chunk_key, fuse
+from bisheng.core.ai.rerank.rrf_rerank import RRFRerank
+
+
+def _chunk(document_id, chunk_index, text=None, knowledge_id=1, **metadata):
+    return Document(
+        page_content=text or f"doc {document_id} chunk {chunk_index}",
+        metadata={"knowledge_id": knowledge_id, "document_id": document_id, "chunk_index": chunk_index, **metadata},
+    )
+
+
+def _legacy_rrf(documents, weights, c=60):
+    """The text-keyed fusion RRFRerank used before (scores only)."""
+    scores = {doc.page_content: 0.0 for doc_list in documents for doc in doc_list}
+    for doc_list, weight in zip(documents, weights):
+        for rank, doc in enumerate(doc_list, start=1):
+            scores[doc.page_content] += weight * (1 / (rank + c))
+    page_content_to_doc_map = {doc.page_content: doc for doc_list in documents for doc in doc_list}
+    return [page_content_to_doc_map[text] for text in sorted(scores, key=lambda t: scores[t], reverse=True)]
+
+
+def test_candidates_are_keyed_on_chunk_identity():
+    vector = [_chunk(1, 0, "same text"), _chunk(2, 0, "same text"), _chunk(3, 4)]
+    keyword = [_chunk(3, 4, "doc 3 chunk 4, highlighted"), _chunk(1, 0, "same text")]
+
+    fused = fuse([vector, keyword], [0.5, 0.5])
+
+    # equal text from two documents stays apart; one chunk from two retrievers merges
+    assert [chunk_key(doc) for doc, _ in fused] == [(1, 1, 0), (1, 3, 4), (1, 2, 0)]
+    # the merged chunk is returned as first seen, not as the keyword retriever's copy
+    assert fused[1][0] is vector[2]
+    # the same chunk id in another knowledge base is another chunk
+    assert len(fuse([[_chunk(1, 0)], [_chunk(1, 0, knowledge_id=2)]], [1, 1])) == 2
+    # without RAG metadata: the document id, then the text
+    assert chunk_key(Document(id="abc", page_content="x")) == ("id", "abc")
+    assert chunk_key(Document(page_content="x")) == "x"
+    assert chunk_key(Document(page_content="x", metadata={"file_id": 7, "chunk_index": 0})) == (None, 7, 0)
+
+
+def test_weighted_rrf_scores():
+    a, b, c = _chunk(1, 0), _chunk(2, 0), _chunk(3, 0)
+
+    fused = dict((chunk_key(doc), score) for doc, score in fuse([[a, b], [b, c, b]], [0.7, 0.3], c=10))
+
+    assert fused[chunk_key(a)] == pytest.approx(0.7 / 11)
+    # listed twice in the second list: both occurrences count
+    assert fused[chunk_key(b)] == pytest.approx(0.7 / 12 + 0.3 / 11 + 0.3 / 13)
+    assert fused[chunk_key(c)] == pytest.approx(0.3 / 12)
+
+
+def test_ties_keep_first_appearance_order():
+    lists = [[_chunk(i, 0) for i in range(5)], [_chunk(i, 0) for i in range(5, 10)]]
+
+    for _ in range(3):
+        order = [doc.metadata["document_id"] for doc, _ in fuse(lists, [0.5, 0.5])]
+        assert order == [0, 5, 1, 6, 2, 7, 3, 8, 4, 9]
+
+
+def test_score_normalized_fusion():
+    vector = [_chunk(1, 0, relevance_score=0.9), _chunk(2, 0, relevance_score=0.5), _chunk(3, 0, relevance_score=0.1)]
+    keyword = [_chunk(3, 0, relevance_score=42.0), _chunk(1, 0, relevance_score=2.0)]
+    unscored = [_chunk(2, 0), _chunk(4, 0)]
+
+    scores = {doc.metadata["document_id"]: score
+              for doc, score in fuse([vector, keyword, unscored], [1, 1, 1], method="score")}
+
+    assert scores == pytest.approx({1: 1.0 + 0.0, 2: 0.5 + 1.0, 3: 0.0 + 1.0, 4: 0.5})
+    with pytest.raises(ValueError):
+        fuse([vector], [1], method="borda")
+
+
+def test_rrf_rerank_compress_documents():
+    rerank = RRFRerank(retrievers=[None, None], weights=[1.0, 0.0], remove_zero_score=True)
+    docs = rerank.compress_documents(documents=[[_chunk(1, 0)], [_chunk(2, 0), _chunk(1, 0)]], query="q")
+
+    assert [doc.metadata["document_id"] for doc in docs] == [1]
+    with pytest.raises(ValueError):
+        rerank.compress_documents(documents=[[_chunk(1, 0)]], query="q")
+
+    by_score = RRFRerank(retrievers=[None, None], fusion="score")
+    docs = by_score.compress_documents(
+        documents=[[_chunk(1, 0, relevance_score=0.2), _chunk(2, 0, relevance_score=0.8)], [_chunk(1, 0)]],
+        query="q",
+    )
+    assert [doc.metadata["document_id"] for doc in docs] == [1, 2]
+
+
+def _10x200_result_lists():
+    """10 weighted lists of 200 chunks drawn from 1000; returns a factory of fresh lists, and the weights"""
+    rng = random.Random(0)
+    filler = "lorem ipsum dolor sit amet " * 60
+    pool = [(i, f"chunk {i} {filler}") for i in range(1000)]
+    picks = [rng.sample(pool, 200) for _ in range(10)]
+    weights = [rng.random() for _ in range(10)]
+
+    def result_lists():
+        # fresh documents per round, as a retrieval returns them (no cached string hashes)
+        return [
+            [Document(page_content="".join(text), metadata={"knowledge_id": i % 3, "document_id": i // 8,
+                                                             "chunk_index": i % 8}) for i, text in picked]
+            for picked in picks
+        ]
+
+    return result_lists, weights
+
+
+def test_10x200_lists_rank_like_the_text_keyed_loop():
+    result_lists, weights = _10x200_result_lists()
+
+    legacy = _legacy_rrf(result_lists(), weights)
+    fused = fuse(result_lists(), weights)
+
+    # every chunk has distinct text here, so both fusions agree on the candidates and their scores
+    assert len(fused) == len(legacy)
+    assert [chunk_key(doc) for doc, _ in fused][:20] == [chunk_key(doc) for doc in legacy][:20]
+
+
+@pytest.mark.benchmark
+def test_benchmark_10x200_result_lists(record_property):
+    result_lists, weights = _10x200_result_lists()
+
+    def timed(fn, rounds=30):
+        total = 0.0
+        for _ in range(rounds):
+            lists = result_lists()
+            start = time.perf_counter()
+            fn(lists)
+            total += time.perf_counter() - start
+        return total / rounds
+
+    record_property("text_keyed_loop_ms", round(timed(lambda lists: _legacy_rrf(lists, weights)) * 1e3, 2))
+    record_property("array_fusion_ms", round(timed(lambda lists: fuse(lists, weights)) * 1e3, 2))
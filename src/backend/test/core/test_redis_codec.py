@@ -0,0 +1,245 @@
+"""RedisCodec: values are encoded by their key's namespace, plain pickle stays
+byte-compatible with what RedisClient always wrote, keys written with any codec
+decode after a namespace switches, values orjson/msgpack would change on the way
+back go through pickle, and the cluster default node is resolved once.
+The benchmark reports encode/decode throughput and stored size per codec."""
+
+import pickle
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+
+from bisheng.core.cache.redis_codec import RedisCodec
+from bisheng.core.config.settings import RedisCodecConf, RedisCodecRule
+
+fakeredis = pytest.importorskip('fakeredis')
+
+# The real client is needed here; the conftest may have pre-mocked it.
+for _mod in ('bisheng.core.cache.redis_conn',):
+    if isinstance(sys.modules.get(_mod), MagicMock):
+        sys.modules.pop(_mod)
+from bisheng.core.cache.redis_conn import RedisClient  # noqa: E402
+
+_CHAT_HISTORY = [
+    {'role': 'user' if i % 2 else 'assistant', 'content': f'第{i}轮对话 ' + 'message content ' * 20,
+     'message_id': 10_000 + i, 'files': [], 'liked': i % 3 == 0}
+    for i in range(40)
+]
+_PERMISSION_LIST = [f'{i:08d}-workflow-{i * 7919 % 100003}' for i in range(2000)]
+_WORKFLOW_EVENTS = [
+    {'event': 'node_run', 'node_id': f'llm_{i % 9}', 'status': 'success', 'elapsed': i * 0.013,
+     'output': {'text': 'partial answer ' * 8, 'tokens': i}}
+    for i in range(200)
+]
+
+
+def _codec(**namespaces) -> RedisCodec:
+    return RedisCodec(RedisCodecConf(namespaces={
+        prefix.replace('_', ':') + ':': RedisCodecRule(**rule) for prefix, rule in namespaces.items()
+    }))
+
+
+@pytest.fixture
+def client():
+    def make(codec: RedisCodec) -> RedisClient:
+        redis_client = RedisClient('redis://127.0.0.1:6379/0', codec=codec)
+        server = fakeredis.FakeServer()
+        redis_client.connection = fakeredis.FakeStrictRedis(server=server)
+        redis_client.async_connection = fakeredis.FakeAsyncRedis(server=server)
+        redis_client.async_blocking_connection = redis_client.async_connection
+        return redis_client
+
+    return make
+
+
+def test_default_is_plain_pickle():
+    codec = RedisCodec()
+    value = {'a': [1, 2, 3], 'b': ('tuple', {1, 2})}
+
+    assert codec.encode('any:key', value) == pickle.dumps(value)
+    assert codec.decode(pickle.dumps(value)) == value
+
+
+def test_namespace_codec_and_compression(client):
+    redis_client = client(_codec(perm_lst={'codec': 'orjson'},
+                                 chat={'codec': 'orjson', 'compress_threshold': 1024}))
+    redis_client.set('perm:lst:1:2', _PERMISSION_LIST[:3])
+    redis_client.set('chat:1', _CHAT_HISTORY)
+
+    stored = redis_client.connection.get('perm:lst:1:2')
+    assert stored[:2] == b'\xbc\x02'
+    # readable without Python: a two byte header, then plain JSON
+    assert orjson.loads(stored[2:]) == _PERMISSION_LIST[:3]
+    assert redis_client.connection.get('chat:1')[:2] == b'\xbc\x82'
+    assert len(redis_client.connection.get('chat:1')) < len(orjson.dumps(_CHAT_HISTORY)) / 4
+    assert redis_client.get('perm:lst:1:2') == _PERMISSION_LIST[:3]
+    assert redis_client.get('chat:1') == _CHAT_HISTORY
+
+
+@pytest.mark.asyncio
+async def test_legacy_and_switched_values_stay_readable(client):
+    redis_client = client(_codec(chat={'codec': 'orjson'}))
+    # written before the namespace moved to orjson
+    redis_client.connection.set('chat:old', pickle.dumps({'legacy': True}))
+
+    await redis_client.aset('chat:new', {'legacy': False})
+    redis_client.mset({'chat:a': [1], 'other:b': {2}})
+
+    assert await redis_client.aget('chat:old') == {'legacy': True}
+    assert await redis_client.aget('chat:new') == {'legacy': False}
+    assert redis_client.mget(['chat:a', 'other:b', 'chat:old']) == [[1], {2}, {'legacy': True}]
+    # a reader configured with pickle only still decodes every layout
+    reader = client(RedisCodec())
+    reader.connection = redis_client.connection
+    assert reader.get('chat:new') == {'legacy': False}
+
+
+@dataclass
+class _Point:
+    x: int
+    y: int
+
+
+class _Color(str, Enum):
+    RED = 'red'
+
+
+_NOT_JSON_LIKE = [
+    ('tuple', (1, 2)),
+    ('nested tuple', {'pair': [('a', 1)]}),
+    ('int keys', {1: 'a', 2: 'b'}),
+    ('nested int keys', [{'ok': {3: None}}]),
+    ('datetime', {'at': datetime(2026, 1, 2, 3, 4, 5)}),
+    ('date', [date(2026, 1, 2)]),
+    ('dataclass', _Point(1, 2)),
+    ('uuid', uuid.UUID(int=7)),
+    ('str enum', _Color.RED),
+    ('bytes', {'raw': b'\x00'}),
+    ('nan', [float('nan')]),
+    ('big int', 2 ** 70),
+]
+
+
+def _same(a, b):
+    if isinstance(a, float) and a != a:
+        return isinstance(b, float) and b != b
+    if isinstance(a, dict):
+        return type(a) is type(b) and list(a) == list(b) and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+
+@pytest.mark.parametrize('codec_name', ['orjson', 'msgpack'])
+@pytest.mark.parametrize('label,value', _NOT_JSON_LIKE, ids=[label for label, _ in _NOT_JSON_LIKE])
+def test_values_come_back_with_their_types(codec_name, label, value):
+    if codec_name == 'msgpack':
+        pytest.importorskip('msgpack')
+    codec = _codec(ns={'codec': codec_name})
+
+    encoded = codec.encode('ns:1', value)
+
+    assert _same(codec.decode(encoded), value)
+    if codec_name == 'msgpack' and label == 'bytes':
+        # msgpack has a binary type; nothing is lost
+        assert encoded[:2] == b'\xbc\x03'
+    else:
+        assert encoded == pickle.dumps(value)
+
+
+def test_json_like_values_keep_the_namespace_codec():
+    codec = _codec(ns={'codec': 'orjson'})
+    value = {'a': [1, 2.5, None, True, {'b': 'c'}], 'd': []}
+
+    assert codec.encode('ns:1', value) == b'\xbc\x02' + orjson.dumps(value)
+
+
+def test_values_the_codec_cannot_represent_fall_back_to_pickle():
+    codec = _codec(chat={'codec': 'orjson', 'compress_threshold': 64})
+    value = {'ids': {1, 2, 3}, 'pad': 'x' * 100}
+
+    encoded = codec.encode('chat:1', value)
+
+    assert encoded[:2] == b'\xbc\x81'
+    assert codec.decode(encoded) == value
+    with pytest.raises(ValueError):
+        codec.decode(b'\xbc\x7f{}')
+
+
+@pytest.mark.asyncio
+async def test_list_values_use_the_codec(client):
+    redis_client = client(_codec(queue={'codec': 'orjson'}))
+    await redis_client.arpush('queue:q', {'task': 1})
+    await redis_client.arpush('queue:q', {'task': 2})
+
+    assert redis_client.connection.lindex('queue:q', 0) == b'\xbc\x02{"task":1}'
+    assert await redis_client.alrange('queue:q') == [{'task': 1}, {'task': 2}]
+    assert await redis_client.alrem('queue:q', {'task': 1}) == 1
+    assert await redis_client.ablpop('queue:q', timeout=1) == {'task': 2}
+
+
+def test_msgpack_codec():
+    pytest.importorskip('msgpack')
+    codec = _codec(events={'codec': 'msgpack'})
+
+    assert codec.decode(codec.encode('events:1', _WORKFLOW_EVENTS)) == _WORKFLOW_EVENTS
+
+
+def test_cluster_default_node_is_resolved_once():
+    redis_client = RedisClient('redis://127.0.0.1:6379/0')
+    cluster = MagicMock()
+    cluster.get_default_node.side_effect = [None, 'node-1']
+    redis_client.connection = cluster
+    redis_client._cluster = True
+
+    for i in range(100):
+        redis_client.cluster_nodes(f'key:{i}')
+
+    cluster.get_node_from_key.assert_called_once_with('key:0')
+    assert cluster.get_default_node.call_count == 2
+
+
+def _codec_sizes(client, record_property=None) -> dict:
+    rules = {'pickle': {'codec': 'pickle'}, 'orjson': {'codec': 'orjson'},
+             'orjson+zstd': {'codec': 'orjson', 'compress_threshold': 1024}}
+    payloads = {'chat_history': _CHAT_HISTORY, 'permission_list': _PERMISSION_LIST,
+                'workflow_events': _WORKFLOW_EVENTS}
+    sizes = {}
+    for name, rule in rules.items():
+        redis_client = client(RedisCodec(RedisCodecConf(default=RedisCodecRule(**rule))))
+        for payload_name, payload in payloads.items():
+            if record_property is not None:
+                rounds = 200
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    encoded = redis_client.encode('bench', payload)
+                encode = time.perf_counter() - start
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    redis_client.decode(encoded)
+                decode = time.perf_counter() - start
+                record_property(f'{name}_{payload_name}_encode_us', round(encode / rounds * 1e6, 1))
+                record_property(f'{name}_{payload_name}_decode_us', round(decode / rounds * 1e6, 1))
+            redis_client.set(f'bench:{payload_name}', payload, expiration=None)
+            sizes[name, payload_name] = redis_client.connection.strlen(f'bench:{payload_name}')
+    return sizes
+
+
+def test_compressed_values_are_smaller_than_pickle(client):
+    sizes = _codec_sizes(client)
+
+    for payload_name in ('chat_history', 'permission_list', 'workflow_events'):
+        assert sizes['orjson+zstd', payload_name] < sizes['pickle', payload_name]
+
+
+@pytest.mark.benchmark
+def test_benchmark_codecs(client, record_property):
+    for (name, payload_name), stored in _codec_sizes(client, record_property).items():
+        record_property(f'{name}_{payload_name}_stored_bytes', stored)
@@ -0,0 +1,213 @@
+"""Read replica routing in ``DatabaseConnectionManager``.
+
+Primary and replica are two SQLite files holding a different marker row, so a
+query tells which engine served it. Covers: read-only sessions on the replica,
+writes and read-your-writes on the primary, ``use_primary`` / ``replica_read``
+scopes, fallback when a replica cannot connect, the read-only write guard (which
+lets read-only raw SQL such as CTEs and EXPLAIN through) and per-engine
+``db_query_agg`` metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
+
+from bisheng.common.services import metric_log as ml
+from bisheng.core.config.settings import DatabaseReplicaConf, MetricLogConf
+from bisheng.core.database import connection
+from bisheng.core.database.connection import (
+    DatabaseConnectionManager,
+    read_replica,
+    replica_read,
+    use_primary,
+)
+
+
+def _make_db(path, marker: str) -> str:
+    url = f"sqlite:///{path}"
+    mgr = DatabaseConnectionManager(url)
+    with mgr.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE marker (name TEXT)"))
+        conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": marker})
+    mgr.close_sync()
+    return url
+
+
+@pytest.fixture
+def urls(tmp_path):
+    return _make_db(tmp_path / "primary.db", "primary"), _make_db(tmp_path / "replica.db", "replica")
+
+
+@pytest.fixture
+def manager(urls):
+    primary, replica = urls
+    mgr = DatabaseConnectionManager(primary, replica_urls=[replica], read_your_writes_s=60)
+    yield mgr
+    mgr.close_sync()
+
+
+def _served_by(session) -> str:
+    return session.exec(text("SELECT name FROM marker")).first()[0]
+
+
+def test_read_only_sessions_go_to_the_replica(manager):
+    with manager.create_session(read_only=True) as session:
+        assert _served_by(session) == "replica"
+    with manager.create_session() as session:
+        assert _served_by(session) == "primary"
+    with read_replica(), manager.create_session() as session:
+        assert _served_by(session) == "replica"
+    # an explicit read_only=False wins over the context
+    with read_replica(), manager.create_session(read_only=False) as session:
+        assert _served_by(session) == "primary"
+
+
+def test_reads_after_a_write_stay_on_the_primary(manager):
+    def write_then_read():
+        with manager.create_session() as session:
+            session.exec(text("INSERT INTO marker VALUES ('written')"))
+            session.commit()
+        with manager.create_session(read_only=True) as session:
+            return _served_by(session)
+
+    assert contextvars.copy_context().run(write_then_read) == "primary"
+
+    # a reading-only primary session does not pin, and other contexts are unaffected
+    with manager.create_session() as session:
+        _served_by(session)
+    with manager.create_session(read_only=True) as session:
+        assert _served_by(session) == "replica"
+
+
+def test_read_your_writes_window_expires(urls):
+    primary, replica = urls
+    mgr = DatabaseConnectionManager(primary, replica_urls=[replica], read_your_writes_s=0)
+
+    def write_then_read():
+        with mgr.create_session() as session:
+            session.exec(text("INSERT INTO marker VALUES ('written')"))
+            session.commit()
+        with mgr.create_session(read_only=True) as session:
+            return _served_by(session)
+
+    assert contextvars.copy_context().run(write_then_read) == "replica"
+    mgr.close_sync()
+
+
+def test_use_primary_and_replica_read_scopes(manager):
+    @replica_read
+    def list_markers():
+        with manager.create_session() as session:
+            return _served_by(session)
+
+    assert list_markers() == "replica"
+    with use_primary():
+        assert list_markers() == "primary"
+
+
+def test_unreachable_replica_falls_back_to_the_primary(urls, tmp_path):
+    primary, _ = urls
+    broken = f"sqlite:///{tmp_path}/missing/dir/replica.db"
+    mgr = DatabaseConnectionManager(primary, replica_urls=[broken], replica_retry_s=60)
+
+    with mgr.create_session(read_only=True) as session:
+        assert _served_by(session) == "primary"
+    replica = mgr._replicas[0]
+    assert replica.down_until > 0
+
+    # skipped without another connection attempt while it is marked down
+    connects = []
+    original = replica.engine.connect
+    replica.engine.connect = lambda: connects.append(1) or original()
+    with mgr.create_session(read_only=True) as session:
+        assert _served_by(session) == "primary"
+    assert connects == []
+    mgr.close_sync()
+
+
+def test_read_only_session_refuses_writes(manager):
+    with pytest.raises(InvalidRequestError):
+        with manager.create_session(read_only=True) as session:
+            session.exec(text("INSERT INTO marker VALUES ('nope')"))
+    with manager.create_session(read_only=True) as session:
+        assert session.exec(text("SELECT count(*) FROM marker")).one()[0] == 1
+        # other read-only forms of raw SQL are not writes
+        assert session.exec(text("WITH m AS (SELECT name FROM marker) SELECT name FROM m")).one()[0] == "replica"
+        assert session.exec(text("explain SELECT name FROM marker")).all()
+    for sql in ("  (SELECT 1) UNION (SELECT 2)", "SHOW TABLES", "\nDESC marker"):
+        assert not connection._is_write_statement(SimpleNamespace(is_select=False, statement=text(sql)))
+    assert connection._is_write_statement(SimpleNamespace(is_select=False, statement=text("update marker set name = ''")))
+
+
+async def test_async_sessions_route_the_same_way(tmp_path):
+    primary = _make_db(tmp_path / "primary.db", "primary").replace("sqlite://", "sqlite+aiosqlite://")
+    replica = _make_db(tmp_path / "replica.db", "replica").replace("sqlite://", "sqlite+aiosqlite://")
+    mgr = DatabaseConnectionManager(primary, replica_urls=[replica], read_your_writes_s=60)
+
+    async def served_by(read_only=None):
+        async with mgr.async_session(read_only=read_only) as session:
+            return (await session.exec(text("SELECT name FROM marker"))).first()[0]
+
+    @replica_read
+    async def list_markers():
+        return await served_by()
+
+    assert await served_by() == "primary"
+    assert await list_markers() == "replica"
+
+    async def write_then_read():
+        async with mgr.async_session() as session:
+            await session.exec(text("INSERT INTO marker VALUES ('written')"))
+            await session.commit()
+        return await list_markers()
+
+    assert await asyncio.create_task(write_then_read()) == "primary"
+    assert await list_markers() == "replica"
+    await mgr.close()
+
+
+@contextmanager
+def capture_metric_logs():
+    messages: list[str] = []
+    sink_id = logger.add(lambda m: messages.append(str(m).rstrip("\n")), level="INFO", format="{message}")
+    try:
+        yield messages
+    finally:
+        logger.remove(sink_id)
+
+
+def test_latency_histograms_are_per_engine(manager, monkeypatch):
+    from bisheng.common.services import config_service
+
+    monkeypatch.setattr(config_service.settings, "metric_log", MetricLogConf(db_agg_window_s=0), raising=False)
+    ml.db_histograms.clear()
+
+    with capture_metric_logs() as messages:
+        with manager.create_session(read_only=True) as session:
+            _served_by(session)
+        with manager.create_session() as session:
+            _served_by(session)
+
+    aggregates = [m for m in messages if m.startswith("BS_METRIC domain=db_query_agg ")]
+    assert any("engine=sync_replica_0" in m for m in aggregates)
+    assert any("engine=sync " in m for m in aggregates)
+    assert set(ml.db_histograms) == {"sync", "sync_replica_0"}
+
+
+def test_replica_conf_feeds_the_connection_manager():
+    conf = DatabaseReplicaConf(urls=["sqlite:///replica.db"], read_your_writes_s=2, retry_interval_s=10)
+
+    mgr = DatabaseConnectionManager("sqlite:///primary.db", **conf.as_connection_kwargs())
+
+    assert [replica.url for replica in mgr._replicas] == ["sqlite:///replica.db"]
+    assert (mgr.read_your_writes_s, mgr.replica_retry_s) == (2, 10)
+    assert connection._write_tracking_installed
+    assert DatabaseReplicaConf().as_connection_kwargs()["replica_urls"] == []
@@ -0,0 +1,390 @@
+"""Department tree index: subtree / ancestor lookups without ``path LIKE`` scans.
+
+``DepartmentDao`` answers subtree, ancestor and mount lookups from a
+process-local ``DepartmentTreeIndex`` stamped with a version token in Redis
+(fakeredis here). The tests run against a real SQLite ``department`` table and
+check every answer against the LIKE-scan result, that committed subtree moves
+patch the snapshot in place, that other tree writes invalidate it, and that
+the DAO falls back to SQL when the index cannot be trusted.
+
+The opt-in benchmark builds a 20k-department tree and reports query and move
+cost.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from bisheng.database.models import department as department_module
+from bisheng.database.models import department_tree
+from bisheng.database.models.department import Department, DepartmentDao, subtree_path_update
+from bisheng.database.models.department_tree import DepartmentTreeIndex
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture()
+def redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    client = SimpleNamespace(
+        connection=fakeredis.FakeRedis(server=server),
+        async_connection=fakeredis.FakeAsyncRedis(server=server),
+    )
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(department_tree, "_redis", get_client)
+    monkeypatch.setattr(department_tree, "_redis_sync", lambda: client)
+    department_tree.invalidate()
+    yield client
+    department_tree.invalidate()
+
+
+@pytest.fixture()
+async def db(monkeypatch, redis):
+    """SQLite department table behind the DAO session factory; counts statements."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Department.__table__.create)
+
+    state = SimpleNamespace(engine=engine, statements=0)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*args):
+        state.statements += 1
+
+    @asynccontextmanager
+    async def session_factory(read_only=None):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(department_module, "get_async_db_session", session_factory)
+    state.session = session_factory
+    yield state
+    await engine.dispose()
+
+
+def _tree(fanouts: list[int], *, seed: int = 7) -> list[dict]:
+    """Rows of a tree with ``fanouts[i]`` children per node at depth ``i``.
+
+    Every 7th department is archived and every 50th non-root node is a mount point.
+    """
+    rng = random.Random(seed)
+    rows = [dict(id=1, parent_id=None, path="/1/")]
+    level = [rows[0]]
+    for fanout in fanouts:
+        next_level = []
+        for parent in level:
+            for _ in range(fanout):
+                dept_id = len(rows) + 1
+                row = dict(id=dept_id, parent_id=parent["id"], path=f"{parent['path']}{dept_id}/")
+                rows.append(row)
+                next_level.append(row)
+        level = next_level
+    for row in rows:
+        row.update(
+            dept_id=f"BS@{row['id']}",
+            name=f"dept {row['id']}",
+            tenant_id=1 + row["id"] % 2,
+            status="archived" if row["id"] % 7 == 0 else "active",
+            is_tenant_root=1 if row["id"] > 1 and row["id"] % 50 == 0 and rng.random() < 0.5 else 0,
+        )
+    return rows
+
+
+async def _seed(db, rows: list[dict]) -> None:
+    async with db.session() as session:
+        for start in range(0, len(rows), 500):
+            await session.exec(insert(Department).values(rows[start:start + 500]))
+        await session.commit()
+
+
+async def _like_subtree(db, path: str) -> list[int]:
+    async with db.session() as session:
+        result = await session.exec(
+            select(Department.id).where(Department.path.like(f"{path}%"), Department.status == "active")
+        )
+        return sorted(result.all())
+
+
+async def _sql_answers(monkeypatch, coro_fn):
+    """Run ``coro_fn`` with the index disabled, i.e. on the SQL fallback."""
+    with monkeypatch.context() as m:
+        m.setattr(DepartmentDao, "aget_tree_index", classmethod(lambda cls: _none()))
+        return await coro_fn()
+
+
+async def _none():
+    return None
+
+
+def test_index_from_rows():
+    rows = [
+        (1, "/1/", "active", 1, 0),
+        (2, "/1/2/", "active", 1, 1),
+        (3, "/1/2/3/", "archived", 1, 0),
+        (4, "/1/2/3/4/", "active", 2, 0),
+        (5, "/1/5/", "active", 1, 0),
+        (6, "", "active", 1, 0),
+    ]
+    index = DepartmentTreeIndex(rows)
+
+    assert index.consistent
+    assert sorted(index.subtree_ids(2)) == [2, 3, 4]
+    assert sorted(index.subtree_ids(2, active_only=True)) == [2, 4]
+    assert index.subtree_ids(2, tenant_ids=frozenset({2})) == [4]
+    assert index.ancestor_ids(4) == (1, 2, 3, 4)
+    assert index.in_subtree(4, 2) and index.in_subtree(2, 2) and not index.in_subtree(5, 2)
+    assert index.nearest_mount(4) == 2 and index.nearest_mount(5) is None
+    assert index.descendant_mount(1) == 2 and index.descendant_mount(3) is None
+    assert index.node_for_path("/1/2/") == 2 and index.node_for_path("/1/") == 1
+    assert index.node_for_path("/2/") is None and index.node_for_path("/1/2") is None
+
+    assert index.move_subtree("/1/2/", "/1/5/2/")
+    rebuilt = DepartmentTreeIndex([(d, index.paths[d], "active", 1, 0) for d in index.paths])
+    assert index.ancestors == rebuilt.ancestors
+    assert {p: sorted(k) for p, k in index.children.items() if k} == {
+        p: sorted(k) for p, k in rebuilt.children.items()
+    }
+    # into its own subtree, or under an unknown parent: rejected untouched
+    assert not index.move_subtree("/1/5/", "/1/5/2/3/5/")
+    assert not index.move_subtree("/1/5/2/", "/1/99/2/")
+    assert index.ancestor_ids(4) == (1, 5, 2, 3, 4)
+
+    # a path that does not chain onto its parent's makes the index untrustworthy
+    assert not DepartmentTreeIndex(rows + [(7, "/1/99/7/", "active", 1, 0)]).consistent
+    assert not DepartmentTreeIndex(rows + [(8, "/1/x/8/", "active", 1, 0)]).consistent
+
+
+async def test_dao_answers_match_the_prefix_scan(db, monkeypatch):
+    rows = _tree([4, 3, 5])
+    await _seed(db, rows)
+    sample = [row for row in rows if row["id"] % 3 == 1]
+
+    async def answers():
+        out = []
+        for row in sample:
+            out.append(sorted(await DepartmentDao.aget_subtree_ids(row["path"])))
+            out.append(await DepartmentDao.aget_ancestor_ids(row["id"]))
+            out.append(await DepartmentDao.ais_descendant_of(row["id"], 2))
+            mount = await DepartmentDao.aget_ancestors_with_mount(row["id"])
+            inner = await DepartmentDao.aget_descendant_mount(row["id"])
+            out.append((mount and mount.id, inner is not None))
+        return out
+
+    from_index = await answers()
+
+    assert await DepartmentDao.aget_tree_index() is not None
+    assert from_index == await _sql_answers(monkeypatch, answers)
+    assert from_index[0] == await _like_subtree(db, "/1/")
+
+
+async def test_committed_move_patches_the_snapshot(db):
+    rows = _tree([3, 4, 4])
+    await _seed(db, rows)
+    index = await DepartmentDao.aget_tree_index()
+    moved, new_parent = rows[2], rows[1]  # /1/3/ goes under /1/2/
+
+    # the department service's move: subtree rewrite + the row itself, one commit
+    async with db.session() as session:
+        dept = await session.get(Department, moved["id"])
+        new_path = f"{new_parent['path']}{moved['id']}/"
+        await session.exec(subtree_path_update(dept.path, new_path))
+        dept.parent_id, dept.path = new_parent["id"], new_path
+        session.add(dept)
+        await session.commit()
+
+    db.statements = 0
+    assert await DepartmentDao.aget_tree_index() is index
+    assert sorted(await DepartmentDao.aget_subtree_ids(new_path)) == await _like_subtree(db, new_path)
+    grandchild = next(row["id"] for row in rows if row["parent_id"] == moved["id"])
+    assert await DepartmentDao.ais_descendant_of(grandchild, new_parent["id"]) is True
+    assert await DepartmentDao.aget_ancestor_ids(grandchild) == [1, new_parent["id"], moved["id"], grandchild]
+    assert db.statements == 1  # only the LIKE scan run by the test itself
+    assert sorted(await DepartmentDao.aget_subtree_ids("/1/2/")) == await _like_subtree(db, "/1/2/")
+
+    # the DAO batch move patches as well
+    await DepartmentDao.aupdate_paths_batch(new_path, f"/1/{moved['id']}/")
+    assert await DepartmentDao.aget_tree_index() is index
+    assert await DepartmentDao.aget_ancestor_ids(moved["id"]) == [1, moved["id"]]
+
+
+async def test_async_commits_publish_through_the_async_client(db, redis, monkeypatch):
+    await _seed(db, _tree([3, 3]))
+    index = await DepartmentDao.aget_tree_index()
+    version = redis.connection.get(department_tree.VERSION_KEY)
+
+    def blocking_client():
+        raise AssertionError("synchronous Redis call on the event loop")
+
+    monkeypatch.setattr(department_tree, "_redis_sync", blocking_client)
+    await DepartmentDao.aupdate_paths_batch("/1/3/", "/1/2/3/")
+
+    # the lookup waits for the publish, which patched the snapshot under the new version
+    assert await DepartmentDao.aget_tree_index() is index
+    assert redis.connection.get(department_tree.VERSION_KEY) != version
+    assert await DepartmentDao.aget_ancestor_ids(3) == [1, 2, 3]
+
+
+def test_commits_outside_an_event_loop_publish_synchronously(redis):
+    redis.connection.set(department_tree.VERSION_KEY, "before")
+
+    department_tree._publish(department_tree._TreeChanges())
+
+    assert redis.connection.get(department_tree.VERSION_KEY) not in (None, b"before")
+    assert not department_tree._publishing
+
+
+async def test_other_writes_keep_or_drop_the_snapshot(db, redis):
+    await _seed(db, _tree([3, 3]))
+    index = await DepartmentDao.aget_tree_index()
+    version = redis.connection.get(department_tree.VERSION_KEY)
+
+    # renames do not touch the tree: same version, same snapshot
+    async with db.session() as session:
+        dept = await session.get(Department, 2)
+        dept.name = "renamed"
+        session.add(dept)
+        await session.commit()
+    assert redis.connection.get(department_tree.VERSION_KEY) == version
+    assert await DepartmentDao.aget_tree_index() is index
+
+    # a mount flip goes through a plain UPDATE: rebuilt
+    await DepartmentDao.aset_mount(3, 9)
+    rebuilt = await DepartmentDao.aget_tree_index()
+    assert rebuilt is not index and rebuilt.nearest_mount(3) == 3
+
+    # a new department
+    async with db.session() as session:
+        session.add(Department(id=100, dept_id="BS@100", name="new", parent_id=2, path="/1/2/100/"))
+        await session.commit()
+    assert 100 in await DepartmentDao.aget_subtree_ids("/1/2/")
+
+    # a write from another process only replaces the token
+    snapshot = await DepartmentDao.aget_tree_index()
+    redis.connection.set(department_tree.VERSION_KEY, "written-elsewhere")
+    assert await DepartmentDao.aget_tree_index() is not snapshot
+
+    # a rolled-back write publishes nothing
+    version = redis.connection.get(department_tree.VERSION_KEY)
+    async with db.session() as session:
+        await session.exec(subtree_path_update("/1/2/", "/1/3/2/"))
+        await session.rollback()
+    assert redis.connection.get(department_tree.VERSION_KEY) == version
+
+
+async def test_untrustworthy_index_falls_back_to_sql(db, monkeypatch):
+    rows = _tree([2, 2])
+    rows.append(dict(id=50, dept_id="BS@50", name="orphan", parent_id=99, path="/1/99/50/", tenant_id=1,
+                     status="active", is_tenant_root=0))
+    await _seed(db, rows)
+
+    assert await DepartmentDao.aget_tree_index() is None
+    assert sorted(await DepartmentDao.aget_subtree_ids("/1/")) == await _like_subtree(db, "/1/")
+
+    async def no_redis():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(department_tree, "_redis", no_redis)
+    assert await DepartmentDao.aget_tree_index() is None
+    assert await DepartmentDao.aget_ancestor_ids(3) == [1, 3]
+
+
+async def test_index_answers_respect_the_tenant_scope(db, monkeypatch):
+    await _seed(db, _tree([3, 3]))
+    monkeypatch.setattr(DepartmentDao, "_tenant_scope", staticmethod(lambda: frozenset({2})))
+
+    subtree = await DepartmentDao.aget_subtree_ids("/1/")
+
+    assert subtree and all(dept_id % 2 == 1 for dept_id in subtree)
+    assert await DepartmentDao.aget_ancestor_ids(2) == []
+
+
+@pytest.mark.benchmark
+async def test_benchmark_20k_departments(db, record_property):
+    # 1 + 20 + 400 + 20000 departments, four levels
+    rows = _tree([20, 20, 50])
+    await _seed(db, rows)
+    rng = random.Random(1)
+    branches = [row for row in rows if row["path"].count("/") == 3]
+    leaves = rng.sample([row for row in rows if row["path"].count("/") == 5], 200)
+
+    start = time.perf_counter()
+    index = await DepartmentDao.aget_tree_index()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in branches:
+        expected = await _like_subtree(db, row["path"])
+    like_subtree = (time.perf_counter() - start) / len(branches)
+    start = time.perf_counter()
+    for row in branches:
+        got = sorted(await DepartmentDao.aget_subtree_ids(row["path"]))
+    index_subtree = (time.perf_counter() - start) / len(branches)
+    assert got == expected
+
+    async def descendant_via_sql(dept, ancestor):
+        async with db.session() as session:
+            result = await session.exec(
+                select(Department.id).where(Department.id == dept["id"], Department.path.like(f"{ancestor['path']}%"))
+            )
+            return result.first() is not None
+
+    start = time.perf_counter()
+    for leaf in leaves:
+        await descendant_via_sql(leaf, branches[0])
+    like_check = (time.perf_counter() - start) / len(leaves)
+    start = time.perf_counter()
+    for leaf in leaves:
+        await DepartmentDao.ais_descendant_of(leaf["id"], branches[0]["id"])
+    index_check = (time.perf_counter() - start) / len(leaves)
+
+    start = time.perf_counter()
+    for leaf in leaves:
+        await DepartmentDao.aget_ancestors_with_mount(leaf["id"])
+    index_mount = (time.perf_counter() - start) / len(leaves)
+
+    # move a 1k-department branch: SQL rewrite, then the in-memory patch vs a rebuild
+    moved, target = branches[3], branches[4]
+    new_path = f"{target['path']}{moved['id']}/"
+    async with db.session() as session:
+        start = time.perf_counter()
+        await session.exec(subtree_path_update(moved["path"], new_path))
+        await session.commit()
+        sql_move = time.perf_counter() - start
+    assert await DepartmentDao.aget_tree_index() is index
+
+    patch_index = DepartmentTreeIndex((d, index.paths[d], "active", 1, 0) for d in index.paths)
+    start = time.perf_counter()
+    patch_index.move_subtree(new_path, moved["path"])
+    patch = time.perf_counter() - start
+    department_tree.invalidate()
+    start = time.perf_counter()
+    await DepartmentDao.aget_tree_index()
+    rebuild = time.perf_counter() - start
+
+    for name, seconds in (
+        ("index_build", build),
+        ("subtree_like", like_subtree), ("subtree_index", index_subtree),
+        ("is_descendant_like", like_check), ("is_descendant_index", index_check),
+        ("mount_ancestor_index", index_mount),
+        ("move_sql", sql_move), ("move_index_patch", patch), ("move_index_rebuild", rebuild),
+    ):
+        record_property(f"{name}_ms", round(seconds * 1e3, 3))
+
+    assert len(rows) == 20_421
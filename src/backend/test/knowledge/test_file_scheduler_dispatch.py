@@ -1,4 +1,6 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
+
+import pytest
 
 from bisheng.worker.knowledge.scheduler import FileScheduler, run_dispatch_round, trigger_dispatch_task
 
@@ -15,12 +17,29 @@ def _conf(**overrides):
     return conf
 
 
+def _dispatch_batch(sched, user_ids):
+    """Batch pop built on the per-user dispatch_one/get_payload stubs, like DISPATCH_BATCH
+    a user yields no more files once its queue came back empty."""
+    drained, popped = set(), []
+    for user_id in user_ids:
+        file_id = None if user_id in drained else sched.dispatch_one(user_id=user_id)
+        if file_id is None:
+            drained.add(user_id)
+            popped.append((user_id, None, {}))
+        else:
+            popped.append((user_id, file_id, sched.get_payload(file_id=file_id)))
+    return popped
+
+
 def _sched():
     """A FileScheduler stub with the new methods used by run_dispatch_round."""
     sched = MagicMock(spec=FileScheduler)
     sched.acquire_dispatch_lock.return_value = "tok"
     sched.inflight_count.return_value = 0
     sched.inflight_total.return_value = 0
+    # Batched calls delegate to the per-user stubs each test configures
+    sched.inflight_counts.side_effect = lambda *, user_ids: {u: sched.inflight_count(user_id=u) for u in user_ids}
+    sched.dispatch_batch.side_effect = lambda *, user_ids: _dispatch_batch(sched, user_ids)
     return sched
 
 
@@ -255,6 +274,32 @@ def test_rollback_on_apply_async_failure(monkeypatch):
     sched.release_dispatch_lock.assert_called_once_with("tok")
 
 
+def test_failure_mid_batch_puts_undispatched_files_back(monkeypatch):
+    """An error after the batch pop re-queues every popped file that was not handed to
+    celery yet (newest first), instead of leaving them in flight until reconcile."""
+    sched = _sched()
+    sched.active_users.return_value = ["a", "b"]
+    queues = {"a": ["1", "2"], "b": ["3"]}
+    sched.dispatch_one.side_effect = lambda *, user_id: queues[user_id].pop(0) if queues[user_id] else None
+    sched.get_payload.return_value = {"file_ext": "txt"}
+    sched.confirm_dispatch.side_effect = RuntimeError("redis gone")
+    apply_async = MagicMock()
+    monkeypatch.setattr("bisheng.worker.knowledge.scheduler._parse_apply_async", apply_async)
+    monkeypatch.setattr("bisheng.worker.knowledge.scheduler.decide_queue", lambda ext: "knowledge_celery")
+    monkeypatch.setattr("bisheng.worker.knowledge.scheduler._fair_scheduler_conf", lambda: _conf())
+
+    with pytest.raises(RuntimeError):
+        run_dispatch_round(scheduler=sched)
+
+    # "1" reached celery before confirm failed; "3" and "2" were popped in the same batch
+    assert apply_async.call_count == 1
+    assert sched.rollback_dispatch.call_args_list == [
+        call(user_id="a", file_id="2"),
+        call(user_id="b", file_id="3"),
+    ]
+    sched.release_dispatch_lock.assert_called_once_with("tok")
+
+
 def test_no_lock_returns_early(monkeypatch):
     sched = _sched()
     sched.acquire_dispatch_lock.return_value = None
@@ -0,0 +1,86 @@
+"""Dispatch throughput of the fair scheduler against the configured Redis.
+
+Simulates a bulk import: many users enqueue thousands of files, then dispatch
+rounds drain them while completions free the slots. Records files dispatched
+per second as a test property; opt in with ``--run-benchmark``.
+"""
+
+import socket
+import time
+from unittest.mock import MagicMock
+from urllib.parse import urlparse
+
+import pytest
+import redis
+
+from bisheng.common.services.config_service import settings
+from bisheng.worker.knowledge import scheduler as s
+
+_parsed = urlparse(settings.redis_url)
+REDIS_HOST = _parsed.hostname or "localhost"
+REDIS_PORT = _parsed.port or 6379
+REDIS_TEST_DB = 15
+
+USERS = 50
+FILES_PER_USER = 200
+QUEUE_CAP = 200
+
+
+def _redis_reachable():
+    try:
+        with socket.create_connection((REDIS_HOST, REDIS_PORT), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+pytestmark = [pytest.mark.slow, pytest.mark.benchmark, pytest.mark.skipif(not _redis_reachable(), reason="needs Redis")]
+
+
+@pytest.fixture
+def redis_conn():
+    conn = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_TEST_DB, decode_responses=True)
+    for k in conn.keys("{bisheng_fs}:*"):
+        conn.delete(k)
+    yield conn
+    for k in conn.keys("{bisheng_fs}:*"):
+        conn.delete(k)
+
+
+def test_bulk_import_dispatch_throughput(redis_conn, monkeypatch, record_property):
+    conf = MagicMock()
+    conf.dispatch_lock_ttl_seconds = 24
+    conf.concurrency_for = lambda q: QUEUE_CAP
+    conf.weight_for = lambda u: 1
+    dispatched = []
+    monkeypatch.setattr(s, "_fair_scheduler_conf", lambda: conf)
+    monkeypatch.setattr(s, "decide_queue", lambda ext: s.KNOWLEDGE_QUEUE)
+    monkeypatch.setattr(s, "dispatch_queues", lambda: [s.KNOWLEDGE_QUEUE])
+    monkeypatch.setattr(s, "_parse_apply_async", lambda *, args, queue: dispatched.append(args[0]))
+
+    sched = s.FileScheduler(connection=redis_conn)
+    owner = {}
+    for user in range(USERS):
+        for n in range(FILES_PER_USER):
+            file_id = user * FILES_PER_USER + n
+            owner[file_id] = str(user)
+            sched.enqueue_file(user_id=str(user), file_id=str(file_id), preview_cache_key="", callback_url="",
+                               file_ext="txt")
+    total = USERS * FILES_PER_USER
+
+    rounds = 0
+    start = time.perf_counter()
+    while len(dispatched) < total:
+        done = len(dispatched)
+        s.run_dispatch_round(scheduler=sched)
+        rounds += 1
+        assert len(dispatched) > done, "dispatch round made no progress"
+        # the parse workers finish everything in flight before the next round
+        for file_id in dispatched[done:]:
+            sched.complete_file(user_id=owner[file_id], file_id=str(file_id))
+    elapsed = time.perf_counter() - start
+
+    record_property("rounds", rounds)
+    record_property("files_per_second", round(total / elapsed))
+    assert sorted(dispatched) == list(range(total))
+    assert sched.inflight_total(queue=s.KNOWLEDGE_QUEUE) == 0
@@ -282,3 +282,53 @@ def test_refresh_parse_lock_extends_ttl_only_for_owner(scheduler, redis_conn):
     assert redis_conn.ttl("{bisheng_fs}:parse_lock:3684") > 5
     # a stale token must NOT be able to refresh someone else's lock
     assert scheduler.refresh_parse_lock(file_id="3684", token="stale", ttl_seconds=120) is False
+
+
+def test_dispatch_batch_pops_picks_in_order_with_payloads(scheduler, redis_conn):
+    for fid in ("1", "2"):
+        scheduler.enqueue_file(user_id="9", file_id=fid, preview_cache_key=f"pk{fid}", callback_url="", file_ext="txt")
+    scheduler.enqueue_file(user_id="7", file_id="3", preview_cache_key="", callback_url="", file_ext="pdf")
+
+    popped = scheduler.dispatch_batch(user_ids=["9", "7", "9", "7", "9"])
+
+    assert [(uid, fid) for uid, fid, _ in popped] == [("9", "1"), ("7", "3"), ("9", "2"), ("7", None), ("9", None)]
+    assert popped[0][2]["preview_cache_key"] == "pk1"
+    assert popped[1][2]["file_ext"] == "pdf"
+    assert redis_conn.smembers("{bisheng_fs}:inflight:9") == {"1", "2"}
+    assert redis_conn.hgetall("{bisheng_fs}:inflight_owner") == {"1": "9", "2": "9", "3": "7"}
+    assert not redis_conn.smembers("{bisheng_fs}:active_users")
+
+
+def test_release_file_uses_owner_index(scheduler, redis_conn):
+    scheduler.enqueue_file(user_id="9", file_id="1", preview_cache_key="", callback_url="", file_ext="txt")
+    scheduler.dispatch_batch(user_ids=["9"])
+    scheduler.confirm_dispatch(file_id="1", queue="knowledge_celery")
+
+    assert scheduler.release_file(file_id="1") is True
+    assert scheduler.inflight_total(queue="knowledge_celery") == 0
+    assert redis_conn.hget("{bisheng_fs}:inflight_owner", "1") is None
+    assert scheduler.release_file(file_id="1") is False
+
+
+def test_release_file_finds_entries_without_owner_index(scheduler, redis_conn):
+    # in flight since before the owner index existed
+    redis_conn.sadd("{bisheng_fs}:inflight:9", "1")
+    redis_conn.sadd("{bisheng_fs}:inflight_users", "9")
+
+    assert scheduler.release_file(file_id="1") is True
+    assert not redis_conn.smembers("{bisheng_fs}:inflight:9")
+
+
+def test_purge_files_removes_queued_and_inflight_files(scheduler, redis_conn):
+    for fid in ("1", "2"):
+        scheduler.enqueue_file(user_id="9", file_id=fid, preview_cache_key="", callback_url="", file_ext="txt")
+    scheduler.dispatch_one(user_id="9")
+    scheduler.confirm_dispatch(file_id="1", queue="knowledge_celery")
+
+    scheduler.purge_files([(9, 1), (9, 2)])
+
+    assert scheduler.inflight_total(queue="knowledge_celery") == 0
+    assert redis_conn.lrange("{bisheng_fs}:queue:9", 0, -1) == []
+    assert redis_conn.hgetall("{bisheng_fs}:payload:2") == {}
+    assert not redis_conn.sismember("{bisheng_fs}:active_users", "9")
+    assert not redis_conn.sismember("{bisheng_fs}:inflight_users", "9")
@@ -252,6 +252,43 @@ async def test_retrieve_and_filter_expansion_succeeds_second_attempt(monkeypatch
     assert sorted(int(d.metadata["document_id"]) for d in docs) == [5]
 
 
+@pytest.mark.asyncio
+async def test_retrieve_and_filter_builds_stores_once_for_both_attempts(monkeypatch):
+    """The expansion attempt reuses the first attempt's stores and query embedding."""
+    svc = _make_service()
+    visibility = MagicMock()
+    visibility.build_index_prefilter = AsyncMock(
+        return_value=IndexFilter(strategy="all", accessible_size=3)
+    )
+    visibility.post_filter_visible_files = AsyncMock(side_effect=[set(), {3}])
+    monkeypatch.setattr(svc, "_visibility_service", lambda: visibility)
+
+    milvus_init = AsyncMock(return_value=MagicMock(as_retriever=lambda **kw: MagicMock()))
+    es_init = AsyncMock(return_value=MagicMock(as_retriever=lambda **kw: MagicMock()))
+    monkeypatch.setattr(
+        "bisheng.knowledge.domain.services.knowledge_space_chat_service.KnowledgeRag.init_knowledge_milvus_vectorstore",
+        milvus_init,
+    )
+    monkeypatch.setattr(
+        "bisheng.knowledge.domain.services.knowledge_space_chat_service.KnowledgeRag.init_knowledge_es_vectorstore",
+        es_init,
+    )
+    monkeypatch.setattr(
+        "bisheng.knowledge.domain.services.knowledge_space_chat_service.KnowledgeRetrieverTool",
+        lambda **kwargs: MagicMock(ainvoke=AsyncMock(return_value=[_make_doc(3)])),
+    )
+
+    docs = await svc._retrieve_and_filter(
+        space=MagicMock(id=10), query="q", candidate_file_ids=None, max_content=1000
+    )
+
+    assert [int(d.metadata["document_id"]) for d in docs] == [3]
+    assert visibility.post_filter_visible_files.await_count == 2
+    milvus_init.assert_awaited_once()
+    assert milvus_init.await_args.kwargs["memoize_query"] is True
+    es_init.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_retrieve_and_filter_logs_structured_fields(monkeypatch, caplog):
     """AC-27: each retrieval attempt writes the permission_filter log fields."""
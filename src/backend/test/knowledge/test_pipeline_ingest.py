@@ -0,0 +1,151 @@
+"""Ingest stage of NormalPipeline: all vector stores are written in parallel, stores that
+take vectors share one embedding call, and the per-stage timings land in the result."""
+
+import threading
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_milvus import Milvus
+
+from bisheng.core.context.tenant import current_tenant_id
+from bisheng.core.logger import trace_id_var
+from bisheng.knowledge.rag.pipeline.base import NormalPipeline
+from bisheng.knowledge.rag.pipeline.ingest import StoreWriteOptions, VectorStoreIngestor, store_kind
+from bisheng.knowledge.rag.pipeline.types import PipelineConfig
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(one))] for one in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+class _FakeMilvus(Milvus):
+    """A Milvus store that records inserts instead of talking to a server."""
+
+    def __init__(self, embeddings, barrier: threading.Barrier = None, fail: bool = False):
+        self.embedding_func = embeddings
+        self.barrier = barrier
+        self.fail = fail
+        self.inserted = []
+        self.deleted = []
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, **kwargs):
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        if self.fail:
+            raise RuntimeError("milvus unavailable")
+        start = len(self.inserted)
+        self.inserted.extend(zip(texts, embeddings))
+        return list(range(start, start + len(texts)))
+
+    def delete(self, ids=None, **kwargs):
+        self.deleted.extend(ids)
+
+
+class _KeywordStore:
+    """Keyword-only store, written through add_documents."""
+
+    def __init__(self, barrier: threading.Barrier = None, failures: int = 0):
+        self.barrier = barrier
+        self.failures = failures
+        self.calls = []
+        self.deleted = []
+
+    def add_documents(self, docs, **kwargs):
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("es bulk rejected")
+        self.calls.append(len(docs))
+        return [f"es-{len(self.calls)}-{i}" for i in range(len(docs))]
+
+    def delete(self, ids=None, **kwargs):
+        self.deleted.extend(ids)
+
+
+class _Loader:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def load(self):
+        return list(self.docs)
+
+
+def _docs(count: int) -> list[Document]:
+    return [Document(page_content=f"chunk {i}", metadata={"chunk_index": i}) for i in range(count)]
+
+
+def test_stores_are_written_in_parallel_with_one_embedding_call():
+    embeddings = _CountingEmbeddings()
+    # every write blocks until all three stores are writing at the same time
+    barrier = threading.Barrier(3)
+    first, second = _FakeMilvus(embeddings, barrier), _FakeMilvus(embeddings, barrier)
+    keyword = _KeywordStore(barrier)
+    pipeline = NormalPipeline(loader=_Loader(_docs(5)), vector_store=[first, keyword, second])
+
+    result = pipeline.run()
+
+    assert embeddings.calls == 1
+    assert first.inserted == second.inserted == [(f"chunk {i}", [7.0]) for i in range(5)]
+    assert keyword.calls == [5]
+    assert {"load", "transform", "embed", "write.milvus", "write._keywordstore", "ingest"} <= \
+           set(result.stage_timings)
+
+
+def test_store_options_batch_and_retry_per_store():
+    keyword = _KeywordStore(failures=1)
+    ingestor = VectorStoreIngestor(
+        [keyword], {store_kind(keyword): StoreWriteOptions(batch_size=2, max_retries=1, retry_backoff=0)})
+
+    ingestor.write(_docs(5))
+    ingestor.close()
+
+    # the first slice is retried once, then the rest goes through in slices of two
+    assert keyword.calls == [2, 2, 1]
+
+
+def test_failed_store_rolls_back_the_others():
+    milvus = _FakeMilvus(_CountingEmbeddings())
+    keyword = _KeywordStore(failures=10)
+    config = PipelineConfig(store_options={"_keywordstore": StoreWriteOptions(max_retries=0)})
+    pipeline = NormalPipeline(loader=_Loader(_docs(3)), vector_store=[milvus, keyword])
+
+    with pytest.raises(ConnectionError):
+        pipeline.run(config)
+
+    assert milvus.deleted == [0, 1, 2]
+
+
+def test_store_writes_keep_the_callers_tenant_and_trace():
+    seen = []
+
+    class _ContextKeywordStore(_KeywordStore):
+        def add_documents(self, docs, **kwargs):
+            seen.append((current_tenant_id.get(), trace_id_var.get()))
+            return super().add_documents(docs, **kwargs)
+
+    class _ContextMilvus(_FakeMilvus):
+        def add_embeddings(self, texts, embeddings, metadatas=None, **kwargs):
+            seen.append((current_tenant_id.get(), trace_id_var.get()))
+            return super().add_embeddings(texts, embeddings, metadatas, **kwargs)
+
+    ingestor = VectorStoreIngestor([_ContextMilvus(_CountingEmbeddings()), _ContextKeywordStore()])
+    tenant_token = current_tenant_id.set(7)
+    trace_token = trace_id_var.set("trace-7")
+    try:
+        ingestor.write(_docs(3))
+    finally:
+        trace_id_var.reset(trace_token)
+        current_tenant_id.reset(tenant_token)
+        ingestor.close()
+
+    assert seen == [(7, "trace-7")] * 2
@@ -0,0 +1,46 @@
+"""Retrieval attempts within one request share the query embedding."""
+
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from bisheng.knowledge.rag.query_embedding import QueryMemoEmbeddings
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text))]
+
+
+async def _two_attempts(embeddings: Embeddings, query: str) -> None:
+    """What the retrieval loop does per query: one search per expansion attempt."""
+    for _ in range(2):
+        await embeddings.aembed_query(query)
+
+
+def test_query_is_embedded_once_per_request():
+    model = _CountingEmbeddings()
+    memo = QueryMemoEmbeddings(model)
+
+    assert memo.embed_query("q") == memo.embed_query("q") == [1.0]
+    assert asyncio.run(memo.aembed_query("q")) == [1.0]
+    assert memo.embed_documents(["a", "b"]) == [[1.0], [1.0]]
+    assert model.queries == ["q"]
+
+
+def test_expansion_attempts_share_one_query_embedding():
+    model = _CountingEmbeddings()
+    asyncio.run(_two_attempts(model, "what is bisheng"))
+    assert model.queries == ["what is bisheng"] * 2
+
+    model = _CountingEmbeddings()
+    asyncio.run(_two_attempts(QueryMemoEmbeddings(model), "what is bisheng"))
+    # one embedding call per request instead of one per attempt
+    assert model.queries == ["what is bisheng"]
@@ -0,0 +1,173 @@
+"""Streaming NormalPipeline: page batches flow through the transformers and into the
+vector stores in bounded batches, with the same chunks and whole-document results as
+the buffered run."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import BaseDocumentTransformer, Document
+
+from bisheng.common.utils.simhash_utils import SimHashAccumulator, compute_simhash_64_hex
+from bisheng.core.context.tenant import current_tenant_id
+from bisheng.core.logger import trace_id_var
+from bisheng.knowledge.domain.models.knowledge_file import KnowledgeFile
+from bisheng.knowledge.rag.pipeline.base import NormalPipeline
+from bisheng.knowledge.rag.pipeline.transformer.abstract import AbstractTransformer
+from bisheng.knowledge.rag.pipeline.transformer.simhash import SimHashTransformer
+from bisheng.knowledge.rag.pipeline.transformer.splitter import SplitterTransformer
+from bisheng.knowledge.rag.pipeline.types import PipelineConfig
+
+_PAGES = [f"第{i}页 机器学习是人工智能的一个分支。\n\nPage {i} studies algorithms. " * 8 for i in range(40)]
+
+
+class _PagedLoader:
+    """Yields one document per page and records how far loading got."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.yielded = 0
+        self.load_called = False
+
+    def lazy_load(self):
+        for page in self.pages:
+            self.yielded += 1
+            yield Document(page_content=page, metadata={"page": self.yielded})
+
+    def load(self):
+        self.load_called = True
+        return list(self.lazy_load())
+
+
+class _RecordingVectorStore:
+    def __init__(self, loader: _PagedLoader = None, fail_after: int = None):
+        self.loader = loader
+        self.fail_after = fail_after
+        self.batches: list[list[Document]] = []
+        self.loaded_at_write: list[int] = []
+        self.deleted: list = []
+        self._lock = threading.Lock()
+
+    def add_documents(self, docs, **kwargs):
+        with self._lock:
+            if self.fail_after is not None and len(self.batches) >= self.fail_after:
+                raise RuntimeError("milvus insert failed")
+            self.loaded_at_write.append(self.loader.yielded if self.loader else 0)
+            start = sum(len(one) for one in self.batches)
+            self.batches.append(list(docs))
+            return [str(start + i) for i in range(len(docs))]
+
+    def delete(self, ids, **kwargs):
+        self.deleted.extend(ids)
+
+    @property
+    def added(self) -> list[Document]:
+        # concurrent batches can land in any order
+        return sorted((doc for batch in self.batches for doc in batch), key=lambda doc: doc.metadata["chunk_index"])
+
+
+def _transformers(kf: KnowledgeFile, summaries: list):
+    abstract = AbstractTransformer(invoke_user_id=1, knowledge_file=kf)
+    llm = SimpleNamespace(invoke=lambda messages: summaries.append(messages[1].content)
+                          or SimpleNamespace(content="摘要"))
+    abstract.llm_config = (llm, SimpleNamespace(abstract_prompt=None))
+    return [abstract, SimHashTransformer(knowledge_file=kf),
+            SplitterTransformer(separator=["\n\n"], separator_rule=["after"], chunk_size=200, chunk_overlap=0)]
+
+
+def _run(streaming: bool, store_factory=_RecordingVectorStore, **config):
+    kf = KnowledgeFile(id=1, knowledge_id=1, file_name="big.pdf")
+    summaries = []
+    loader = _PagedLoader(_PAGES)
+    store = store_factory(loader)
+    pipeline = NormalPipeline(loader=loader, transformers=_transformers(kf, summaries), vector_store=[store])
+    result = pipeline.run(PipelineConfig(streaming=streaming, **config))
+    return kf, summaries, store, result
+
+
+def test_streaming_matches_buffered_run():
+    buffered_kf, buffered_summaries, buffered_store, _ = _run(streaming=False)
+    kf, summaries, store, result = _run(streaming=True, load_batch_size=2, ingest_batch_size=16)
+
+    assert [(d.page_content, d.metadata) for d in store.added] == \
+           [(d.page_content, d.metadata) for d in buffered_store.added]
+    assert [d.metadata["chunk_index"] for d in store.added] == list(range(len(store.added)))
+    assert {d.metadata["abstract"] for d in store.added} == {"摘要"}
+    # the LLM sees the same leading text, and the hash covers every page
+    assert summaries == buffered_summaries
+    assert kf.abstract == buffered_kf.abstract == "摘要"
+    assert kf.simhash == buffered_kf.simhash
+    assert len(result.documents) == len(store.added)
+
+
+def test_streaming_writes_bounded_batches_while_loading():
+    _, _, store, result = _run(streaming=True, load_batch_size=2, ingest_batch_size=16,
+                               max_inflight_batches=1, keep_documents=False)
+
+    assert all(len(batch) <= 16 for batch in store.batches)
+    # ingestion starts long before the loader reaches the last page
+    assert store.loaded_at_write[0] < len(_PAGES) // 2
+    assert result.documents is None
+
+
+def test_failed_ingest_rolls_back_streamed_chunks():
+    loader = _PagedLoader(_PAGES)
+    store = _RecordingVectorStore(loader, fail_after=3)
+    kf = KnowledgeFile(id=1, knowledge_id=1, file_name="big.pdf")
+    pipeline = NormalPipeline(loader=loader, transformers=_transformers(kf, []), vector_store=[store])
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(PipelineConfig(streaming=True, load_batch_size=2, ingest_batch_size=16,
+                                    max_inflight_batches=1))
+
+    assert store.deleted == [str(i) for i in range(48)]
+
+
+class _WholeFileTransformer(BaseDocumentTransformer):
+    def transform_documents(self, documents, **kwargs):
+        return documents
+
+
+class _ContextRecordingVectorStore(_RecordingVectorStore):
+    def __init__(self, loader: _PagedLoader = None):
+        super().__init__(loader)
+        self.contexts: set = set()
+
+    def add_documents(self, docs, **kwargs):
+        self.contexts.add((current_tenant_id.get(), trace_id_var.get()))
+        return super().add_documents(docs, **kwargs)
+
+
+def test_streamed_writes_keep_the_callers_tenant_and_trace():
+    tenant_token = current_tenant_id.set(7)
+    trace_token = trace_id_var.set("trace-7")
+    try:
+        _, _, store, _ = _run(streaming=True, store_factory=_ContextRecordingVectorStore,
+                              load_batch_size=2, ingest_batch_size=16, max_inflight_batches=2)
+    finally:
+        trace_id_var.reset(trace_token)
+        current_tenant_id.reset(tenant_token)
+
+    assert len(store.batches) > 1
+    assert store.contexts == {(7, "trace-7")}
+
+
+def test_non_streaming_transformer_falls_back_to_buffered_run():
+    loader = _PagedLoader(_PAGES[:3])
+    store = _RecordingVectorStore(loader)
+    pipeline = NormalPipeline(loader=loader, transformers=[_WholeFileTransformer()], vector_store=[store])
+
+    pipeline.run(PipelineConfig(streaming=True, ingest_batch_size=1))
+
+    assert loader.load_called
+    assert len(store.batches) == 1
+
+
+def test_simhash_accumulator_matches_joined_text():
+    pieces = ["  开头的空白", "\n", "", "\n", "machine learning 机器学习\r", "\n第二段 text  "]
+    accumulator = SimHashAccumulator()
+    for piece in pieces:
+        accumulator.update(piece)
+
+    assert accumulator.hexdigest() == compute_simhash_64_hex("".join(pieces))
+    assert SimHashAccumulator().hexdigest() == compute_simhash_64_hex("")
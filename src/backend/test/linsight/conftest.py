@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture
+def redis_commands(monkeypatch):
+    """Every command a fakeredis server executes, as (name, bytes sent); clear it before the part to measure"""
+    _basefakesocket = pytest.importorskip("fakeredis._basefakesocket")
+    commands = []
+    process = _basefakesocket.BaseFakeSocket._process_command
+
+    def record(self, fields):
+        if fields:
+            commands.append((bytes(fields[0]).decode().upper(), sum(len(field) for field in fields)))
+        return process(self, fields)
+
+    monkeypatch.setattr(_basefakesocket.BaseFakeSocket, "_process_command", record)
+    return commands
@@ -0,0 +1,249 @@
+"""Append-only execution step log: a step is one RPUSH onto the task's log
+whatever the history length, concurrent writers keep every step, readers page
+or tail the log, a streamed thinking segment lands as one frame per flush
+rather than one per token, and tasks stored by an older release (history inline
+in the header) or dropped from Redis keep their history.
+
+Every append sends the same commands whatever the history length. The opt-in
+benchmark appends thousands of steps and reports the per-step cost as the
+history grows, next to the bytes the old read-modify-write of the whole task
+would have moved.
+"""
+
+import asyncio
+import pickle
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from bisheng.linsight.domain.models.linsight_execute_task import (
+    ExecuteTaskStatusEnum,
+    ExecuteTaskTypeEnum,
+    LinsightExecuteTask,
+)
+from bisheng_langchain.linsight.event import ExecStep
+
+fakeredis = pytest.importorskip("fakeredis")
+
+# The real client is needed here; the conftest may have pre-mocked it.
+if isinstance(sys.modules.get("bisheng.core.cache.redis_conn"), MagicMock):
+    sys.modules.pop("bisheng.core.cache.redis_conn")
+from bisheng.core.cache.redis_conn import RedisClient  # noqa: E402
+from bisheng.linsight.domain.services import state_message_manager as smm  # noqa: E402
+
+_STEPS_KEY = "linsight_tasks:svid:execution_steps:t1"
+_TASK_KEY = "linsight_tasks:svid:execution_tasks:t1"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """The task's DB row; ``writes`` records the history length of every DB history rewrite"""
+    row = {"task": _task(), "writes": []}
+
+    async def get_by_id(task_id):
+        return row["task"].model_copy(deep=True) if task_id == "t1" else None
+
+    async def update_by_id(task_id, **kwargs):
+        if task_id != "t1":
+            return None
+        if "history" in kwargs:
+            row["writes"].append(len(kwargs["history"]))
+        row["task"] = row["task"].model_copy(update=kwargs)
+        return row["task"].model_copy(deep=True)
+
+    monkeypatch.setattr(smm.LinsightExecuteTaskDao, "get_by_id", get_by_id)
+    monkeypatch.setattr(smm.LinsightExecuteTaskDao, "update_by_id", update_by_id)
+    return row
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def make_manager(monkeypatch, server):
+    monkeypatch.setattr(smm, "get_redis_client_sync", lambda: MagicMock())
+
+    def make() -> smm.LinsightStateMessageManager:
+        redis_client = RedisClient("redis://127.0.0.1:6379/0")
+        redis_client.async_connection = fakeredis.FakeAsyncRedis(server=server)
+        mgr = smm.LinsightStateMessageManager("svid")
+        mgr._redis_client = redis_client
+        return mgr
+
+    return make
+
+
+def _task(history=None) -> LinsightExecuteTask:
+    return LinsightExecuteTask(
+        id="t1",
+        session_version_id="svid",
+        task_type=ExecuteTaskTypeEnum.SINGLE,
+        status=ExecuteTaskStatusEnum.IN_PROGRESS,
+        task_data={"name": "research"},
+        history=history,
+    )
+
+
+def _step(call_id, output, step_type="tool", status="end"):
+    return ExecStep(task_id="t1", call_id=call_id, call_reason="", name="some_tool", params={"q": call_id},
+                    output=output, step_type=step_type, status=status)
+
+
+async def test_concurrent_writers_keep_every_step(make_manager, db):
+    writers = [make_manager() for _ in range(4)]
+
+    await asyncio.gather(*(
+        mgr.add_execution_task_step("t1", _step(f"w{w}-{i}", "r"))
+        for i in range(25) for w, mgr in enumerate(writers)
+    ))
+
+    history = (await writers[0].get_execution_task("t1")).history
+    assert len(history) == 100
+    assert {entry["call_id"] for entry in history} == {f"w{w}-{i}" for w in range(4) for i in range(25)}
+
+
+async def test_paged_and_tail_reads(make_manager, db):
+    mgr = make_manager()
+    for i in range(10):
+        await mgr.add_execution_task_step("t1", _step(f"c{i}", str(i)))
+
+    page, cursor = await mgr.get_execution_task_steps("t1", 0, 4)
+    assert [frame["output"] for frame in page] == ["0", "1", "2", "3"]
+    page, cursor = await mgr.get_execution_task_steps("t1", cursor, 4)
+    assert [frame["output"] for frame in page] == ["4", "5", "6", "7"]
+
+    tail, tail_cursor = await mgr.get_execution_task_steps("t1", -3)
+    assert [frame["output"] for frame in tail] == ["7", "8", "9"]
+    assert tail_cursor == 10
+
+    # polling with the cursor returns only what was appended since
+    await mgr.add_execution_task_step("t1", _step("c1", "again"))
+    page, cursor = await mgr.get_execution_task_steps("t1", tail_cursor)
+    assert [frame["output"] for frame in page] == ["again"]
+    assert cursor == 11
+    assert smm.merge_execution_steps(page, [{"call_id": "c1", "output": "1"}]) == [page[0]]
+
+
+async def test_thinking_deltas_join_into_one_frame(make_manager, db, monkeypatch, redis_commands):
+    mgr = make_manager()
+    monkeypatch.setattr(mgr, "HISTORY_DB_FLUSH_INTERVAL", 3600)
+
+    await mgr.add_execution_task_step("t1", _step("c0", "0", step_type="thinking"))  # first step -> flush
+    redis_commands.clear()
+    for i in range(1, 1000):
+        await mgr.add_execution_task_step("t1", _step("c0", str(i % 10), step_type="thinking"))
+
+    # the deltas touch neither Redis nor the DB, yet readers here see the whole text
+    assert redis_commands == []
+    assert await mgr._redis_client.async_connection.llen(_STEPS_KEY) == 1
+    text = "".join(str(i % 10) for i in range(1000))
+    assert (await mgr.get_execution_task("t1")).history[0]["output"] == text
+
+    # the next step appends the joined deltas ahead of itself
+    await mgr.add_execution_task_step("t1", _step("c1", "r"))
+    frames, _ = await mgr.get_execution_task_steps("t1")
+    assert [frame["output"] for frame in frames] == ["0", text[1:], "r"]
+
+    await mgr.add_execution_task_step("t1", _step("c2", "more", step_type="thinking"))
+    await mgr.flush_execution_histories()
+    assert await mgr._redis_client.async_connection.llen(_STEPS_KEY) == 4
+    assert [entry["output"] for entry in db["task"].history] == [text, "r", "more"]
+
+
+async def test_legacy_header_with_inline_history(make_manager, db):
+    mgr = make_manager()
+    legacy = _task([{"call_id": "c0", "step_type": "thinking", "output": "plan"}])
+    # written by a release that kept the whole history in the task key
+    await mgr._redis_client.async_connection.set(_TASK_KEY, pickle.dumps(legacy.model_dump()))
+
+    await mgr.add_execution_task_step("t1", _step("c0", " more", step_type="thinking"))
+    await mgr.add_execution_task_step("t1", _step("c1", "r"))
+
+    history = (await mgr.get_execution_task("t1")).history
+    assert [entry["output"] for entry in history] == ["plan more", "r"]
+    assert [len(t.history) for t in await mgr.get_execution_tasks()] == [2]
+
+
+async def test_reload_after_the_task_left_redis(make_manager, db):
+    db["task"] = _task([{"call_id": "c0", "output": "from db"}])
+    mgr = make_manager()
+
+    await mgr.add_execution_task_step("t1", _step("c1", "r"))
+    await mgr._redis_client.async_connection.delete(_TASK_KEY, _STEPS_KEY)
+    await mgr.add_execution_task_step("t1", _step("c2", "r"))
+
+    history = (await mgr.get_execution_task("t1")).history
+    assert [entry["call_id"] for entry in history] == ["c0", "c1", "c2"]
+    # a resume replaying write_todos with the stored row does not reset the live log
+    await mgr.set_execution_tasks([_task([{"call_id": "c0", "output": "from db"}])])
+    assert len((await mgr.get_execution_task("t1")).history) == 3
+
+
+async def test_orphan_steps_leave_nothing_behind(make_manager, db):
+    mgr = make_manager()
+
+    await mgr.add_execution_task_step("svid", _step("c1", "r"))
+
+    assert await mgr._redis_client.async_connection.keys("*") == []
+    assert db["writes"] == []
+
+
+async def test_append_cost_does_not_grow_with_history(make_manager, db, monkeypatch, redis_commands):
+    mgr = make_manager()
+    monkeypatch.setattr(mgr, "HISTORY_DB_FLUSH_INTERVAL", 3600)
+    output = "observation " * 40
+    frame_bytes = len(mgr._redis_client.encode(_STEPS_KEY, _step("c0", output).model_dump()))
+    decoded = []
+    decode = mgr._redis_client.decode
+    monkeypatch.setattr(mgr._redis_client, "decode", lambda value: decoded.append(1) or decode(value))
+
+    await mgr.add_execution_task_step("t1", _step("c0", output))
+    decoded.clear()
+    appends = {}
+    for step in range(1, 2001):
+        redis_commands.clear()
+        await mgr.add_execution_task_step("t1", _step(f"c{step:04d}", output))
+        if step in (1, 2000):
+            appends[step] = list(redis_commands)
+
+    # the same three commands whatever the history length, carrying the new frame only
+    for commands in appends.values():
+        assert [name for name, _ in commands] == ["EXPIRE", "RPUSH", "EXPIRE"]
+        assert frame_bytes <= sum(size for _, size in commands) < frame_bytes + 200
+    assert appends[1] == appends[2000]
+    # appending never reads the log back, and the DB was written once
+    assert decoded == []
+    assert db["writes"] == [1]
+    assert await mgr._redis_client.async_connection.llen(_STEPS_KEY) == 2001
+
+    await mgr.flush_execution_histories()
+    assert db["writes"] == [1, 2001]
+
+
+@pytest.mark.benchmark
+async def test_benchmark_per_step_cost(make_manager, db, monkeypatch, record_property):
+    mgr = make_manager()
+    monkeypatch.setattr(mgr, "HISTORY_DB_FLUSH_INTERVAL", 3600)
+    output = "observation " * 40
+
+    await mgr.add_execution_task_step("t1", _step("c0", output))
+    # time a window of 200 appends at each history length
+    step, window = 1, 200
+    for checkpoint in (200, 2000, 4000):
+        while step < checkpoint - window:
+            await mgr.add_execution_task_step("t1", _step(f"c{step}", output))
+            step += 1
+        start = time.perf_counter()
+        while step < checkpoint:
+            await mgr.add_execution_task_step("t1", _step(f"c{step}", output))
+            step += 1
+        per_step = (time.perf_counter() - start) / (window - 1 if checkpoint == window else window)
+        record_property(f"history_{checkpoint}_us_per_step", round(per_step * 1e6, 1))
+    # bytes the old read-modify-write moved: read + write of the whole task per step
+    frame_bytes = len(pickle.dumps(_step("c0", output).model_dump()))
+    record_property("appended_mb", round(step * frame_bytes / 1e6, 1))
+    record_property("legacy_rewrite_gb", round(sum(2 * n * frame_bytes for n in range(1, step + 1)) / 1e9, 1))
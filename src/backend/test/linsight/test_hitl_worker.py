@@ -11,7 +11,7 @@ Covers the worker-side plumbing for LangGraph ``interrupt()`` park-and-release:
   TB-5  queue position semantics: resume items are not counted in other users'
         queue position.
 
-Redis is mocked (no real Redis / no fakeredis dependency). The checkpointer
+Redis is an in-memory fakeredis server behind the real RedisClient. The checkpointer
 is exercised conceptually via ``make_checkpointer`` being swappable for
 ``InMemorySaver`` in resume agent construction (TB-2).
 """
@@ -19,12 +19,16 @@ is exercised conceptually via ``make_checkpointer`` being swappable for
 from __future__ import annotations
 
 import asyncio
-import pickle
+import sys
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from bisheng.linsight.worker import (
+# The real client is needed here; the conftest may have pre-mocked it.
+if isinstance(sys.modules.get("bisheng.core.cache.redis_conn"), MagicMock):
+    sys.modules.pop("bisheng.core.cache.redis_conn")
+from bisheng.core.cache.redis_conn import RedisClient  # noqa: E402
+from bisheng.linsight.worker import (  # noqa: E402
     LinsightQueue,
     ScheduleCenterProcess,
     encode_queue_item,
@@ -33,52 +37,14 @@ from bisheng.linsight.worker import (
 
 
 # ---------------------------------------------------------------------------
-# Fake Redis backing a single list, mimicking RedisClient list semantics:
-# rpush/lpush store pickled values, blpop/lpop/lrange unpickle.
+# The real RedisClient over an in-memory fakeredis server.
 # ---------------------------------------------------------------------------
-class _FakeRedisList:
-    def __init__(self):
-        self.lists: dict[str, list] = {}
-
-    async def arpush(self, key, value, expiration=3600):
-        value = pickle.dumps(value) if not isinstance(value, bytes) else value
-        self.lists.setdefault(key, []).append(value)
-
-    async def alpush(self, key, value, expiration=3600):
-        # NOTE: RedisClient.alpush does NOT pickle; callers must pass bytes.
-        self.lists.setdefault(key, []).insert(0, value)
-
-    async def ablpop(self, key, timeout=0):
-        items = self.lists.get(key, [])
-        if not items:
-            return None
-        raw = items.pop(0)
-        return pickle.loads(raw) if raw else None
-
-    async def alpop(self, key, count=None):
-        items = self.lists.get(key, [])
-        if not items:
-            return None
-        return items.pop(0)
-
-    async def alrange(self, key, start=0, end=-1):
-        items = self.lists.get(key, [])
-        return [pickle.loads(v) for v in items if v is not None]
-
-    async def allen(self, key):
-        return len(self.lists.get(key, []))
-
-    async def alrem(self, key, value):
-        value = pickle.dumps(value) if not isinstance(value, bytes) else value
-        items = self.lists.get(key, [])
-        before = len(items)
-        self.lists[key] = [v for v in items if v != value]
-        return before - len(self.lists[key])
-
-
 @pytest.fixture()
 def fake_redis():
-    return _FakeRedisList()
+    fakeredis = pytest.importorskip("fakeredis")
+    redis_client = RedisClient("redis://127.0.0.1:6379/0")
+    redis_client.async_connection = fakeredis.FakeAsyncRedis()
+    return redis_client
 
 
 @pytest.fixture()
@@ -0,0 +1,248 @@
+"""Indexed Linsight queue and checkpoint pending writes.
+
+LinsightQueue keeps its items in sorted sets, so a position poll is a ZRANK and
+a removal a ZREM however long the queue is; items left in the list of the
+previous release are still served first, and a put racing a pop queues a new
+item instead of losing its payload. PlainRedisCheckpointer lists a
+checkpoint's pending writes in a per-checkpoint index instead of scanning the
+keyspace, and still reads checkpoints written before the index existed.
+
+Position polls and removals are checked by the commands they send. The opt-in
+load benchmark queues 10k tasks. It runs on an in-memory fakeredis server, or
+against a local Redis when BISHENG_TEST_REDIS_URL is set (keys live under a
+throwaway namespace and are deleted afterwards).
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+fakeredis = pytest.importorskip("fakeredis")
+
+# The real client is needed here; the conftest may have pre-mocked it.
+if isinstance(sys.modules.get("bisheng.core.cache.redis_conn"), MagicMock):
+    sys.modules.pop("bisheng.core.cache.redis_conn")
+from bisheng.core.cache.redis_conn import RedisClient  # noqa: E402
+from bisheng.linsight.domain.services.checkpointer import PlainRedisCheckpointer  # noqa: E402
+from bisheng.linsight.worker import LinsightQueue, encode_queue_item  # noqa: E402
+
+
+@pytest.fixture
+def redis_client():
+    redis_client = RedisClient("redis://127.0.0.1:6379/0")
+    redis_client.async_connection = fakeredis.FakeAsyncRedis()
+    return redis_client
+
+
+@pytest.fixture
+def queue(redis_client):
+    return LinsightQueue("queue", namespace="linsight", redis=redis_client)
+
+
+async def test_queue_order_lanes_and_duplicates(queue):
+    await queue.put(encode_queue_item("a"))
+    await queue.put(encode_queue_item("b"))
+    await queue.put_head(encode_queue_item("r1", resume=True, user_input="1"))
+    await queue.put_head(encode_queue_item("r2", resume=True, user_input="2"))
+    # enqueuing a session again keeps its place and takes the latest payload
+    await queue.put(encode_queue_item("a", continue_question="again"))
+
+    assert await queue.qsize() == 4
+    assert await queue.index("a") == 1
+    popped = [await queue.get_nowait() for _ in range(5)]
+    assert [item["session_version_id"] for item in popped[:4]] == ["r2", "r1", "a", "b"]
+    assert popped[2]["continue_question"] == "again"
+    assert popped[4] is None
+
+
+async def test_get_wait_times_out_and_wakes_up(queue):
+    start = time.monotonic()
+    assert await queue.get_wait(timeout=0.2) is None
+    assert time.monotonic() - start < 2
+
+    waiter = asyncio.create_task(queue.get_wait(timeout=5))
+    await asyncio.sleep(0.05)
+    await queue.put(encode_queue_item("late"))
+    assert (await waiter)["session_version_id"] == "late"
+
+
+async def test_legacy_list_is_served_first(queue, redis_client):
+    # left behind by the list-based queue of the previous release
+    await redis_client.arpush("linsight:queue", encode_queue_item("old-1"))
+    await redis_client.arpush("linsight:queue", "old-2")
+    await queue.put(encode_queue_item("new-1"))
+
+    assert await queue.qsize() == 3
+    assert await queue.index("new-1") == 3
+    await queue.remove("old-1")
+    assert await queue.index("new-1") == 2
+    assert await queue.get_wait(timeout=1) == "old-2"
+    assert (await queue.get_wait(timeout=1))["session_version_id"] == "new-1"
+
+
+async def test_removed_item_is_not_served(queue):
+    await queue.put(encode_queue_item("a"))
+    await queue.put_head(encode_queue_item("a", resume=True))
+    await queue.put(encode_queue_item("b"))
+
+    await queue.remove("a")
+
+    assert await queue.index("b") == 1
+    assert (await queue.get_wait(timeout=1))["session_version_id"] == "b"
+    assert await queue.qsize() == 0
+
+
+async def test_put_between_pop_and_payload_fetch_queues_a_new_item(queue, monkeypatch):
+    await queue.put(encode_queue_item("a", user_input="first"))
+    take = queue._take
+
+    async def put_then_take(*popped):
+        await queue.put(encode_queue_item("a", user_input="second"))
+        return await take(*popped)
+
+    monkeypatch.setattr(queue, "_take", put_then_take)
+    first = await queue.get_wait(timeout=1)
+    monkeypatch.undo()
+
+    assert first["user_input"] == "first"
+    assert (await queue.get_wait(timeout=1))["user_input"] == "second"
+    assert await queue.qsize() == 0
+
+
+@pytest.fixture
+def checkpointer(redis_client, monkeypatch):
+    saver = PlainRedisCheckpointer(ttl_seconds=60)
+
+    async def get_client():
+        return redis_client
+
+    monkeypatch.setattr(saver, "_get_redis_client", get_client)
+    return saver
+
+
+def _config(checkpoint_id=None):
+    configurable = {"thread_id": "thread-1", "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+async def test_pending_writes_are_read_from_the_index(checkpointer, redis_client, monkeypatch):
+    checkpoint = empty_checkpoint()
+    config = await checkpointer.aput(_config(), checkpoint, {"step": 1}, {})
+    await checkpointer.aput_writes(config, [("messages", "hello"), ("todos", [1, 2])], task_id="task:a")
+    await checkpointer.aput_writes(config, [("__interrupt__", {"q": "?"})], task_id="task:b")
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("pending writes must not be found with SCAN")
+
+    monkeypatch.setattr(redis_client.async_connection, "scan_iter", no_scan)
+    tup = await checkpointer.aget_tuple(_config())
+
+    assert tup.checkpoint["id"] == checkpoint["id"]
+    assert sorted(tup.pending_writes) == sorted([
+        ("task:a", "messages", "hello"), ("task:a", "todos", [1, 2]), ("task:b", "__interrupt__", {"q": "?"}),
+    ])
+    assert len([t async for t in checkpointer.alist(_config())]) == 1
+
+
+async def test_checkpoints_without_index_are_scanned(checkpointer, redis_client):
+    checkpoint = empty_checkpoint()
+    config = await checkpointer.aput(_config(), checkpoint, {"step": 1}, {})
+    await checkpointer.aput_writes(config, [("messages", "hello")], task_id="task:a")
+    # what the previous release left behind: no index, no widx marker
+    conn = redis_client.async_connection
+    await conn.delete(checkpointer._write_idx_key("thread-1", "", checkpoint["id"]))
+    await conn.hdel(checkpointer._ckpt_key("thread-1", "", checkpoint["id"]), "widx")
+
+    tup = await checkpointer.aget_tuple(_config(checkpoint["id"]))
+
+    assert tup.pending_writes == [("task:a", "messages", "hello")]
+
+
+@pytest.fixture
+async def load_queue():
+    url = os.environ.get("BISHENG_TEST_REDIS_URL")
+    if not url:
+        redis_client = RedisClient("redis://127.0.0.1:6379/0")
+        redis_client.async_connection = fakeredis.FakeAsyncRedis()
+        yield LinsightQueue("queue", namespace="linsight", redis=redis_client)
+        return
+    import redis.asyncio
+
+    redis_client = RedisClient(url)
+    redis_client.async_connection = redis.asyncio.Redis.from_url(url)
+    namespace = f"linsight-load-{uuid.uuid4().hex}"
+    yield LinsightQueue("queue", namespace=namespace, redis=redis_client)
+    keys = await redis_client.async_connection.keys(f"*{namespace}*")
+    if keys:
+        await redis_client.async_connection.delete(*keys)
+    await redis_client.async_connection.aclose()
+
+
+async def test_position_polls_and_removals_do_not_scan_the_queue(queue, redis_commands):
+    total = 2000
+    for i in range(total):
+        await queue.put(encode_queue_item(f"sv-{i:05d}"))
+    await queue.put_head(encode_queue_item("sv-resume", resume=True, user_input="ok"))
+
+    def commands():
+        sent = [name for name, _ in redis_commands]
+        redis_commands.clear()
+        return sent
+
+    polls, removals = [], []
+    # the first removal also loads its script
+    await queue.remove("sv-missing")
+    commands()
+    for position in (1, total // 2, total):
+        assert await queue.index(f"sv-{position - 1:05d}") == position
+        polls.append(commands())
+    for position in (1, total // 2, total):
+        await queue.remove(f"sv-{position - 1:05d}")
+        removals.append(commands())
+
+    # the same fixed commands at the head and at the tail, never a read of the whole queue
+    assert polls == [["LLEN", "ZRANK"]] * 3
+    assert removals[0] == removals[1] == removals[2]
+    assert not {"LRANGE", "ZRANGE", "HGETALL", "SCAN"} & set(removals[0])
+    assert await queue.qsize() == total - 3 + 1
+    assert await queue.index(f"sv-{total - 2:05d}") == total - 3
+    assert (await queue.get_nowait())["session_version_id"] == "sv-resume"
+    assert (await queue.get_nowait())["session_version_id"] == "sv-00001"
+
+
+@pytest.mark.benchmark
+async def test_benchmark_10k_queued_tasks(load_queue, record_property):
+    total = 10_000
+    for i in range(total):
+        await load_queue.put(encode_queue_item(f"sv-{i:05d}"))
+    await load_queue.put_head(encode_queue_item("sv-resume", resume=True, user_input="ok"))
+
+    for position in (1, total // 2, total):
+        start = time.perf_counter()
+        for _ in range(50):
+            assert await load_queue.index(f"sv-{position - 1:05d}") == position
+        record_property(f"index_at_{position}_us", round((time.perf_counter() - start) / 50 * 1e6, 1))
+
+    start = time.perf_counter()
+    for i in range(0, total, 10):
+        await load_queue.remove(f"sv-{i:05d}")
+    record_property("remove_us", round((time.perf_counter() - start) / (total // 10) * 1e6, 1))
+
+    # the list-based lookup this replaces: LRANGE and decode the whole queue per poll
+    db = load_queue._LinsightQueue__db
+    legacy_key = f"{load_queue.key}:bench-list"
+    await db.async_connection.rpush(legacy_key, *[db.encode(legacy_key, encode_queue_item(f"sv-{i:05d}"))
+                                                  for i in range(total)])
+    start = time.perf_counter()
+    items = await db.alrange(legacy_key)
+    assert next(i for i, item in enumerate(items) if item["session_version_id"] == f"sv-{total - 1:05d}") == total - 1
+    record_property(f"list_index_at_{total}_us", round((time.perf_counter() - start) * 1e6, 1))
+    await db.async_connection.delete(legacy_key)
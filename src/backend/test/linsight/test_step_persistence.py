@@ -12,8 +12,11 @@ Two defects:
 """
 
 import asyncio
+import sys
 from unittest.mock import AsyncMock, MagicMock
 
+import pytest
+
 from bisheng.linsight.domain.models.linsight_execute_task import (
     ExecuteTaskStatusEnum,
     ExecuteTaskTypeEnum,
@@ -21,24 +24,34 @@ from bisheng.linsight.domain.models.linsight_execute_task import (
 )
 from bisheng_langchain.linsight.event import ExecStep, NeedUserInput
 
+fakeredis = pytest.importorskip("fakeredis")
+
+# The real client is needed here; the conftest may have pre-mocked it.
+if isinstance(sys.modules.get("bisheng.core.cache.redis_conn"), MagicMock):
+    sys.modules.pop("bisheng.core.cache.redis_conn")
+from bisheng.core.cache.redis_conn import RedisClient  # noqa: E402
+
+
+def _redis_client() -> RedisClient:
+    redis_client = RedisClient("redis://127.0.0.1:6379/0")
+    redis_client.async_connection = fakeredis.FakeAsyncRedis()
+    return redis_client
+
 
 def _make_manager(monkeypatch):
-    """Build a LinsightStateMessageManager with a stateful in-memory history.
+    """Build a LinsightStateMessageManager over an in-memory Redis and a stubbed DB row.
 
-    get_execution_task reads from / update_by_id writes to a shared dict so the
-    accumulation across add_execution_task_step calls is observable, while Redis
-    writes are stubbed.
+    Steps land in the task's Redis step log (the every-step source of truth);
+    get_execution_task folds them back into history. `store["history"]` is the
+    DB column and `store["db_writes"]` counts the (batched) DB history rewrites,
+    so a test can assert the write coalescing.
     """
     from bisheng.linsight.domain.services import state_message_manager as smm
 
     monkeypatch.setattr(smm, "get_redis_client_sync", lambda: MagicMock())
     mgr = smm.LinsightStateMessageManager("svid")
-    mgr._redis_client = MagicMock()
+    mgr._redis_client = _redis_client()
 
-    # `store["history"]` mirrors the EVERY-STEP source of truth (Redis): the real
-    # get_execution_task reads Redis to accumulate the next step, so aset writes it
-    # each call. `store["db_writes"]` counts the (now throttled) DB update_by_id
-    # calls, so a test can assert the thinking-delta write coalescing.
     store = {"history": [], "db_writes": 0}
     task = LinsightExecuteTask(
         id="t1",
@@ -48,27 +61,24 @@ def _make_manager(monkeypatch):
         history=[],
     )
 
-    async def fake_aset(key, value, expiration=None):
-        if isinstance(value, dict) and "history" in value:
-            store["history"] = value["history"]
-
-    mgr._redis_client.aset = AsyncMock(side_effect=fake_aset)
-
-    async def fake_get(task_id):
-        task.history = list(store["history"])
-        return task
+    async def fake_get_by_id(task_id):
+        return task.model_copy(update={"history": list(store["history"])}) if task_id == "t1" else None
 
     async def fake_update(task_id, **kwargs):
         if "history" in kwargs:
             store["history"] = kwargs["history"]
             store["db_writes"] += 1
-        return task
+        return task.model_copy(update={"history": list(store["history"]), **kwargs})
 
-    mgr.get_execution_task = fake_get
+    monkeypatch.setattr(smm.LinsightExecuteTaskDao, "get_by_id", fake_get_by_id)
     monkeypatch.setattr(smm.LinsightExecuteTaskDao, "update_by_id", fake_update)
     return mgr, store
 
 
+async def _history(mgr, task_id="t1"):
+    return (await mgr.get_execution_task(task_id)).history
+
+
 def _thinking(call_id, text):
     return ExecStep(
         task_id="t1",
@@ -101,9 +111,10 @@ async def test_thinking_deltas_collapse_to_one_entry(monkeypatch):
     await mgr.add_execution_task_step("t1", _thinking("c1", "world"))
     await mgr.add_execution_task_step("t1", _thinking("c1", "!"))
 
-    assert len(store["history"]) == 1
-    assert store["history"][0]["output"] == "Hello world!"
-    assert store["history"][0]["step_type"] == "thinking"
+    history = await _history(mgr)
+    assert len(history) == 1
+    assert history[0]["output"] == "Hello world!"
+    assert history[0]["step_type"] == "thinking"
 
 
 async def test_tool_start_end_collapse_to_one_end_frame(monkeypatch):
@@ -112,8 +123,9 @@ async def test_tool_start_end_collapse_to_one_end_frame(monkeypatch):
     await mgr.add_execution_task_step("t1", _tool("c2", "start", params={"a": 1}))
     await mgr.add_execution_task_step("t1", _tool("c2", "end", output="result", params={"a": 1}))
 
-    assert len(store["history"]) == 1
-    entry = store["history"][0]
+    history = await _history(mgr)
+    assert len(history) == 1
+    entry = history[0]
     assert entry["status"] == "end"
     assert entry["output"] == "result"
     assert entry["params"] == {"a": 1}
@@ -126,7 +138,7 @@ async def test_distinct_call_ids_kept_separate(monkeypatch):
     await mgr.add_execution_task_step("t1", _tool("c2", "start"))
     await mgr.add_execution_task_step("t1", _tool("c2", "end", output="r"))
 
-    assert len(store["history"]) == 2
+    assert len(await _history(mgr)) == 2
 
 
 async def test_need_user_input_without_call_id_appends(monkeypatch):
@@ -136,14 +148,17 @@ async def test_need_user_input_without_call_id_appends(monkeypatch):
     nui = NeedUserInput(task_id="t1", call_reason="please clarify", step_type="call_user_input")
     await mgr.add_execution_task_step("t1", nui)
 
-    assert len(store["history"]) == 2
+    history = await _history(mgr)
+    assert len(history) == 2
     # set_user_input relies on the call_user_input step being history[-1].
-    assert store["history"][-1]["step_type"] == "call_user_input"
+    assert history[-1]["step_type"] == "call_user_input"
+    # the task parks here: the DB already holds the step for the resume
+    assert store["history"] == history
 
 
 # ---------------------------------------------------------------------------
-# DB write-amplification guard (DM8 -7120 incident): thinking token-delta DB
-# writes are coalesced; everything else flushes immediately.
+# DB write-amplification guard (DM8 -7120 incident): history DB writes are
+# batched per interval; status updates and parking flush immediately.
 # ---------------------------------------------------------------------------
 
 
@@ -152,38 +167,45 @@ async def test_thinking_deltas_coalesce_db_writes(monkeypatch):
 
     # 3 deltas of ONE thinking segment, streamed back-to-back (well within the
     # flush interval).
-    await mgr.add_execution_task_step("t1", _thinking("c1", "Hel"))  # first delta -> DB flush
-    await mgr.add_execution_task_step("t1", _thinking("c1", "lo "))  # merge -> throttled
-    await mgr.add_execution_task_step("t1", _thinking("c1", "world"))  # merge -> throttled
-
-    # Redis (every-step truth) accumulated the full text...
-    assert store["history"][0]["output"] == "Hello world"
-    assert mgr._redis_client.aset.await_count == 3
-    # ...but the DB was rewritten ONCE (the first, appended delta), not per token.
+    await mgr.add_execution_task_step("t1", _thinking("c1", "Hel"))  # first step -> DB flush
+    await mgr.add_execution_task_step("t1", _thinking("c1", "lo "))  # throttled
+    await mgr.add_execution_task_step("t1", _thinking("c1", "world"))  # throttled
+
+    # readers see the full text, the throttled deltas wait to be appended as one frame...
+    assert (await _history(mgr))[0]["output"] == "Hello world"
+    assert await mgr._redis_client.async_connection.llen("linsight_tasks:svid:execution_steps:t1") == 1
+    # ...but the DB was rewritten ONCE, not per token.
     assert store["db_writes"] == 1
 
 
-async def test_tool_frames_always_flush_db(monkeypatch):
+async def test_status_update_carries_pending_steps(monkeypatch):
     mgr, store = _make_manager(monkeypatch)
 
-    # A tool start + end (end merges into start by call_id) must BOTH persist to
-    # the DB immediately — tool/output frames are never throttled.
     await mgr.add_execution_task_step("t1", _tool("c2", "start"))
     await mgr.add_execution_task_step("t1", _tool("c2", "end", output="r"))
+    assert store["db_writes"] == 1
+
+    # the end frame reaches the DB with the status change, in the same UPDATE
+    task_data = await mgr.update_execution_task_status("t1", status=ExecuteTaskStatusEnum.SUCCESS)
 
     assert store["db_writes"] == 2
+    assert store["history"][0]["output"] == "r"
+    assert task_data["history"] == store["history"]
+    # the header update leaves the step log alone
+    assert (await mgr.get_execution_task("t1")).status == ExecuteTaskStatusEnum.SUCCESS
+    assert (await _history(mgr))[0]["status"] == "end"
 
 
 async def test_thinking_delta_flushes_after_interval(monkeypatch):
     mgr, store = _make_manager(monkeypatch)
 
-    await mgr.add_execution_task_step("t1", _thinking("c1", "a"))  # first delta -> flush (db=1)
-    await mgr.add_execution_task_step("t1", _thinking("c1", "b"))  # merge -> throttled (db=1)
+    await mgr.add_execution_task_step("t1", _thinking("c1", "a"))  # first step -> flush (db=1)
+    await mgr.add_execution_task_step("t1", _thinking("c1", "b"))  # throttled (db=1)
     assert store["db_writes"] == 1
 
     # Simulate the flush window elapsing: a long thinking segment still persists
     # periodically so a mid-run reload isn't stale and nothing is lost.
-    elapsed = asyncio.get_event_loop().time() - mgr.THINKING_DB_FLUSH_INTERVAL - 1
+    elapsed = asyncio.get_event_loop().time() - mgr.HISTORY_DB_FLUSH_INTERVAL - 1
     mgr._last_history_db_flush["t1"] = elapsed
     await mgr.add_execution_task_step("t1", _thinking("c1", "c"))  # interval passed -> flush (db=2)
 
@@ -191,6 +213,20 @@ async def test_thinking_delta_flushes_after_interval(monkeypatch):
     assert store["history"][0]["output"] == "abc"
 
 
+async def test_run_end_flushes_pending_steps(monkeypatch):
+    mgr, store = _make_manager(monkeypatch)
+
+    await mgr.add_execution_task_step("t1", _thinking("c1", "a"))
+    await mgr.add_execution_task_step("t1", _tool("c2", "end", output="r"))
+    assert len(store["history"]) == 1
+
+    await mgr.flush_execution_histories()
+    await mgr.flush_execution_histories()
+
+    assert store["db_writes"] == 2
+    assert [entry["call_id"] for entry in store["history"]] == ["c1", "c2"]
+
+
 # ---------------------------------------------------------------------------
 # Problem 2: session-level pseudo task row
 # ---------------------------------------------------------------------------
@@ -416,8 +452,7 @@ def _make_answer_manager(monkeypatch, history, task_data):
 
     monkeypatch.setattr(smm, "get_redis_client_sync", lambda: MagicMock())
     mgr = smm.LinsightStateMessageManager("svid")
-    mgr._redis_client = MagicMock()
-    mgr._redis_client.aset = AsyncMock()
+    mgr._redis_client = _redis_client()
 
     store = {"history": list(history), "task_data": dict(task_data)}
     task = LinsightExecuteTask(
@@ -429,10 +464,9 @@ def _make_answer_manager(monkeypatch, history, task_data):
         history=list(history),
     )
 
-    async def fake_get(task_id):
-        task.history = [dict(h) for h in store["history"]]
-        task.task_data = dict(store["task_data"])
-        return task
+    async def fake_get_by_id(task_id):
+        return task.model_copy(update={"history": [dict(h) for h in store["history"]],
+                                       "task_data": dict(store["task_data"])})
 
     async def fake_update(task_id, **kwargs):
         if "history" in kwargs:
@@ -441,7 +475,7 @@ def _make_answer_manager(monkeypatch, history, task_data):
             store["task_data"] = kwargs["task_data"]
         return task
 
-    mgr.get_execution_task = fake_get
+    monkeypatch.setattr(smm.LinsightExecuteTaskDao, "get_by_id", fake_get_by_id)
     monkeypatch.setattr(smm.LinsightExecuteTaskDao, "update_by_id", fake_update)
     return mgr, store
 
@@ -0,0 +1,219 @@
+"""Workspace index and etag-validated cache of the MinIO ``WorkspaceBackend``.
+
+glob resolves against a per-task index (path, size, etag, mtime) built from one
+listing and kept in sync by the backend's writes; grep serves files from the
+local cache when the cached bytes match the indexed etag and downloads only
+files that are missing or changed. An in-memory object store counts the LIST and
+GET requests each tool call makes.
+
+The opt-in benchmark reports glob/grep latency against workspace size, cold
+(first call) and warm (agent loop calling the tool again), with a small
+simulated round trip per object-store request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from bisheng.linsight.domain.services.workspace_backend import WORKSPACE_PREFIX, WorkspaceBackend
+
+
+class CountingMinio:
+    """In-memory ``MinioStorage`` stand-in with real etags and request counters."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.bucket = "bisheng"
+        self.latency = latency
+        self.store: dict[str, tuple[bytes, str, datetime]] = {}
+        self.calls = {"list": 0, "get": 0, "put": 0}
+        self.minio_client_sync = self
+
+    def put(self, object_name: str, data: bytes, etag: str | None = None) -> None:
+        """Write behind the backend's back (another writer, a multipart upload)."""
+        self.store[object_name] = (data, etag or hashlib.md5(data).hexdigest(), datetime.now(timezone.utc))
+
+    def _round_trip(self, op: str) -> None:
+        self.calls[op] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def list_objects(self, bucket_name, prefix="", recursive=True):
+        self._round_trip("list")
+        for name, (data, etag, modified) in sorted(self.store.items()):
+            if name.startswith(prefix):
+                yield _Object(name, len(data), f'"{etag}"', modified)
+
+    def get_object_sync(self, bucket_name=None, object_name=None):
+        self._round_trip("get")
+        item = self.store.get(object_name)
+        return item[0] if item else None
+
+    def put_object_sync(self, *, bucket_name=None, object_name, file, **kwargs):
+        self._round_trip("put")
+        self.put(object_name, bytes(file))
+
+    def reset(self) -> None:
+        self.calls = {"list": 0, "get": 0, "put": 0}
+
+
+class _Object:
+    def __init__(self, object_name: str, size: int, etag: str, last_modified: datetime) -> None:
+        self.object_name = object_name
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.is_dir = False
+
+
+def _key(rel: str) -> str:
+    return f"{WORKSPACE_PREFIX}/sv1/{rel}"
+
+
+@pytest.fixture()
+def minio():
+    return CountingMinio()
+
+
+@pytest.fixture()
+def backend(minio, tmp_path):
+    return WorkspaceBackend(svid="sv1", minio=minio, file_dir=str(tmp_path / "cache"))
+
+
+def _seed(minio: CountingMinio, count: int) -> None:
+    for i in range(count):
+        minio.put(_key(f"scratch/note_{i:04d}.md"), f"# note {i}\nbody line\nneedle-{i % 7}\n".encode())
+
+
+def test_glob_resolves_against_the_index(backend, minio):
+    _seed(minio, 5)
+    assert len(backend.glob("*.md").matches) == 5
+    minio.reset()
+
+    backend.write("/output/report.md", "done")
+    matches = backend.glob("*.md", path="/output").matches
+
+    assert matches == [{"path": "/output/report.md", "is_dir": False, "size": 4}]
+    assert len(backend.glob("scratch/note_000?.md").matches) == 5
+    assert minio.calls["list"] == 0
+
+
+def test_grep_downloads_only_changed_files(backend, minio):
+    _seed(minio, 20)
+    assert len(backend.grep("needle-3").matches) == 3
+    assert minio.calls["get"] == 20
+    minio.reset()
+
+    assert len(backend.grep("needle-3").matches) == 3
+    assert minio.calls == {"list": 0, "get": 0, "put": 0}
+
+    # another writer changes one file; the next listing picks it up
+    minio.put(_key("scratch/note_0000.md"), b"needle-3 rewritten\n")
+    backend.INDEX_REFRESH_INTERVAL = 0
+    matches = backend.grep("needle-3").matches
+
+    assert matches[0]["path"] == "/scratch/note_0000.md"
+    assert matches[0]["text"] == "needle-3 rewritten"
+    assert minio.calls["list"] == 1
+    assert minio.calls["get"] == 1
+
+
+def test_own_writes_never_refetch(backend, minio):
+    backend.write("/scratch/a.md", "alpha needle")
+    backend.upload_files([("/scratch/b.md", b"beta needle")])
+    backend.edit("/scratch/a.md", "alpha", "gamma")
+    minio.reset()
+
+    assert [m["text"] for m in backend.grep("needle").matches] == ["gamma needle", "beta needle"]
+    assert minio.calls["get"] == 0
+
+
+def test_cache_left_by_an_earlier_run_is_validated_by_content(minio, tmp_path):
+    _seed(minio, 10)
+    first = WorkspaceBackend(svid="sv1", minio=minio, file_dir=str(tmp_path / "cache"))
+    first.grep("needle")
+    minio.reset()
+
+    resumed = WorkspaceBackend(svid="sv1", minio=minio, file_dir=str(tmp_path / "cache"))
+    # a stale local copy from the earlier run must not be served
+    (tmp_path / "cache" / "scratch" / "note_0001.md").write_bytes(b"stale needle-1\n")
+
+    texts = [m["text"] for m in resumed.grep("needle-1").matches]
+
+    assert texts == ["needle-1", "needle-1"]
+    assert minio.calls == {"list": 1, "get": 1, "put": 0}
+
+
+def test_read_and_edit_see_changes_behind_the_cache(backend, minio):
+    backend.write("/output/report.md", "v1")
+    backend.glob("*")
+    minio.put(_key("output/report.md"), b"v2 from the sandbox")
+    backend.ls("/output")
+
+    assert backend.read("/output/report.md").file_data["content"] == "v2 from the sandbox"
+    assert backend.edit("/output/report.md", "v2", "v3").error is None
+    assert minio.store[_key("output/report.md")][0] == b"v3 from the sandbox"
+
+
+def test_deleted_and_added_objects(backend, minio):
+    _seed(minio, 3)
+    backend.glob("*")
+    del minio.store[_key("scratch/note_0002.md")]
+    minio.put(_key("uploads/brief.md"), b"needle-2 in an attachment")
+
+    # until the next listing the deleted file is skipped, the new one unseen
+    assert backend.grep("needle-2").matches == []
+    assert "/scratch/note_0002.md" not in {m["path"] for m in backend.glob("*").matches}
+
+    backend.INDEX_REFRESH_INTERVAL = 0
+    assert [m["path"] for m in backend.grep("needle-2").matches] == ["/uploads/brief.md"]
+
+
+def test_etag_that_is_not_the_content_md5_is_fetched_once(backend, minio):
+    minio.put(_key("output/big.bin"), b"needle in a multipart upload", etag="9b2cf535f27731c974343645a3985328-3")
+    backend.INDEX_REFRESH_INTERVAL = 0
+
+    for _ in range(3):
+        assert len(backend.grep("needle").matches) == 1
+
+    assert minio.calls["get"] == 1
+
+
+def _tool_calls(tmp_path, size: int, latency: float = 0.0):
+    """Cold grep, then 10 warm glob+grep rounds; returns (cold seconds, cold requests, warm seconds, warm requests)"""
+    minio = CountingMinio(latency=latency)
+    _seed(minio, size)
+    backend = WorkspaceBackend(svid="sv1", minio=minio, file_dir=str(tmp_path / f"cache-{size}"))
+
+    start = time.perf_counter()
+    backend.grep("needle-3")
+    cold = time.perf_counter() - start
+    cold_calls = dict(minio.calls)
+    minio.reset()
+
+    start = time.perf_counter()
+    for _ in range(10):
+        backend.glob("*.md", path="/scratch")
+        backend.grep("needle-3", glob="*.md")
+    warm = (time.perf_counter() - start) / 10
+    return cold, cold_calls, warm, dict(minio.calls)
+
+
+@pytest.mark.parametrize("size", [50, 800])
+def test_requests_do_not_grow_with_tool_calls(tmp_path, size):
+    _, cold_calls, _, warm_calls = _tool_calls(tmp_path, size)
+
+    # the listing-per-call backend issued a LIST per glob and per grep
+    assert cold_calls["list"] == 1 and cold_calls["get"] == size
+    assert warm_calls == {"list": 0, "get": 0, "put": 0}
+
+
+@pytest.mark.benchmark
+def test_benchmark_tool_latency_against_workspace_size(tmp_path, record_property):
+    for size in (50, 200, 800):
+        cold, _, warm, _ = _tool_calls(tmp_path, size, latency=0.0002)
+        record_property(f"{size}_files_cold_grep_ms", round(cold * 1e3, 1))
+        record_property(f"{size}_files_warm_glob_grep_ms", round(warm * 1e3, 2))
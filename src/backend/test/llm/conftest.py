@@ -0,0 +1,29 @@
+import pytest
+
+from bisheng.core.context.tenant import current_tenant_id
+from bisheng.llm.domain.services import usage_writer as writer_module
+from bisheng.llm.domain.services.usage_writer import LLMUsageWriter
+
+
+class _DiscardingUsageWriter(LLMUsageWriter):
+    """Queues like the process-wide writer but never reaches the database"""
+
+    def _send_batch(self, batch) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _no_tenant_context():
+    # tests elsewhere may leave a tenant set in this context
+    token = current_tenant_id.set(None)
+    yield
+    current_tenant_id.reset(token)
+
+
+@pytest.fixture(autouse=True)
+def _usage_writer(monkeypatch):
+    # the process-wide writer would start a thread that writes to MySQL at interpreter exit
+    writer = _DiscardingUsageWriter()
+    monkeypatch.setattr(writer_module, '_writer', writer)
+    yield writer
+    writer.close()
@@ -0,0 +1,77 @@
+"""BishengEmbedding splits large inputs into bounded requests, runs them concurrently
+and normalizes each batch in one step, keeping the input order."""
+
+import threading
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from bisheng.llm.domain.llm.embedding import BishengEmbedding
+
+
+class _FakeEmbeddings(Embeddings):
+    def __init__(self, barrier: threading.Barrier = None):
+        self.barrier = barrier
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.requests.append(list(texts))
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        return [[float(len(text)), 3.0, 4.0] for text in texts]
+
+    def embed_query(self, text):
+        return [0.0, 3.0, 4.0]
+
+
+@pytest.fixture(autouse=True)
+def _skip_model_limit_check(monkeypatch):
+    # quota and telemetry need the model records; only the batching is under test here
+    monkeypatch.setattr(BishengEmbedding, "_embed_batch", BishengEmbedding._embed_batch.__wrapped__)
+    monkeypatch.setattr(BishengEmbedding, "_embed_query", BishengEmbedding._embed_query.__wrapped__)
+    monkeypatch.setattr("bisheng.llm.domain.llm.embedding.get_embedding_cache", lambda: None)
+
+
+def _embedding(fake: _FakeEmbeddings, **kwargs) -> BishengEmbedding:
+    return BishengEmbedding.model_construct(model_id=1, model_name="bge", embeddings=fake, **kwargs)
+
+
+def test_requests_are_bounded_and_order_is_kept():
+    fake = _FakeEmbeddings()
+    texts = ["x" * (i % 7) for i in range(23)]
+
+    vectors = _embedding(fake, batch_size=5, max_concurrency=3).embed_documents(texts)
+
+    assert sorted(len(one) for one in fake.requests) == [3, 5, 5, 5, 5]
+    expected = np.array([[len(text), 3.0, 4.0] for text in texts], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(vectors, expected)
+    assert all(isinstance(value, float) for value in vectors[0])
+
+
+def test_token_budget_splits_requests():
+    fake = _FakeEmbeddings()
+
+    _embedding(fake, batch_size=100, max_batch_tokens=10).embed_documents(["aaaa", "bbbb", "cccc", "d" * 30, "e"])
+
+    assert sorted(map(tuple, fake.requests)) == sorted(
+        [("aaaa", "bbbb"), ("cccc",), ("d" * 30,), ("e",)])
+
+
+def test_batches_run_concurrently():
+    # every request waits until three of them are in flight together
+    fake = _FakeEmbeddings(threading.Barrier(3))
+
+    vectors = _embedding(fake, batch_size=2, max_concurrency=3).embed_documents(["a", "b", "c", "d", "e", "f"])
+
+    assert len(fake.requests) == 3
+    assert len(vectors) == 6
+
+
+def test_query_is_normalized():
+    vector = _embedding(_FakeEmbeddings()).embed_query("q")
+
+    assert vector == pytest.approx([0.0, 0.6, 0.8])
@@ -0,0 +1,114 @@
+"""Embedding cache: only texts not seen before reach the model, for documents and
+queries alike, and the stores stay within max_entries."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from bisheng.core.config.llm import EmbeddingCacheConf
+from bisheng.llm.domain.llm import embedding as embedding_module
+from bisheng.llm.domain.llm.embedding import BishengEmbedding
+from bisheng.llm.domain.llm.embedding_cache import (
+    EmbeddingCache,
+    FileEmbeddingCacheStore,
+    RedisEmbeddingCacheStore,
+)
+
+
+class _Model:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+def _file_cache(tmp_path, **conf) -> EmbeddingCache:
+    return EmbeddingCache(FileEmbeddingCacheStore(EmbeddingCacheConf(file_path=str(tmp_path / "cache.db"), **conf)))
+
+
+def test_only_misses_are_embedded(tmp_path):
+    cache = _file_cache(tmp_path)
+    model = _Model()
+
+    first = cache.embed(1, "bge", ["a", "bb", "a"], model)
+    second = cache.embed(1, "bge", ["bb", "ccc", "a"], model)
+
+    assert model.calls == [["a", "bb"], ["ccc"]]
+    assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert second == [[2.0, 0.5], [3.0, 0.5], [1.0, 0.5]]
+    assert (cache.stats.hits, cache.stats.misses) == (2, 3)
+    assert cache.stats.hit_rate == pytest.approx(0.4)
+
+
+def test_vectors_are_scoped_to_the_model(tmp_path):
+    cache = _file_cache(tmp_path)
+    model = _Model()
+
+    cache.embed(1, "bge", ["a"], model)
+    cache.embed(2, "bge", ["a"], model)
+    cache.embed(1, "bge-m3", ["a"], model)
+
+    assert model.calls == [["a"], ["a"], ["a"]]
+
+
+def test_file_store_evicts_least_recently_used(tmp_path):
+    cache = _file_cache(tmp_path, max_entries=2)
+    model = _Model()
+
+    cache.embed(1, "bge", ["a", "b"], model)
+    cache.embed(1, "bge", ["a"], model)  # a is now more recent than b
+    cache.embed(1, "bge", ["c"], model)
+    model.calls.clear()
+    cache.embed(1, "bge", ["a", "b", "c"], model)
+
+    assert model.calls == [["b"]]
+
+
+def test_redis_store_evicts_beyond_max_entries():
+    fakeredis = pytest.importorskip("fakeredis")
+    connection = fakeredis.FakeStrictRedis()
+    store = RedisEmbeddingCacheStore(EmbeddingCacheConf(max_entries=2), SimpleNamespace(pipeline=connection.pipeline))
+    cache = EmbeddingCache(store)
+    model = _Model()
+
+    cache.embed(1, "bge", ["a", "b"], model)
+    cache.embed(1, "bge", ["a"], model)
+    cache.embed(1, "bge", ["c"], model)
+    model.calls.clear()
+    cache.embed(1, "bge", ["a", "b", "c"], model)
+
+    assert model.calls == [["b"]]
+    assert connection.zcard(store.index_key) == 2
+    assert connection.ttl(EmbeddingCache.make_key(1, "bge", "b")) > 0
+
+
+class _BrokenStore(FileEmbeddingCacheStore):
+    def __init__(self):
+        pass
+
+    def get_many(self, keys):
+        raise ConnectionError("redis down")
+
+    def set_many(self, items):
+        raise ConnectionError("redis down")
+
+
+def test_broken_store_falls_back_to_the_model():
+    model = _Model()
+
+    assert EmbeddingCache(_BrokenStore()).embed(1, "bge", ["a"], model) == [[1.0, 0.5]]
+    assert model.calls == [["a"]]
+
+
+def test_repeated_query_skips_the_model(tmp_path, monkeypatch):
+    cache = _file_cache(tmp_path)
+    monkeypatch.setattr(embedding_module, "get_embedding_cache", lambda: cache)
+    calls = []
+    monkeypatch.setattr(BishengEmbedding, "_embed_query", lambda self, text: calls.append(text) or [0.6, 0.8])
+    embedding = BishengEmbedding.model_construct(model_id=7, model_name="bge")
+
+    assert embedding.embed_query("what is bisheng") == pytest.approx([0.6, 0.8])
+    assert embedding.embed_query("what is bisheng") == pytest.approx([0.6, 0.8])
+    assert calls == ["what is bisheng"]
@@ -1,7 +1,7 @@
 """F017 unit tests — LLMTokenTracker + ModelCallLogger (T16/T17).
 
 Both services obey INV-T13: tenant_id = user leaf (ContextVar), raising
-19504 when unset. Mock DAO.acreate to avoid hitting MySQL.
+19504 when unset. Mock DAO.acreate / the batched writer to avoid hitting MySQL.
 """
 
 from __future__ import annotations
@@ -23,15 +23,15 @@ from bisheng.llm.domain.services.token_tracker import LLMTokenTracker
 async def test_record_usage_stamps_leaf_tenant_and_sums_total():
     captured = {}
 
-    async def _fake_acreate(log):
+    def _fake_add(log):
         captured['log'] = log
-        return log
+        return True
 
     token = current_tenant_id.set(5)
     try:
         with patch(
-            'bisheng.llm.domain.services.token_tracker.LLMTokenLogDao.acreate',
-            side_effect=_fake_acreate,
+            'bisheng.llm.domain.services.usage_writer.LLMUsageWriter.add_token_log',
+            side_effect=_fake_add,
         ):
             await LLMTokenTracker.record_usage(
                 user_id=100, prompt_tokens=30, completion_tokens=12,
@@ -62,15 +62,15 @@ async def test_record_usage_raises_on_missing_context():
 async def test_record_usage_accepts_explicit_total_override():
     captured = {}
 
-    async def _fake_acreate(log):
+    def _fake_add(log):
         captured['log'] = log
-        return log
+        return True
 
     token = current_tenant_id.set(5)
     try:
         with patch(
-            'bisheng.llm.domain.services.token_tracker.LLMTokenLogDao.acreate',
-            side_effect=_fake_acreate,
+            'bisheng.llm.domain.services.usage_writer.LLMUsageWriter.add_token_log',
+            side_effect=_fake_add,
         ):
             await LLMTokenTracker.record_usage(
                 user_id=1, prompt_tokens=10, completion_tokens=5, total_tokens=99,
@@ -0,0 +1,209 @@
+"""LLMUsageWriter: token usage rows go out in multi-row INSERTs, model status is
+written on transitions only, shutdown flushes within a bounded time, and the
+per-day call limit takes one pipelined Redis round trip.
+
+Runs the real DAOs against in-memory SQLite and counts the statements that
+reach the database.
+"""
+
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+from bisheng.core.config.settings import LLMUsageWriterConf
+from bisheng.core.context.tenant import bypass_tenant_filter, current_tenant_id
+from bisheng.llm.domain import utils as llm_utils
+from bisheng.llm.domain.const import LLMModelStatus
+from bisheng.llm.domain.llm.base import BishengBase
+from bisheng.llm.domain.models.llm_server import LLMModel
+from bisheng.llm.domain.models.llm_token_log import LLMTokenLog
+from bisheng.llm.domain.services import usage_writer as writer_module
+from bisheng.llm.domain.services.token_tracker import LLMTokenTracker
+from bisheng.llm.domain.services.usage_writer import LLMUsageWriter
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    LLMTokenLog.__table__.create(engine)
+    LLMModel.__table__.create(engine)
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split(None, 1)[0].upper()
+        if verb in ('INSERT', 'UPDATE'):
+            statements.append(verb)
+
+    @contextmanager
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr('bisheng.llm.domain.models.llm_token_log.get_sync_db_session', _session)
+    monkeypatch.setattr('bisheng.llm.domain.models.llm_server.get_sync_db_session', _session)
+    with Session(engine) as session:
+        session.add(LLMModel(id=1, server_id=1, model_name='m', model_type='llm', status=LLMModelStatus.NORMAL.value))
+        session.commit()
+    statements.clear()
+    yield SimpleNamespace(engine=engine, statements=statements)
+    engine.dispose()
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = LLMUsageWriter(LLMUsageWriterConf(batch_size=500, flush_interval=30, retry_backoff=0.01))
+    monkeypatch.setattr(writer_module, '_writer', writer)
+    yield writer
+    writer.close()
+
+
+def _rows(db) -> list[LLMTokenLog]:
+    # other tests may have registered the global tenant filter
+    with bypass_tenant_filter(), Session(db.engine) as session:
+        return list(session.exec(select(LLMTokenLog).order_by(LLMTokenLog.id)).all())
+
+
+async def _record(calls: int) -> None:
+    token = current_tenant_id.set(5)
+    try:
+        for i in range(calls):
+            await LLMTokenTracker.record_usage(user_id=i, prompt_tokens=10, completion_tokens=i % 7, model_id=1)
+    finally:
+        current_tenant_id.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_token_rows_are_inserted_in_batches(db, writer):
+    await _record(1200)
+    writer.close()
+
+    rows = _rows(db)
+    assert [row.user_id for row in rows] == list(range(1200))
+    assert {row.tenant_id for row in rows} == {5}
+    assert rows[8].total_tokens == 11
+    assert db.statements == ['INSERT'] * 3
+    assert writer.stats.snapshot()['written'] == 1200
+
+
+def test_status_written_on_transitions_only(db, writer):
+    model = SimpleNamespace(model_id=1, model_info=SimpleNamespace(status=LLMModelStatus.NORMAL.value))
+
+    def report(status, remark=''):
+        BishengBase.sync_update_model_status(model, status, remark)
+
+    for _ in range(500):
+        report(LLMModelStatus.NORMAL.value)
+    writer.flush()
+    assert db.statements == []
+
+    report(LLMModelStatus.ERROR.value, 'timeout')
+    for _ in range(500):
+        report(LLMModelStatus.ERROR.value, 'timeout')
+    writer.flush()
+    report(LLMModelStatus.NORMAL.value)
+    report(LLMModelStatus.ERROR.value, 'x' * 600)
+    report(LLMModelStatus.NORMAL.value)
+    writer.flush()
+
+    # ERROR once, then three flips within one flush collapse into their final state
+    assert db.statements == ['UPDATE', 'UPDATE']
+    with bypass_tenant_filter(), Session(db.engine) as session:
+        assert session.get(LLMModel, 1).status == LLMModelStatus.NORMAL.value
+    assert writer.stats.snapshot()['status_skipped'] == 1000
+
+
+def test_status_follows_the_callers_view_of_the_stored_status(db, writer):
+    writer.update_model_status(1, LLMModelStatus.ERROR.value, 'timeout', current=LLMModelStatus.NORMAL.value)
+    writer.flush()
+    # another process set the model back to NORMAL; an instance loaded since reports the next error
+    with bypass_tenant_filter(), Session(db.engine) as session:
+        session.get(LLMModel, 1).status = LLMModelStatus.NORMAL.value
+        session.commit()
+    db.statements.clear()
+
+    assert writer.update_model_status(1, LLMModelStatus.ERROR.value, 'again', current=LLMModelStatus.NORMAL.value)
+    writer.flush()
+
+    assert db.statements == ['UPDATE']
+    with bypass_tenant_filter(), Session(db.engine) as session:
+        assert session.get(LLMModel, 1).remark == 'again'
+    # without a view of its own the caller relies on what this process wrote last
+    assert not writer.update_model_status(1, LLMModelStatus.ERROR.value)
+
+
+def test_close_is_bounded_when_the_database_is_down(writer, monkeypatch):
+    def fail(logs):
+        raise ConnectionError('database unreachable')
+
+    monkeypatch.setattr(writer_module.LLMTokenLogDao, 'create_many', staticmethod(fail))
+    writer.conf = LLMUsageWriterConf(batch_size=500, flush_interval=30, retry_backoff=1, max_retries=5)
+    for i in range(10):
+        writer.add_token_log(LLMTokenLog(tenant_id=1, user_id=i))
+
+    start = time.monotonic()
+    writer.close(timeout=0.5)
+
+    assert time.monotonic() - start < 2
+    assert writer.stats.dropped == 10
+    assert writer.add_token_log(LLMTokenLog(tenant_id=1, user_id=99)) is False
+
+
+def test_limit_check_is_one_pipelined_round_trip(monkeypatch):
+    client = fakeredis.FakeStrictRedis()
+    executed = []
+    redis_client = SimpleNamespace(
+        cluster_nodes=lambda key: None,
+        pipeline=lambda transaction=True: _TrackedPipeline(client.pipeline(transaction=transaction), executed),
+    )
+    monkeypatch.setattr(llm_utils, 'get_redis_client_sync', lambda: redis_client)
+    model = SimpleNamespace(server_info=SimpleNamespace(id=3, name='s', limit_flag=True, limit=2),
+                            model_info=SimpleNamespace(model_name='m'))
+
+    llm_utils.sync_bisheng_model_limit_check(model)
+    llm_utils.sync_bisheng_model_limit_check(model)
+    with pytest.raises(Exception, match='Quota used up'):
+        llm_utils.sync_bisheng_model_limit_check(model)
+
+    assert executed == [2, 2, 2]
+    key = client.keys('model_limit:*')[0]
+    assert 0 < client.ttl(key) <= llm_utils.MODEL_LIMIT_TTL
+
+
+class _TrackedPipeline:
+    def __init__(self, pipe, executed):
+        self._pipe = pipe
+        self._executed = executed
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    def execute(self):
+        self._executed.append(len(self._pipe.command_stack))
+        return self._pipe.execute()
+
+
+@pytest.mark.asyncio
+async def test_1000_calls_take_two_statements(db, writer):
+    await _record(1000)
+    writer.close()
+
+    # one INSERT per call before
+    assert len(db.statements) == 2
+    assert len(_rows(db)) == 1000
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_request_path_cost(db, writer, record_property):
+    start = time.perf_counter()
+    await _record(1000)
+    record_property('us_per_call', round((time.perf_counter() - start) * 1000, 1))
+    writer.close()
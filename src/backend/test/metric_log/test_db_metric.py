@@ -16,7 +16,6 @@ from sqlalchemy.pool import QueuePool
 
 from bisheng.common.services import metric_log as ml
 from bisheng.common.services.metric_log import (
-    DbQueryHistogram,
     maybe_emit_pool_gauge,
     record_db_query,
 )
@@ -55,8 +54,8 @@ def _patch_conf(monkeypatch, conf):
 @pytest.fixture(autouse=True)
 def _reset_db_metric_state():
     """Isolate the per-process histogram + pool sampler singletons between tests."""
-    ml.db_histogram = DbQueryHistogram()
-    ml._pool_sampler = ml._PoolSampler()
+    ml.db_histograms.clear()
+    ml._pool_samplers.clear()
     yield
 
 
@@ -19,7 +19,6 @@ from loguru import logger
 from sqlalchemy import text
 
 from bisheng.common.services import metric_log as ml
-from bisheng.common.services.metric_log import DbQueryHistogram
 from bisheng.core.config.settings import MetricLogConf
 from bisheng.core.database.connection import DatabaseConnectionManager
 
@@ -44,8 +43,8 @@ def _line_for(messages, domain):
 
 @pytest.fixture(autouse=True)
 def _reset_histogram():
-    ml.db_histogram = DbQueryHistogram()
-    ml._pool_sampler = ml._PoolSampler()
+    ml.db_histograms.clear()
+    ml._pool_samplers.clear()
     yield
 
 
@@ -0,0 +1,527 @@
+"""Bulk reconcile mode of :class:`OrgReconcileService` + concurrent provider paging.
+
+Bulk mode runs against a real SQLite database (``department`` +
+``org_sync_log``) with the DAO session factory
+pointed at it, so the batched INSERT / UPDATE statements and the multi-row
+event insert execute for real. Everything outside the department tree
+(provider, Redis lock, audit, deletion hooks) is stubbed the same way as in
+``test_org_reconcile_service.py``.
+
+The opt-in benchmark pages a synthetic 100k-member Feishu directory through
+``httpx.MockTransport`` with a simulated round trip per page, sequentially
+vs. with the provider's bounded concurrency, diffs the members in memory and
+reports department reconcile throughput per-op vs. bulk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from bisheng.database.models import department as department_module
+from bisheng.database.models.department import Department
+from bisheng.org_sync.domain.models import org_sync as org_sync_module
+from bisheng.org_sync.domain.models.org_sync import OrgSyncLog
+from bisheng.org_sync.domain.providers import feishu as feishu_module
+from bisheng.org_sync.domain.providers.feishu import FeishuProvider
+from bisheng.org_sync.domain.schemas.remote_dto import RemoteDepartmentDTO
+from bisheng.org_sync.domain.services.reconciler import reconcile_members
+from test.fixtures.table_definitions import TABLE_ORG_SYNC_LOG
+
+MODULE = 'bisheng.org_sync.domain.services.reconcile_service'
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.async_connection = self
+
+    async def set(self, key, value, *, nx=False, ex=None):
+        return True
+
+    async def delete(self, key):
+        return 1
+
+
+@pytest.fixture()
+async def db(monkeypatch):
+    """SQLite department + org_sync_log tables behind the DAO session factory.
+
+    ``db.statements`` counts cursor executions (an executemany counts once).
+    """
+    engine = create_async_engine(
+        'sqlite+aiosqlite://',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Department.__table__.create)
+        # BIGINT primary keys do not autoincrement on SQLite; use the fixture DDL
+        await conn.exec_driver_sql(TABLE_ORG_SYNC_LOG)
+
+    state = SimpleNamespace(engine=engine, statements=0)
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def _count(*args):
+        state.statements += 1
+
+    @asynccontextmanager
+    async def session_factory(read_only=None):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(department_module, 'get_async_db_session', session_factory)
+    monkeypatch.setattr(org_sync_module, 'get_async_db_session', session_factory)
+
+    async def rows() -> dict[str, Department]:
+        async with session_factory() as session:
+            result = await session.exec(select(Department))
+            return {d.external_id: d for d in result.all()}
+
+    async def events() -> list[OrgSyncLog]:
+        async with session_factory() as session:
+            result = await session.exec(select(OrgSyncLog))
+            return list(result.all())
+
+    state.rows = rows
+    state.events = events
+    yield state
+    await engine.dispose()
+
+
+@pytest.fixture()
+def service(monkeypatch, db):
+    """OrgReconcileService wired to the SQLite tree and a swappable remote."""
+    from bisheng.org_sync.domain.services.reconcile_service import OrgReconcileService
+
+    handles = SimpleNamespace(remote=[], clock=1_000)
+    monkeypatch.setattr(f'{MODULE}.settings', SimpleNamespace(
+        reconcile=SimpleNamespace(redis_lock_ttl_seconds=1800, bulk_min_ops=200),
+    ))
+
+    async def get_redis():
+        return _FakeRedis()
+
+    monkeypatch.setattr(f'{MODULE}.get_redis_client', get_redis)
+    monkeypatch.setattr(f'{MODULE}.OrgSyncConfigDao.aget_by_id', AsyncMock(return_value=SimpleNamespace(
+        id=3, tenant_id=1, provider='feishu', status='active', auth_config='', sync_scope=None,
+    )))
+    monkeypatch.setattr(f'{MODULE}.decrypt_auth_config', MagicMock(return_value={}))
+
+    provider = MagicMock()
+    provider.authenticate = AsyncMock(return_value=True)
+
+    async def fetch_departments(scope):
+        return list(handles.remote)
+
+    provider.fetch_departments = fetch_departments
+    monkeypatch.setattr(f'{MODULE}.get_provider', MagicMock(return_value=provider))
+    monkeypatch.setattr(f'{MODULE}.time.time', lambda: handles.clock)
+    monkeypatch.setattr(f'{MODULE}.flush_log', AsyncMock())
+    monkeypatch.setattr(f'{MODULE}.AuditLogDao.ainsert_v2', AsyncMock())
+    monkeypatch.setattr(
+        f'{MODULE}.DepartmentArchiveCleanupService.arun_for_archived_department', AsyncMock())
+    handles.on_deleted = AsyncMock()
+    monkeypatch.setattr(f'{MODULE}.DepartmentDeletionHandler.on_deleted', handles.on_deleted)
+    monkeypatch.setattr(f'{MODULE}.UserDepartmentDao.aget_user_ids_by_department', AsyncMock(return_value=[]))
+    monkeypatch.setattr(f'{MODULE}.DepartmentDao.aassert_reparent_legal', AsyncMock())
+
+    async def run(bulk=True):
+        return await OrgReconcileService.reconcile_config(3, bulk=bulk)
+
+    handles.run = run
+    return handles
+
+
+def _tree(branches: int, leaves: int) -> list[RemoteDepartmentDTO]:
+    depts = [RemoteDepartmentDTO(external_id='root', name='Company')]
+    for b in range(branches):
+        depts.append(RemoteDepartmentDTO(external_id=f'b{b}', name=f'Branch {b}', parent_external_id='root'))
+        for leaf in range(leaves):
+            depts.append(RemoteDepartmentDTO(
+                external_id=f'b{b}-{leaf}', name=f'Team {b}.{leaf}', parent_external_id=f'b{b}', sort_order=leaf,
+            ))
+    return depts
+
+
+def _shape(rows: dict[str, Department]) -> dict[str, tuple]:
+    """(name, parent external_id, path as external ids, status) per department."""
+    by_id = {d.id: d for d in rows.values()}
+
+    def ext_path(dept):
+        return tuple(by_id[int(p)].external_id for p in dept.path.strip('/').split('/'))
+
+    return {
+        ext: (d.name, by_id[d.parent_id].external_id if d.parent_id else None, ext_path(d), d.status)
+        for ext, d in rows.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Bulk mode
+# ---------------------------------------------------------------------------
+
+
+async def test_bulk_sync_builds_the_same_tree_as_the_per_op_path(service, db, monkeypatch):
+    service.remote = _tree(3, 4)
+
+    result = await service.run(bulk=False)
+    per_op = _shape(await db.rows())
+
+    async with db.engine.begin() as conn:
+        await conn.exec_driver_sql('DELETE FROM department')
+    result_bulk = await service.run(bulk=True)
+
+    assert result.applied_upsert == result_bulk.applied_upsert == 16
+    assert result_bulk.errors == []
+    assert _shape(await db.rows()) == per_op
+    assert per_op['b1-2'] == ('Team 1.2', 'b1', ('root', 'b1', 'b1-2'), 'active')
+
+
+@pytest.mark.parametrize('rename_moved', [False, True])
+async def test_one_diff_builds_the_same_tree_in_both_modes(service, db, rename_moved):
+    service.remote = _tree(2, 3)
+    await service.run(bulk=False)
+    async with db.engine.begin() as conn:
+        await conn.exec_driver_sql('CREATE TABLE synced AS SELECT * FROM department')
+
+    # move b1 (with its teams) under b0 and add a team under b1; with or without a rename
+    service.clock = 2_000
+    remote = _tree(2, 3)
+    for d in remote:
+        if d.external_id == 'b1':
+            d.parent_external_id = 'b0'
+            if rename_moved:
+                d.name = 'Moved'
+    remote.append(RemoteDepartmentDTO(external_id='b1-new', name='New team', parent_external_id='b1'))
+    service.remote = remote
+
+    shapes = {}
+    for bulk in (False, True):
+        async with db.engine.begin() as conn:
+            await conn.exec_driver_sql('DELETE FROM department')
+            await conn.exec_driver_sql('INSERT INTO department SELECT * FROM synced')
+        result = await service.run(bulk=bulk)
+        assert result.errors == []
+        shapes[bulk] = _shape(await db.rows())
+
+    assert shapes[False] == shapes[True]
+    assert shapes[True]['b1-1'][2] == ('root', 'b0', 'b1', 'b1-1')
+    assert shapes[True]['b1-new'][2] == ('root', 'b0', 'b1', 'b1-new')
+
+
+async def test_bulk_applies_renames_moves_and_archives(service, db):
+    service.remote = _tree(2, 3)
+    await service.run()
+    before = await db.rows()
+
+    # rename b0-0, move b1 (with its teams) under b0, drop b0-2, add b1-new
+    service.clock = 2_000
+    remote = [d for d in _tree(2, 3) if d.external_id != 'b0-2']
+    for d in remote:
+        if d.external_id == 'b0-0':
+            d.name = 'Renamed'
+        if d.external_id == 'b1':
+            d.parent_external_id = 'b0'
+    remote.append(RemoteDepartmentDTO(external_id='b1-new', name='New team', parent_external_id='b1'))
+    service.remote = remote
+
+    result = await service.run()
+    rows = await db.rows()
+    shape = _shape(rows)
+
+    assert (result.applied_upsert, result.applied_archive, result.errors) == (3, 1, [])
+    assert shape['b0-0'][0] == 'Renamed'
+    assert shape['b1'][1:3] == ('b0', ('root', 'b0', 'b1'))
+    # descendants of the moved branch follow it, new child lands under it
+    assert shape['b1-1'][2] == ('root', 'b0', 'b1', 'b1-1')
+    assert shape['b1-new'][2] == ('root', 'b0', 'b1', 'b1-new')
+    assert (rows['b0-2'].status, rows['b0-2'].is_deleted, rows['b0-2'].last_sync_ts) == ('archived', 1, 2_000)
+    assert rows['b1'].id == before['b1'].id
+    service.on_deleted.assert_awaited_once()
+
+
+async def test_bulk_records_stale_and_orphan_ops(service, db):
+    service.remote = _tree(1, 2)
+    await service.run()
+    async with db.engine.begin() as conn:
+        await conn.exec_driver_sql("UPDATE department SET last_sync_ts = 5000 WHERE external_id IN ('b0-0', 'b0-1')")
+
+    service.clock = 3_000
+    service.remote = [
+        RemoteDepartmentDTO(external_id='root', name='Company'),
+        RemoteDepartmentDTO(external_id='b0', name='Branch 0', parent_external_id='root'),
+        RemoteDepartmentDTO(external_id='b0-0', name='Stale rename', parent_external_id='b0'),
+        RemoteDepartmentDTO(external_id='b0-1', name='Team 0.1', parent_external_id='b0', sort_order=1),
+        RemoteDepartmentDTO(external_id='lost', name='Orphan', parent_external_id='missing'),
+        RemoteDepartmentDTO(external_id='lost-child', name='Orphan child', parent_external_id='lost'),
+    ]
+    result = await service.run()
+
+    assert result.skipped_ts == 1
+    assert sorted(e.split(':')[0] for e in result.errors) == ['upsert lost', 'upsert lost-child']
+    rows = await db.rows()
+    assert rows['b0-0'].name == 'Team 0.0'
+    assert 'lost' not in rows and 'lost-child' not in rows
+    events = await db.events()
+    assert [(e.event_type, e.level, e.external_id, e.source_ts, e.config_id) for e in events] == [
+        ('stale_ts', 'warn', 'b0-0', 3_000, 3),
+    ]
+
+
+async def test_bulk_writes_commit_together_or_not_at_all(service, db):
+    service.remote = _tree(1, 2)
+    await service.run()
+    before = _shape(await db.rows())
+
+    def fail_updates(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('UPDATE DEPARTMENT'):
+            raise RuntimeError('connection lost')
+
+    service.clock = 2_000
+    service.remote = _tree(2, 2)
+    event.listen(db.engine.sync_engine, 'before_cursor_execute', fail_updates)
+    try:
+        result = await service.run()
+    finally:
+        event.remove(db.engine.sync_engine, 'before_cursor_execute', fail_updates)
+
+    # the new branch was inserted before the UPDATE failed; it must not stay behind unparented
+    assert result.applied_upsert == 0 and len(result.errors) == 3
+    assert _shape(await db.rows()) == before
+
+
+async def test_bulk_apply_removes_new_departments_the_plan_leaves_out(db):
+    from bisheng.database.models.department import DepartmentDao
+
+    async def plan(inserted):
+        root = inserted['root']
+        return [{'id': root.id, 'path': f'/{root.id}/'}], []
+
+    await DepartmentDao.abulk_apply_synced(source='feishu', plan=plan, new_rows=[
+        {'external_id': 'root', 'name': 'Company', 'last_sync_ts': 1},
+        {'external_id': 'dropped', 'name': 'Failed later', 'last_sync_ts': 1},
+    ])
+
+    rows = await db.rows()
+    assert sorted(rows) == ['root']
+    assert rows['root'].path == f"/{rows['root'].id}/"
+
+
+async def test_bulk_statement_count_does_not_grow_with_the_tree(service, db):
+    counts = {}
+    for branches in (5, 40):
+        async with db.engine.begin() as conn:
+            await conn.exec_driver_sql('DELETE FROM department')
+        service.remote = _tree(branches, 5)
+        db.statements = 0
+        result = await service.run()
+        assert result.applied_upsert == branches * 6 + 1
+        counts[branches] = db.statements
+
+    # prefetch + insert + read-back + update, a handful of statements each
+    assert counts[40] == counts[5] < 20
+
+
+async def test_auto_mode_switches_on_diff_size(service, db, monkeypatch):
+    from bisheng.org_sync.domain.services.reconcile_service import OrgReconcileService
+
+    bulk_runs = AsyncMock(wraps=OrgReconcileService._run_bulk)
+    monkeypatch.setattr(OrgReconcileService, '_run_bulk', bulk_runs)
+
+    service.remote = _tree(1, 2)
+    await service.run(bulk=None)
+    assert bulk_runs.await_count == 0
+
+    service.remote = _tree(40, 5)
+    service.clock = 2_000
+    await service.run(bulk=None)
+    assert bulk_runs.await_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Feishu paging
+# ---------------------------------------------------------------------------
+
+
+class FeishuDirectory:
+    """Fake Feishu contact API: a two-level tree and N members per leaf,
+    paged 50 at a time, with a simulated round trip per request."""
+
+    def __init__(self, branches: int, leaves: int, members_per_leaf: int, latency: float = 0.0):
+        self.latency = latency
+        self.children = {'0': [f'od-{b}' for b in range(branches)]}
+        for b in range(branches):
+            self.children[f'od-{b}'] = [f'od-{b}-{leaf}' for leaf in range(leaves)]
+        self.members = {
+            leaf: [f'ou-{leaf}-{i}' for i in range(members_per_leaf)]
+            for kids in list(self.children.values())[1:] for leaf in kids
+        }
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @staticmethod
+    def _page(items: list, params) -> dict:
+        start = int(params.get('page_token') or 0)
+        size = int(params['page_size'])
+        end = start + size
+        return {'code': 0, 'data': {
+            'items': items[start:end], 'has_more': end < len(items), 'page_token': str(end),
+        }}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path, params = request.url.path, request.url.params
+        if path.endswith('/tenant_access_token/internal'):
+            return httpx.Response(200, json={'code': 0, 'tenant_access_token': 't', 'expire': 7200})
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if path.endswith('/children'):
+                parent = params['parent_department_id']
+                items = [{'open_department_id': d, 'name': d, 'order': '0'} for d in self.children.get(parent, [])]
+            else:
+                dept = params['department_id']
+                items = [
+                    {'open_id': uid, 'name': uid, 'department_ids': [dept], 'status': {}}
+                    for uid in self.members.get(dept, [])
+                ]
+            return httpx.Response(200, json=self._page(items, params))
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture()
+def feishu_api(monkeypatch):
+    current = {}
+    original_init = httpx.AsyncClient.__init__
+
+    def patched_init(self, *args, **kwargs):
+        kwargs.setdefault('transport', httpx.MockTransport(current['api'].handler))
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.AsyncClient, '__init__', patched_init)
+
+    def serve(api: FeishuDirectory) -> FeishuDirectory:
+        current['api'] = api
+        return api
+
+    return serve
+
+
+async def test_feishu_pages_departments_and_members_concurrently(feishu_api):
+    api = feishu_api(FeishuDirectory(branches=3, leaves=4, members_per_leaf=120, latency=0.002))
+    provider = FeishuProvider({'app_id': 'a', 'app_secret': 's'})
+
+    depts = await provider.fetch_departments()
+    leaves = [d.external_id for d in depts if d.parent_external_id]
+    members = await provider.fetch_members([d for d in leaves if d.count('-') == 2])
+
+    # FIFO BFS order, as the one-parent-at-a-time traversal produced
+    assert [d.external_id for d in depts[:4]] == ['od-0', 'od-1', 'od-2', 'od-0-0']
+    assert depts[0].parent_external_id is None and depts[3].parent_external_id == 'od-0'
+    assert len(members) == 3 * 4 * 120
+    assert members[0].external_id == 'ou-od-0-0-0' and members[-1].external_id == 'ou-od-2-3-119'
+    assert 1 < api.max_in_flight <= feishu_module.MAX_CONCURRENT_REQUESTS
+
+
+async def test_feishu_member_pages_overlap_up_to_the_limit(feishu_api, monkeypatch):
+    leaves = [f'od-{b}-{leaf}' for b in range(4) for leaf in range(5)]
+    api = feishu_api(FeishuDirectory(branches=4, leaves=5, members_per_leaf=120, latency=0.005))
+
+    members = await FeishuProvider({'app_id': 'a', 'app_secret': 's'}).fetch_members(leaves)
+
+    # 20 departments x 3 pages: more work than slots, so every slot fills
+    assert api.max_in_flight == feishu_module.MAX_CONCURRENT_REQUESTS
+    monkeypatch.setattr(feishu_module, 'MAX_CONCURRENT_REQUESTS', 1)
+    sequential_api = feishu_api(FeishuDirectory(branches=4, leaves=5, members_per_leaf=120, latency=0.005))
+    assert await FeishuProvider({'app_id': 'a', 'app_secret': 's'}).fetch_members(leaves) == members
+    assert sequential_api.max_in_flight == 1
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.benchmark
+async def test_benchmark_100k_member_directory(feishu_api, service, db, monkeypatch, record_property):
+    # 20 branches x 25 leaves x 200 members = 100k members, 2000 member pages
+    api = feishu_api(FeishuDirectory(branches=20, leaves=25, members_per_leaf=200, latency=0.001))
+    provider = FeishuProvider({'app_id': 'a', 'app_secret': 's'})
+
+    depts = await provider.fetch_departments()
+    leaves = [d.external_id for d in depts if d.external_id.count('-') == 2]
+    start = time.perf_counter()
+    members = await provider.fetch_members(leaves)
+    concurrent = time.perf_counter() - start
+    pages = api.requests
+    limit = feishu_module.MAX_CONCURRENT_REQUESTS
+
+    monkeypatch.setattr(feishu_module, 'MAX_CONCURRENT_REQUESTS', 1)
+    sequential_api = feishu_api(FeishuDirectory(branches=20, leaves=25, members_per_leaf=200, latency=0.001))
+    start = time.perf_counter()
+    await FeishuProvider({'app_id': 'a', 'app_secret': 's'}).fetch_members(leaves)
+    sequential = time.perf_counter() - start
+
+    # in-memory member diff: 100k remote vs 100k local, 1% renamed, 1% moved
+    ext_to_local_dept = {ext: i for i, ext in enumerate(leaves)}
+    local_users, local_user_depts = [], {}
+    for uid, m in enumerate(members):
+        name = m.name if uid % 100 else 'old name'
+        local_users.append(SimpleNamespace(
+            user_id=uid, external_id=m.external_id, source='feishu', user_name=name,
+            email=None, phone_number=None, delete=0,
+        ))
+        dept_id = ext_to_local_dept[m.primary_dept_external_id]
+        if uid % 100 == 1:
+            dept_id = (dept_id + 1) % len(leaves)
+        local_user_depts[uid] = [SimpleNamespace(department_id=dept_id, is_primary=1)]
+    start = time.perf_counter()
+    ops = reconcile_members(members, local_users, local_user_depts, ext_to_local_dept, 'feishu')
+    diff_time = time.perf_counter() - start
+
+    # department reconcile: per-op on a 211-node tree, bulk on a 2101-node tree
+    service.remote = _tree(10, 20)
+    start = time.perf_counter()
+    await service.run(bulk=False)
+    per_op = time.perf_counter() - start
+    async with db.engine.begin() as conn:
+        await conn.exec_driver_sql('DELETE FROM department')
+    service.remote = _tree(100, 20)
+    db.statements = 0
+    start = time.perf_counter()
+    result = await service.run(bulk=True)
+    bulk = time.perf_counter() - start
+
+    record_property('member_pages', pages)
+    record_property('members_per_s_concurrent', round(len(members) / concurrent))
+    record_property('members_per_s_sequential', round(len(members) / sequential))
+    record_property('member_diff_per_s', round(len(members) / diff_time))
+    record_property('depts_per_s_per_op', round(211 / per_op))
+    record_property('depts_per_s_bulk', round(result.applied_upsert / bulk))
+    record_property('bulk_statements', db.statements)
+
+    assert len(members) == 100_000
+    assert sequential_api.max_in_flight == 1
+    assert api.max_in_flight == limit
+    assert len(ops) == 2_000
+    assert result.applied_upsert == 2_101 and result.errors == []
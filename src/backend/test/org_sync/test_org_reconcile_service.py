@@ -93,9 +93,9 @@ def reconcile_mocks(monkeypatch):
     Returns a ``SimpleNamespace`` of handles so individual tests can
     assert call counts / arguments without re-patching.
     """
-    # Settings handle (only reconcile.redis_lock_ttl_seconds is read)
+    # Settings handle (reconcile.redis_lock_ttl_seconds + bulk_min_ops)
     fake_settings = SimpleNamespace(
-        reconcile=SimpleNamespace(redis_lock_ttl_seconds=1800),
+        reconcile=SimpleNamespace(redis_lock_ttl_seconds=1800, bulk_min_ops=200),
     )
     monkeypatch.setattr(f'{MODULE}.settings', fake_settings)
 
@@ -44,6 +44,18 @@ class FakeRedisClient:
             key_str = k.decode() if isinstance(k, bytes) else k
             self._store.pop(key_str, None)
 
+    async def hmget(self, name, keys):
+        fields = self._store.get(name, {})
+        return [fields.get(k) for k in keys]
+
+    async def hincrby(self, name, key, amount=1):
+        fields = self._store.setdefault(name, {})
+        fields[key] = fields.get(key, 0) + amount
+        return fields[key]
+
+    async def publish(self, channel, message):
+        return 0
+
 
 @pytest.fixture
 def fake_redis():
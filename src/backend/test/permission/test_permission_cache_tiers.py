@@ -0,0 +1,173 @@
+"""Two-tier PermissionCache: the process-local L1 answers repeated checks without a
+Redis round-trip while the invalidation listener runs, a version bump from any
+process retires both tiers without scanning keys, TTLs follow the relation and idle
+version counters are trimmed."""
+
+import json
+import pickle
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from bisheng.core.config.openfga import PermissionCacheConf
+from bisheng.core.context.tenant import current_tenant_id
+from bisheng.permission.domain.services import permission_cache as cache_module
+from bisheng.permission.domain.services.permission_cache import INVALIDATE_CHANNEL, VERSION_KEY, PermissionCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _wait_for(predicate, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class _RedisClient:
+    """The parts of RedisClient the cache uses, over one fakeredis server."""
+
+    def __init__(self):
+        server = fakeredis.FakeServer()
+        self.connection = fakeredis.FakeStrictRedis(server=server)
+        self.async_connection = fakeredis.FakeAsyncRedis(server=server)
+
+    async def aget(self, key):
+        value = await self.async_connection.get(key)
+        return pickle.loads(value) if value else None
+
+    async def aset(self, key, value, expiration=3600):
+        await self.async_connection.set(key, pickle.dumps(value), ex=expiration)
+
+    def async_pipeline(self, transaction: bool = True):
+        return self.async_connection.pipeline(transaction=transaction)
+
+    def encode(self, key, value):
+        return pickle.dumps(value)
+
+    def decode(self, value):
+        return pickle.loads(value)
+
+
+@pytest.fixture(autouse=True)
+def default_tenant():
+    # keys and version fields below are those of tenant 1; other tests may leave another tenant set
+    token = current_tenant_id.set(1)
+    yield
+    current_tenant_id.reset(token)
+
+
+@pytest.fixture
+def redis_client():
+    client = _RedisClient()
+    with patch.object(PermissionCache, "_get_redis", new_callable=AsyncMock, return_value=client):
+        yield client
+    PermissionCache.stop_invalidation_listener()
+    PermissionCache.stats.reset()
+
+
+@pytest.fixture
+def listening(redis_client):
+    PermissionCache.start_invalidation_listener(redis_client)
+    _wait_for(lambda: PermissionCache._listening)
+
+
+def _count_gets(redis_client) -> list:
+    calls = []
+    original = redis_client.aget
+
+    async def aget(key):
+        calls.append(key)
+        return await original(key)
+
+    redis_client.aget = aget
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_repeated_checks(redis_client, listening):
+    gets = _count_gets(redis_client)
+    await PermissionCache.set_check(1, "can_read", "workflow", "abc", True)
+
+    assert await PermissionCache.get_check(1, "can_read", "workflow", "abc") is True
+    assert await PermissionCache.get_check(1, "can_read", "workflow", "abc") is True
+    assert gets == []
+    assert PermissionCache.stats.l1_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_broadcast_bump_retires_both_tiers(redis_client, listening):
+    await PermissionCache.set_check(1, "can_read", "workflow", "abc", True)
+    await PermissionCache.set_check(2, "can_read", "workflow", "abc", True)
+    keys_before = set(redis_client.connection.keys("perm:chk:*"))
+
+    # another process revokes user 1: one counter bump and a broadcast, nothing is scanned
+    version = redis_client.connection.hincrby(VERSION_KEY, "1:u:1", 1)
+    redis_client.connection.publish(INVALIDATE_CHANNEL, json.dumps({"field": "1:u:1", "version": version}))
+    _wait_for(lambda: PermissionCache._versions.get("1:u:1") == version)
+
+    assert await PermissionCache.get_check(1, "can_read", "workflow", "abc") is None
+    assert await PermissionCache.get_check(2, "can_read", "workflow", "abc") is True
+    assert PermissionCache.stats.stale == 1
+    assert set(redis_client.connection.keys("perm:chk:*")) == keys_before
+
+
+@pytest.mark.asyncio
+async def test_object_type_bump_without_listener(redis_client):
+    await PermissionCache.set_check(1, "can_read", "workflow", "abc", True)
+    await PermissionCache.set_check(1, "can_read", "assistant", "abc", True)
+
+    await PermissionCache.invalidate_object_type("workflow")
+
+    assert await PermissionCache.get_check(1, "can_read", "workflow", "abc") is None
+    assert await PermissionCache.get_check(1, "can_read", "assistant", "abc") is True
+    assert PermissionCache.stats.l1_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_ttl_per_relation(redis_client, monkeypatch):
+    conf = PermissionCacheConf(ttl=10, relation_ttls={"can_read": 60})
+    monkeypatch.setattr(cache_module, "_get_conf", lambda: conf)
+
+    await PermissionCache.set_check(1, "can_read", "workflow", "abc", True)
+    await PermissionCache.set_check(1, "can_edit", "workflow", "abc", True)
+
+    keys = redis_client.connection.keys("perm:chk:*")
+    ttls = {key.decode().split(":")[4]: redis_client.connection.ttl(key) for key in keys}
+    assert 50 < ttls["can_read"] <= 60
+    assert 0 < ttls["can_edit"] <= 10
+
+
+@pytest.mark.asyncio
+async def test_idle_version_counters_are_trimmed(redis_client):
+    conn = redis_client.connection
+    now_ms = int(time.time() * 1000)
+    await PermissionCache.invalidate_user(1)
+    first = int(conn.hget(VERSION_KEY, "1:u:1"))
+    await PermissionCache.invalidate_user(1)
+    # bumps record their time, and a second one in the same millisecond still moves the counter
+    assert now_ms <= first < int(conn.hget(VERSION_KEY, "1:u:1"))
+    stale_ms = now_ms - 3600 * 1000
+    conn.hset(VERSION_KEY, mapping={"1:u:2": stale_ms, "1:t:workflow": stale_ms, "all": stale_ms})
+    await PermissionCache.set_check(2, "can_read", "workflow", "abc", True)
+
+    assert PermissionCache.trim_versions(conn) == 2
+    assert set(conn.hkeys(VERSION_KEY)) == {b"1:u:1", b"all"}  # "all" is never trimmed
+    # the next run waits for the trim interval
+    conn.hset(VERSION_KEY, "1:u:3", stale_ms)
+    assert PermissionCache.trim_versions(conn) == 0
+
+    # a trimmed counter reads as 0 again and its next bump lands above the old value
+    assert await PermissionCache.get_check(2, "can_read", "workflow", "abc") is None
+    await PermissionCache.invalidate_user(2)
+    assert int(conn.hget(VERSION_KEY, "1:u:2")) > stale_ms
+
+
+def test_listener_trims_version_counters(redis_client):
+    stale_ms = int(time.time() * 1000) - 3600 * 1000
+    redis_client.connection.hset(VERSION_KEY, "1:u:9", stale_ms)
+
+    PermissionCache.start_invalidation_listener(redis_client)
+
+    _wait_for(lambda: not redis_client.connection.hexists(VERSION_KEY, "1:u:9"))
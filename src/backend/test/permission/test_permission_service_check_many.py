@@ -0,0 +1,226 @@
+"""PermissionService.check_many: the bulk check agrees with check() object by object,
+serves what it can from the cache and sends the rest to OpenFGA in sized batch_check
+calls. 1k-object list filtering against an in-process fake OpenFGA server is compared
+with a check() loop by round-trips, and by latency in the opt-in benchmark."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from bisheng.core.openfga.client import FGAClient
+from bisheng.core.openfga.exceptions import FGAConnectionError
+from bisheng.permission.domain.services.permission_cache import PermissionCache
+from bisheng.permission.domain.services.permission_service import PermissionService
+from test.fixtures.mock_openfga import InMemoryOpenFGAClient
+
+
+@pytest.fixture
+def login_user():
+    user = MagicMock()
+    user.user_id = 2
+    user.is_admin.return_value = False
+    user.get_visible_tenants = AsyncMock(return_value=[1])
+    user.has_tenant_admin = AsyncMock(return_value=False)
+    return user
+
+
+@pytest.fixture
+def no_cache():
+    with (
+        patch.object(PermissionCache, "get_check", new_callable=AsyncMock, return_value=None),
+        patch.object(PermissionCache, "set_check", new_callable=AsyncMock),
+        patch.object(PermissionCache, "get_checks", new_callable=AsyncMock, return_value={}),
+        patch.object(PermissionCache, "set_checks", new_callable=AsyncMock) as set_checks,
+    ):
+        yield set_checks
+
+
+@pytest.fixture
+def no_tenants():
+    with (
+        patch.object(PermissionService, "_resource_tenant_map", new_callable=AsyncMock, return_value={}),
+        patch.object(PermissionService, "_resolve_resource_tenant", new_callable=AsyncMock, return_value=None),
+    ):
+        yield
+
+
+class _CountingFGA(InMemoryOpenFGAClient):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[int] = []
+
+    async def batch_check(self, checks: list[dict]) -> list[bool]:
+        self.batches.append(len(checks))
+        return await super().batch_check(checks)
+
+
+@pytest.mark.asyncio
+async def test_matches_check_per_object(login_user, no_cache, no_tenants):
+    fga = _CountingFGA()
+    await fga.write_tuples(
+        writes=[
+            {"user": "user:2", "relation": "viewer", "object": "workflow:granted"},
+            {"user": "user:9", "relation": "owner", "object": "workflow:taken"},
+        ]
+    )
+    creators = {"created": 2, "taken": 2}
+    object_ids = ["granted", "created", "taken", "other", "granted"]
+
+    with (
+        patch.object(PermissionService, "_get_fga", return_value=fga),
+        patch.object(
+            PermissionService,
+            "_get_resource_creator",
+            new=AsyncMock(side_effect=lambda object_type, object_id: creators.get(object_id)),
+        ),
+        patch.object(
+            PermissionService,
+            "_resource_ids_by_creator_user_ids",
+            new_callable=AsyncMock,
+            return_value=["created", "taken"],
+        ),
+    ):
+        bulk = await PermissionService.check_many(2, "viewer", "workflow", object_ids, login_user=login_user)
+        single = {
+            one: await PermissionService.check(2, "viewer", "workflow", one, login_user=login_user)
+            for one in object_ids
+        }
+
+    assert bulk == single == {"granted": True, "created": True, "taken": False, "other": False}
+    assert fga.batches == [4]
+    no_cache.assert_awaited_once_with(2, "viewer", "workflow", bulk)
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_tenant_gate_skip_fga(login_user):
+    fga = _CountingFGA()
+    tenant_map = {"hidden": 5, "cached": 1, "fresh": 1}
+
+    with (
+        patch.object(PermissionService, "_get_fga", return_value=fga),
+        patch.object(PermissionService, "_resource_tenant_map", new_callable=AsyncMock, return_value=tenant_map),
+        patch.object(PermissionService, "_is_shared_to", new_callable=AsyncMock, return_value=False),
+        patch.object(PermissionService, "_resource_ids_by_creator_user_ids", new_callable=AsyncMock, return_value=[]),
+        patch.object(PermissionCache, "get_checks", new_callable=AsyncMock, return_value={"cached": True}) as get,
+        patch.object(PermissionCache, "set_checks", new_callable=AsyncMock) as put,
+    ):
+        result = await PermissionService.check_many(
+            2, "viewer", "workflow", ["hidden", "cached", "fresh"], login_user=login_user
+        )
+
+    assert result == {"hidden": False, "cached": True, "fresh": False}
+    get.assert_awaited_once_with(2, "viewer", "workflow", ["cached", "fresh"])
+    assert fga.batches == [1]
+    put.assert_awaited_once_with(2, "viewer", "workflow", {"fresh": False})
+
+
+@pytest.mark.asyncio
+async def test_fga_outage_falls_back_to_creator_without_caching(login_user, no_cache, no_tenants):
+    fga = MagicMock()
+    fga.batch_check = AsyncMock(side_effect=FGAConnectionError("down"))
+
+    with (
+        patch.object(PermissionService, "_get_fga", return_value=fga),
+        patch.object(
+            PermissionService, "_resource_ids_by_creator_user_ids", new_callable=AsyncMock, return_value=["a"]
+        ),
+        patch.object(PermissionService, "_get_resource_creator", new_callable=AsyncMock, return_value=2),
+    ):
+        result = await PermissionService.check_many(2, "can_read", "workflow", ["a", "b"], login_user=login_user)
+
+    assert result == {"a": True, "b": False}
+    no_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_admin_shortcircuit():
+    admin = MagicMock()
+    admin.is_admin.return_value = True
+
+    assert await PermissionService.check_many(1, "can_read", "workflow", ["a", "b"], login_user=admin) == {
+        "a": True,
+        "b": True,
+    }
+
+
+class _FakeOpenFGAServer:
+    """In-process OpenFGA REST endpoint with a fixed per-request latency."""
+
+    def __init__(self, tuples: set[tuple[str, str, str]], latency: float):
+        self.tuples = tuples
+        self.latency = latency
+        self.requests = 0
+
+    def _allowed(self, key: dict) -> bool:
+        return (key["user"], key["relation"], key["object"]) in self.tuples
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        import json
+
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        body = json.loads(request.content)
+        if request.url.path.endswith("/batch-check"):
+            return httpx.Response(
+                200,
+                json={
+                    "result": {
+                        one["correlation_id"]: {"allowed": self._allowed(one["tuple_key"])}
+                        for one in body["checks"]
+                    }
+                },
+            )
+        return httpx.Response(200, json={"allowed": self._allowed(body["tuple_key"])})
+
+
+async def _filter_1k_objects(latency: float) -> dict:
+    """Filter 1k objects with a check() loop and with check_many against the fake server."""
+    object_ids = [f"wf{i}" for i in range(1000)]
+    server = _FakeOpenFGAServer(
+        {("user:2", "can_read", f"workflow:{one}") for one in object_ids[::3]},
+        latency=latency,
+    )
+    client = FGAClient(api_url="http://openfga.test", store_id="store", model_id="model")
+    client._http = httpx.AsyncClient(base_url="http://openfga.test", transport=httpx.MockTransport(server.handle))
+
+    with (
+        patch.object(PermissionService, "_get_fga", return_value=client),
+        patch.object(PermissionService, "_get_resource_creator", new_callable=AsyncMock, return_value=None),
+        patch.object(PermissionService, "_resource_ids_by_creator_user_ids", new_callable=AsyncMock, return_value=[]),
+        patch("bisheng.core.openfga.client.logger"),
+    ):
+        start = time.perf_counter()
+        looped = [one for one in object_ids if await PermissionService.check(2, "can_read", "workflow", one)]
+        loop_seconds, loop_requests = time.perf_counter() - start, server.requests
+
+        server.requests = 0
+        start = time.perf_counter()
+        allowed = await PermissionService.check_many(2, "can_read", "workflow", object_ids)
+        bulk = [one for one in object_ids if allowed[one]]
+        bulk_seconds, bulk_requests = time.perf_counter() - start, server.requests
+    await client.close()
+
+    assert bulk == looped == object_ids[::3]
+    return {"loop_requests": loop_requests, "loop_seconds": loop_seconds,
+            "bulk_requests": bulk_requests, "bulk_seconds": bulk_seconds}
+
+
+@pytest.mark.asyncio
+async def test_list_filtering_1k_objects_round_trips(no_cache):
+    result = await _filter_1k_objects(latency=0)
+
+    assert result["loop_requests"] == 1000
+    assert result["bulk_requests"] == 1000 // PermissionService._FGA_BATCH_CHECK_SIZE
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_benchmark_list_filtering_1k_objects(no_cache, record_property):
+    result = await _filter_1k_objects(latency=0.001)
+
+    for name, value in result.items():
+        record_property(name, value)
+    assert result["bulk_seconds"] < result["loop_seconds"]
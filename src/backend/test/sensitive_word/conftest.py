@@ -0,0 +1,11 @@
+import pytest
+
+from bisheng.sensitive_word.domain.services.sensitive_word_policy_service import SensitiveWordPolicyService
+
+
+@pytest.fixture(autouse=True)
+def _clear_policy_cache():
+    # policies and compiled lexicons are cached per tenant across calls
+    SensitiveWordPolicyService.clear_cache()
+    yield
+    SensitiveWordPolicyService.clear_cache()
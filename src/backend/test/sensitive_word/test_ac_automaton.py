@@ -0,0 +1,213 @@
+"""Compiled ACAutomaton: same counts and order as a node-per-character trie, a
+round trip through bytes/file, and per-policy cache invalidation."""
+
+import os
+import random
+import time
+from collections import Counter, deque
+from types import SimpleNamespace
+
+import pytest
+
+from bisheng.sensitive_word.domain.schemas import SensitiveWordBusinessType
+from bisheng.sensitive_word.domain.services import ac_automaton as ac_module
+from bisheng.sensitive_word.domain.services import sensitive_word_policy_service
+from bisheng.sensitive_word.domain.services.ac_automaton import ACAutomaton
+from bisheng.sensitive_word.domain.services.sensitive_word_policy_service import SensitiveWordPolicyService
+
+_ALPHABET = [chr(code) for code in range(0x4E00, 0x4E00 + 3000)]
+
+
+class _ReferenceAutomaton:
+    """The previous implementation: one dict node per trie state, word lists copied along fail links."""
+
+    def __init__(self, words):
+        self.nodes = [({}, 0, [])]
+        for word in words:
+            state = 0
+            for char in word:
+                children = self.nodes[state][0]
+                if char not in children:
+                    children[char] = len(self.nodes)
+                    self.nodes.append(({}, 0, []))
+                state = children[char]
+            if word not in self.nodes[state][2]:
+                self.nodes[state][2].append(word)
+        queue = deque(self.nodes[0][0].values())
+        while queue:
+            state = queue.popleft()
+            children, fail, _ = self.nodes[state]
+            for char, child in children.items():
+                f = fail
+                while f and char not in self.nodes[f][0]:
+                    f = self.nodes[f][1]
+                child_fail = self.nodes[f][0].get(char, 0) if state else 0
+                self.nodes[child] = (self.nodes[child][0], child_fail,
+                                     self.nodes[child][2] + self.nodes[child_fail][2])
+                queue.append(child)
+
+    def find_all(self, text):
+        counter = Counter()
+        state = 0
+        for char in text:
+            while state and char not in self.nodes[state][0]:
+                state = self.nodes[state][1]
+            state = self.nodes[state][0].get(char, 0)
+            for word in self.nodes[state][2]:
+                counter[word] += 1
+        return counter
+
+
+def _corpus(word_count: int, text_chars: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = list({''.join(rng.choices(_ALPHABET, k=rng.randint(2, 6))) for _ in range(word_count)})
+    pieces = rng.choices(_ALPHABET + list('ab ,.'), k=text_chars)
+    for word in rng.sample(words, min(len(words), text_chars // 200)):
+        pieces.insert(rng.randrange(len(pieces)), word)
+    return words, ''.join(pieces)
+
+
+@pytest.mark.parametrize('text_chars', [500, 50_000])
+def test_matches_reference_counts_and_order(text_chars):
+    words, text = _corpus(5000, text_chars)
+    words += ['ab', 'b', 'abc', 'bc', 'c']  # overlapping outputs along fail links
+    text += ' abcabc bcc'
+
+    expected = _ReferenceAutomaton(words).find_all(text)
+    result = ACAutomaton(words).find_all(text)
+
+    assert list(result.items()) == list(expected.items())
+
+
+def test_vector_scan_sees_matches_across_chunks(monkeypatch):
+    words, text = _corpus(2000, 20_000)
+    monkeypatch.setattr(ac_module, '_VECTOR_CHUNK', 997)
+
+    assert list(ACAutomaton(words).find_all(text).items()) == list(_ReferenceAutomaton(words).find_all(text).items())
+
+
+def test_round_trip(tmp_path):
+    words, text = _corpus(3000, 20_000)
+    automaton = ACAutomaton(words)
+
+    restored = ACAutomaton.from_bytes(automaton.to_bytes())
+    automaton.save(tmp_path / 'lexicon.bsac')
+    loaded = ACAutomaton.load(tmp_path / 'lexicon.bsac')
+
+    assert restored.state_count == automaton.state_count
+    assert restored.find_all(text) == loaded.find_all(text) == automaton.find_all(text)
+    assert restored.find_all(text[:300]) == automaton.find_all(text[:300])
+    assert ACAutomaton.load(tmp_path / 'missing.bsac') is None
+    with pytest.raises(ValueError):
+        ACAutomaton.from_bytes(b'not an automaton')
+
+
+@pytest.fixture
+def policies(monkeypatch, tmp_path):
+    stored = {}
+    monkeypatch.setattr(
+        'bisheng.sensitive_word.domain.models.sensitive_word_policy.SensitiveWordPolicyDao.get_policy',
+        lambda **kwargs: stored[kwargs['tenant_id']],
+    )
+    monkeypatch.setattr(SensitiveWordPolicyService, '_lexicon_path', staticmethod(
+        lambda version: tmp_path / f'{version}.bsac'))
+    SensitiveWordPolicyService.clear_cache()
+    yield stored
+    SensitiveWordPolicyService.clear_cache()
+
+
+def _policy(custom_words, **extra_config):
+    return SimpleNamespace(enabled=True, words_types=['custom'], custom_words=custom_words,
+                           auto_reply='', extra_config=extra_config)
+
+
+def _check(tenant_id, text):
+    result = SensitiveWordPolicyService.check_text(tenant_id, SensitiveWordBusinessType.KNOWLEDGE_SPACE_FILE_PARSE, text)
+    return {hit.word: hit.count for hit in result.hits}
+
+
+def test_policy_cache_is_scoped_and_shared(policies, monkeypatch, tmp_path):
+    policies[1] = _policy('Alpha,beta')
+    policies[2] = _policy('Alpha,beta')
+    policies[3] = _policy('gamma')
+    assert _check(1, 'alpha ALPHA beta') == {'Alpha': 2, 'beta': 1}
+    assert _check(2, 'beta') == {'beta': 1}
+    assert _check(3, 'gamma') == {'gamma': 1}
+    cache = SensitiveWordPolicyService._automaton_cache
+    tenant_2 = cache[(2, 'knowledge_space_file_parse', 'tenant', '2')]
+    assert tenant_2[1] is cache[(1, 'knowledge_space_file_parse', 'tenant', '1')][1]
+
+    # tenant 1 edits its words: only its entry is rebuilt, the shared lexicon stays for tenant 2
+    policies[1] = _policy('delta')
+    assert _check(1, 'alpha delta') == {'delta': 1}
+    assert cache[(2, 'knowledge_space_file_parse', 'tenant', '2')] is tenant_2
+    assert len(SensitiveWordPolicyService._lexicon_cache) == 3
+
+    SensitiveWordPolicyService.invalidate_policy(3, 'knowledge_space_file_parse', 'tenant', '3')
+    assert (3, 'knowledge_space_file_parse', 'tenant', '3') not in cache
+    assert len(SensitiveWordPolicyService._lexicon_cache) == 2
+    # its compiled files go with it
+    assert len(list(tmp_path.glob('*.bsac'))) == 2
+
+    # another process starts cold and loads the compiled files instead of rebuilding
+    SensitiveWordPolicyService.clear_cache()
+    monkeypatch.setattr(ACAutomaton, '_compile', lambda self, words: pytest.fail('rebuilt'))
+    assert _check(2, 'ALPHA beta') == {'Alpha': 1, 'beta': 1}
+    assert len(list(tmp_path.glob('*.bsac'))) == 2
+
+
+def test_changed_policy_removes_stale_files(policies, monkeypatch, tmp_path):
+    monkeypatch.setattr('bisheng.sensitive_word.domain.services.sensitive_word_policy_service.POLICY_CACHE_TTL', 0)
+    policies[1] = _policy('alpha')
+    policies[2] = _policy('alpha')
+    assert _check(1, 'alpha') == {'alpha': 1}
+    assert _check(2, 'alpha') == {'alpha': 1}
+    old_files = sorted(tmp_path.iterdir())
+    assert [file.suffix for file in old_files] == ['.bsac', '.json']
+
+    # still used by tenant 2: kept
+    policies[1] = _policy('beta')
+    assert _check(1, 'beta') == {'beta': 1}
+    assert all(file.exists() for file in old_files)
+
+    # no policy uses it any more: removed along with its sidecar
+    policies[2] = _policy('beta')
+    assert _check(2, 'beta') == {'beta': 1}
+    assert not any(file.exists() for file in old_files)
+    assert len(list(tmp_path.glob('*.bsac'))) == 1
+
+
+def test_compile_sweeps_expired_files(policies, tmp_path):
+    expired = time.time() - sensitive_word_policy_service.LEXICON_FILE_TTL - 60
+    leftovers = [tmp_path / 'gone.bsac', tmp_path / 'gone.json', tmp_path / 'half.bsac1x2y.tmp']
+    recent = [tmp_path / 'recent.bsac', tmp_path / 'recent.json']
+    for file in leftovers + recent:
+        file.write_bytes(b'')
+    for file in leftovers:
+        os.utime(file, (expired, expired))
+
+    policies[1] = _policy('alpha')
+    assert _check(1, 'alpha') == {'alpha': 1}
+
+    assert not any(file.exists() for file in leftovers)
+    assert all(file.exists() for file in recent)
+    assert len(list(tmp_path.glob('*.bsac'))) == 2
+
+
+def _match_rates():
+    words, text = _corpus(20_000, 400_000)
+    size_mb = len(text.encode('utf-8')) / 1e6
+    rates = {}
+    for name, cls in (('reference', _ReferenceAutomaton), ('compiled', ACAutomaton)):
+        automaton = cls(words)
+        start = time.perf_counter()
+        automaton.find_all(text)
+        rates[name] = size_mb / (time.perf_counter() - start)
+    return rates
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_reference(record_property):
+    rates = _match_rates()
+    for name, rate in rates.items():
+        record_property(f'{name}_mb_per_s', round(rate, 1))
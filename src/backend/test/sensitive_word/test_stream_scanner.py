@@ -0,0 +1,96 @@
+"""Streaming sensitive-word scan: words split across pieces are found, scanning stops
+at the first hit, and the policy is read once per cache period."""
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from bisheng.knowledge.rag.pipeline.transformer.content_safety import ContentSafetyTransformer
+from bisheng.sensitive_word.domain.schemas import SensitiveWordBusinessType
+from bisheng.sensitive_word.domain.services.exceptions import ContentSafetyViolation
+from bisheng.sensitive_word.domain.services.sensitive_word_policy_service import SensitiveWordPolicyService
+
+_BUSINESS = SensitiveWordBusinessType.KNOWLEDGE_SPACE_FILE_PARSE
+
+
+@pytest.fixture
+def policy_reads(monkeypatch, tmp_path):
+    reads = []
+    policy = SimpleNamespace(enabled=True, words_types=['custom'], custom_words='敏感词,Blocked',
+                             auto_reply='不允许', extra_config={})
+
+    def get_policy(**kwargs):
+        reads.append(kwargs)
+        return policy
+
+    monkeypatch.setattr(
+        'bisheng.sensitive_word.domain.models.sensitive_word_policy.SensitiveWordPolicyDao.get_policy', get_policy)
+    monkeypatch.setattr(SensitiveWordPolicyService, '_lexicon_path', staticmethod(
+        lambda version: tmp_path / f'{version}.bsac'))
+    return reads
+
+
+def test_token_stream_stops_at_first_hit(policy_reads):
+    scanner = SensitiveWordPolicyService.open_scanner(1, _BUSINESS)
+    tokens = ['这里', '有敏', '感', '词和', 'BLOCK', 'ED']
+
+    fed = []
+    for token in tokens:
+        fed.append(token)
+        if scanner.feed(token):
+            break
+
+    assert fed == ['这里', '有敏', '感', '词和']
+    assert scanner.blocked
+    result = scanner.result()
+    assert [(hit.word, hit.count) for hit in result.hits] == [('敏感词', 1)]
+    assert result.auto_reply == '不允许'
+    assert scanner.feed('blocked') is True
+    assert scanner.result() == result
+
+
+def test_full_scan_matches_check_text(policy_reads):
+    text = ('正文' * 3000) + '敏感词' + ('正文' * 3000) + 'blocked 敏感词'
+    scanner = SensitiveWordPolicyService.open_scanner(1, _BUSINESS, stop_at_hit=False)
+    for start in range(0, len(text), 4999):
+        scanner.feed(text[start:start + 4999])
+
+    assert scanner.result() == SensitiveWordPolicyService.check_text(1, _BUSINESS, text)
+    assert {hit.word: hit.count for hit in scanner.result().hits} == {'敏感词': 2, 'Blocked': 1}
+
+
+def test_transformer_scans_batches_one_document_at_a_time(policy_reads):
+    transformer = ContentSafetyTransformer(tenant_id=1)
+    transformer.begin_stream()
+    # documents are separate texts, so a word is not matched across two of them
+    transformer.transform_batch([Document(page_content='第一页结尾是敏')])
+    transformer.transform_batch([Document(page_content='感词'), Document(page_content='正常内容')])
+
+    with pytest.raises(ContentSafetyViolation) as exc:
+        transformer.transform_batch([Document(page_content='第三批有敏感词和blocked')])
+
+    assert exc.value.to_remark()['hits'] == [{'word': '敏感词', 'count': 1}]
+
+
+def test_policy_is_read_once_until_saved(policy_reads):
+    assert SensitiveWordPolicyService.is_effective(1, _BUSINESS)
+    assert SensitiveWordPolicyService.open_scanner(1, _BUSINESS).enabled
+    ContentSafetyTransformer(tenant_id=1).transform_documents([Document(page_content='正常内容')])
+    assert len(policy_reads) == 1
+
+    SensitiveWordPolicyService.invalidate_policy(1, _BUSINESS.value, 'tenant', '1')
+    assert SensitiveWordPolicyService.is_effective(1, _BUSINESS)
+    assert len(policy_reads) == 2
+
+
+def test_disabled_policy_scanner(monkeypatch):
+    monkeypatch.setattr(
+        'bisheng.sensitive_word.domain.models.sensitive_word_policy.SensitiveWordPolicyDao.get_policy',
+        lambda **kwargs: None,
+    )
+    scanner = SensitiveWordPolicyService.open_scanner(1, _BUSINESS)
+
+    assert scanner.enabled is False
+    assert scanner.feed('敏感词') is False
+    assert scanner.result().enabled is False
@@ -0,0 +1,159 @@
+"""Node levels and mutually exclusive branch detection without path enumeration.
+
+The dominator based analysis must give the same answers as comparing every branch
+from get_all_edges_nodes, and the work of building a large workflow with many
+condition branches must grow with its size rather than with its number of branches.
+The opt-in benchmark times the build.
+"""
+
+import random
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from bisheng.workflow.edges.edges import EdgeManage
+from bisheng.workflow.graph import graph_engine as engine_mod
+from bisheng.workflow.graph.graph_engine import GraphEngine
+from bisheng.workflow.nodes.base import BaseNode
+
+
+def _edge(source: str, target: str, handle: str = 'right_handle') -> dict:
+    return {'id': f'{source}-{target}-{handle}', 'source': source, 'sourceHandle': handle,
+            'target': target, 'targetHandle': 'left_handle'}
+
+
+def _exclusive_by_paths(edges: EdgeManage, node_id: str, condition_nodes: list[str]) -> bool:
+    """The previous implementation: enumerate every branch and look for two disjoint ones"""
+    all_branches = []
+    for one in condition_nodes:
+        if node_id == one:
+            continue
+        for branch in edges.get_all_edges_nodes(one, node_id):
+            if node_id not in branch:
+                continue
+            branch.remove(node_id)
+            branch.remove(one)
+            all_branches.append(set(branch))
+    return any(not (all_branches[i] & all_branches[j])
+               for i in range(len(all_branches)) for j in range(i + 1, len(all_branches)))
+
+
+def _levels_by_paths(edges: EdgeManage, start: str) -> dict:
+    levels = {}
+
+    def mark(node_id, seen, level):
+        if node_id in seen:
+            return
+        levels[node_id] = max(levels.get(node_id, 0), level)
+        for one in edges.get_target_node(node_id) or []:
+            mark(one, seen | {node_id}, level + 1)
+
+    mark(start, frozenset(), 0)
+    return levels
+
+
+def _random_edges(rng: random.Random, size: int, acyclic: bool) -> list[dict]:
+    edges = []
+    for _ in range(rng.randint(size, size * 2)):
+        source, target = rng.sample(range(size), 2)
+        if acyclic and source > target:
+            source, target = target, source
+        # parallel edges mimic a condition routing two cases to the same node
+        edges.append(_edge(f'n{source}', f'n{target}', handle=str(rng.random())))
+    return edges
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_exclusive_branch_matches_path_enumeration(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        size = rng.randint(3, 8)
+        edges = EdgeManage(_random_edges(rng, size, acyclic=False))
+        condition_nodes = [f'n{i}' for i in rng.sample(range(size), rng.randint(1, 3))]
+        for i in range(size):
+            node_id = f'n{i}'
+            assert edges.is_exclusive_branch_end(node_id, condition_nodes) == \
+                   _exclusive_by_paths(edges, node_id, condition_nodes), (edges.edges, condition_nodes, node_id)
+
+
+def test_levels_match_longest_path_on_acyclic_graphs():
+    rng = random.Random(0)
+    for _ in range(100):
+        edges = EdgeManage(_random_edges(rng, rng.randint(3, 10), acyclic=True))
+        assert edges.get_node_levels('n0') == _levels_by_paths(edges, 'n0')
+
+
+def test_loop_edge_does_not_raise_level():
+    edges = EdgeManage([_edge('start', 'a'), _edge('a', 'b'), _edge('b', 'a'), _edge('b', 'end')])
+
+    # b -> a closes the loop, so a stays below its predecessor b
+    assert edges.get_node_levels('start') == {'start': 0, 'a': 1, 'b': 2, 'end': 3}
+
+
+class _FakeNode(BaseNode):
+    def _run(self, unique_id: str):
+        return {}
+
+
+_DIAMONDS = 60
+
+
+def _diamond_chain(count: int) -> dict:
+    """start -> (condition -> two branches -> join) * count -> parallel fork/join -> end"""
+    nodes = [{'data': {'id': 'start_1', 'type': 'start', 'name': 'start'}}]
+    edges = []
+    prev = 'start_1'
+    for i in range(count):
+        cond, left, right, join = f'condition_{i}', f'code_{i}_l', f'code_{i}_r', f'code_{i}_j'
+        nodes += [{'data': {'id': one, 'type': 'condition' if one == cond else 'code', 'name': one}}
+                  for one in (cond, left, right, join)]
+        edges += [_edge(prev, cond), _edge(cond, left, 'case_a'), _edge(cond, right, 'case_b'),
+                  _edge(left, join), _edge(right, join)]
+        prev = join
+    nodes += [{'data': {'id': one, 'type': 'end' if one == 'end_1' else 'code', 'name': one}}
+              for one in ('code_p1', 'code_p2', 'end_1')]
+    edges += [_edge(prev, 'code_p1'), _edge(prev, 'code_p2'), _edge('code_p1', 'end_1'), _edge('code_p2', 'end_1')]
+    return {'nodes': nodes, 'edges': edges}
+
+
+def _build(monkeypatch, diamonds: int) -> tuple[GraphEngine, int]:
+    """Build a diamond chain, returning the engine and the number of adjacency lookups it took"""
+    monkeypatch.setattr(engine_mod.NodeFactory, 'get_node_class', classmethod(lambda cls, t: _FakeNode))
+    lookups = 0
+    get_target_node = EdgeManage.get_target_node
+
+    def counting(self, source):
+        nonlocal lookups
+        lookups += 1
+        return get_target_node(self, source)
+
+    monkeypatch.setattr(EdgeManage, 'get_target_node', counting)
+    engine = GraphEngine(workflow_data=_diamond_chain(diamonds), max_steps=10, callback=MagicMock())
+    monkeypatch.setattr(EdgeManage, 'get_target_node', get_target_node)
+    return engine, lookups
+
+
+def test_large_workflow_build_work_is_polynomial(monkeypatch):
+    engine, lookups = _build(monkeypatch, _DIAMONDS)
+    _, half_lookups = _build(monkeypatch, _DIAMONDS // 2)
+
+    # enumerating branches doubles the work with every diamond, 2 ** 30 times over here;
+    # every node listing all of its descendants bounds it by the square of the size
+    assert lookups <= 4 * half_lookups, (half_lookups, lookups)
+    assert engine.node_level['end_1'] == 3 * _DIAMONDS + 2
+    # joins after a condition run as soon as either branch finishes, the parallel join waits for both
+    assert engine.parse_fan_in_node(f'code_{_DIAMONDS - 1}_j') == ([], [f'code_{_DIAMONDS - 1}_l',
+                                                                         f'code_{_DIAMONDS - 1}_r'])
+    assert engine.parse_fan_in_node('end_1') == (['code_p1', 'code_p2'], [])
+
+
+@pytest.mark.benchmark
+def test_benchmark_large_workflow_build(monkeypatch, record_property):
+    monkeypatch.setattr(engine_mod.NodeFactory, 'get_node_class', classmethod(lambda cls, t: _FakeNode))
+    for diamonds in (_DIAMONDS, 4 * _DIAMONDS):
+        workflow_data = _diamond_chain(diamonds)
+        start = time.perf_counter()
+        GraphEngine(workflow_data=workflow_data, max_steps=10, callback=MagicMock())
+        record_property(f'build_{len(workflow_data["nodes"])}_nodes_ms',
+                        round((time.perf_counter() - start) * 1e3, 1))
@@ -0,0 +1,123 @@
+"""Compiled graph cache: repeated runs of an unchanged flow reuse the compiled topology,
+while every run still gets its own node instances and checkpointer."""
+
+import copy
+from unittest.mock import MagicMock
+
+import pytest
+
+from bisheng.workflow.common.workflow import WorkflowStatus
+from bisheng.workflow.graph import graph_engine as engine_mod
+from bisheng.workflow.graph.graph_cache import CompiledGraphCache, compiled_graph_cache
+from bisheng.workflow.graph.graph_engine import GraphEngine
+from bisheng.workflow.nodes.base import BaseNode
+
+
+class _StartNode(BaseNode):
+    def _run(self, unique_id: str):
+        return {'greeting': 'hello'}
+
+
+class _InputNode(BaseNode):
+    def get_input_schema(self):
+        return {'key': 'text'}
+
+    def _run(self, unique_id: str):
+        return dict(self.node_params)
+
+
+class _EchoNode(BaseNode):
+    def _run(self, unique_id: str):
+        return {'echo': self.get_other_node_variable('input_1.text')}
+
+
+_NODES = {'start': _StartNode, 'input': _InputNode, 'code': _EchoNode, 'end': _EchoNode}
+
+
+def _edge(source: str, target: str) -> dict:
+    return {'id': f'{source}-{target}', 'source': source, 'sourceHandle': 'right_handle',
+            'target': target, 'targetHandle': 'left_handle'}
+
+
+_WORKFLOW_DATA = {
+    'nodes': [
+        {'data': {'id': 'start_1', 'type': 'start', 'name': 'start'}},
+        {'data': {'id': 'input_1', 'type': 'input', 'name': 'input'}},
+        {'data': {'id': 'code_1', 'type': 'code', 'name': 'echo'}},
+        {'data': {'id': 'end_1', 'type': 'end', 'name': 'end'}},
+    ],
+    'edges': [_edge('start_1', 'input_1'), _edge('input_1', 'code_1'), _edge('code_1', 'end_1')],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_nodes(monkeypatch):
+    monkeypatch.setattr(engine_mod.NodeFactory, 'get_node_class', classmethod(lambda cls, t: _NODES[t]))
+    compiled_graph_cache.clear()
+    yield
+    compiled_graph_cache.clear()
+
+
+def _engine(workflow_data: dict = None, workflow_id: str = 'wf') -> GraphEngine:
+    return GraphEngine(user_id=None, workflow_id=workflow_id, workflow_data=workflow_data or _WORKFLOW_DATA,
+                       max_steps=10, callback=MagicMock())
+
+
+def test_second_run_reuses_compiled_graph():
+    first = _engine()
+    second = _engine()
+
+    stats = compiled_graph_cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses']) == (1, 1, 1)
+    assert first.topology is second.topology
+    assert first.nodes_map['input_1'] is not second.nodes_map['input_1']
+    assert first.graph.checkpointer is not second.graph.checkpointer
+    assert first.graph_config['recursion_limit'] == second.graph_config['recursion_limit']
+
+
+def test_interleaved_runs_on_cached_graph_stay_isolated():
+    first = _engine()
+    second = _engine()
+    first.run()
+    second.run()
+    assert first.status == second.status == WorkflowStatus.INPUT.value
+
+    second.continue_run({'input_1': {'text': 'second'}})
+    first.continue_run({'input_1': {'text': 'first'}})
+
+    assert first.status == second.status == WorkflowStatus.SUCCESS.value
+    assert first.graph_state.get_variable('code_1', 'echo') == 'first'
+    assert second.graph_state.get_variable('code_1', 'echo') == 'second'
+
+
+def test_changed_workflow_data_rebuilds():
+    _engine()
+    changed = copy.deepcopy(_WORKFLOW_DATA)
+    changed['nodes'].append({'data': {'id': 'code_2', 'type': 'code', 'name': 'echo'}})
+    changed['edges'] += [_edge('input_1', 'code_2'), _edge('code_2', 'end_1')]
+    engine = _engine(changed)
+
+    assert compiled_graph_cache.stats()['misses'] == 2
+    assert engine.nodes_fan_in.get('code_2') == ['input_1']
+    engine.run()
+    engine.continue_run({'input_1': {'text': 'hi'}})
+    assert engine.graph_state.get_variable('code_2', 'echo') == 'hi'
+
+
+def test_unsaved_workflow_is_not_cached():
+    _engine(workflow_id=None)
+    _engine(workflow_id=None)
+
+    assert compiled_graph_cache.stats()['size'] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompiledGraphCache(maxsize=2)
+    cache.set('a', 'v1', MagicMock())
+    cache.set('b', 'v1', MagicMock())
+    assert cache.get('a', 'v1') is not None
+    cache.set('c', 'v1', MagicMock())
+
+    assert cache.get('b', 'v1') is None
+    assert cache.get('a', 'v2') is None
+    assert cache.get('c', 'v1') is not None
@@ -0,0 +1,182 @@
+"""RedisCallback push-based event delivery.
+
+The reader blocks on the event list (BLPOP) instead of polling the status and
+stop keys; status and stop changes arrive as control signals pushed to the
+head of the same list. The blocking pops hold connections of their own pool,
+not of the one shared by every other Redis command.
+"""
+
+import pickle
+from unittest.mock import MagicMock
+
+import pytest
+from redis import BlockingConnectionPool
+
+import bisheng.worker.workflow.redis_callback as cb_mod
+from bisheng.core.cache.redis_conn import RedisClient
+from bisheng.worker.workflow.redis_callback import (
+    WORKFLOW_SIGNAL_PREFIX,
+    WORKFLOW_SIGNAL_STOP,
+    RedisCallback,
+)
+from bisheng.workflow.common.workflow import WorkflowStatus
+
+
+class _FakeRedis:
+    """Mimics the RedisClient subset used by RedisCallback (pickled KV, raw lists)."""
+
+    def __init__(self):
+        self.kv: dict[str, bytes] = {}
+        self.lists: dict[str, list] = {}
+        self.reads: dict[str, int] = {}
+        # Invoked once when a blocking pop finds the list empty (simulates the worker moving on)
+        self.on_empty = None
+
+    @staticmethod
+    def _raw(value):
+        return value.encode('utf-8') if isinstance(value, str) else value
+
+    def set(self, key, value, expiration=3600):
+        self.kv[key] = pickle.dumps(value)
+
+    async def aset(self, key, value, expiration=3600):
+        self.set(key, value, expiration)
+
+    def get(self, key):
+        self.reads[key] = self.reads.get(key, 0) + 1
+        value = self.kv.get(key)
+        return pickle.loads(value) if value else None
+
+    async def aget(self, key):
+        return self.get(key)
+
+    def delete(self, key):
+        self.kv.pop(key, None)
+        self.lists.pop(key, None)
+
+    async def adelete(self, key):
+        self.delete(key)
+
+    def rpush(self, key, value, expiration=3600):
+        self.lists.setdefault(key, []).append(self._raw(value))
+
+    def lpush(self, key, value, expiration=3600):
+        self.lists.setdefault(key, []).insert(0, self._raw(value))
+
+    async def alpush(self, key, value, expiration=3600):
+        self.lpush(key, value, expiration)
+
+    def lpop(self, key, count=None):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    async def alpop(self, key, count=None):
+        return self.lpop(key, count)
+
+    def blpop(self, key, timeout=0, raw=False):
+        if not self.lists.get(key) and self.on_empty:
+            on_empty, self.on_empty = self.on_empty, None
+            on_empty()
+        # An empty list behaves like an expired block timeout
+        return self.lpop(key)
+
+    async def ablpop(self, key, timeout=0, raw=False):
+        return self.blpop(key, timeout, raw)
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(cb_mod, 'get_redis_client_sync', lambda: fake)
+    monkeypatch.setattr(cb_mod, 'settings', MagicMock(**{'get_workflow_conf.return_value.timeout': 10}))
+    return fake
+
+
+def _callback() -> RedisCallback:
+    return RedisCallback('uid', 'flow', 'chat', 1)
+
+
+def _event(message: str) -> dict:
+    return {'category': 'stream_msg', 'type': 'stream', 'message': message, 'user_id': 1,
+            'chat_id': 'chat', 'flow_id': 'flow'}
+
+
+def _stream(callback: RedisCallback, count: int):
+    callback.set_workflow_status(WorkflowStatus.RUNNING.value)
+    for i in range(count):
+        callback.insert_workflow_response(_event(str(i)))
+
+
+def test_reader_streams_events_without_polling_status(fake_redis):
+    callback = _callback()
+    _stream(callback, 50)
+    fake_redis.on_empty = lambda: callback.set_workflow_status(WorkflowStatus.SUCCESS.value)
+
+    messages = [one.message for one in callback.sync_get_response_until_break()]
+
+    assert messages == [str(i) for i in range(50)]
+    # Initial read plus one per status signal, not one per event
+    assert fake_redis.reads[callback.workflow_status_key] <= 3
+
+
+def test_signal_items_are_not_returned_as_events(fake_redis):
+    callback = _callback()
+    callback.set_workflow_status(WorkflowStatus.RUNNING.value)
+    callback.insert_workflow_response(_event('a'))
+
+    assert callback.wait_workflow_response()[0] is not None
+    signal, response = callback.wait_workflow_response()
+    assert signal is None and response.message == 'a'
+    assert callback.wait_workflow_response() == (None, None)
+
+
+def test_stop_signal_discards_pending_events(fake_redis, monkeypatch):
+    monkeypatch.setattr('bisheng.worker.workflow.tasks.stop_workflow', MagicMock())
+    callback = _callback()
+    _stream(callback, 3)
+    reader = callback.sync_get_response_until_break()
+    assert next(reader).message == '0'
+
+    callback.set_workflow_stop()
+    callback.insert_workflow_response(_event('late'))
+    # stop_workflow task marks the run failed once the worker has stopped
+    fake_redis.on_empty = lambda: callback.set_workflow_status(WorkflowStatus.FAILED.value, 'workflow stop by user')
+
+    assert list(reader) == []
+
+
+def test_stale_stop_signal_is_ignored(fake_redis):
+    callback = _callback()
+    # Left behind by a run whose status was cleared before any reader consumed it
+    fake_redis.lpush(callback.workflow_event_key, f'{WORKFLOW_SIGNAL_PREFIX}{WORKFLOW_SIGNAL_STOP}')
+    _stream(callback, 2)
+    fake_redis.on_empty = lambda: callback.set_workflow_status(WorkflowStatus.SUCCESS.value)
+
+    assert [one.message for one in callback.sync_get_response_until_break()] == ['0', '1']
+
+
+async def test_async_reader_stops_at_user_input(fake_redis):
+    callback = _callback()
+    _stream(callback, 5)
+    fake_redis.on_empty = lambda: callback.set_workflow_status(WorkflowStatus.INPUT.value)
+
+    messages = [one.message async for one in callback.get_response_until_break()]
+
+    assert messages == [str(i) for i in range(5)]
+
+
+async def test_blocking_pops_do_not_use_the_shared_pool():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = RedisClient('redis://127.0.0.1:6379/0')
+    assert isinstance(client.blocking_pool, BlockingConnectionPool)
+    assert client.blocking_pool is not client.pool and client.async_blocking_pool is not client.async_pool
+
+    server = fakeredis.FakeServer()
+    client.connection = client.async_connection = MagicMock(side_effect=AssertionError('shared pool used'))
+    client.blocking_connection = fakeredis.FakeStrictRedis(server=server)
+    client.async_blocking_connection = fakeredis.FakeAsyncRedis(server=server)
+    client.blocking_connection.rpush('workflow:uid:event', b'a', b'b')
+
+    assert client.blpop('workflow:uid:event', timeout=1, raw=True) == b'a'
+    assert await client.ablpop('workflow:uid:event', timeout=1, raw=True) == b'b'
+    assert client.blpop('workflow:uid:event', timeout=1) is None
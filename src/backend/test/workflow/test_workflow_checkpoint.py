@@ -0,0 +1,105 @@
+"""Durable workflow state: a run paused for user input is checkpointed and resumed
+by a freshly built GraphEngine, as a different worker process would do."""
+
+import pickle
+from unittest.mock import MagicMock
+
+import pytest
+
+from bisheng.workflow.common.workflow import WorkflowStatus
+from bisheng.workflow.graph import graph_engine as engine_mod
+from bisheng.workflow.graph.graph_engine import GraphEngine
+from bisheng.workflow.nodes.base import BaseNode
+
+_runs: list[str] = []
+
+
+class _StartNode(BaseNode):
+    def _run(self, unique_id: str):
+        _runs.append(self.id)
+        return {'greeting': 'hello'}
+
+
+class _InputNode(BaseNode):
+    checkpoint_attrs = ('_asked',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._asked = 0
+
+    def get_input_schema(self):
+        self._asked += 1
+        return {'key': 'text'}
+
+    def _run(self, unique_id: str):
+        _runs.append(self.id)
+        return dict(self.node_params)
+
+
+class _EchoNode(BaseNode):
+    def _run(self, unique_id: str):
+        _runs.append(self.id)
+        return {'echo': self.get_other_node_variable('input_1.text')}
+
+
+_NODES = {'start': _StartNode, 'input': _InputNode, 'code': _EchoNode, 'end': _EchoNode}
+
+
+def _edge(source: str, target: str) -> dict:
+    return {'id': f'{source}-{target}', 'source': source, 'sourceHandle': 'right_handle',
+            'target': target, 'targetHandle': 'left_handle'}
+
+
+_WORKFLOW_DATA = {
+    'nodes': [
+        {'data': {'id': 'start_1', 'type': 'start', 'name': 'start'}},
+        {'data': {'id': 'input_1', 'type': 'input', 'name': 'input'}},
+        {'data': {'id': 'code_1', 'type': 'code', 'name': 'echo'}},
+        {'data': {'id': 'end_1', 'type': 'end', 'name': 'end'}},
+    ],
+    'edges': [_edge('start_1', 'input_1'), _edge('input_1', 'code_1'), _edge('code_1', 'end_1')],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_nodes(monkeypatch):
+    monkeypatch.setattr(engine_mod.NodeFactory, 'get_node_class', classmethod(lambda cls, t: _NODES[t]))
+    _runs.clear()
+
+
+def _engine() -> GraphEngine:
+    return GraphEngine(user_id=None, workflow_id='wf', workflow_data=_WORKFLOW_DATA, max_steps=10,
+                       callback=MagicMock())
+
+
+def test_paused_run_resumes_on_a_new_engine():
+    first = _engine()
+    first.run()
+    assert first.status == WorkflowStatus.INPUT.value
+    assert _runs == ['start_1']
+
+    # Crosses the process boundary the same way RedisClient stores it
+    checkpoint = pickle.loads(pickle.dumps(first.dump_checkpoint()))
+
+    second = _engine()
+    second.load_checkpoint(checkpoint)
+    assert second.status == WorkflowStatus.INPUT.value
+    assert second.nodes_map['input_1']._asked == 1
+    second.continue_run({'input_1': {'text': 'hi'}})
+
+    assert second.status == WorkflowStatus.SUCCESS.value
+    # The start node is not executed again after the restore
+    assert _runs == ['start_1', 'input_1', 'code_1', 'end_1']
+    assert second.graph_state.get_variable('start_1', 'greeting') == 'hello'
+    assert second.graph_state.get_variable('code_1', 'echo') == 'hi'
+    assert second.nodes_map['start_1'].current_step == 1
+
+
+def test_checkpoint_for_changed_topology_is_rejected():
+    first = _engine()
+    first.run()
+    checkpoint = first.dump_checkpoint()
+    checkpoint['nodes']['removed_1'] = {'current_step': 1}
+
+    with pytest.raises(Exception, match='workflow node is update'):
+        _engine().load_checkpoint(checkpoint)
@@ -0,0 +1,155 @@
+"""queryChunksFromDB searches all selected knowledge bases at the same time, embeds
+the question once per embedding model and fuses the per-KB rankings before the
+100-doc cut."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from bisheng.api.services.workstation import WorkStationService
+from bisheng.api.v1.schema.chat_schema import UseKnowledgeBaseParam
+
+_SERVICE = "bisheng.workstation.domain.services.workstation_service"
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = 0
+
+    def embed_documents(self, texts):
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return [1.0]
+
+
+def _docs(kb_id: int, count: int) -> list[Document]:
+    return [
+        Document(page_content=f"kb{kb_id}-{i}", metadata={"document_id": i, "knowledge_id": kb_id})
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_kbs_are_searched_concurrently_with_one_query_embedding(monkeypatch):
+    embeddings = _CountingEmbeddings()
+    kb_ids = [100, 200, 300]
+    stores = {kb_id: SimpleNamespace(embedding_func=embeddings, kb_id=kb_id) for kb_id in kb_ids}
+    in_flight, all_in_flight = 0, asyncio.Event()
+
+    async def fake_filter_ids(self, login_user, knowledge_ids, permission_id):
+        return knowledge_ids
+
+    async def fake_get_vectorstore(**kwargs):
+        kb_id = kwargs["knowledge_ids"][0]
+        knowledge = SimpleNamespace(id=kb_id, name=f"kb-{kb_id}", model="7")
+        return {kb_id: {"knowledge": knowledge, "milvus": stores[kb_id], "es": None}}
+
+    class FakeMultiRetriever:
+        def __init__(self, vectors, search_kwargs, **kwargs):
+            self.store = vectors[0]
+            self.search_kwargs = search_kwargs[0]
+
+    class FakeKnowledgeRetrieverTool:
+        def __init__(self, vector_retriever, **kwargs):
+            self.store = vector_retriever.store
+            self.query_embeddings = vector_retriever.search_kwargs["query_embeddings"]
+
+        async def ainvoke(self, payload):
+            nonlocal in_flight
+            await self.query_embeddings.aembed_query(payload["query"])
+            in_flight += 1
+            if in_flight == len(kb_ids):
+                all_in_flight.set()
+            # every KB waits until all of them are being searched at once
+            await asyncio.wait_for(all_in_flight.wait(), timeout=5)
+            return _docs(self.store.kb_id, 60)
+
+    monkeypatch.setattr(
+        f"{_SERVICE}.KnowledgePermissionService.filter_knowledge_ids_by_permission_async", fake_filter_ids
+    )
+    monkeypatch.setattr(f"{_SERVICE}.KnowledgeRag.get_multi_knowledge_vectorstore", fake_get_vectorstore)
+    monkeypatch.setattr(f"{_SERVICE}.KnowledgeRetrieverTool", FakeKnowledgeRetrieverTool)
+    monkeypatch.setattr(f"{_SERVICE}.MultiRetriever", FakeMultiRetriever)
+
+    login_user = MagicMock(user_id=42, user_name="sarah")
+    login_user.is_admin = MagicMock(return_value=False)
+
+    _, docs, failures = await WorkStationService.queryChunksFromDB(
+        question="q",
+        use_knowledge_param=UseKnowledgeBaseParam(organization_knowledge_ids=kb_ids),
+        max_token=1000,
+        login_user=login_user,
+    )
+
+    assert failures == []
+    assert embeddings.queries == 1
+    # the shared stores keep their own embedding function
+    assert all(store.embedding_func is embeddings for store in stores.values())
+    assert len(docs) == 100
+    # the fused ranking interleaves the KBs instead of filling up with the first one
+    assert sorted(doc.metadata["knowledge_id"] for doc in docs[:3]) == kb_ids
+    assert {doc.metadata["knowledge_id"] for doc in docs} == set(kb_ids)
+
+
+@pytest.mark.asyncio
+async def test_source_and_index_sort_runs_after_fusion(monkeypatch):
+    tool_kwargs = []
+    ranked = {
+        # relevance order; kb 100 returns chunks of one file, kb 200 of another
+        100: [Document(page_content=f"a{i}", metadata={"document_id": 1, "document_name": "a.pdf", "chunk_index": i,
+                                                        "knowledge_id": 100}) for i in (3, 1, 2)],
+        200: [Document(page_content=f"b{i}", metadata={"document_id": 2, "document_name": "b.pdf", "chunk_index": i,
+                                                        "knowledge_id": 200}) for i in (5, 4)],
+    }
+
+    async def fake_filter_ids(self, login_user, knowledge_ids, permission_id):
+        return knowledge_ids
+
+    async def fake_get_vectorstore(**kwargs):
+        kb_id = kwargs["knowledge_ids"][0]
+        knowledge = SimpleNamespace(id=kb_id, name=f"kb-{kb_id}", model="7")
+        return {kb_id: {"knowledge": knowledge, "milvus": SimpleNamespace(kb_id=kb_id), "es": None}}
+
+    class FakeMultiRetriever:
+        def __init__(self, vectors, **kwargs):
+            self.store = vectors[0]
+
+    class FakeKnowledgeRetrieverTool:
+        def __init__(self, vector_retriever, **kwargs):
+            tool_kwargs.append(kwargs)
+            self.store = vector_retriever.store
+
+        async def ainvoke(self, payload):
+            return list(ranked[self.store.kb_id])
+
+    monkeypatch.setattr(
+        f"{_SERVICE}.KnowledgePermissionService.filter_knowledge_ids_by_permission_async", fake_filter_ids
+    )
+    monkeypatch.setattr(f"{_SERVICE}.KnowledgeRag.get_multi_knowledge_vectorstore", fake_get_vectorstore)
+    monkeypatch.setattr(f"{_SERVICE}.KnowledgeRetrieverTool", FakeKnowledgeRetrieverTool)
+    monkeypatch.setattr(f"{_SERVICE}.MultiRetriever", FakeMultiRetriever)
+    login_user = MagicMock(user_id=42, user_name="sarah")
+    login_user.is_admin = MagicMock(return_value=False)
+
+    async def query(kb_ids):
+        _, docs, _ = await WorkStationService.queryChunksFromDB(
+            question="q",
+            use_knowledge_param=UseKnowledgeBaseParam(organization_knowledge_ids=kb_ids),
+            max_token=1000,
+            login_user=login_user,
+        )
+        return [doc.page_content for doc in docs]
+
+    # the per-KB lists reach the fusion in relevance order
+    assert await query([100, 200]) == ["a3", "b5", "a1", "b4", "a2"]
+    assert {kwargs["sort_by_source_and_index"] for kwargs in tool_kwargs} == {False}
+    # a result from a single file is put back in reading order
+    assert await query([100]) == ["a1", "a2", "a3"]